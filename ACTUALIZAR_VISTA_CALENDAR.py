@@ -1,10 +1,9 @@
-with open('src/App.tsx', 'r') as f:
-    content = f.read()
+from patch_engine import Patch
+from patch_ledger import run
 
-# 1. Agregar interface Appointment después de Campaign
-insert_after = content.find("interface Campaign {")
-insert_after = content.find("}", insert_after) + 1
+TARGET = 'src/App.tsx'
 
+# 1. Agregar interface Appointment después de Campaign
 appointment_interface = """
 
 interface Appointment {
@@ -31,20 +30,10 @@ interface Appointment {
 }
 """
 
-content = content[:insert_after] + appointment_interface + content[insert_after:]
-
 # 2. Agregar estado appointments
-insert_state = content.find("const [calendarEvents, setCalendarEvents] = useState<any[]>([])") 
-insert_state = content.find("\n", insert_state) + 1
-
 appointments_state = "  const [appointments, setAppointments] = useState<Appointment[]>([])\n"
 
-content = content[:insert_state] + appointments_state + content[insert_state:]
-
 # 3. Agregar fetch de appointments en loadData
-old_loaddata = "const calData = await fetch("
-insert_before_calendar = content.find(old_loaddata)
-
 fetch_appointments = """    // Cargar citas de Supabase
     const { data: appointmentsData } = await supabase
       .from('appointments')
@@ -54,8 +43,6 @@ fetch_appointments = """    // Cargar citas de Supabase
 
     """
 
-content = content[:insert_before_calendar] + fetch_appointments + content[insert_before_calendar:]
-
 # 4. Actualizar la vista calendar
 old_calendar_view = """        {view === 'calendar' && (
           <div className="space-y-6">
@@ -208,13 +195,20 @@ new_calendar_view = """        {view === 'calendar' && (
           </div>
         )}"""
 
-content = content.replace(old_calendar_view, new_calendar_view)
-
-with open('src/App.tsx', 'w') as f:
-    f.write(content)
-
-print("✅ Vista Calendar actualizada:")
-print("   - Muestra appointments de Supabase")
-print("   - Datos completos: vendedor, asesor, cliente, fecha")
-print("   - Botón cancelar (actualiza DB + Calendar)")
-print("   - Sección de citas canceladas")
+PATCHES = [
+    Patch('calendar-appointment-interface', anchor=r'interface Campaign \{[^}]*\}', regex=True,
+          action='after', text=appointment_interface),
+    Patch('calendar-appointments-state', anchor="const [calendarEvents, setCalendarEvents] = useState<any[]>([])",
+          action='after_line', text=appointments_state),
+    Patch('calendar-load-appointments', anchor="const calData = await fetch(",
+          action='before', text=fetch_appointments),
+    Patch('calendar-view', anchor=old_calendar_view, text=new_calendar_view),
+]
+
+if __name__ == '__main__':
+    run(TARGET, PATCHES)
+    print("✅ Vista Calendar actualizada:")
+    print("   - Muestra appointments de Supabase")
+    print("   - Datos completos: vendedor, asesor, cliente, fecha")
+    print("   - Botón cancelar (actualiza DB + Calendar)")
+    print("   - Sección de citas canceladas")
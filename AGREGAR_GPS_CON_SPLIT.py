@@ -1,5 +1,7 @@
-with open('src/handlers/whatsapp.ts', 'r', encoding='utf-8') as f:
-    content = f.read()
+from patch_engine import Patch
+from patch_ledger import run
+
+TARGET = 'src/handlers/whatsapp.ts'
 
 # PASO 1: Agregar objeto después de VIDEO_SERVER_URL
 maps_object = """
@@ -28,10 +30,7 @@ const MAPS_UBICACIONES: { [key: string]: string } = {
 };
 """
 
-content = content.replace(
-    "const VIDEO_SERVER_URL = 'https://sara-videos.onrender.com';",
-    "const VIDEO_SERVER_URL = 'https://sara-videos.onrender.com';" + maps_object
-)
+video_server = "const VIDEO_SERVER_URL = 'https://sara-videos.onrender.com';"
 
 # PASO 2: Extraer modelo y obtener link ANTES de crear hipoteca
 marker = """      if (needsMortgageStatus && mortgageData.monthly_income && matchedProperty) {
@@ -45,24 +44,24 @@ replacement = """      // Obtener link de Google Maps (el modelo es la primera p
       if (needsMortgageStatus && mortgageData.monthly_income && matchedProperty) {
         const existingMortgage = await this.supabase.client"""
 
-content = content.replace(marker, replacement)
-
 # PASO 3: Agregar en notificación ASESOR
-content = content.replace(
-    "              `🏦 *NUEVA SOLICITUD HIPOTECARIA*\\n\\n👤 Cliente: ${clientName}\\n📱 Teléfono: ${cleanPhone}\\n🏠 Propiedad: ${matchedProperty.name}\\n\\n💰 *DATOS FINANCIEROS:*",
-    "              `🏦 *NUEVA SOLICITUD HIPOTECARIA*\\n\\n👤 Cliente: ${clientName}\\n📱 Teléfono: ${cleanPhone}\\n🏠 Propiedad: ${matchedProperty.name}${ubicacionTexto}\\n\\n💰 *DATOS FINANCIEROS:*"
-)
+asesor_old = "              `🏦 *NUEVA SOLICITUD HIPOTECARIA*\\n\\n👤 Cliente: ${clientName}\\n📱 Teléfono: ${cleanPhone}\\n🏠 Propiedad: ${matchedProperty.name}\\n\\n💰 *DATOS FINANCIEROS:*"
+asesor_new = "              `🏦 *NUEVA SOLICITUD HIPOTECARIA*\\n\\n👤 Cliente: ${clientName}\\n📱 Teléfono: ${cleanPhone}\\n🏠 Propiedad: ${matchedProperty.name}${ubicacionTexto}\\n\\n💰 *DATOS FINANCIEROS:*"
 
 # PASO 4: Agregar en notificación VENDEDOR
-content = content.replace(
-    "                `🏦 *LEAD CON CRÉDITO*\\n\\n👤 ${clientName}\\n📱 ${cleanPhone}\\n🏠 ${matchedProperty.name}\\n\\n💰 Ingreso:",
-    "                `🏦 *LEAD CON CRÉDITO*\\n\\n👤 ${clientName}\\n📱 ${cleanPhone}\\n🏠 ${matchedProperty.name}${ubicacionTexto}\\n\\n💰 Ingreso:"
-)
+vendedor_old = "                `🏦 *LEAD CON CRÉDITO*\\n\\n👤 ${clientName}\\n📱 ${cleanPhone}\\n🏠 ${matchedProperty.name}\\n\\n💰 Ingreso:"
+vendedor_new = "                `🏦 *LEAD CON CRÉDITO*\\n\\n👤 ${clientName}\\n📱 ${cleanPhone}\\n🏠 ${matchedProperty.name}${ubicacionTexto}\\n\\n💰 Ingreso:"
 
-with open('src/handlers/whatsapp.ts', 'w', encoding='utf-8') as f:
-    f.write(content)
+PATCHES = [
+    Patch('maps-ubicaciones', anchor=video_server, action='after', text=maps_object),
+    Patch('maps-link-before-mortgage', anchor=marker, text=replacement),
+    Patch('maps-link-asesor', anchor=asesor_old, text=asesor_new),
+    Patch('maps-link-vendedor', anchor=vendedor_old, text=vendedor_new),
+]
 
-print("✅ GPS con split corregido:")
-print("  1. Extrae modelo: matchedProperty.name.split(' ')[0]")
-print("  2. Busca en MAPS_UBICACIONES[modelo]")
-print("  3. Link agregado en notificaciones")
+if __name__ == '__main__':
+    run(TARGET, PATCHES)
+    print("✅ GPS con split corregido:")
+    print("  1. Extrae modelo: matchedProperty.name.split(' ')[0]")
+    print("  2. Busca en MAPS_UBICACIONES[modelo]")
+    print("  3. Link agregado en notificaciones")
@@ -1,5 +1,7 @@
-with open('src/App.tsx', 'r') as f:
-    content = f.read()
+from patch_engine import Patch
+from patch_ledger import run
+
+TARGET = 'src/App.tsx'
 
 # Encontrar el Promise.all y agregar appointments
 old_promise = """    const [leadsRes, propsRes, teamRes, mortgagesRes, campaignsRes, remindersRes] = await Promise.all([
@@ -34,15 +36,14 @@ new_promise = """    const [leadsRes, propsRes, teamRes, mortgagesRes, campaigns
     setReminderConfigs(remindersRes.data || [])
     setAppointments(appointmentsRes.data || [])"""
 
-content = content.replace(old_promise, new_promise)
-
 # Eliminar el código duplicado que está mal ubicado (fuera de loadData)
-# Buscar y eliminar el bloque suelto
-import re
-pattern = r"    // Cargar citas de Supabase\n    const \{ data: appointmentsData \}[^}]+\}[^)]+\)\n    setAppointments\(appointmentsData \|\| \[\]\)\n\n    "
-content = re.sub(pattern, '', content)
+loose_block = r"    // Cargar citas de Supabase\n    const \{ data: appointmentsData \}[^}]+\}[^)]+\)\n    setAppointments\(appointmentsData \|\| \[\]\)\n\n    "
 
-with open('src/App.tsx', 'w') as f:
-    f.write(content)
+PATCHES = [
+    Patch('promise-all-appointments', anchor=old_promise, text=new_promise),
+    Patch('remove-loose-appointments-fetch', anchor=loose_block, regex=True, expect=None),
+]
 
-print("✅ Appointments agregado dentro de Promise.all")
+if __name__ == '__main__':
+    run(TARGET, PATCHES)
+    print("✅ Appointments agregado dentro de Promise.all")
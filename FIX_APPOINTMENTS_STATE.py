@@ -1,30 +1,17 @@
-with open('src/App.tsx', 'r') as f:
-    content = f.read()
+from patch_engine import Patch
+from patch_ledger import run
 
-# Buscar donde están los useState
-find_after = "const [calendarEvents, setCalendarEvents] = useState<any[]>([])"
-insert_pos = content.find(find_after)
-
-if insert_pos == -1:
-    print("❌ No encontré calendarEvents")
-    exit(1)
-
-# Insertar DESPUÉS de esa línea
-insert_pos = content.find("\n", insert_pos) + 1
+TARGET = 'src/App.tsx'
 
+# Insertar DESPUÉS de la declaración de calendarEvents (se busca en el índice
+# de anclas). La bitácora (patch_ledger) evita volver a insertarla si ya
+# existe, así que no hace falta limpiar duplicados.
 appointments_state = "  const [appointments, setAppointments] = useState<Appointment[]>([])\n"
 
-# Verificar que no exista ya
-if "const [appointments" in content:
-    print("⚠️ appointments ya existe, eliminando duplicado")
-    # Eliminar la línea existente mal insertada
-    lines = content.split('\n')
-    new_lines = [line for line in lines if 'const [appointments' not in line or 'useState<Appointment[]>' in line]
-    content = '\n'.join(new_lines)
-
-content = content[:insert_pos] + appointments_state + content[insert_pos:]
-
-with open('src/App.tsx', 'w') as f:
-    f.write(content)
+PATCHES = [
+    Patch('appointments-state-after-calendar-events', at='state:calendarEvents', action='after_line', text=appointments_state),
+]
 
-print("✅ Estado appointments agregado correctamente")
+if __name__ == '__main__':
+    run(TARGET, PATCHES)
+    print("✅ Estado appointments agregado correctamente")
@@ -1,5 +1,7 @@
-with open('src/App.tsx', 'r') as f:
-    content = f.read()
+from patch_engine import Patch
+from patch_ledger import run
+
+TARGET = 'src/App.tsx'
 
 # Buscar donde muestra el cliente
 old_cliente = """                            <div>
@@ -13,16 +15,16 @@ new_cliente = """                            <div>
                               {appt.lead_name && <p className="text-xs text-gray-400">{appt.lead_phone}</p>}
                             </div>"""
 
-content = content.replace(old_cliente, new_cliente)
-
 # También en citas canceladas
 old_cancelada = """                              <p className="font-semibold">{appt.property_name} - {appt.lead_phone}</p>"""
 
 new_cancelada = """                              <p className="font-semibold">{appt.property_name} - {appt.lead_name || appt.lead_phone}</p>"""
 
-content = content.replace(old_cancelada, new_cancelada)
-
-with open('src/App.tsx', 'w') as f:
-    f.write(content)
+PATCHES = [
+    Patch('appointment-show-lead-name', anchor=old_cliente, text=new_cliente),
+    Patch('cancelled-appointment-show-lead-name', anchor=old_cancelada, text=new_cancelada),
+]
 
-print("✅ CRM actualizado para mostrar nombre")
+if __name__ == '__main__':
+    run(TARGET, PATCHES)
+    print("✅ CRM actualizado para mostrar nombre")
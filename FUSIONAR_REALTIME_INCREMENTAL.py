@@ -0,0 +1,131 @@
+import os
+import re
+
+from patch_engine import Patch, read_text, write_atomic
+from patch_ledger import run
+from query_profiler import find_queries
+
+TARGET = 'src/context/CrmContext.tsx'
+HELPER = 'src/lib/realtimeMerge.ts'
+
+# Los handlers de realtime re-descargan la tabla completa en cada evento:
+#   supabase.from('leads').select('*').order(...).then(({ data }) => { if (data) setLeads(data) })
+# Se reemplazan por un merge de payload.new/payload.old sobre el estado actual,
+# manteniendo el mismo orden que el .order() original.
+REFETCH_RE = re.compile(r"\.then\(\(\{ data \}\) => \{ if \(data\) (set\w+)\(data\) \}\)$")
+NO_PAYLOAD_RE = re.compile(r"\{ event: '(UPDATE|DELETE)', schema: 'public', table: '(\w+)' \}, \(\) =>")
+
+supabase_import = "import { supabase } from '../lib/supabase'"
+merge_import = "import { mergeRealtimeRow } from '../lib/realtimeMerge'\n"
+
+merge_helper = """// ═══════════════════════════════════════════════════════════════════════════
+// REALTIME MERGE — Applies a postgres_changes event to an in-memory array
+// Replaces the full-table refetch on every INSERT/UPDATE/DELETE event
+// (generated by FUSIONAR_REALTIME_INCREMENTAL.py)
+// ═══════════════════════════════════════════════════════════════════════════
+
+export interface RealtimeChange {
+  eventType: 'INSERT' | 'UPDATE' | 'DELETE'
+  new: Record<string, any>
+  old: Record<string, any>
+}
+
+export interface SortSpec<T> {
+  column: keyof T
+  ascending: boolean
+}
+
+// Same ordering as Postgres: NULLS LAST for ascending, NULLS FIRST for descending
+export function compareValues(a: unknown, b: unknown, ascending: boolean): number {
+  const aNull = a === null || a === undefined
+  const bNull = b === null || b === undefined
+  if (aNull || bNull) {
+    if (aNull && bNull) return 0
+    return aNull === ascending ? 1 : -1
+  }
+  const cmp = (a as any) < (b as any) ? -1 : (a as any) > (b as any) ? 1 : 0
+  return ascending ? cmp : -cmp
+}
+
+// First index whose row sorts strictly after `row` (keeps insertion stable)
+function upperBound<T>(rows: T[], row: T, sort: SortSpec<T>): number {
+  let lo = 0
+  let hi = rows.length
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1
+    if (compareValues(rows[mid][sort.column], row[sort.column], sort.ascending) <= 0) lo = mid + 1
+    else hi = mid
+  }
+  return lo
+}
+
+export function mergeRealtimeRow<T extends { id: string }>(rows: T[], change: RealtimeChange, sort?: SortSpec<T>): T[] {
+  if (change.eventType === 'DELETE') {
+    const id = change.old?.id
+    const idx = rows.findIndex(r => r.id === id)
+    if (idx === -1) return rows
+    return [...rows.slice(0, idx), ...rows.slice(idx + 1)]
+  }
+
+  const incoming = change.new as Partial<T>
+  if (!incoming || incoming.id === undefined) return rows
+  const idx = rows.findIndex(r => r.id === incoming.id)
+  const row = (idx === -1 ? incoming : { ...rows[idx], ...incoming }) as T
+
+  if (idx !== -1 && (!sort || rows[idx][sort.column] === row[sort.column])) {
+    const next = rows.slice()
+    next[idx] = row
+    return next
+  }
+
+  const rest = idx === -1 ? rows : [...rows.slice(0, idx), ...rows.slice(idx + 1)]
+  const pos = sort ? upperBound(rest, row, sort) : rest.length
+  return [...rest.slice(0, pos), row, ...rest.slice(pos)]
+}
+"""
+
+
+def build_patches(path=TARGET):
+    """Arma los parches a partir de los handlers que todavía hacen refetch."""
+    if not os.path.exists(path):
+        return []
+    content = read_text(path)
+    refetches = {}
+    for site in find_queries(path, content):
+        if 'realtime' not in site.contexts or site.operation != 'select' or len(site.orders) > 1:
+            continue
+        source = content[site.start:site.end]
+        m = REFETCH_RE.search(source)
+        if not m:
+            continue
+        sort = ''
+        if site.orders:
+            column, ascending = site.orders[0]
+            sort = f", {{ column: '{column}', ascending: {str(ascending).lower()} }}"
+        merge = f"{m.group(1)}(prev => mergeRealtimeRow(prev, payload{sort}))"
+        refetches.setdefault(source, [site.table, merge, 0])[2] += 1
+
+    patches = []
+    for n, (source, (table, merge, count)) in enumerate(sorted(refetches.items())):
+        patches.append(Patch(f'realtime-merge-{table}-{n}', anchor=source, text=merge, expect=count))
+    tables = {table for table, _, _ in refetches.values()}
+    # Los handlers sin parámetro ahora necesitan el payload
+    handlers = {m.group(0): (m.group(2), m.group(1).lower()) for m in NO_PAYLOAD_RE.finditer(content)}
+    for handler, (table, event) in sorted(handlers.items()):
+        if table in tables:
+            patches.append(Patch(f'realtime-payload-{table}-{event}', anchor=handler,
+                                 text=handler.replace('() =>', '(payload) =>'), expect=content.count(handler)))
+    if patches and merge_import not in content:
+        patches.append(Patch('realtime-merge-import', anchor=supabase_import, action='after_line', text=merge_import))
+    return patches
+
+
+PATCHES = build_patches()
+
+if __name__ == '__main__':
+    if not os.path.exists(HELPER):
+        write_atomic(HELPER, merge_helper)
+        print(f"✅ Helper generado: {HELPER}")
+    if PATCHES:
+        run(TARGET, PATCHES)
+    print("✅ Realtime incremental: cada evento hace merge por id en vez de re-descargar la tabla")
@@ -1,13 +1,16 @@
-with open('src/App.tsx', 'r') as f:
-    content = f.read()
+from patch_engine import Patch
+from patch_ledger import run
+
+TARGET = 'src/App.tsx'
 
 # Buscar donde están los otros set...
 old_line = "    setReminderConfigs(remindersRes.data || [])"
 new_line = "    setReminderConfigs(remindersRes.data || [])\n    setAppointments(appointmentsRes.data || [])"
 
-content = content.replace(old_line, new_line)
-
-with open('src/App.tsx', 'w') as f:
-    f.write(content)
+PATCHES = [
+    Patch('set-appointments-after-reminders', anchor=old_line, text=new_line),
+]
 
-print("✅ setAppointments agregado en el lugar correcto")
+if __name__ == '__main__':
+    run(TARGET, PATCHES)
+    print("✅ setAppointments agregado en el lugar correcto")
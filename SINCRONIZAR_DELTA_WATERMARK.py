@@ -0,0 +1,378 @@
+import os
+import re
+
+from anchor_index import match_close
+from column_projection import SELECT_COLS_RE, parse_interfaces
+from patch_engine import Patch, read_text, write_atomic
+from patch_ledger import run
+from query_profiler import find_queries
+
+TARGET = 'src/context/CrmContext.tsx'
+TYPES = 'src/types/crm.ts'
+HELPER = 'src/lib/deltaSync.ts'
+MIGRATION = 'migrations/003_delta_sync_updated_at.sql'
+
+# loadDataSilent re-descarga seis tablas completas cada 30 s. Se reemplaza por:
+#   - una marca (el updated_at más alto visto) por tabla, inicializada en loadData
+#   - consultas .gte('updated_at', marca - 60 s) que traen solo lo que cambió
+#   - mergeDelta por id manteniendo el .order() original
+#   - cada 5 minutos un select('id') por tabla para quitar lo borrado en el servidor
+# Los insights pasan a ser un useMemo sobre leads/team/campaigns porque el poll
+# ya no tiene las tablas completas a mano; generateInsights sale del componente
+# como buildInsights (función pura) para que las dependencias del hook cierren.
+# Si la migración todavía no corrió, withUpdatedAt repite en ese sitio la misma
+# lectura sin updated_at (ni en el select ni en el filtro) y el poll de esa
+# tabla solo la vuelve a pedir completa cada 5 minutos, con la reconciliación.
+FUNCTION_RE = r'  async function {name}\(\) \{{'
+PROMISE_RE = re.compile(r'const \[([^\]]*)\] = await Promise\.all\(\[')
+
+merge_import = "import { mergeRealtimeRow } from '../lib/realtimeMerge'"
+delta_import = ("import { highWaterMark, keepIds, mergeDelta, watermarkSince, withUpdatedAt, NO_CHANGES, "
+                "RECONCILE_INTERVAL_MS, type Watermarks } from '../lib/deltaSync'\n")
+data_loading = '  // ---- Data Loading ----\n'
+sync_refs = """  // ---- Delta sync: highest updated_at seen per polled table ----
+  const syncWatermarks = useRef<Watermarks>({})
+  const lastReconcile = useRef(0)
+
+"""
+insights_state = '  const [insights, setInsights] = useState<Insight[]>([])\n'
+insights_memo = '  const insights = useMemo(() => buildInsights(leads, team, campaigns), [leads, team, campaigns])\n'
+insights_header = '  // ---- Insights ----\n  function generateInsights('
+inner_provider = '// Inner provider that uses Router hooks (must be inside a Router)\n'
+insights_call = '      generateInsights(leadsRes.data || [], teamRes.data || [], campaignsRes.data || [])\n'
+
+delta_helper = """// ═══════════════════════════════════════════════════════════════════════════
+// DELTA SYNC — updated_at watermarks for the 30 s background poll
+// Each polled table keeps the highest updated_at it has seen; the poll only
+// asks for rows at or after that mark and merges them into state by id.
+// Deletes are caught by a periodic id-only reconciliation.
+// (generated by SINCRONIZAR_DELTA_WATERMARK.py)
+// ═══════════════════════════════════════════════════════════════════════════
+
+import { compareValues, type SortSpec } from './realtimeMerge'
+
+export type Watermarks = Record<string, string | null | undefined>
+
+// Re-read a small window before the mark: a transaction that commits late
+// can carry an updated_at older than rows already seen
+export const SYNC_OVERLAP_MS = 60_000
+
+// How often the poll also fetches ids to drop rows deleted on the server
+export const RECONCILE_INTERVAL_MS = 5 * 60_000
+
+const EPOCH = '1970-01-01T00:00:00.000Z'
+
+export interface QueryResult<T> {
+  data: T[] | null
+  error: { code?: string; message?: string } | null
+}
+
+// Stands in for a poll query that is skipped this round
+export const NO_CHANGES: QueryResult<never> = { data: null, error: null }
+
+// Tables where PostgREST reported updated_at as missing (migrations/003 not run yet)
+const withoutUpdatedAt = new Set<string>()
+
+export function resetUpdatedAtFallback(): void {
+  withoutUpdatedAt.clear()
+}
+
+function missingUpdatedAt(error: QueryResult<unknown>['error']): boolean {
+  return error?.code === '42703' && /\\bupdated_at\\b/.test(error.message || '')
+}
+
+// Runs `query(true)`, the read that names updated_at. If the server answers
+// 42703 for updated_at, the table is remembered and `query(false)` runs
+// instead: the caller's own read without updated_at in its select list or
+// filter. Any other error, and any other column, is returned as is.
+export async function withUpdatedAt<T>(
+  table: string,
+  query: (hasUpdatedAt: boolean) => PromiseLike<QueryResult<T>> | QueryResult<T>,
+): Promise<QueryResult<T>> {
+  if (withoutUpdatedAt.has(table)) return query(false)
+  const res = await query(true)
+  if (!missingUpdatedAt(res.error)) return res
+  withoutUpdatedAt.add(table)
+  console.warn(`${table}.updated_at does not exist yet (run migrations/003); polling ${table} only on reconcile`)
+  return query(false)
+}
+
+export function highWaterMark(rows: { updated_at?: string | null }[] | null | undefined, current?: string | null): string | null {
+  let best = current ?? null
+  let bestMs = best ? Date.parse(best) : -Infinity
+  for (const row of rows || []) {
+    const ms = row.updated_at ? Date.parse(row.updated_at) : NaN
+    if (ms > bestMs) {
+      best = row.updated_at as string
+      bestMs = ms
+    }
+  }
+  return best
+}
+
+export function watermarkSince(mark: string | null | undefined, overlapMs = SYNC_OVERLAP_MS): string {
+  if (!mark) return EPOCH
+  const ms = Date.parse(mark)
+  return Number.isNaN(ms) ? EPOCH : new Date(ms - overlapMs).toISOString()
+}
+
+// Merges changed rows by id, keeping `sort` order. Rows already in state are
+// shallow-merged so columns that only arrived through realtime are kept.
+export function mergeDelta<T extends { id: string }>(rows: T[], changed: T[] | null | undefined, sort?: SortSpec<T>): T[] {
+  if (!changed || changed.length === 0) return rows
+  const incoming = new Map<string, T>()
+  for (const row of changed) incoming.set(row.id, row)
+
+  if (!sort) {
+    const next = rows.map(r => {
+      const row = incoming.get(r.id)
+      if (!row) return r
+      incoming.delete(r.id)
+      return { ...r, ...row }
+    })
+    return [...next, ...incoming.values()]
+  }
+
+  const kept: T[] = []
+  const moved: T[] = []
+  for (const r of rows) {
+    const row = incoming.get(r.id)
+    if (!row) {
+      kept.push(r)
+      continue
+    }
+    incoming.delete(r.id)
+    moved.push({ ...r, ...row })
+  }
+  const fresh = [...moved, ...incoming.values()]
+  fresh.sort((a, b) => compareValues(a[sort.column], b[sort.column], sort.ascending))
+
+  // Linear merge of two sorted lists; on ties existing rows go first
+  const next: T[] = []
+  let i = 0
+  let j = 0
+  while (i < kept.length && j < fresh.length) {
+    if (compareValues(kept[i][sort.column], fresh[j][sort.column], sort.ascending) <= 0) next.push(kept[i++])
+    else next.push(fresh[j++])
+  }
+  while (i < kept.length) next.push(kept[i++])
+  while (j < fresh.length) next.push(fresh[j++])
+  return next
+}
+
+// Drops rows whose id the server no longer returns
+export function keepIds<T extends { id: string }>(rows: T[], ids: { id: string }[] | null | undefined): T[] {
+  if (!ids) return rows
+  const alive = new Set(ids.map(r => r.id))
+  const next = rows.filter(r => alive.has(r.id))
+  return next.length === rows.length ? rows : next
+}
+"""
+
+
+def function_span(content, name):
+    m = re.search(FUNCTION_RE.format(name=name), content)
+    if not m:
+        return None
+    end = match_close(content, m.end() - 1)
+    return (m.start(), end) if end != -1 else None
+
+
+def insights_builder(content):
+    """(bloque dentro del componente, versión pura a nivel de módulo) de generateInsights."""
+    start = content.find(insights_header)
+    if start == -1:
+        return None
+    end = match_close(content, content.index('{', start + len(insights_header)))
+    if end == -1:
+        return None
+    block = content[start:end] + '\n\n'
+    pure = '\n'.join(line[2:] if line.startswith('  ') else line for line in block.split('\n'))
+    pure = pure.replace('// ---- Insights ----\n',
+                        '// Derived from state, so it recomputes on every merge (load, delta poll, realtime)\n')
+    pure = pure.replace('function generateInsights(leadsData: Lead[], teamData: TeamMember[], campaignsData: Campaign[]) {',
+                        'function buildInsights(leadsData: Lead[], teamData: TeamMember[], campaignsData: Campaign[]): Insight[] {')
+    pure = pure.replace('  setInsights(newInsights)\n}', '  return newInsights\n}')
+    return block, pure
+
+
+def polled_queries(content, name):
+    """[(tabla, resultado, setter, sitio, cadena)] del Promise.all de ``name``."""
+    span = function_span(content, name)
+    if not span:
+        return []
+    body = content[span[0]:span[1]]
+    m = PROMISE_RE.search(body)
+    if not m:
+        return []
+    results = [r.strip() for r in m.group(1).split(',')]
+    sites = sorted((s for s in find_queries(TARGET, content)
+                    if s.function == name and s.operation == 'select' and span[0] <= s.start < span[1]),
+                   key=lambda s: s.start)[:len(results)]
+    polled = []
+    for result, site in zip(results, sites):
+        setter = re.search(rf'(set\w+)\({result}\.data \|\| \[\]\)', body)
+        if setter:
+            polled.append((site.table, result, setter.group(1), site, content[site.start:site.end]))
+    return polled
+
+
+def with_updated_at(chain):
+    """``(select con updated_at, resto de la cadena)``."""
+    m = SELECT_COLS_RE.search(chain)
+    close = chain.index(')', m.end()) + 1
+    columns = [c.strip() for c in m.group(2).split(',')]
+    select = chain[:close]
+    if '*' not in columns and 'updated_at' not in columns:
+        select = chain[:m.end() - 1] + ', updated_at' + chain[m.end() - 1:close]
+    return select, chain[close:]
+
+
+def without_updated_at(chain):
+    """La misma cadena sin ``updated_at`` en la lista del select."""
+    m = SELECT_COLS_RE.search(chain)
+    columns = [c.strip() for c in m.group(2).split(',')]
+    if 'updated_at' not in columns:
+        return chain
+    kept = ', '.join(c for c in columns if c != 'updated_at')
+    return chain[:m.start(2)] + kept + chain[m.end(2):]
+
+
+def sort_arg(site):
+    if not site.orders:
+        return ''
+    column, ascending = site.orders[0]
+    return f", {{ column: '{column}', ascending: {str(ascending).lower()} }}"
+
+
+def silent_loader(polled):
+    results = ', '.join(result for _, result, _, _, _ in polled)
+    ids = ', '.join(result.replace('Res', 'Ids') for _, result, _, _, _ in polled)
+    deltas, merges, marks, fetch_ids, prunes = [], [], [], [], []
+    for table, result, setter, site, chain in polled:
+        select, rest = with_updated_at(chain)
+        deltas.append(f"        withUpdatedAt('{table}', hasUpdatedAt => hasUpdatedAt\n"
+                      f"          ? {select}.gte('updated_at', watermarkSince(marks.{table})).order('updated_at', {{ ascending: true }})\n"
+                      f"          : reconcile ? {without_updated_at(chain)} : NO_CHANGES)")
+        merges.append(f"      {setter}(prev => mergeDelta(prev, {result}.data{sort_arg(site)}))")
+        marks.append(f"        {table}: highWaterMark({result}.data, marks.{table}),")
+        fetch_ids.append(f"          supabase.from('{table}').select('id'){rest}")
+        prunes.append(f"        {setter}(prev => keepIds(prev, {result.replace('Res', 'Ids')}.data))")
+    return (
+        "  async function loadDataSilent() {\n"
+        "    try {\n"
+        "      const marks = syncWatermarks.current\n"
+        "      // Tables without updated_at yet are only re-read on reconcile\n"
+        "      const reconcile = Date.now() - lastReconcile.current >= RECONCILE_INTERVAL_MS\n"
+        f"      const [{results}] = await Promise.all([\n"
+        + ',\n'.join(deltas) + "\n"
+        "      ])\n"
+        + '\n'.join(merges) + "\n"
+        "      syncWatermarks.current = {\n"
+        + '\n'.join(marks) + "\n"
+        "      }\n"
+        "      if (reconcile) {\n"
+        "        lastReconcile.current = Date.now()\n"
+        f"        const [{ids}] = await Promise.all([\n"
+        + ',\n'.join(fetch_ids) + "\n"
+        "        ])\n"
+        + '\n'.join(prunes) + "\n"
+        "      }\n"
+        "      setLastRefresh(new Date())\n"
+        "    } catch (err) {\n"
+        "      console.error('Error loading data (silent):', err)\n"
+        "    }\n"
+        "  }"
+    )
+
+
+def build_patches(path=TARGET):
+    if not os.path.exists(path):
+        return []
+    content = read_text(path)
+    if 'syncWatermarks' in content:
+        return []
+    polled = polled_queries(content, 'loadDataSilent')
+    initial = polled_queries(content, 'loadData')
+    if not polled or not initial:
+        return []
+    span = function_span(content, 'loadDataSilent')
+    patches = [Patch('delta-sync-loader', anchor=content[span[0]:span[1]], text=silent_loader(polled))]
+    builder = insights_builder(content)
+    if builder:
+        block, pure = builder
+        patches.append(Patch('delta-sync-insights-builder', anchor=inner_provider, text=pure, action='before'))
+        patches.append(Patch('delta-sync-insights-inline', anchor=block, text=''))
+        patches.append(Patch('delta-sync-insights-memo', anchor=insights_state, text=insights_memo))
+    patches.append(Patch('delta-sync-refs', anchor=data_loading, text=sync_refs, action='before'))
+    patches.append(Patch('delta-sync-import', anchor=merge_import, text=delta_import, action='after_line'))
+    return patches
+
+
+def build_initial_patches(path=TARGET):
+    """Segunda pasada: loadData pide updated_at e inicializa las marcas.
+
+    Va aparte porque las mismas consultas están dentro de loadDataSilent, que
+    la primera pasada reemplaza entera, y los parches de un lote no se
+    encadenan ni se pueden solapar.
+    """
+    if not os.path.exists(path):
+        return []
+    content = read_text(path)
+    if 'syncWatermarks' not in content or insights_call not in content:
+        return []
+    # Las tablas con marca son las que el poll nuevo pide con watermarkSince
+    polled = re.findall(r'watermarkSince\(marks\.(\w+)\)', content)
+    initial = polled_queries(content, 'loadData')
+    patches = []
+    for table, _, _, _, chain in initial:
+        select, rest = with_updated_at(chain)
+        if select + rest != chain:
+            # Columna nueva de la migración 003: si todavía no existe se lee como antes
+            m = SELECT_COLS_RE.search(chain)
+            both = f"hasUpdatedAt ? '{m.group(2)}, updated_at' : '{m.group(2)}'"
+            text = f"withUpdatedAt('{table}', hasUpdatedAt => {chain[:m.start()]}.select({both}{chain[m.end():]})"
+            # Con la sangría: el poll repite la misma cadena detrás de "reconcile ?"
+            patches.append(Patch(f'delta-sync-select-{table}', anchor='        ' + chain, text='        ' + text))
+    polled_results = {table: result for table, result, _, _, _ in initial}
+    marks = ''.join(f"        {table}: highWaterMark({polled_results[table]}.data),\n"
+                    for table in polled if table in polled_results)
+    patches.append(Patch('delta-sync-initial-marks', anchor=insights_call,
+                         text=f"      syncWatermarks.current = {{\n{marks}      }}\n"
+                              "      lastReconcile.current = Date.now()\n"))
+    return patches
+
+
+def build_type_patches(path=TYPES, interfaces=('Property', 'TeamMember', 'Campaign')):
+    """Agrega ``updated_at?: string`` a las interfaces de tablas que no lo declaraban."""
+    if not os.path.exists(path):
+        return []
+    content = read_text(path)
+    fields = parse_interfaces(content)
+    patches = []
+    for name in interfaces:
+        if fields.get(name) is None or 'updated_at' in fields[name]:
+            continue
+        m = re.search(rf'export interface {name} \{{', content)
+        end = match_close(content, m.end() - 1)
+        block = content[m.start():end]
+        patches.append(Patch(f'delta-sync-type-{name}', anchor=block, text=block[:-1] + '  updated_at?: string\n}'))
+    return patches
+
+
+PATCHES = build_patches()
+TYPE_PATCHES = build_type_patches()
+
+if __name__ == '__main__':
+    if not os.path.exists(HELPER):
+        write_atomic(HELPER, delta_helper)
+        print(f"✅ Helper generado: {HELPER}")
+    if PATCHES:
+        run(TARGET, PATCHES)
+    initial_patches = build_initial_patches()
+    if initial_patches:
+        run(TARGET, initial_patches)
+    if TYPE_PATCHES:
+        run(TYPES, TYPE_PATCHES)
+    print("✅ Delta sync: el poll de 30 s trae solo filas con updated_at >= marca")
+    print(f"⚠️ Aplicar {MIGRATION} en Supabase (updated_at + trigger en las tablas sondeadas)")
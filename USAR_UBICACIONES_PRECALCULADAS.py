@@ -0,0 +1,33 @@
+from patch_engine import Patch
+from patch_ledger import run
+
+TARGET = 'src/handlers/whatsapp.ts'
+
+# MAPS_UBICACIONES (AGREGAR_GPS_CON_SPLIT.py) se reemplaza por el módulo que
+# genera property_locations.py desde el export de properties: el nombre exacto
+# es una sola consulta al Map, sin split(' ')[0] y sin parche por desarrollo nuevo.
+maps_object = r"\nconst MAPS_UBICACIONES: \{ \[key: string\]: string \} = \{\n[\s\S]*?\n\};\n"
+
+# El import va con los demás, después del último import del módulo
+last_import = r"(?m)^import\s[^;]*;[^\n]*\n(?![\s\S]*^import\s)"
+locations_import = "import { propertyMapsLink } from '../lib/propertyLocations';\n"
+
+split_lookup = """      // Obtener link de Google Maps (el modelo es la primera palabra del nombre)
+      const modelo = matchedProperty?.name?.split(' ')[0] || '';
+      const mapsLink = MAPS_UBICACIONES[modelo] || '';"""
+
+table_lookup = """      // Link de Google Maps precalculado por nombre (generado por property_locations.py)
+      const mapsLink = propertyMapsLink(matchedProperty?.name);"""
+
+PATCHES = [
+    Patch('maps-ubicaciones-import', anchor=last_import, regex=True, text=locations_import, action='after'),
+    Patch('maps-ubicaciones-sin-const', anchor=maps_object, regex=True, text=''),
+    Patch('maps-link-sin-split', anchor=split_lookup, text=table_lookup),
+]
+
+if __name__ == '__main__':
+    run(TARGET, PATCHES)
+    print("✅ Ubicaciones precalculadas:")
+    print("  1. MAPS_UBICACIONES eliminado; import de src/lib/propertyLocations.ts junto a los demás")
+    print("  2. propertyMapsLink(matchedProperty?.name) en vez de split(' ')[0]")
+    print("  Regenerar la tabla: python property_locations.py properties.csv")
@@ -1,5 +1,7 @@
-with open('src/App.tsx', 'r') as f:
-    content = f.read()
+from patch_engine import Patch
+from patch_ledger import run
+
+TARGET = 'src/App.tsx'
 
 # Buscar el botón Guardar y agregar Cancelar antes
 old_button = '<button onClick={() => saveReminderConfig'
@@ -10,15 +12,15 @@ new_buttons = '''<div className="flex gap-3">
                                             </button>
                                             <button onClick={() => saveReminderConfig'''
 
-content = content.replace(old_button, new_buttons)
-
 # Cerrar el div después del botón Guardar
-content = content.replace(
-    'rounded">Guardar</button>',
-    'rounded">Guardar</button>\n                                          </div>'
-)
+old_save = 'rounded">Guardar</button>'
+new_save = 'rounded">Guardar</button>\n                                          </div>'
 
-with open('src/App.tsx', 'w') as f:
-    f.write(content)
+PATCHES = [
+    Patch('reminder-cancel-button', anchor=old_button, text=new_buttons),
+    Patch('reminder-buttons-close-div', anchor=old_save, text=new_save),
+]
 
-print("✅ Botón Cancelar agregado")
+if __name__ == '__main__':
+    run(TARGET, PATCHES)
+    print("✅ Botón Cancelar agregado")
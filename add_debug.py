@@ -1,18 +1,19 @@
-with open('src/App.tsx', 'r') as f:
-    content = f.read()
+from patch_engine import Patch
+from patch_ledger import run
+
+TARGET = 'src/App.tsx'
 
 # Buscar la línea donde se cargan los reminders
-if "const { data: reminders } = await supabase.from('reminder_config')" in content:
-    content = content.replace(
-        "const { data: reminders } = await supabase.from('reminder_config').select('*').order('lead_category')",
-        "const { data: reminders } = await supabase.from('reminder_config').select('*').order('lead_category')\n      console.log('🔍 Reminders cargados:', reminders)"
-    )
-    content = content.replace(
-        "if (reminders) setReminderConfigs(reminders)",
-        "console.log('🔍 Seteando reminders:', reminders)\n      if (reminders) setReminderConfigs(reminders)"
-    )
+load_reminders = "const { data: reminders } = await supabase.from('reminder_config').select('*').order('lead_category')"
+set_reminders = "if (reminders) setReminderConfigs(reminders)"
 
-with open('src/App.tsx', 'w') as f:
-    f.write(content)
+PATCHES = [
+    Patch('debug-reminders-loaded', anchor=load_reminders,
+          text=load_reminders + "\n      console.log('🔍 Reminders cargados:', reminders)"),
+    Patch('debug-reminders-set', anchor=set_reminders,
+          text="console.log('🔍 Seteando reminders:', reminders)\n      " + set_reminders),
+]
 
-print("✅ Debug agregado")
+if __name__ == '__main__':
+    run(TARGET, PATCHES)
+    print("✅ Debug agregado")
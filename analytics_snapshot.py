@@ -0,0 +1,628 @@
+"""Snapshot columnar de leads, citas e hipotecas con los agregados ya calculados.
+
+DashboardView, BusinessIntelligenceView, ForecastView y ReportBuilderView
+recalculan en cada render embudo, conversión por vendedor, forecast y
+agrupaciones filtrando los arreglos completos una y otra vez (un
+``leads.filter`` por etapa, otro por vendedor, otro por mes…). Este job:
+
+1. Lee los exports y guarda cada columna como un arreglo contiguo: los textos
+   (status, vendedor, fuente…) codificados como diccionario + códigos
+   ``int64`` y los números/fechas como ``float64``. Son archivos crudos
+   (``<tabla>/<columna>.bin`` + ``meta.json``) que se leen igual con
+   ``array.fromfile`` o ``numpy.fromfile``.
+2. Calcula todo con una pasada por agregado: cada agrupación es un
+   ``bincount`` sobre ``tenant * K + código``, así que todos los tenants salen
+   juntos. Con numpy es vectorizado; sin numpy son los mismos kernels con
+   ``array`` y un bucle.
+3. Publica un JSON por tenant (``<out>/<tenant_id>.json``) de unos KB con
+   embudo, tendencia mensual, conversión por vendedor, forecast por etapa y
+   por mes, y los conteos por campo que usa el Report Builder.
+
+Las probabilidades y días de cierre por etapa se leen de ForecastView.tsx
+para no desincronizarse. Sin ``tenant_id`` en el export todo cae en
+``default``.
+
+Uso::
+
+    python analytics_snapshot.py --leads leads.csv --appointments appointments.csv \\
+        --mortgages mortgage_applications.csv --team team_members.csv
+    python analytics_snapshot.py --from-snapshot              # solo recalcular los JSON
+    python analytics_snapshot.py --bench 200000
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+
+from lead_dedup import iter_rows
+from patch_engine import read_text, write_atomic
+
+try:
+    import numpy as np
+except ImportError:         # sin numpy: los mismos kernels sobre array
+    np = None
+
+FORECAST_VIEW = 'src/views/ForecastView.tsx'
+SNAPSHOT_DIR = '.analytics-snapshot'
+OUT_DIR = 'analytics'
+DEFAULT_TENANT = 'default'
+TOP_VALUES = 50
+
+FUNNEL_STAGES = ('new', 'contacted', 'scheduled', 'visited', 'negotiation', 'reserved', 'closed')
+CLOSED = ('closed', 'delivered', 'Cerrado')
+DECIDED = ('sold', 'lost', 'fallen')
+NAN = float('nan')
+
+# tabla -> (columnas del export, columnas codificadas, columnas numéricas)
+TABLES = {
+    'leads': (('tenant_id', 'status', 'assigned_to', 'source', 'property_interest', 'temperature', 'credit_status',
+               'budget', 'score', 'created_at', 'status_changed_at', 'updated_at'),
+              ('tenant_id', 'status', 'assigned_to', 'source', 'property_interest', 'temperature', 'credit_status'),
+              ('budget', 'score', 'created_day', 'changed_day', 'created_month', 'updated_month')),
+    'appointments': (('tenant_id', 'status', 'vendedor_id', 'property_name', 'appointment_type', 'mode',
+                      'scheduled_date'),
+                     ('tenant_id', 'status', 'vendedor_id', 'property_name', 'appointment_type', 'mode'),
+                     ('scheduled_month',)),
+    'mortgage_applications': (('tenant_id', 'status', 'bank', 'assigned_advisor_name', 'requested_amount'),
+                              ('tenant_id', 'status', 'bank', 'assigned_advisor_name'),
+                              ('requested_amount',)),
+}
+
+
+def _number_literal(content: str, name: str) -> dict:
+    m = re.search(rf'const\s+{name}\s*:[^=]*=\s*\{{', content)
+    if not m:
+        raise ValueError(f"No se encontró {name}")
+    body = content[m.end():content.index('\n}', m.end())]
+    return {k: float(v) for k, v in re.findall(r'(\w+)\s*:\s*(-?[\d.]+)', body)}
+
+
+def load_forecast_constants(path: str = FORECAST_VIEW) -> tuple:
+    """``PIPELINE_STAGES``, ``STAGE_PROBABILITY`` y ``DEFAULT_DAYS_TO_CLOSE`` de ForecastView."""
+    content = read_text(path)
+    m = re.search(r'const\s+PIPELINE_STAGES\s*=\s*\[([^\]]*)\]', content)
+    if not m:
+        raise ValueError("No se encontró PIPELINE_STAGES")
+    stages = tuple(re.findall(r"'([^']+)'", m.group(1)))
+    return stages, _number_literal(content, 'STAGE_PROBABILITY'), _number_literal(content, 'DEFAULT_DAYS_TO_CLOSE')
+
+
+def parse_budget(value: str) -> float:
+    """Igual que ``parseBudget`` de ForecastView: solo dígitos y punto."""
+    try:
+        return float(re.sub(r'[^0-9.]', '', value or '') or 0)
+    except ValueError:
+        return 0.0
+
+
+def _num(value: str) -> float:
+    try:
+        return float(value) if value != '' else NAN
+    except ValueError:
+        return NAN
+
+
+@lru_cache(maxsize=8192)
+def _day(value: str) -> float:
+    try:
+        return float(date.fromisoformat(value).toordinal())
+    except ValueError:
+        return NAN
+
+
+def day_number(value: str) -> float:
+    return _day(value[:10]) if value else NAN
+
+
+def month_number(value: str) -> float:
+    """``año * 12 + mes - 1`` del prefijo ``YYYY-MM``."""
+    try:
+        return float(int(value[:4]) * 12 + int(value[5:7]) - 1) if value else NAN
+    except ValueError:
+        return NAN
+
+
+def month_label(n: int) -> str:
+    return f'{n // 12:04d}-{n % 12 + 1:02d}'
+
+
+class Table:
+    """Columnas contiguas: códigos ``int64`` con su diccionario, o valores ``float64``."""
+
+    def __init__(self, name: str, coded: tuple, numeric: tuple):
+        self.name = name
+        self.rows = 0
+        self.labels = {c: [] for c in coded}
+        self.codes = {c: array('q') for c in coded}
+        self.values = {c: array('d') for c in numeric}
+        self._lookup = {c: {} for c in coded}
+
+    def append(self, coded: tuple, numeric: tuple) -> None:
+        for column, label in zip(self.codes, coded):
+            lookup = self._lookup[column]
+            code = lookup.get(label)
+            if code is None:
+                code = lookup[label] = len(lookup)
+                self.labels[column].append(label)
+            self.codes[column].append(code)
+        for column, value in zip(self.values, numeric):
+            self.values[column].append(value)
+        self.rows += 1
+
+    def save(self, directory: str) -> dict:
+        os.makedirs(os.path.join(directory, self.name), exist_ok=True)
+        for columns in (self.codes, self.values):
+            for column, data in columns.items():
+                with open(os.path.join(directory, self.name, f'{column}.bin'), 'wb') as f:
+                    data.tofile(f)
+        return {'rows': self.rows, 'labels': self.labels, 'codes': list(self.codes), 'values': list(self.values)}
+
+    @classmethod
+    def load(cls, directory: str, name: str, meta: dict) -> 'Table':
+        table = cls(name, tuple(meta['codes']), tuple(meta['values']))
+        table.rows = meta['rows']
+        table.labels = meta['labels']
+        for columns in (table.codes, table.values):
+            for column, data in columns.items():
+                with open(os.path.join(directory, name, f'{column}.bin'), 'rb') as f:
+                    data.fromfile(f, table.rows)
+        return table
+
+    def column(self, name: str):
+        data = self.codes.get(name, self.values.get(name))
+        return np.frombuffer(data, dtype=np.int64 if data.typecode == 'q' else np.float64) if np is not None else data
+
+
+def build_table(name: str, path: str) -> Table:
+    columns, coded, numeric = TABLES[name]
+    table = Table(name, coded, numeric)
+    positions = [columns.index(c) for c in coded]
+    for row in iter_rows(path, columns):
+        codes = tuple(row[i] for i in positions)
+        codes = (codes[0] or DEFAULT_TENANT,) + codes[1:]
+        if name == 'leads':
+            *_, budget, score, created, changed, updated = row
+            values = (parse_budget(budget), _num(score), day_number(created), day_number(changed),
+                      month_number(created), month_number(updated or created))
+        elif name == 'appointments':
+            values = (month_number(row[-1]),)
+        else:
+            values = (_num(row[-1]),)
+        table.append(codes, values)
+    return table
+
+
+def save_snapshot(tables: dict, directory: str) -> None:
+    meta = {'byteorder': sys.byteorder, 'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'tables': {name: table.save(directory) for name, table in tables.items()}}
+    write_atomic(os.path.join(directory, 'meta.json'), json.dumps(meta, ensure_ascii=False) + '\n')
+
+
+def load_snapshot(directory: str) -> dict:
+    with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta['byteorder'] != sys.byteorder:
+        raise ValueError(f"Snapshot {meta['byteorder']}-endian en máquina {sys.byteorder}-endian")
+    return {name: Table.load(directory, name, m) for name, m in meta['tables'].items()}
+
+
+# ── Kernels: numpy si está, array + bucle si no ──────────────────────────────
+
+def keyed(tenant, codes, size: int):
+    """Llave compuesta ``tenant * size + código``."""
+    if np is not None:
+        return tenant * size + codes
+    return array('q', [t * size + c for t, c in zip(tenant, codes)])
+
+
+def take(lookup: list, codes):
+    """``lookup[código]`` por fila."""
+    if np is not None:
+        return np.asarray(lookup, dtype=np.float64)[codes]
+    return array('d', [lookup[c] for c in codes])
+
+
+def isin(codes, labels: list, wanted) -> list:
+    flags = [label in wanted for label in labels]
+    if np is not None:
+        return np.asarray(flags, dtype=bool)[codes] if flags else np.zeros(len(codes), dtype=bool)
+    return [flags[c] for c in codes]
+
+
+def both(a, b):
+    return a & b if np is not None else [x and y for x, y in zip(a, b)]
+
+
+def finite(values):
+    return ~np.isnan(values) if np is not None else [v == v for v in values]
+
+
+def minus(a, b):
+    return a - b if np is not None else array('d', [x - y for x, y in zip(a, b)])
+
+
+def times(a, b):
+    return a * b if np is not None else array('d', [x * y for x, y in zip(a, b)])
+
+
+def month_offset(months, first: int, span: int) -> tuple:
+    """Índice del mes dentro de ``[first, first + span)`` y la máscara de los que caen ahí."""
+    if np is not None:
+        safe = np.where(np.isnan(months), -1, months - first).astype(np.int64)
+        inside = (safe >= 0) & (safe < span)
+        return np.where(inside, safe, 0), inside
+    index, inside = array('q'), []
+    for m in months:
+        i = int(m) - first if m == m else -1
+        ok = 0 <= i < span
+        index.append(i if ok else 0)
+        inside.append(ok)
+    return index, inside
+
+
+def bincount(keys, size: int, weights=None, mask=None) -> list:
+    if np is not None:
+        if mask is not None:
+            keys = keys[mask]
+            weights = weights[mask] if weights is not None else None
+        return np.bincount(keys, weights=weights, minlength=size).tolist()
+    out = [0] * size
+    if weights is None and mask is None:
+        for k in keys:
+            out[k] += 1
+    elif weights is None:
+        for k, m in zip(keys, mask):
+            if m:
+                out[k] += 1
+    elif mask is None:
+        for k, w in zip(keys, weights):
+            out[k] += w
+    else:
+        for k, w, m in zip(keys, weights, mask):
+            if m:
+                out[k] += w
+    return out
+
+
+# ── Agregados ────────────────────────────────────────────────────────────────
+
+def _grid(flat: list, tenants: list, labels: list) -> dict:
+    """``{tenant: {label: valor}}`` de un bincount sobre ``tenant * len(labels) + código``."""
+    size = len(labels)
+    return {t: {labels[i]: flat[ti * size + i] for i in range(size) if flat[ti * size + i]}
+            for ti, t in enumerate(tenants)}
+
+
+def _pct(part: float, whole: float) -> float:
+    return round(part / whole * 100, 1) if whole else 0
+
+
+def group_counts(table: Table) -> dict:
+    """``{tenant: {columna: {valor: conteo}}}`` para el Report Builder."""
+    tenants = table.labels['tenant_id']
+    tenant = table.column('tenant_id')
+    out = {t: {} for t in tenants}
+    for column, labels in table.labels.items():
+        if column == 'tenant_id':
+            continue
+        counts = _grid(bincount(keyed(tenant, table.column(column), len(labels)), len(tenants) * len(labels)),
+                       tenants, [label or '(vacio)' for label in labels])
+        for t, values in counts.items():
+            ranked = sorted(values.items(), key=lambda kv: -kv[1])
+            top = dict(ranked[:TOP_VALUES])
+            if len(ranked) > TOP_VALUES:
+                top['(otros)'] = sum(v for _, v in ranked[TOP_VALUES:])
+            out[t][column] = top
+    return out
+
+
+def aggregate(tables: dict, constants: tuple, today: date = None, names: dict = None) -> dict:
+    """Un dict por tenant listo para publicar."""
+    stages, probability, default_days = constants
+    today = today or date.today()
+    names = names or {}
+    leads = tables['leads']
+    tenants = leads.labels['tenant_id']
+    statuses = leads.labels['status']
+    people = leads.labels['assigned_to']
+    T, S, P = len(tenants), len(statuses), len(people)
+
+    tenant = leads.column('tenant_id')
+    status = leads.column('status')
+    budget = leads.column('budget')
+    by_status = keyed(tenant, status, S)
+    by_person = keyed(tenant, leads.column('assigned_to'), P)
+
+    count_ts = bincount(by_status, T * S)
+    budget_ts = bincount(by_status, T * S, weights=budget)
+    cycle = minus(leads.column('changed_day'), leads.column('created_day'))
+    dated = finite(cycle)
+    cycle_sum_ts = bincount(by_status, T * S, weights=cycle, mask=dated)
+    cycle_n_ts = bincount(by_status, T * S, mask=dated)
+
+    in_pipeline = isin(status, statuses, set(stages))
+    weighted = times(budget, take([probability.get(s, 0) for s in statuses], status))
+    person = {
+        'leads': bincount(by_person, T * P),
+        'closed': bincount(by_person, T * P, mask=isin(status, statuses, set(CLOSED))),
+        'sold': bincount(by_person, T * P, mask=isin(status, statuses, {'sold'})),
+        'decided': bincount(by_person, T * P, mask=isin(status, statuses, set(DECIDED))),
+        'pipeline_leads': bincount(by_person, T * P, mask=in_pipeline),
+        'pipeline_value': bincount(by_person, T * P, weights=budget, mask=in_pipeline),
+        'weighted': bincount(by_person, T * P, weights=weighted, mask=in_pipeline),
+    }
+
+    this_month = today.year * 12 + today.month - 1
+    first = this_month - 5
+    created_idx, created_in = month_offset(leads.column('created_month'), first, 6)
+    updated_idx, updated_in = month_offset(leads.column('updated_month'), first, 6)
+    trend_leads = bincount(keyed(tenant, created_idx, 6), T * 6, mask=created_in)
+    trend_closed = bincount(keyed(tenant, updated_idx, 6), T * 6,
+                            mask=both(updated_in, isin(status, statuses, {'closed', 'Cerrado'})))
+
+    appointments = per_person_appointments(tables.get('appointments'))
+    groups = {name: group_counts(table) for name, table in tables.items()}
+    row_counts = {name: dict(zip(table.labels['tenant_id'],
+                                 bincount(table.column('tenant_id'), len(table.labels['tenant_id']))))
+                  for name, table in tables.items()}
+
+    result = {}
+    for ti, t in enumerate(tenants):
+        row = {s: ti * S + i for i, s in enumerate(statuses)}
+
+        def stat(flat, s):
+            return flat[row[s]] if s in row else 0
+
+        reached = [sum(stat(count_ts, s) for s in FUNNEL_STAGES[i:]) for i in range(len(FUNNEL_STAGES))]
+        funnel = [{'stage': s, 'count': stat(count_ts, s), 'reached': reached[i],
+                   'conversion': 100 if i == 0 else round(_pct(reached[i], reached[0]))}
+                  for i, s in enumerate(FUNNEL_STAGES)]
+
+        velocity = {s: round(stat(cycle_sum_ts, s) / stat(cycle_n_ts, s)) if stat(cycle_n_ts, s) > 3
+                    else default_days.get(s, 90) for s in stages}
+        months = {month_label(this_month + i): {'projected': 0.0, 'optimistic': 0.0, 'pessimistic': 0.0}
+                  for i in range(6)}
+        stage_rows, cumulative = [], 0.0
+        for s in stages:
+            value = stat(budget_ts, s) * probability.get(s, 0)
+            cumulative += value
+            stage_rows.append({'stage': s, 'count': stat(count_ts, s), 'total_budget': stat(budget_ts, s),
+                               'probability': round(probability.get(s, 0) * 100), 'weighted': value,
+                               'cumulative': cumulative, 'days_to_close': velocity[s]})
+            # Todas las filas de la etapa proyectan el mismo mes de cierre
+            close = (today + timedelta(days=velocity[s])).isoformat()[:7]
+            if close in months:
+                months[close]['projected'] += value
+                months[close]['optimistic'] += value * 1.20
+                months[close]['pessimistic'] += value * 0.70
+        sold, decided = stat(count_ts, 'sold'), sum(stat(count_ts, s) for s in DECIDED)
+
+        vendors = []
+        for pi, pid in enumerate(people):
+            k = ti * P + pi
+            if not pid or not person['leads'][k]:
+                continue
+            vendors.append({
+                'id': pid, 'name': names.get(pid, ''), 'leads': person['leads'][k], 'closed': person['closed'][k],
+                'conversion': round(_pct(person['closed'][k], person['leads'][k])),
+                'appointments': appointments.get((t, pid), 0),
+                'pipeline_leads': person['pipeline_leads'][k], 'pipeline_value': person['pipeline_value'][k],
+                'weighted_forecast': person['weighted'][k], 'sold': person['sold'][k],
+                'win_rate': _pct(person['sold'][k], person['decided'][k]),
+            })
+        vendors.sort(key=lambda v: -v['weighted_forecast'])
+
+        result[t] = {
+            'tenant_id': t,
+            'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'rows': {name: counts.get(t, 0) for name, counts in row_counts.items()},
+            'funnel': funnel,
+            'monthly': [{'month': month_label(first + i), 'leads': trend_leads[ti * 6 + i],
+                         'closed': trend_closed[ti * 6 + i]} for i in range(6)],
+            'vendedores': vendors,
+            'forecast': {
+                'pipeline_value': sum(stat(budget_ts, s) for s in stages),
+                'weighted': cumulative,
+                'avg_deal_size': stat(budget_ts, 'sold') / sold if sold else 0,
+                'win_rate': _pct(sold, decided),
+                'avg_sales_cycle': round(stat(cycle_sum_ts, 'sold') / stat(cycle_n_ts, 'sold'))
+                if stat(cycle_n_ts, 'sold') else 0,
+                'stages': stage_rows,
+                'months': [dict(month=m, **v) for m, v in months.items()],
+            },
+            'group_by': {name: counts.get(t, {}) for name, counts in groups.items()},
+        }
+    return result
+
+
+def per_person_appointments(table) -> dict:
+    """``{(tenant, vendedor_id): citas no canceladas}``."""
+    if table is None or not table.rows:
+        return {}
+    tenants, people = table.labels['tenant_id'], table.labels['vendedor_id']
+    status = table.column('status')
+    flat = bincount(keyed(table.column('tenant_id'), table.column('vendedor_id'), len(people)),
+                    len(tenants) * len(people), mask=isin(status, table.labels['status'],
+                                                          set(table.labels['status']) - {'cancelled'}))
+    return {(t, p): n for t, by in _grid(flat, tenants, people).items() for p, n in by.items()}
+
+
+def publish(result: dict, out_dir: str) -> int:
+    os.makedirs(out_dir, exist_ok=True)
+    total = 0
+    for tenant, payload in result.items():
+        text = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+        write_atomic(os.path.join(out_dir, f'{tenant}.json'), text)
+        total += len(text.encode('utf-8'))
+    return total
+
+
+def load_team_names(path: str) -> dict:
+    return {member_id: (name or '').split(' ')[0] for member_id, name in iter_rows(path, ('id', 'name'))}
+
+
+# ── Benchmark ────────────────────────────────────────────────────────────────
+
+def row_by_row(leads: list, appointments: list, constants: tuple, today: date) -> dict:
+    """Como lo hacen hoy las vistas: un ``filter`` sobre el arreglo completo por cada corte."""
+    stages, probability, default_days = constants
+    out = {}
+    for t in sorted({l['tenant_id'] for l in leads}):
+        tl = [l for l in leads if l['tenant_id'] == t]
+        ta = [a for a in appointments if a['tenant_id'] == t]
+        funnel = [len([l for l in tl if l['status'] == s or (l['status'] in FUNNEL_STAGES and
+                       FUNNEL_STAGES.index(l['status']) > FUNNEL_STAGES.index(s))]) for s in FUNNEL_STAGES]
+        vendors = {}
+        for v in sorted({l['assigned_to'] for l in tl if l['assigned_to']}):
+            vl = [l for l in tl if l['assigned_to'] == v]
+            pipe = [l for l in vl if l['status'] in stages]
+            vendors[v] = {
+                'leads': len(vl), 'closed': len([l for l in vl if l['status'] in CLOSED]),
+                'appointments': len([a for a in ta if a['vendedor_id'] == v and a['status'] != 'cancelled']),
+                'weighted': sum(parse_budget(l['budget']) * probability.get(l['status'], 0) for l in pipe),
+            }
+        stage_budget = {s: sum(parse_budget(l['budget']) for l in tl if l['status'] == s) for s in stages}
+        velocity = {}
+        for s in stages:
+            sl = [l for l in tl if l['status'] == s and l['status_changed_at'] and l['created_at']]
+            velocity[s] = (sum((datetime.fromisoformat(l['status_changed_at'][:10]) -
+                                datetime.fromisoformat(l['created_at'][:10])).days for l in sl) / len(sl)
+                           if len(sl) > 3 else default_days.get(s, 90))
+        months = []
+        for i in range(5, -1, -1):
+            m = today.year * 12 + today.month - 1 - i
+            label = month_label(m)
+            months.append((len([l for l in tl if l['created_at'][:7] == label]),
+                           len([l for l in tl if (l['updated_at'] or l['created_at'])[:7] == label
+                                and l['status'] in ('closed', 'Cerrado')])))
+        groups = {}
+        for field in ('status', 'source', 'assigned_to', 'property_interest', 'temperature'):
+            counts = {}
+            for l in tl:
+                counts[l[field] or '(vacio)'] = counts.get(l[field] or '(vacio)', 0) + 1
+            groups[field] = counts
+        out[t] = {'funnel': funnel, 'vendors': vendors, 'stage_budget': stage_budget, 'months': months,
+                  'groups': groups}
+    return out
+
+
+def synthetic(count: int, path: str, appointments_path: str, seed: int = 18) -> None:
+    import csv
+    rnd = random.Random(seed)
+    statuses = ('new', 'contacted', 'qualified', 'scheduled', 'visited', 'negotiation', 'reserved', 'closed',
+                'delivered', 'sold', 'lost', 'fallen', 'inactive')
+    sources = ('facebook_ads', 'whatsapp', 'referral', 'website', 'phone_inbound', 'Directo')
+    props = [f'Modelo {i}' for i in range(40)]
+    today = date.today()
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(TABLES['leads'][0])
+        for i in range(count):
+            tenant = f't{i % 3}'
+            created = today - timedelta(days=rnd.randrange(540))
+            changed = created + timedelta(days=rnd.randrange(120)) if rnd.random() < 0.7 else None
+            w.writerow((tenant, rnd.choice(statuses), f'{tenant}-v{rnd.randrange(30)}' if rnd.random() < 0.9 else '',
+                        rnd.choice(sources), rnd.choice(props), rnd.choice(('hot', 'warm', 'cold', '')),
+                        rnd.choice(('', 'pending', 'approved')), f'${rnd.randrange(900, 4500)},000',
+                        rnd.randrange(100), created.isoformat() + 'T10:00:00+00:00',
+                        changed.isoformat() + 'T10:00:00+00:00' if changed else '',
+                        (changed or created).isoformat() + 'T12:00:00+00:00'))
+    with open(appointments_path, 'w', encoding='utf-8', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(TABLES['appointments'][0])
+        for i in range(count // 2):
+            tenant = f't{i % 3}'
+            w.writerow((tenant, rnd.choice(('scheduled', 'completed', 'cancelled')), f'{tenant}-v{rnd.randrange(30)}',
+                        rnd.choice(props), rnd.choice(('visita', 'seguimiento', 'firma')), 'presencial',
+                        (today - timedelta(days=rnd.randrange(365))).isoformat()))
+
+
+def bench(count: int) -> None:
+    import tempfile
+    constants = load_forecast_constants()
+    today = date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        leads_csv, appts_csv = os.path.join(tmp, 'leads.csv'), os.path.join(tmp, 'appointments.csv')
+        synthetic(count, leads_csv, appts_csv)
+        raw_bytes = os.path.getsize(leads_csv) + os.path.getsize(appts_csv)
+
+        leads = [dict(zip(TABLES['leads'][0], r)) for r in iter_rows(leads_csv, TABLES['leads'][0])]
+        appointments = [dict(zip(TABLES['appointments'][0], r))
+                        for r in iter_rows(appts_csv, TABLES['appointments'][0])]
+        t0 = time.perf_counter()
+        baseline = row_by_row(leads, appointments, constants, today)
+        rows_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        tables = {'leads': build_table('leads', leads_csv), 'appointments': build_table('appointments', appts_csv)}
+        save_snapshot(tables, os.path.join(tmp, 'snap'))
+        build_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        tables = load_snapshot(os.path.join(tmp, 'snap'))
+        result = aggregate(tables, constants, today)
+        columnar_s = time.perf_counter() - t0
+        json_bytes = publish(result, os.path.join(tmp, 'out'))
+
+    for t, expected in baseline.items():
+        got = result[t]
+        assert [s['reached'] for s in got['funnel']] == expected['funnel'], t
+        assert [(m['leads'], m['closed']) for m in got['monthly']] == expected['months'], t
+        for v in got['vendedores']:
+            e = expected['vendors'][v['id']]
+            assert (v['leads'], v['closed'], v['appointments']) == (e['leads'], e['closed'], e['appointments'])
+            assert math.isclose(v['weighted_forecast'], e['weighted'], rel_tol=1e-9)
+        assert got['group_by']['leads']['source'] == expected['groups']['source']
+
+    engine = 'numpy' if np is not None else 'array (sin numpy)'
+    print(f"📊 {count:,} leads + {count // 2:,} citas, {len(result)} tenants, kernels: {engine}")
+    print(f"   fila por fila (como las vistas): {rows_s * 1000:,.0f} ms")
+    print(f"   columnar: {columnar_s * 1000:,.0f} ms leyendo el snapshot y agregando "
+          f"({build_s * 1000:,.0f} ms para armarlo desde el CSV, una vez)")
+    print(f"   el dashboard baja {json_bytes / len(result) / 1024:,.1f} KB por tenant "
+          f"en vez de {raw_bytes / len(result) / 1024 / 1024:,.1f} MB de tablas")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Snapshot columnar y agregados por tenant para dashboards')
+    parser.add_argument('--leads', help='export de leads')
+    parser.add_argument('--appointments', help='export de appointments')
+    parser.add_argument('--mortgages', help='export de mortgage_applications')
+    parser.add_argument('--team', help='export de team_members (nombres de vendedores)')
+    parser.add_argument('--snapshot', default=SNAPSHOT_DIR, help='directorio del snapshot columnar')
+    parser.add_argument('--from-snapshot', action='store_true', help='no leer exports; usar el snapshot guardado')
+    parser.add_argument('--out', default=OUT_DIR, help='directorio de los JSON por tenant')
+    parser.add_argument('--today', help='fecha de referencia (YYYY-MM-DD)')
+    parser.add_argument('--bench', type=int, metavar='N', help='benchmark con N leads sintéticos')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(args.bench)
+        return 0
+    if args.from_snapshot:
+        tables = load_snapshot(args.snapshot)
+        print(f"📄 Snapshot {args.snapshot}: " + ', '.join(f'{n} {t.rows:,}' for n, t in tables.items()))
+    else:
+        if not args.leads:
+            parser.error('falta --leads (o --from-snapshot)')
+        sources = {'leads': args.leads, 'appointments': args.appointments, 'mortgage_applications': args.mortgages}
+        tables = {name: build_table(name, path) for name, path in sources.items() if path}
+        save_snapshot(tables, args.snapshot)
+        print(f"📄 Snapshot → {args.snapshot}: " + ', '.join(f'{n} {t.rows:,}' for n, t in tables.items()))
+
+    names = load_team_names(args.team) if args.team else {}
+    today = date.fromisoformat(args.today) if args.today else None
+    result = aggregate(tables, load_forecast_constants(), today, names)
+    size = publish(result, args.out)
+    print(f"✅ {len(result)} tenants → {args.out}/ ({size / 1024:,.1f} KB en total)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
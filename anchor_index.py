@@ -0,0 +1,234 @@
+"""Índice de anclas para fuentes TSX.
+
+En vez de que cada script recorra el archivo buscando
+``const [calendarEvents, setCalendarEvents]`` o la consulta de ``leads``,
+se arma una vez un índice con los offsets (de caracteres, los mismos que usa
+``patch_engine``) de:
+
+- ``state:<nombre>``      declaraciones ``const [x, setX] = useState(...)``
+- ``from:<tabla>``        cadenas ``supabase.from('<tabla>')...`` completas
+- ``promise_all:<n>``     llamadas ``Promise.all(...)`` / ``Promise.allSettled(...)``
+- ``view:<vista>``        ramas JSX ``{view === '<vista>' && ...}``
+
+Las búsquedas son un acceso a diccionario. El índice se guarda en
+``.anchor-index.json`` junto con el mtime, tamaño y hash de cada archivo, así
+que en el siguiente run solo se vuelve a parsear lo que cambió.
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+
+from patch_engine import read_text, write_atomic
+
+INDEX_PATH = '.anchor-index.json'
+
+STATE_RE = re.compile(r'const\s*\[\s*(\w+)\s*,\s*\w+\s*\]\s*=\s*useState\b')
+FROM_RE = re.compile(r'\bsupabase(?:\.client)?\s*\.from\(\s*[\'"`]([\w.-]+)[\'"`]\s*\)')
+PROMISE_RE = re.compile(r'\bPromise\.(?:all|allSettled)\s*\(')
+VIEW_RE = re.compile(r'\{\s*view\s*===\s*[\'"]([\w-]+)[\'"]\s*&&')
+CHAIN_RE = re.compile(r'\s*\.\s*(\w+)\s*(?:<[^()]*?>)?\s*\(')
+
+OPENERS = {'(': ')', '[': ']', '{': '}'}
+
+
+def skip_string(content: str, pos: int) -> int:
+    """Devuelve la posición después del literal que empieza en ``pos``."""
+    quote = content[pos]
+    i = pos + 1
+    n = len(content)
+    while i < n:
+        c = content[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == quote:
+            return i + 1
+        if quote == '`' and c == '$' and content.startswith('${', i):
+            end = match_close(content, i + 1)
+            if end == -1:
+                return -1
+            i = end
+            continue
+        if c == '\n' and quote != '`':
+            # Comilla suelta en texto JSX (p. ej. un apóstrofe): no es un string
+            return pos + 1
+        i += 1
+    return -1
+
+
+def match_close(content: str, pos: int) -> int:
+    """Posición después del cierre que corresponde a la apertura en ``pos``.
+
+    Salta strings, template literals y comentarios. Devuelve -1 si no cierra.
+    """
+    stack = [OPENERS[content[pos]]]
+    i = pos + 1
+    n = len(content)
+    while i < n:
+        c = content[i]
+        if c in '\'"`':
+            i = skip_string(content, i)
+            if i == -1:
+                return -1
+            continue
+        if c == '/' and i + 1 < n:
+            nxt = content[i + 1]
+            if nxt == '/':
+                eol = content.find('\n', i)
+                i = n if eol == -1 else eol
+                continue
+            if nxt == '*':
+                end = content.find('*/', i + 2)
+                if end == -1:
+                    return -1
+                i = end + 2
+                continue
+        if c in OPENERS:
+            stack.append(OPENERS[c])
+        elif c == stack[-1]:
+            stack.pop()
+            if not stack:
+                return i + 1
+        i += 1
+    return -1
+
+
+def chain_end(content: str, pos: int) -> tuple:
+    """Recorre ``.metodo(...)`` encadenados desde ``pos``.
+
+    Devuelve ``(fin, [(metodo, args), ...])``.
+    """
+    calls = []
+    while True:
+        m = CHAIN_RE.match(content, pos)
+        if not m:
+            return pos, calls
+        end = match_close(content, m.end() - 1)
+        if end == -1:
+            return pos, calls
+        calls.append((m.group(1), content[m.end():end - 1]))
+        pos = end
+
+
+def parse(content: str) -> dict:
+    """Construye ``{clave: [[inicio, fin], ...]}`` para un archivo TSX."""
+    entries = {}
+
+    def add(key, start, end):
+        entries.setdefault(key, []).append([start, end])
+
+    for m in STATE_RE.finditer(content):
+        paren = m.end()
+        while paren < len(content) and content[paren] != '(':
+            paren += 1
+        end = match_close(content, paren) if paren < len(content) else -1
+        if end != -1:
+            add(f'state:{m.group(1)}', m.start(), end)
+    for m in FROM_RE.finditer(content):
+        end, _ = chain_end(content, m.end())
+        add(f'from:{m.group(1)}', m.start(), end)
+    for n, m in enumerate(PROMISE_RE.finditer(content)):
+        end = match_close(content, m.end() - 1)
+        if end != -1:
+            add(f'promise_all:{n}', m.start(), end)
+            add('promise_all', m.start(), end)
+    for m in VIEW_RE.finditer(content):
+        end = match_close(content, m.start())
+        if end != -1:
+            add(f'view:{m.group(1)}', m.start(), end)
+    return entries
+
+
+@dataclass
+class AnchorIndex:
+    path: str
+    sha: str
+    entries: dict = field(default_factory=dict)
+
+    def spans(self, key: str) -> list:
+        return [tuple(span) for span in self.entries.get(key, [])]
+
+    def keys(self, kind: str = '') -> list:
+        return sorted(k for k in self.entries if k.startswith(kind))
+
+
+def _sha(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _load_cache(cache_path: str) -> dict:
+    if not os.path.exists(cache_path):
+        return {}
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def build_index(path: str, content: str) -> AnchorIndex:
+    return AnchorIndex(path, _sha(content), parse(content))
+
+
+def resolve_index(path: str, content: str = None, cached: dict = None) -> tuple:
+    """``(índice, entrada de caché)`` de ``path`` a partir de su entrada ``cached``.
+
+    No toca el archivo de caché: sirve para los procesos de patch_runner, que
+    devuelven la entrada y el proceso principal la guarda con ``save_entries``.
+    Sin ``content`` se valida por mtime/tamaño y no se lee el archivo cuando
+    la entrada está al día.
+    """
+    st = os.stat(path)
+    stat = [st.st_size, st.st_mtime_ns]
+    if cached and content is None and cached['stat'] == stat:
+        return AnchorIndex(path, cached['sha'], cached['entries']), cached
+    if content is None:
+        content = read_text(path)
+    digest = _sha(content)
+    if cached and cached['sha'] == digest:
+        index = AnchorIndex(path, digest, cached['entries'])
+    else:
+        index = AnchorIndex(path, digest, parse(content))
+    return index, {'stat': stat, 'sha': digest, 'entries': index.entries}
+
+
+def load_entries(cache_path: str = INDEX_PATH) -> dict:
+    return _load_cache(cache_path)
+
+
+def save_entries(entries: dict, cache_path: str = INDEX_PATH) -> None:
+    """Guarda de una vez las entradas ``{ruta: entrada}`` sobre la caché existente."""
+    if not entries:
+        return
+    cache = _load_cache(cache_path)
+    cache.update((os.path.normpath(path), entry) for path, entry in entries.items())
+    write_atomic(cache_path, json.dumps(cache, sort_keys=True) + '\n')
+
+
+def load_index(path: str, content: str = None, cache_path: str = INDEX_PATH, save: bool = True) -> AnchorIndex:
+    """Índice de ``path`` desde la caché si sigue vigente; si no, lo re-parsea.
+
+    Lee y escribe la caché compartida, así que es para un solo proceso; en un
+    pool se usa ``resolve_index`` y el padre llama a ``save_entries``. Con
+    ``save=False`` (dry-run) la caché no se toca.
+    """
+    key = os.path.normpath(path)
+    index, entry = resolve_index(path, content, _load_cache(cache_path).get(key))
+    if save:
+        save_entries({key: entry}, cache_path)
+    return index
+
+
+def main(argv=None) -> int:
+    paths = (argv if argv is not None else sys.argv[1:]) or ['src/context/CrmContext.tsx', 'src/App.tsx']
+    for path in paths:
+        index = load_index(path)
+        print(f"📄 {path}")
+        for key in index.keys():
+            spans = index.spans(key)
+            print(f"   {key}: {', '.join(f'{s}-{e}' for s, e in spans)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
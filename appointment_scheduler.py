@@ -0,0 +1,474 @@
+"""Motor de choques y disponibilidad de citas con un árbol de intervalos.
+
+Hoy nadie revisa si una cita nueva se encima con otra del mismo vendedor o
+asesor, y el calendario filtra el arreglo completo de ``appointments`` en cada
+render. Aquí cada vendedor, asesor y propiedad tiene su propio árbol de
+intervalos (AVL aumentado con el fin máximo de cada subárbol):
+
+- ``conflicts``   ¿esta cita se encima con otra? — O(log n + k)
+- ``free_slots``  huecos de la semana para la propiedad X, con los vendedores
+                  libres en cada uno, respetando ``hora_inicio``/``hora_fin``,
+                  ``working_days`` y vacaciones de ``team_members``
+- ``load``        carga de una temporada completa: ordena una vez y arma
+                  cada árbol balanceado en O(n)
+
+Solo bloquean las citas ``scheduled`` y ``completed``; las fechas son hora
+local (``scheduled_date`` + ``scheduled_time``) como las guarda la app.
+
+Uso::
+
+    python appointment_scheduler.py appointments.csv --team team.csv --check "2026-10-20 10:00" --vendedor <id>
+    python appointment_scheduler.py appointments.csv --team team.csv --free <property_id> --week 2026-10-19
+    python appointment_scheduler.py --bench 100000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from lead_dedup import iter_rows
+
+BLOCKING = ('scheduled', 'completed')
+DEFAULT_DURATION = 60
+DEFAULT_HOURS = (9, 18)
+SLOT_STEP = 30
+EPOCH = datetime(2000, 1, 1)
+
+APPOINTMENT_COLUMNS = ('id', 'scheduled_date', 'scheduled_time', 'duration_minutes', 'status',
+                       'vendedor_id', 'asesor_id', 'property_id')
+TEAM_COLUMNS = ('id', 'role', 'active', 'hora_inicio', 'hora_fin', 'working_days', 'vacation_start', 'vacation_end')
+
+
+@lru_cache(maxsize=4096)
+def _day_minutes(day: str) -> int:
+    return (date.fromisoformat(day) - EPOCH.date()).days * 1440
+
+
+def to_minutes(day: str, hhmm: str = '00:00') -> int:
+    """Minutos desde 2000-01-01 (hora local, sin zona)."""
+    hours, _, minutes = (hhmm or '00:00').partition(':')
+    return _day_minutes(day[:10]) + int(hours) * 60 + int(minutes[:2] or 0)
+
+
+def from_minutes(minutes: int) -> datetime:
+    return EPOCH + timedelta(minutes=minutes)
+
+
+class _Node:
+    __slots__ = ('start', 'end', 'key', 'left', 'right', 'height', 'max_end')
+
+    def __init__(self, start, end, key):
+        self.start, self.end, self.key = start, end, key
+        self.left = self.right = None
+        self.height = 1
+        self.max_end = end
+
+
+def _h(node) -> int:
+    return node.height if node else 0
+
+
+def _update(node) -> None:
+    node.height = 1 + max(_h(node.left), _h(node.right))
+    node.max_end = max(node.end, node.left.max_end if node.left else node.end,
+                       node.right.max_end if node.right else node.end)
+
+
+def _rotate_right(node):
+    top = node.left
+    node.left, top.right = top.right, node
+    _update(node)
+    _update(top)
+    return top
+
+
+def _rotate_left(node):
+    top = node.right
+    node.right, top.left = top.left, node
+    _update(node)
+    _update(top)
+    return top
+
+
+def _balance(node):
+    _update(node)
+    diff = _h(node.left) - _h(node.right)
+    if diff > 1:
+        if _h(node.left.left) < _h(node.left.right):
+            node.left = _rotate_left(node.left)
+        return _rotate_right(node)
+    if diff < -1:
+        if _h(node.right.right) < _h(node.right.left):
+            node.right = _rotate_right(node.right)
+        return _rotate_left(node)
+    return node
+
+
+class IntervalTree:
+    """Intervalos semiabiertos ``[start, end)`` ordenados por ``(start, key)``."""
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def bulk_load(self, items: list) -> None:
+        """Reemplaza el contenido con ``[(start, end, key)]``; árbol balanceado en O(n log n)."""
+        items = sorted(items, key=lambda it: (it[0], it[2]))
+
+        def build(lo, hi):
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            node = _Node(*items[mid])
+            node.left = build(lo, mid)
+            node.right = build(mid + 1, hi)
+            _update(node)
+            return node
+
+        self.root = build(0, len(items))
+        self.size = len(items)
+
+    def insert(self, start: int, end: int, key) -> None:
+        def ins(node):
+            if node is None:
+                return _Node(start, end, key)
+            if (start, key) < (node.start, node.key):
+                node.left = ins(node.left)
+            else:
+                node.right = ins(node.right)
+            return _balance(node)
+
+        self.root = ins(self.root)
+        self.size += 1
+
+    def remove(self, start: int, key) -> bool:
+        removed = []
+
+        def pop_min(node):
+            if node.left is None:
+                return node.right, node
+            node.left, smallest = pop_min(node.left)
+            return _balance(node), smallest
+
+        def rem(node):
+            if node is None:
+                return None
+            if (start, key) < (node.start, node.key):
+                node.left = rem(node.left)
+            elif (start, key) > (node.start, node.key):
+                node.right = rem(node.right)
+            else:
+                removed.append(node)
+                if node.left is None or node.right is None:
+                    return node.left or node.right
+                node.right, successor = pop_min(node.right)
+                successor.left, successor.right = node.left, node.right
+                node = successor
+            return _balance(node)
+
+        self.root = rem(self.root)
+        self.size -= len(removed)
+        return bool(removed)
+
+    def first_overlap(self, start: int, end: int):
+        """Un intervalo que se encima con ``[start, end)`` o ``None``; O(log n)."""
+        node = self.root
+        while node:
+            if node.start < end and start < node.end:
+                return node.start, node.end, node.key
+            if node.left and node.left.max_end > start:
+                node = node.left
+            elif node.start < end:
+                node = node.right
+            else:
+                return None
+        return None
+
+    def overlaps(self, start: int, end: int) -> list:
+        """Todos los intervalos que se enciman con ``[start, end)``, por inicio; O(log n + k)."""
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            if node.max_end <= start:
+                continue
+            if node.start < end:
+                if node.right:
+                    stack.append(node.right)
+                if start < node.end:
+                    found.append((node.start, node.end, node.key))
+            if node.left:
+                stack.append(node.left)
+        found.sort()
+        return found
+
+
+@dataclass
+class Member:
+    id: str
+    role: str = ''
+    hours: tuple = DEFAULT_HOURS
+    days: frozenset = frozenset(range(7))        # 0 = domingo, como Date.getDay()
+    vacation: tuple = ()
+
+    def works(self, day: date) -> bool:
+        if (day.isoweekday() % 7) not in self.days:
+            return False
+        return not (self.vacation and self.vacation[0] <= day.isoformat() <= self.vacation[1])
+
+
+@dataclass
+class Slot:
+    start: int
+    end: int
+    vendedores: list = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {'start': from_minutes(self.start).isoformat(timespec='minutes'),
+                'end': from_minutes(self.end).isoformat(timespec='minutes'), 'vendedores': self.vendedores}
+
+
+class Scheduler:
+    ROLES = ('vendedor_id', 'asesor_id', 'property_id')
+
+    def __init__(self, team: dict = None):
+        self.team = team or {}
+        self.trees = {role: {} for role in self.ROLES}
+        self.appointments = {}          # id -> (start, end, {rol: recurso})
+        self.sellers_by_property = {}
+
+    def _tree(self, role: str, resource: str) -> IntervalTree:
+        return self.trees[role].setdefault(resource, IntervalTree())
+
+    def load(self, appointments) -> int:
+        """Carga masiva; reemplaza lo que hubiera."""
+        grouped = {role: {} for role in self.ROLES}
+        self.appointments.clear()
+        for appt in appointments:
+            if appt.get('status', 'scheduled') not in BLOCKING or not appt.get('scheduled_date'):
+                continue
+            start = to_minutes(appt['scheduled_date'], appt.get('scheduled_time'))
+            end = start + int(appt.get('duration_minutes') or DEFAULT_DURATION)
+            owners = {role: appt.get(role) for role in self.ROLES if appt.get(role)}
+            self.appointments[appt['id']] = (start, end, owners)
+            for role, resource in owners.items():
+                grouped[role].setdefault(resource, []).append((start, end, appt['id']))
+            if owners.get('property_id') and owners.get('vendedor_id'):
+                self.sellers_by_property.setdefault(owners['property_id'], set()).add(owners['vendedor_id'])
+        for role, by_resource in grouped.items():
+            self.trees[role] = {}
+            for resource, items in by_resource.items():
+                self._tree(role, resource).bulk_load(items)
+        return len(self.appointments)
+
+    def conflicts(self, start: int, end: int, exclude: str = None, **owners) -> list:
+        """``[(rol, id de cita)]`` que chocan con ``[start, end)`` para los recursos dados."""
+        found = []
+        for role, resource in owners.items():
+            tree = self.trees[role].get(resource) if resource else None
+            for _, _, key in tree.overlaps(start, end) if tree else ():
+                if key != exclude:
+                    found.append((role, key))
+        return found
+
+    def book(self, appt_id: str, start: int, end: int, **owners) -> list:
+        """Agenda si no hay choque; si lo hay, devuelve los choques y no agenda."""
+        clash = self.conflicts(start, end, **owners)
+        if clash:
+            return clash
+        owners = {role: r for role, r in owners.items() if r}
+        for role, resource in owners.items():
+            self._tree(role, resource).insert(start, end, appt_id)
+        self.appointments[appt_id] = (start, end, owners)
+        if owners.get('property_id') and owners.get('vendedor_id'):
+            self.sellers_by_property.setdefault(owners['property_id'], set()).add(owners['vendedor_id'])
+        return []
+
+    def cancel(self, appt_id: str) -> bool:
+        entry = self.appointments.pop(appt_id, None)
+        if not entry:
+            return False
+        start, _, owners = entry
+        for role, resource in owners.items():
+            self.trees[role][resource].remove(start, appt_id)
+        return True
+
+    def _busy(self, role: str, resource: str, start: int, end: int) -> list:
+        tree = self.trees[role].get(resource)
+        return [(s, e) for s, e, _ in tree.overlaps(start, end)] if tree else []
+
+    def free_slots(self, property_id: str, week_start: date, days: int = 7, duration: int = DEFAULT_DURATION,
+                   step: int = SLOT_STEP, vendedores: list = None, exclusive: bool = False) -> list:
+        """Huecos de ``duration`` minutos (cada ``step``) con algún vendedor libre.
+
+        Los vendedores son los que ya tienen citas en la propiedad (o ``vendedores``);
+        con ``exclusive`` la propiedad además recibe una sola visita a la vez.
+        """
+        sellers = vendedores or sorted(self.sellers_by_property.get(property_id, ())) or \
+            [m.id for m in self.team.values() if m.role == 'vendedor']
+        slots = []
+        for offset in range(days):
+            day = week_start + timedelta(days=offset)
+            base = to_minutes(day.isoformat())
+            property_busy = self._busy('property_id', property_id, base, base + 1440) if exclusive else []
+            free_at = {}
+            for seller in sellers:
+                member = self.team.get(seller, Member(seller))
+                if not member.works(day):
+                    continue
+                opens, closes = base + member.hours[0] * 60, base + member.hours[1] * 60
+                busy = _merge(self._busy('vendedor_id', seller, opens, closes) + property_busy)
+                # Barrido por los huecos entre citas: cada inicio alineado a ``step``
+                # que cabe completo antes de la siguiente cita
+                cursor = opens
+                for s, e in busy + [[closes, closes]]:
+                    t = opens + -(-(cursor - opens) // step) * step
+                    while t + duration <= min(s, closes):
+                        free_at.setdefault(t, []).append(seller)
+                        t += step
+                    cursor = max(cursor, e)
+            slots.extend(Slot(t, t + duration, free_at[t]) for t in sorted(free_at))
+        return slots
+
+
+def _merge(intervals: list) -> list:
+    merged = []
+    for s, e in sorted(intervals):
+        if merged and s <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s, e])
+    return merged
+
+
+def load_team(path: str) -> dict:
+    team = {}
+    for member_id, role, active, start, end, days, vac_start, vac_end in iter_rows(path, TEAM_COLUMNS):
+        if str(active).lower() in ('false', '0', 'f'):
+            continue
+        try:
+            working = frozenset(json.loads(days)) if days else frozenset(range(7))
+        except ValueError:
+            working = frozenset(int(d) for d in days.strip('{}[]').split(',') if d.strip())
+        team[member_id] = Member(member_id, role, (int(start or DEFAULT_HOURS[0]), int(end or DEFAULT_HOURS[1])),
+                                 working, (vac_start[:10], vac_end[:10]) if vac_start and vac_end else ())
+    return team
+
+
+def load_appointments(path: str):
+    for row in iter_rows(path, APPOINTMENT_COLUMNS):
+        yield dict(zip(APPOINTMENT_COLUMNS, row))
+
+
+def synthetic(count: int, vendedores: int = 200, asesores: int = 40, properties: int = 60,
+              days: int = 180, seed: int = 5) -> list:
+    """Una temporada de citas: 9 a 18 h en bloques de 30 min, ~8 vendedores por propiedad."""
+    rnd = random.Random(seed)
+    first = date(2026, 1, 5)
+    teams = [rnd.sample(range(vendedores), 8) for _ in range(properties)]
+    rows = []
+    for i in range(count):
+        prop = rnd.randrange(properties)
+        rows.append({
+            'id': f'a{i}',
+            'scheduled_date': (first + timedelta(days=rnd.randrange(days))).isoformat(),
+            'scheduled_time': f'{rnd.randrange(9, 17):02d}:{rnd.choice((0, 30)):02d}',
+            'duration_minutes': rnd.choice((30, 60, 60, 90)),
+            'status': 'cancelled' if rnd.random() < 0.1 else 'scheduled',
+            'vendedor_id': f'v{rnd.choice(teams[prop])}',
+            'asesor_id': f's{rnd.randrange(asesores)}' if rnd.random() < 0.3 else '',
+            'property_id': f'p{prop}',
+        })
+    return rows
+
+
+def bench(count: int) -> None:
+    appointments = synthetic(count)
+    scheduler = Scheduler()
+    t0 = time.perf_counter()
+    loaded = scheduler.load(appointments)
+    load_s = time.perf_counter() - t0
+    print(f"📄 {loaded:,} citas activas de {count:,} cargadas en {load_s * 1000:,.0f} ms")
+
+    rnd = random.Random(9)
+    checks = [(to_minutes((date(2026, 1, 5) + timedelta(days=rnd.randrange(180))).isoformat(),
+                          f'{rnd.randrange(9, 17):02d}:00'), f'v{rnd.randrange(200)}') for _ in range(20000)]
+    t0 = time.perf_counter()
+    clashes = sum(bool(scheduler.conflicts(s, s + 60, vendedor_id=v)) for s, v in checks)
+    tree_us = (time.perf_counter() - t0) / len(checks) * 1e6
+
+    active = [(s, e, o) for s, e, o in scheduler.appointments.values()]
+    t0 = time.perf_counter()
+    naive = sum(any(o.get('vendedor_id') == v and st < s + 60 and s < en for st, en, o in active)
+                for s, v in checks[:200])
+    naive_us = (time.perf_counter() - t0) / 200 * 1e6
+    print(f"   choque: {tree_us:,.1f} µs/consulta con árbol vs {naive_us:,.0f} µs recorriendo el arreglo "
+          f"({clashes:,} de {len(checks):,} chocan)")
+    assert naive == sum(bool(scheduler.conflicts(s, s + 60, vendedor_id=v)) for s, v in checks[:200])
+
+    weeks = [(f'p{rnd.randrange(60)}', date(2026, 1, 5) + timedelta(weeks=rnd.randrange(25))) for _ in range(200)]
+    t0 = time.perf_counter()
+    found = sum(len(scheduler.free_slots(p, w)) for p, w in weeks)
+    free_ms = (time.perf_counter() - t0) / len(weeks) * 1000
+    print(f"   huecos de la semana por propiedad: {free_ms:,.2f} ms/consulta ({found / len(weeks):,.0f} huecos promedio)")
+
+    t0 = time.perf_counter()
+    booked = 0
+    for i, (s, v) in enumerate(checks[:5000]):
+        booked += not scheduler.book(f'n{i}', s, s + 60, vendedor_id=v, property_id=f'p{i % 60}')
+    for i in range(0, 5000, 2):
+        scheduler.cancel(f'n{i}')
+    print(f"   agendar/cancelar: {(time.perf_counter() - t0) / 7500 * 1e6:,.1f} µs/operación ({booked:,} agendadas)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Choques y disponibilidad de citas')
+    parser.add_argument('appointments', nargs='?', help='export de appointments (.csv, .jsonl o .json)')
+    parser.add_argument('--team', help='export de team_members (horarios, días y vacaciones)')
+    parser.add_argument('--check', metavar='"YYYY-MM-DD HH:MM"', help='¿choca una cita a esta hora?')
+    parser.add_argument('--duration', type=int, default=DEFAULT_DURATION)
+    parser.add_argument('--vendedor')
+    parser.add_argument('--asesor')
+    parser.add_argument('--property')
+    parser.add_argument('--free', metavar='PROPERTY_ID', help='huecos libres para esta propiedad')
+    parser.add_argument('--week', help='lunes de la semana (por defecto la actual)')
+    parser.add_argument('--exclusive', action='store_true', help='la propiedad recibe una visita a la vez')
+    parser.add_argument('--bench', type=int, metavar='N', help='benchmark con N citas sintéticas')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(args.bench)
+        return 0
+    if not args.appointments:
+        parser.error('falta el export de appointments')
+    scheduler = Scheduler(load_team(args.team) if args.team else None)
+    print(f"📄 {scheduler.load(load_appointments(args.appointments)):,} citas activas")
+
+    if args.check:
+        day, _, hhmm = args.check.partition(' ')
+        start = to_minutes(day, hhmm)
+        clash = scheduler.conflicts(start, start + args.duration, vendedor_id=args.vendedor,
+                                    asesor_id=args.asesor, property_id=args.property)
+        if not clash:
+            print(f"✅ {args.check} ({args.duration} min) está libre")
+        for role, key in clash:
+            s, e, _ = scheduler.appointments[key]
+            print(f"❌ choca con {key} ({role}): {from_minutes(s):%Y-%m-%d %H:%M}–{from_minutes(e):%H:%M}")
+        return 1 if clash else 0
+    if args.free:
+        today = date.today()
+        week = date.fromisoformat(args.week) if args.week else today - timedelta(days=today.weekday())
+        slots = scheduler.free_slots(args.free, week, duration=args.duration, exclusive=args.exclusive)
+        print(json.dumps([slot.as_dict() for slot in slots], indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,508 @@
+"""Archivo y compactación de audit_log en particiones por día.
+
+audit_log crece sin límite y CrmContext lo consulta en cada carga
+(``ORDER BY timestamp DESC LIMIT 500``). Este job mueve lo viejo fuera de la
+tabla viva sin perderlo:
+
+1. Recorre audit_log por ``(timestamp, id)`` con paginación keyset
+   (``WHERE (timestamp, id) > (?, ?) ORDER BY timestamp, id LIMIT n``): cada
+   página cuesta lo mismo sin importar qué tan atrás vaya, a diferencia de
+   ``OFFSET``, y en memoria solo hay una página.
+2. Escribe las filas más viejas que ``--older-than`` días a
+   ``audit-archive/AAAA/MM/AAAA-MM-DD.NNN.jsonl.gz`` (UTC). Cada archivo se
+   escribe como ``.part`` y se publica con rename al cerrarse; un día con
+   muchas filas se parte cada ``--part-rows``.
+3. Al cerrar cada archivo, en una sola transacción, suma sus filas a
+   ``audit_log_summary`` (eventos por acción, primera y última fecha por
+   entidad) y lo registra en ``audit_archive_partitions`` con su sha256. El
+   watermark para la siguiente corrida es el último ``(timestamp, id)``
+   registrado; archivos sin registro (corrida cortada) se borran y se
+   reescriben.
+4. Con ``--prune`` verifica cada archivo (sha256 y número de filas) y borra
+   sus ids de audit_log en lotes de ``--batch``, una transacción por lote.
+
+El historial queda consultable sin base con ``--query``, que lee los
+archivos en streaming y salta los días fuera de ``--since``/``--until``.
+Requiere migrations/005_audit_log_archive.sql.
+
+Uso::
+
+    python audit_archive.py --dsn "$DATABASE_URL" --older-than 90
+    python audit_archive.py --sqlite crm.db --older-than 90 --prune
+    python audit_archive.py --dsn "$DATABASE_URL" --prune-only --batch 500 --pause 0.2
+    python audit_archive.py --query --entity-id 3f2c... --since 2025-01-01
+    python audit_archive.py --bench 500000
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from migrate import MIGRATIONS_DIR, SQLiteBackend, connect, discover
+
+ARCHIVE_DIR = 'audit-archive'
+COLUMNS = ('id', 'entity_type', 'entity_id', 'entity_name', 'action', 'changes',
+           'user_id', 'user_name', 'timestamp')
+ACTIONS = ('create', 'update', 'delete', 'status_change')
+PAGE_SIZE = 5000
+PART_ROWS = 200_000
+DELETE_BATCH = 1000
+PART_RE = re.compile(r'(\d{4}-\d{2}-\d{2})\.(\d{3})\.jsonl\.gz$')
+
+
+def iso(value) -> str:
+    """timestamptz de psycopg (datetime) o texto de SQLite → ISO en UTC."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc).isoformat()
+    return str(value or '')
+
+
+def batched(iterable, size: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Store:
+    """audit_log y sus tablas de control sobre la conexión de migrate.py."""
+
+    def __init__(self, backend):
+        self.conn = backend.conn
+        self.pg = not isinstance(backend, SQLiteBackend)
+        # En SQLite un CAST a timestamptz tendría afinidad NUMERIC; el texto ISO ya compara bien
+        self.ts = 'CAST(%s AS timestamptz)' if self.pg else '?'
+        self.least, self.greatest = ('LEAST', 'GREATEST') if self.pg else ('min', 'max')
+
+    def _sql(self, sql: str) -> str:
+        return sql.replace('?', '%s') if self.pg else sql
+
+    def _run(self, sql: str, params=(), many: bool = False):
+        cur = self.conn.cursor()
+        try:
+            if many:
+                cur.executemany(self._sql(sql), params)
+            else:
+                cur.execute(self._sql(sql), params)
+            return cur.fetchall() if cur.description else cur.rowcount
+        finally:
+            cur.close()
+
+    @contextmanager
+    def transaction(self):
+        if not self.pg:
+            self.conn.execute('BEGIN')
+        try:
+            yield
+        except BaseException:
+            self.conn.rollback() if self.pg else self.conn.execute('ROLLBACK')
+            raise
+        self.conn.commit() if self.pg else self.conn.execute('COMMIT')
+
+    def _read(self, sql: str, params=()):
+        rows = self._run(sql, params)
+        if self.pg:
+            self.conn.commit()  # no dejar la sesión idle in transaction entre páginas
+        return rows
+
+    def watermark(self):
+        rows = self._read('SELECT last_timestamp, last_id FROM audit_archive_partitions '
+                          'ORDER BY last_timestamp DESC, last_id DESC LIMIT 1')
+        return (iso(rows[0][0]), rows[0][1]) if rows else None
+
+    def partitions(self, pending_only: bool = False) -> list:
+        where = ' WHERE pruned_at IS NULL' if pending_only else ''
+        return self._read(f'SELECT path, rows, sha256 FROM audit_archive_partitions{where} ORDER BY path')
+
+    def page(self, after, cutoff: str, size: int) -> list:
+        cols = ', '.join(f'"{c}"' for c in COLUMNS)
+        sql = f'SELECT {cols} FROM audit_log WHERE "timestamp" < {self.ts}'
+        params = [cutoff]
+        if after:
+            sql += f' AND ("timestamp", id) > ({self.ts}, ?)'
+            params += list(after)
+        return self._read(sql + ' ORDER BY "timestamp", id LIMIT ?', params + [size])
+
+    def stream(self, after, cutoff: str, size: int = PAGE_SIZE):
+        while True:
+            rows = self.page(after, cutoff, size)
+            for row in rows:
+                yield dict(zip(COLUMNS, row))
+            if len(rows) < size:
+                return
+            after = (iso(rows[-1][-1]), rows[-1][0])
+
+    def commit_partition(self, part: 'Partition') -> None:
+        g, l, ts = self.greatest, self.least, self.ts
+        upsert = (
+            'INSERT INTO audit_log_summary (entity_type, entity_id, entity_name, events, creates, updates, '
+            f'deletes, status_changes, first_at, last_at, last_user_name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, {ts}, {ts}, ?) '
+            'ON CONFLICT (entity_type, entity_id) DO UPDATE SET '
+            'entity_name = COALESCE(excluded.entity_name, audit_log_summary.entity_name), '
+            'events = audit_log_summary.events + excluded.events, '
+            'creates = audit_log_summary.creates + excluded.creates, '
+            'updates = audit_log_summary.updates + excluded.updates, '
+            'deletes = audit_log_summary.deletes + excluded.deletes, '
+            'status_changes = audit_log_summary.status_changes + excluded.status_changes, '
+            f'first_at = {l}(audit_log_summary.first_at, excluded.first_at), '
+            f'last_at = {g}(audit_log_summary.last_at, excluded.last_at), '
+            'last_user_name = CASE WHEN excluded.last_at >= audit_log_summary.last_at '
+            'THEN excluded.last_user_name ELSE audit_log_summary.last_user_name END')
+        with self.transaction():
+            self._run(upsert, [key + tuple(acc) for key, acc in part.summary.items()], many=True)
+            self._run('INSERT INTO audit_archive_partitions (path, rows, sha256, first_timestamp, first_id, '
+                      f'last_timestamp, last_id) VALUES (?, ?, ?, {ts}, ?, {ts}, ?)',
+                      (part.path, part.rows, part.sha256) + part.first + part.last)
+
+    def delete(self, ids: list) -> int:
+        if self.pg:
+            return self._run('DELETE FROM audit_log WHERE id = ANY(?)', (ids,))
+        return self._run(f'DELETE FROM audit_log WHERE id IN ({", ".join("?" * len(ids))})', ids)
+
+    def mark_pruned(self, path: str) -> None:
+        with self.transaction():
+            self._run(f'UPDATE audit_archive_partitions SET pruned_at = {"now()" if self.pg else "CURRENT_TIMESTAMP"} '
+                      'WHERE path = ?', (path,))
+
+    def live_rows(self) -> int:
+        return self._read('SELECT count(*) FROM audit_log')[0][0]
+
+
+class Partition:
+    """Un archivo .jsonl.gz de un día; acumula el resumen por entidad de sus filas."""
+
+    def __init__(self, root: str, day: str, seq: int):
+        self.day = day
+        self.path = f'{day[:4]}/{day[5:7]}/{day}.{seq:03d}.jsonl.gz'
+        self.full = os.path.join(root, self.path)
+        os.makedirs(os.path.dirname(self.full), exist_ok=True)
+        self.fh = gzip.open(self.full + '.part', 'wt', encoding='utf-8', compresslevel=6)
+        self.rows = 0
+        self.first = self.last = None
+        self.sha256 = ''
+        # (entity_type, entity_id) -> [name, events, create, update, delete, status_change, first, last, user]
+        self.summary = {}
+
+    def add(self, row: dict) -> None:
+        stamp = iso(row['timestamp'])
+        changes = row['changes']
+        if isinstance(changes, str):
+            try:
+                changes = json.loads(changes)
+            except ValueError:
+                pass
+        self.fh.write(json.dumps(dict(row, changes=changes, timestamp=stamp),
+                                 ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.rows += 1
+        self.first = self.first or (stamp, row['id'])
+        self.last = (stamp, row['id'])
+        acc = self.summary.get((row['entity_type'], row['entity_id']))
+        if acc is None:
+            acc = self.summary[(row['entity_type'], row['entity_id'])] = [None, 0, 0, 0, 0, 0, stamp, stamp, None]
+        acc[0] = row['entity_name'] or acc[0]
+        acc[1] += 1
+        if row['action'] in ACTIONS:
+            acc[2 + ACTIONS.index(row['action'])] += 1
+        acc[7] = stamp
+        acc[8] = row['user_name']
+
+    def close(self) -> None:
+        self.fh.close()
+        digest = hashlib.sha256()
+        with open(self.full + '.part', 'rb') as fh:
+            os.fsync(fh.fileno())
+            for chunk in iter(lambda: fh.read(1 << 20), b''):
+                digest.update(chunk)
+        self.sha256 = digest.hexdigest()
+        os.replace(self.full + '.part', self.full)
+
+    def discard(self) -> None:
+        self.fh.close()
+        for path in (self.full + '.part', self.full):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def archive_files(root: str) -> list:
+    """Rutas relativas de los archivos del archivo, en orden cronológico."""
+    found = []
+    for base, _, names in os.walk(root):
+        for name in names:
+            if PART_RE.search(name) or name.endswith('.jsonl.gz.part'):
+                found.append(os.path.relpath(os.path.join(base, name), root).replace(os.sep, '/'))
+    return sorted(found)
+
+
+def archive(store: Store, root: str, cutoff: str, page_size: int = PAGE_SIZE,
+            part_rows: int = PART_ROWS) -> dict:
+    """Copia a ``root`` las filas anteriores a ``cutoff`` que aún no están archivadas."""
+    known = {path for path, _, _ in store.partitions()}
+    orphans = [path for path in archive_files(root) if path not in known]
+    for path in orphans:
+        os.remove(os.path.join(root, path))
+    if orphans:
+        print(f"🔁 {len(orphans)} archivos sin registrar de una corrida anterior: se reescriben")
+    seqs = {}
+    for path in known:
+        match = PART_RE.search(path)
+        if match:
+            seqs[match.group(1)] = max(seqs.get(match.group(1), -1), int(match.group(2)))
+
+    stats = {'rows': 0, 'files': 0, 'bytes': 0}
+    current = None
+
+    def close():
+        try:
+            current.close()
+            store.commit_partition(current)
+        except BaseException:
+            current.discard()
+            raise
+        stats['files'] += 1
+        stats['bytes'] += os.path.getsize(current.full)
+        print(f"📄 {current.path}: {current.rows:,} filas, {len(current.summary):,} entidades")
+
+    try:
+        for row in store.stream(store.watermark(), cutoff, page_size):
+            day = iso(row['timestamp'])[:10]
+            if current is not None and (current.day != day or current.rows >= part_rows):
+                close()
+                current = None
+            if current is None:
+                seqs[day] = seqs.get(day, -1) + 1
+                current = Partition(root, day, seqs[day])
+            current.add(row)
+            stats['rows'] += 1
+        if current is not None:
+            close()
+            current = None
+    finally:
+        if current is not None:
+            current.discard()
+    return stats
+
+
+def read_partition(path: str):
+    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+        for line in fh:
+            yield json.loads(line)
+
+
+def verify(path: str, rows: int, sha256: str) -> str:
+    """'' si el archivo coincide con su registro; si no, el motivo."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(chunk)
+    if digest.hexdigest() != sha256:
+        return 'sha256 distinto'
+    count = sum(1 for _ in read_partition(path))
+    return '' if count == rows else f'{count:,} filas en vez de {rows:,}'
+
+
+def prune(store: Store, root: str, batch: int = DELETE_BATCH, pause: float = 0.0) -> dict:
+    """Borra de audit_log las filas de los archivos verificados que aún no se podaron."""
+    stats = {'rows': 0, 'files': 0, 'skipped': 0}
+    for path, rows, sha256 in store.partitions(pending_only=True):
+        full = os.path.join(root, path)
+        problem = 'no existe' if not os.path.exists(full) else verify(full, rows, sha256)
+        if problem:
+            print(f"❌ {path}: {problem}; no se borra nada de este archivo")
+            stats['skipped'] += 1
+            continue
+        deleted = 0
+        for ids in batched((row['id'] for row in read_partition(full)), batch):
+            with store.transaction():
+                deleted += store.delete(ids)
+            if pause:
+                time.sleep(pause)
+        store.mark_pruned(path)
+        stats['rows'] += deleted
+        stats['files'] += 1
+    return stats
+
+
+def query(root: str, since: str = '', until: str = '', entity_type: str = '', entity_id: str = '',
+          action: str = '', user: str = ''):
+    """Filas archivadas que cumplen los filtros, en orden cronológico."""
+    for path in archive_files(root):
+        match = PART_RE.search(path)
+        if not match or (since and match.group(1) < since[:10]) or (until and match.group(1) > until[:10]):
+            continue
+        for row in read_partition(os.path.join(root, path)):
+            if ((entity_type and row['entity_type'] != entity_type)
+                    or (entity_id and row['entity_id'] != entity_id)
+                    or (action and row['action'] != action)
+                    or (user and user not in (row['user_id'], row['user_name']))
+                    or (since and row['timestamp'] < since)
+                    or (until and row['timestamp'][:len(until)] > until)):
+                continue
+            yield row
+
+
+def cutoff_for(days: int, now: datetime = None) -> str:
+    """Medianoche UTC de hace ``days`` días: así ningún día queda partido entre corridas."""
+    now = now or datetime.now(timezone.utc)
+    return (now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+
+
+def bench(n: int) -> int:
+    random.seed(7)
+    workdir = tempfile.mkdtemp(prefix='audit-archive-')
+    db_path = os.path.join(workdir, 'crm.db')
+    backend = SQLiteBackend(db_path)
+    migrations = discover(MIGRATIONS_DIR)
+    backend.ensure_tracking()
+    backend.bootstrap(migrations)
+    for migration in migrations:
+        backend.apply(migration)
+    store = Store(backend)
+
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    entities = [(random.choice(('lead', 'property', 'mortgage')), f'e{i:06d}') for i in range(max(1, n // 20))]
+    users = [(f'u{i}', f'Usuario {i}') for i in range(25)]
+
+    def rows():
+        for i in range(n):
+            stamp = now - timedelta(seconds=int(400 * 86400 * (1 - i / n)) + random.randint(0, 59))
+            etype, eid = random.choice(entities)
+            uid, uname = random.choice(users)
+            yield (f'a{i:09d}', etype, eid, f'Entidad {eid}', random.choice(ACTIONS),
+                   json.dumps({'status': {'old': 'new', 'new': 'contacted'}}), uid, uname, stamp.isoformat())
+
+    cols = ', '.join(f'"{c}"' for c in COLUMNS)
+    t0 = time.perf_counter()
+    with store.transaction():
+        for chunk in batched(rows(), 10_000):
+            store._run(f'INSERT INTO audit_log ({cols}) VALUES ({", ".join("?" * len(COLUMNS))})', chunk, many=True)
+    print(f"📊 {n:,} filas de audit_log en {time.perf_counter() - t0:.1f} s")
+
+    cutoff = cutoff_for(90, now)
+    deep = max(0, int(n * 0.7) - PAGE_SIZE)
+    t0 = time.perf_counter()
+    store._read(f'SELECT {cols} FROM audit_log WHERE "timestamp" < ? ORDER BY "timestamp", id LIMIT ? OFFSET ?',
+                (cutoff, PAGE_SIZE, deep))
+    offset_ms = (time.perf_counter() - t0) * 1000
+    after = store._read('SELECT "timestamp", id FROM audit_log ORDER BY "timestamp", id LIMIT 1 OFFSET ?', (deep,))[0]
+    t0 = time.perf_counter()
+    store.page(tuple(after), cutoff, PAGE_SIZE)
+    keyset_ms = (time.perf_counter() - t0) * 1000
+    print(f"   página de {PAGE_SIZE:,} en la fila {deep:,}: OFFSET {offset_ms:.1f} ms vs keyset {keyset_ms:.1f} ms")
+
+    root = os.path.join(workdir, ARCHIVE_DIR)
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    # la salida por archivo es una línea por día: se calla en el bench
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        stats = archive(store, root, cutoff)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    elapsed = time.perf_counter() - t0
+    rss = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss0) / 1024
+    raw = sum(len(json.dumps(list(r))) + 1 for r in store._read(
+        f'SELECT {cols} FROM audit_log WHERE "timestamp" < ? LIMIT 50000',
+        (cutoff,)))
+    sample = min(50_000, stats['rows']) or 1
+    print(f"✅ archivo: {stats['rows']:,} filas en {stats['files']} archivos, {elapsed:.1f} s "
+          f"({stats['rows'] / elapsed:,.0f} filas/s), +{rss:.0f} MB de RSS")
+    print(f"   {stats['bytes'] / 1e6:.1f} MB en gzip vs ~{raw / sample * stats['rows'] / 1e6:.0f} MB en JSON plano")
+
+    t0 = time.perf_counter()
+    pruned = prune(store, root)
+    elapsed = time.perf_counter() - t0
+    print(f"✅ poda: {pruned['rows']:,} filas en {elapsed:.1f} s ({pruned['rows'] / max(elapsed, 1e-9):,.0f} filas/s); "
+          f"quedan {store.live_rows():,} en audit_log")
+    summaries = store._read('SELECT count(*), sum(events) FROM audit_log_summary')[0]
+    print(f"   audit_log_summary: {summaries[0]:,} entidades, {summaries[1]:,} eventos")
+
+    target = entities[len(entities) // 2][1]
+    t0 = time.perf_counter()
+    found = sum(1 for _ in query(root, entity_id=target))
+    full_scan = time.perf_counter() - t0
+    since = cutoff_for(120, now)[:10]
+    t0 = time.perf_counter()
+    recent = sum(1 for _ in query(root, entity_id=target, since=since))
+    print(f"🔎 --query de una entidad: {found} eventos en {full_scan:.1f} s (todo el archivo); "
+          f"{recent} desde {since} en {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    rerun = archive(store, root, cutoff)
+    print(f"🔁 segunda corrida: {rerun['rows']} filas nuevas (watermark {store.watermark()[0]})")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Archiva audit_log en particiones gzip por día y poda lo archivado')
+    parser.add_argument('--dsn', help='cadena de conexión de Postgres (o DATABASE_URL)')
+    parser.add_argument('--sqlite', help='base SQLite local')
+    parser.add_argument('--dir', default=ARCHIVE_DIR, help=f'directorio del archivo (por defecto {ARCHIVE_DIR})')
+    parser.add_argument('--older-than', type=int, default=90, metavar='DÍAS')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    parser.add_argument('--part-rows', type=int, default=PART_ROWS, help='máximo de filas por archivo')
+    parser.add_argument('--prune', action='store_true', help='después de archivar, borrar lo archivado')
+    parser.add_argument('--prune-only', action='store_true', help='solo borrar lo ya archivado')
+    parser.add_argument('--batch', type=int, default=DELETE_BATCH, help='ids por DELETE')
+    parser.add_argument('--pause', type=float, default=0.0, help='segundos entre lotes de DELETE')
+    parser.add_argument('--query', action='store_true', help='buscar en el archivo (sin base)')
+    parser.add_argument('--entity-type', default='')
+    parser.add_argument('--entity-id', default='')
+    parser.add_argument('--action', default='', choices=('',) + ACTIONS)
+    parser.add_argument('--user', default='', help='user_id o user_name')
+    parser.add_argument('--since', default='', help='AAAA-MM-DD[THH:MM…] en UTC')
+    parser.add_argument('--until', default='', help='AAAA-MM-DD[THH:MM…] en UTC, inclusive')
+    parser.add_argument('--limit', type=int, default=0)
+    parser.add_argument('--bench', type=int, metavar='N', help='benchmark con N filas en SQLite')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        return bench(args.bench)
+
+    if args.query:
+        if not os.path.isdir(args.dir):
+            print(f"❌ No existe {args.dir}")
+            return 1
+        count = 0
+        for row in query(args.dir, args.since, args.until, args.entity_type, args.entity_id, args.action, args.user):
+            print(json.dumps(row, ensure_ascii=False))
+            count += 1
+            if count == args.limit:
+                break
+        print(f"🔎 {count:,} eventos", file=sys.stderr)
+        return 0
+
+    store = Store(connect(args))
+    if not args.prune_only:
+        cutoff = cutoff_for(args.older_than)
+        t0 = time.perf_counter()
+        stats = archive(store, args.dir, cutoff, args.page_size, args.part_rows)
+        print(f"✅ {stats['rows']:,} filas anteriores a {cutoff[:10]} en {stats['files']} archivos "
+              f"({stats['bytes'] / 1e6:.1f} MB) en {time.perf_counter() - t0:.1f} s")
+    if args.prune or args.prune_only:
+        t0 = time.perf_counter()
+        stats = prune(store, args.dir, args.batch, args.pause)
+        print(f"✅ {stats['rows']:,} filas borradas de audit_log ({stats['files']} archivos) "
+              f"en {time.perf_counter() - t0:.1f} s; quedan {store.live_rows():,}")
+        if stats['skipped']:
+            print(f"⚠️ {stats['skipped']} archivos no pasaron la verificación")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
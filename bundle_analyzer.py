@@ -0,0 +1,1046 @@
+"""Analizador del bundle inicial del SPA y codemod a ``lazy()``.
+
+``src/App.tsx`` importa de forma estática Sidebar, NotificationDrawer,
+GlobalSearch, SecuritySettings, LoginScreen y todos los modales (a través de
+``components/modals/index.ts``); todo eso viaja en el chunk principal aunque
+casi nada se pinte en el primer render. Este script:
+
+- Arma el grafo de imports de ``src/`` desde ``src/main.tsx``: imports
+  estáticos, re-exports, imports de efecto (``import './x'``) y ``import()``
+  dinámicos. Los imports solo de tipos no cuentan (TypeScript los borra). Los
+  barrels se siguen por nombre, como hace Rollup al descartar re-exports que
+  nadie usa.
+- Estima el tamaño de cada módulo: el fuente sin comentarios, sin
+  declaraciones de tipos y con los espacios colapsados; el gzip se mide
+  comprimiendo el chunk completo. Los paquetes de npm usan la tabla
+  aproximada ``PACKAGE_SIZES`` (o ``--package-sizes``) y los que
+  ``manualChunks`` de ``vite.config.ts`` separa se reportan como chunks
+  vendor que se precargan.
+- Ordena los módulos del camino de arranque por los bytes que salen del chunk
+  principal si dejan de importarse estáticamente (el módulo más todo lo que
+  solo cuelga de él), y para cada componente importado en el archivo destino
+  indica cómo se usa (condicional, siempre montado, overlay) y cuánto ahorra.
+- Con ``--lazy`` / ``--apply-suggested`` reescribe el archivo destino:
+  ``import X from './X'`` pasa a ``const X = lazy(() => import('./X'))``, los
+  nombres de un barrel van directo a su módulo (los exports con nombre usan
+  ``.then(m => ({ default: m.X }))``) y cada ``<X ...>`` queda dentro de
+  ``<Suspense fallback={...}>``. Los overlays (el ``return`` abre con un
+  ``fixed inset-0``: modales, drawers, GlobalSearch) usan
+  ``fallback={null}`` como CommandPalette; el resto un skeleton de
+  ``components/Skeletons.tsx``. Al final imprime el tamaño del chunk
+  principal antes y después.
+
+Un import que mezcla el default con otros valores (``LoginScreen, {
+getSession }``) no se puede partir: el módulo seguiría en el chunk principal.
+
+Uso::
+
+    python bundle_analyzer.py
+    python bundle_analyzer.py --top 40 --json bundle-report.json
+    python bundle_analyzer.py --lazy GlobalSearch,LeadModal --dry-run
+    python bundle_analyzer.py --apply-suggested
+    python bundle_analyzer.py --lazy SecuritySettings --fallback-for SecuritySettings=SkeletonCards
+    python bundle_analyzer.py --target src/app/App.tsx --lazy PricingPage,ApiDocsPage
+"""
+import argparse
+import json
+import os
+import posixpath
+import re
+import sys
+import zlib
+from dataclasses import dataclass, field
+
+from patch_engine import read_text, render, unified_diff, write_atomic
+
+ENTRY = 'src/main.tsx'
+TARGET = 'src/App.tsx'
+SKELETONS = 'src/components/Skeletons.tsx'
+VITE_CONFIG = 'vite.config.ts'
+EXTENSIONS = ('.tsx', '.ts', '.jsx', '.js')
+DEFAULT_FALLBACK = 'SkeletonGeneric'
+MIN_SAVING = 1024
+
+# Tamaños aproximados (minificado, gzip) de lo que importa la app de cada
+# paquete, para las versiones de package.json. Sin node_modules no hay forma
+# de medirlos; --package-sizes acepta un JSON {"paquete": [min, gzip]}.
+PACKAGE_SIZES = {
+    'react': (7_500, 2_900),
+    'react-dom': (180_000, 57_000),
+    'react-router-dom': (68_000, 22_000),
+    '@supabase/supabase-js': (112_000, 31_000),
+    'recharts': (470_000, 128_000),
+    'zustand': (1_500, 700),
+}
+# lucide-react se sacude por ícono
+ICON_PACKAGES = {'lucide-react': (600, 330)}
+
+IMPORT_RE = re.compile(
+    r'^[ \t]*import\s+(type\s+)?([\w$*{}\s,]+?)\s*from\s*([\'"])([^\'"\n]+)\3[ \t]*;?[ \t]*', re.M)
+SIDE_EFFECT_RE = re.compile(r'^[ \t]*import\s*([\'"])([^\'"\n]+)\1[ \t]*;?[ \t]*', re.M)
+REEXPORT_RE = re.compile(
+    r'^[ \t]*export\s+(type\s+)?(\*(?:\s+as\s+[\w$]+)?|\{[^}]*\})\s*from\s*([\'"])([^\'"\n]+)\3[ \t]*;?', re.M)
+DYNAMIC_RE = re.compile(r'\bimport\(\s*([\'"])([^\'"\n]+)\1\s*\)')
+EXPORT_DECL_RE = re.compile(
+    r'^[ \t]*export\s+(?:declare\s+)?(?:async\s+)?(?:function\*?|const|let|var|class|enum)\s+([\w$]+)', re.M)
+EXPORT_DEFAULT_RE = re.compile(r'^[ \t]*export\s+default\b', re.M)
+EXPORT_LIST_RE = re.compile(r'^[ \t]*export\s+(type\s+)?\{([^}]*)\}(?!\s*from)', re.M)
+TYPE_DECL_RE = re.compile(r'^[ \t]*(?:export\s+)?(?:declare\s+)?(interface|type)\s+[\w$]+', re.M)
+OVERLAY_RE = re.compile(r'return\s*\(?\s*(?:<>\s*)?<div\b[^>]*?\bfixed\b[^>]*?\binset-0\b')
+SUSPENSE_OPEN_RE = re.compile(r'<Suspense\s+fallback=\{(?:[^{}]|\{[^{}]*\})*\}\s*>\s*$')
+MANUAL_CHUNK_RE = re.compile(r'[\'"]?([\w-]+)[\'"]?\s*:\s*\[([^\]]*)\]')
+PUNCT_RE = re.compile(r' ?([{}()\[\];,:=<>+\-*/&|?!]) ?')
+
+
+# ─── Lectura del fuente ───────────────────────────────────────────────────
+
+def scan_source(src: str) -> tuple:
+    """Devuelve ``(comentarios, cadenas)`` como listas de ``(inicio, fin)``.
+
+    Entiende comillas simples y dobles, template literals con ``${}``
+    anidados y comentarios de línea y de bloque. Las expresiones regulares
+    literales no se distinguen de una división; en este código no estorban.
+    """
+    comments, strings = [], []
+    n = len(src)
+    i = 0
+    braces = []            # profundidad de llaves dentro de cada ${ abierto
+    while i < n:
+        c = src[i]
+        if c == '/' and i + 1 < n and src[i + 1] in '/*':
+            if src[i + 1] == '/':
+                j = src.find('\n', i)
+                j = n if j == -1 else j
+            else:
+                j = src.find('*/', i + 2)
+                j = n if j == -1 else j + 2
+            comments.append((i, j))
+            i = j
+        elif c in '\'"':
+            j = i + 1
+            while j < n and src[j] != c and src[j] != '\n':
+                j += 2 if src[j] == '\\' else 1
+            strings.append((i, min(j + 1, n)))
+            i = j + 1
+        elif c == '`' or (c == '}' and braces and braces[-1] == 0):
+            if c == '}':
+                braces.pop()
+            j = i + 1
+            while j < n and src[j] != '`' and not src.startswith('${', j):
+                j += 2 if src[j] == '\\' else 1
+            if src.startswith('${', j):
+                strings.append((i, j + 2))
+                braces.append(0)
+                i = j + 2
+            else:
+                strings.append((i, min(j + 1, n)))
+                i = j + 1
+        else:
+            if braces:
+                if c == '{':
+                    braces[-1] += 1
+                elif c == '}':
+                    braces[-1] -= 1
+            i += 1
+    return comments, strings
+
+
+def blank(src: str, spans: list) -> str:
+    """Reemplaza los tramos por espacios (conserva saltos de línea y offsets)."""
+    parts = []
+    cursor = 0
+    for start, end in spans:
+        parts.append(src[cursor:start])
+        parts.append(re.sub(r'[^\n]', ' ', src[start:end]))
+        cursor = end
+    parts.append(src[cursor:])
+    return ''.join(parts)
+
+
+def _type_decl_end(code: str, pos: int, kind: str) -> int:
+    """Fin de una declaración ``interface``/``type`` que empieza en ``pos``."""
+    n = len(code)
+    depth = 0
+    i = pos
+    if kind == 'interface':
+        i = code.find('{', pos)
+        if i == -1:
+            return pos
+    while i < n:
+        c = code[i]
+        if c in '{[(<':
+            depth += 1
+        elif c in '}])>' and not (c == '>' and code[i - 1] == '='):
+            depth -= 1
+            if depth == 0 and kind == 'interface':
+                return i + 1
+        elif c == ';' and depth == 0:
+            return i + 1
+        elif c == '\n' and depth <= 0 and kind == 'type' and i > pos:
+            rest = code[i:].lstrip()
+            if not rest.startswith(('|', '&')):
+                return i
+        i += 1
+    return n
+
+
+def estimate_text(src: str) -> str:
+    """Aproxima lo que queda tras compilar y minificar: sin comentarios, sin
+    declaraciones de tipos y con los espacios colapsados fuera de las cadenas."""
+    comments, _ = scan_source(src)
+    code = blank(src, comments)
+    cuts = []
+    for m in TYPE_DECL_RE.finditer(code):
+        if cuts and m.start() < cuts[-1][1]:
+            continue
+        cuts.append((m.start(), _type_decl_end(code, m.end(), m.group(1))))
+    for m in IMPORT_RE.finditer(code):
+        if m.group(1):
+            cuts.append(m.span())
+    cuts.sort()
+    code = blank(code, cuts)
+    _, strings = scan_source(code)
+    parts = []
+    cursor = 0
+    for start, end in strings + [(len(code), len(code))]:
+        segment = re.sub(r'\s+', ' ', code[cursor:start])
+        parts.append(PUNCT_RE.sub(r'\1', segment))
+        parts.append(code[start:end])
+        cursor = end
+    return ''.join(parts).strip()
+
+
+# ─── Grafo de módulos ─────────────────────────────────────────────────────
+
+@dataclass
+class Import:
+    spec: str
+    kind: str                 # 'static' | 'reexport' | 'side' | 'dynamic'
+    start: int = 0
+    end: int = 0
+    default: str = ''
+    namespace: str = ''
+    names: list = field(default_factory=list)    # [(importado, local)]
+    type_names: list = field(default_factory=list)
+    type_only: bool = False
+    target: str = ''          # ruta dentro del repo o 'npm:paquete'
+
+    @property
+    def has_values(self) -> bool:
+        if self.type_only:
+            return False
+        return self.kind in ('side', 'dynamic') or bool(self.default or self.namespace or self.names)
+
+    def bindings(self) -> list:
+        """``[(importado, local)]`` de valores, con el default como ``'default'``."""
+        out = [('default', self.default)] if self.default else []
+        return out + list(self.names)
+
+
+@dataclass
+class Module:
+    path: str
+    source: str = ''
+    text: str = ''            # estimación del código emitido
+    imports: list = field(default_factory=list)
+    exports: set = field(default_factory=set)
+    overlay: bool = False
+
+    @property
+    def size(self) -> int:
+        return len(self.text.encode('utf-8'))
+
+
+def parse_specifiers(clause: str) -> tuple:
+    """``'X, { a, b as c, type T }'`` → ``(default, namespace, names, type_names)``."""
+    default = namespace = ''
+    names, type_names = [], []
+    clause = clause.strip()
+    braces = re.search(r'\{([^}]*)\}', clause)
+    head = clause[:braces.start()] if braces else clause
+    for part in (p.strip() for p in head.split(',')):
+        if part.startswith('*'):
+            namespace = part.split()[-1]
+        elif part:
+            default = part
+    if braces:
+        for spec in (s.strip() for s in braces.group(1).split(',')):
+            if not spec:
+                continue
+            is_type = spec.startswith('type ')
+            if is_type:
+                spec = spec[5:].strip()
+            imported, _, local = spec.partition(' as ')
+            pair = (imported.strip(), (local or imported).strip())
+            (type_names if is_type else names).append(pair)
+    return default, namespace, names, type_names
+
+
+def parse_imports(source: str) -> list:
+    comments, _ = scan_source(source)
+    code = blank(source, comments)
+    imports = []
+    for m in IMPORT_RE.finditer(code):
+        default, namespace, names, type_names = parse_specifiers(m.group(2))
+        imports.append(Import(m.group(4), 'static', m.start(), m.end(), default, namespace, names,
+                              type_names, type_only=bool(m.group(1))))
+    for m in SIDE_EFFECT_RE.finditer(code):
+        imports.append(Import(m.group(2), 'side', m.start(), m.end()))
+    for m in REEXPORT_RE.finditer(code):
+        clause = m.group(2)
+        if clause.startswith('*'):
+            namespace = clause.split()[-1] if ' as ' in clause else '*'
+            imports.append(Import(m.group(4), 'reexport', m.start(), m.end(), namespace=namespace,
+                                  type_only=bool(m.group(1))))
+        else:
+            _, _, names, type_names = parse_specifiers(clause)
+            imports.append(Import(m.group(4), 'reexport', m.start(), m.end(), names=names,
+                                  type_names=type_names, type_only=bool(m.group(1))))
+    for m in DYNAMIC_RE.finditer(code):
+        imports.append(Import(m.group(2), 'dynamic', m.start(), m.end()))
+    imports.sort(key=lambda imp: imp.start)
+    return imports
+
+
+def parse_exports(source: str) -> set:
+    comments, _ = scan_source(source)
+    code = blank(source, comments)
+    exports = {m.group(1) for m in EXPORT_DECL_RE.finditer(code)}
+    if EXPORT_DEFAULT_RE.search(code):
+        exports.add('default')
+    for m in EXPORT_LIST_RE.finditer(code):
+        if m.group(1):
+            continue
+        for spec in m.group(2).split(','):
+            spec = spec.strip()
+            if spec and not spec.startswith('type '):
+                exports.add(spec.partition(' as ')[2].strip() or spec)
+    return exports
+
+
+def package_name(spec: str) -> str:
+    parts = spec.split('/')
+    return '/'.join(parts[:2]) if spec.startswith('@') else parts[0]
+
+
+def load_manual_chunks(path: str = VITE_CONFIG) -> dict:
+    """``{paquete: chunk}`` a partir de ``manualChunks`` en vite.config.ts."""
+    if not os.path.exists(path):
+        return {}
+    config = read_text(path)
+    start = config.find('manualChunks')
+    if start == -1:
+        return {}
+    block = config[start:config.find('}', start)]
+    chunks = {}
+    for m in MANUAL_CHUNK_RE.finditer(block):
+        for pkg in re.findall(r'[\'"]([^\'"]+)[\'"]', m.group(2)):
+            chunks[pkg] = m.group(1)
+    return chunks
+
+
+class Graph:
+    """Grafo de imports de la app. Los nodos son rutas relativas al repo
+    (``src/App.tsx``) o paquetes (``npm:react``, ``npm:lucide-react#Bell``)."""
+
+    def __init__(self, entry: str = ENTRY, package_sizes: dict = None, manual_chunks: dict = None):
+        self.entry = entry
+        self.modules = {}
+        self.package_sizes = dict(PACKAGE_SIZES if package_sizes is None else package_sizes)
+        self.manual_chunks = load_manual_chunks() if manual_chunks is None else manual_chunks
+        self.unresolved = []
+        self._deps = {}
+
+    @classmethod
+    def build(cls, entry: str = ENTRY, **kwargs) -> 'Graph':
+        graph = cls(entry, **kwargs)
+        graph.load(entry)
+        return graph
+
+    def load(self, path: str, source: str = None) -> None:
+        """Lee ``path`` y todo lo que alcanza (estático y dinámico)."""
+        pending = [(path, source)]
+        while pending:
+            current, text = pending.pop()
+            if current in self.modules and text is None:
+                continue
+            module = self.parse(current, read_text(current) if text is None else text)
+            self.modules[current] = module
+            self._deps.clear()
+            for imp in module.imports:
+                if imp.target and not imp.target.startswith('npm:') and imp.target not in self.modules:
+                    pending.append((imp.target, None))
+
+    def parse(self, path: str, source: str) -> Module:
+        module = Module(path, source, estimate_text(source), parse_imports(source), parse_exports(source),
+                        bool(OVERLAY_RE.search(source)))
+        for imp in module.imports:
+            imp.target = self.resolve(path, imp.spec)
+        return module
+
+    def resolve(self, importer: str, spec: str) -> str:
+        if not spec.startswith('.'):
+            return f'npm:{package_name(spec)}'
+        base = posixpath.normpath(posixpath.join(posixpath.dirname(importer), spec))
+        if base.endswith(EXTENSIONS) and os.path.isfile(base):
+            return base
+        for candidate in [base + ext for ext in EXTENSIONS] + [f'{base}/index{ext}' for ext in EXTENSIONS]:
+            if os.path.isfile(candidate):
+                return candidate
+        if not os.path.splitext(base)[1]:
+            self.unresolved.append((importer, spec))
+        return ''              # CSS, imágenes y demás assets van por otro lado
+
+    def with_source(self, path: str, source: str) -> 'Graph':
+        """Copia del grafo con ``path`` reemplazado por ``source`` (para simular)."""
+        other = Graph(self.entry, self.package_sizes, self.manual_chunks)
+        other.modules = dict(self.modules)
+        other.load(path, source)
+        return other
+
+    # ── Alcance ──
+
+    def resolve_export(self, path: str, name: str, seen: set = None) -> set:
+        """Módulos que hay que incluir para obtener ``name`` de ``path``,
+        siguiendo re-exports. Si no se puede saber, incluye todo el barrel."""
+        seen = set() if seen is None else seen
+        if path in seen or path not in self.modules:
+            return {path} if path else set()
+        seen.add(path)
+        module = self.modules[path]
+        if name in module.exports:
+            return {path}
+        stars = []
+        for imp in module.imports:
+            if imp.kind != 'reexport' or not imp.has_values or not imp.target:
+                continue
+            if imp.namespace == '*':
+                stars.append(imp)
+                continue
+            if imp.namespace == name:
+                return {path} | self._whole(imp.target)
+            for imported, exported in imp.names:
+                if exported == name:
+                    if imp.target.startswith('npm:'):
+                        return {path} | self._package_nodes(imp.target, [imported])
+                    return {path} | self.resolve_export(imp.target, imported, seen)
+        for imp in stars:
+            if imp.target.startswith('npm:'):
+                continue
+            found = self.resolve_export(imp.target, name, set(seen))
+            if any(name in self.modules[p].exports for p in found if p in self.modules):
+                return {path} | found
+        return {path}.union(*(self._whole(imp.target) for imp in stars))
+
+    def _whole(self, path: str) -> set:
+        """Un módulo con todos sus re-exports (``import *`` o de efecto)."""
+        if path.startswith('npm:'):
+            return {path}
+        out, stack = set(), [path]
+        while stack:
+            current = stack.pop()
+            if current in out or current not in self.modules:
+                continue
+            out.add(current)
+            stack.extend(imp.target for imp in self.modules[current].imports
+                         if imp.kind == 'reexport' and imp.has_values and imp.target)
+        return out
+
+    def _package_nodes(self, target: str, names: list) -> set:
+        pkg = target[4:]
+        if pkg in ICON_PACKAGES and names:
+            return {f'{target}#{name}' for name in names}
+        return {target}
+
+    def import_nodes(self, imp: Import) -> set:
+        """Nodos que entran al bundle por un import estático con valores."""
+        if not imp.target:
+            return set()
+        if imp.target.startswith('npm:'):
+            return self._package_nodes(imp.target, [imported for imported, _ in imp.bindings()
+                                                    if imported != 'default'])
+        if imp.kind == 'side' or imp.namespace:
+            return self._whole(imp.target)
+        nodes = {imp.target}
+        for imported, _ in imp.bindings():
+            nodes |= self.resolve_export(imp.target, imported)
+        return nodes
+
+    def provider(self, imp: Import, local: str) -> str:
+        """Módulo que define el binding ``local`` de ``imp`` (atraviesa barrels)."""
+        imported = next(a for a, b in imp.bindings() if b == local)
+        found = sorted(self.resolve_export(imp.target, imported) - {imp.target})
+        defining = [p for p in found if p in self.modules and imported in self.modules[p].exports]
+        return (defining or found or [imp.target])[-1]
+
+    def static_deps(self, path: str) -> set:
+        if path not in self._deps:
+            deps = set()
+            module = self.modules.get(path)
+            if module is not None:
+                for imp in module.imports:
+                    if imp.kind in ('static', 'side') and imp.has_values:
+                        deps |= self.import_nodes(imp)
+            deps.discard(path)
+            self._deps[path] = deps
+        return self._deps[path]
+
+    def dynamic_roots(self, nodes: set) -> set:
+        return {imp.target for path in nodes if path in self.modules
+                for imp in self.modules[path].imports if imp.kind == 'dynamic' and imp.target}
+
+    def closure(self, roots, skip: str = '') -> set:
+        seen = set()
+        stack = [r for r in roots if r != skip]
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            stack.extend(d for d in self.static_deps(current) if d != skip and d not in seen)
+        return seen
+
+    # ── Tamaños ──
+
+    def node_size(self, node: str) -> tuple:
+        """``(bytes, gzip)`` estimados de un nodo."""
+        if node.startswith('npm:'):
+            pkg, _, icon = node[4:].partition('#')
+            if icon:
+                return ICON_PACKAGES[pkg]
+            return tuple(self.package_sizes.get(pkg, (0, 0)))
+        module = self.modules[node]
+        return module.size, 0
+
+    def chunk_of(self, node: str) -> str:
+        if node.startswith('npm:'):
+            return self.manual_chunks.get(node[4:].partition('#')[0], 'main')
+        return 'main'
+
+    def measure(self, nodes) -> dict:
+        """``{chunk: (bytes, gzip)}`` de un conjunto de nodos. El gzip de los
+        módulos propios se mide comprimiendo el chunk concatenado."""
+        totals, texts = {}, {}
+        for node in sorted(nodes):
+            chunk = self.chunk_of(node)
+            size, gz = self.node_size(node)
+            raw, gzip_size = totals.get(chunk, (0, 0))
+            totals[chunk] = (raw + size, gzip_size + gz)
+            if not node.startswith('npm:'):
+                texts.setdefault(chunk, []).append(self.modules[node].text)
+        for chunk, parts in texts.items():
+            raw, gzip_size = totals[chunk]
+            totals[chunk] = (raw, gzip_size + len(zlib.compress('\n'.join(parts).encode('utf-8'), 9)))
+        return totals
+
+    def startup(self) -> set:
+        return self.closure([self.entry])
+
+
+# ─── Análisis ─────────────────────────────────────────────────────────────
+
+@dataclass
+class Candidate:
+    name: str
+    module: str
+    usage: str                # 'condicional' | 'siempre' | 'overlay' | 'ruta' | 'lazy'
+    saving: int = 0
+    saving_gzip: int = 0
+    blocked: str = ''
+    already_lazy: bool = False
+    together: list = field(default_factory=list)
+
+    @property
+    def suggested(self) -> bool:
+        return not self.blocked and self.saving >= MIN_SAVING and self.usage in ('condicional', 'overlay', 'ruta')
+
+
+def exclusive_savings(graph: Graph, nodes: set) -> list:
+    """``[(ahorro_bytes, módulo, arrastra)]`` de cada módulo propio del camino
+    de arranque: lo que sale si nadie lo importa estáticamente."""
+    base = graph.measure(nodes)['main'][0]
+    rows = []
+    for node in nodes:
+        if node == graph.entry or node.startswith('npm:'):
+            continue
+        remaining = graph.closure([graph.entry], skip=node)
+        dropped = nodes - remaining
+        rows.append((base - graph.measure(remaining).get('main', (0, 0))[0], node, len(dropped)))
+    rows.sort(key=lambda r: (-r[0], r[1]))
+    return rows
+
+
+def importers_of(graph: Graph, nodes: set) -> dict:
+    out = {}
+    for path in nodes:
+        for dep in graph.static_deps(path):
+            out.setdefault(dep, set()).add(path)
+    return out
+
+
+def jsx_elements(content: str, name: str) -> list:
+    """Spans ``(inicio, fin)`` de cada elemento ``<name ...>`` completo."""
+    spans = []
+    for m in re.finditer(rf'<{re.escape(name)}(?=[\s/>])', content):
+        end = _element_end(content, m.start(), name)
+        if end:
+            spans.append((m.start(), end))
+    # Los elementos anidados del mismo componente ya quedan dentro del externo
+    outer = []
+    for span in spans:
+        if not outer or span[0] >= outer[-1][1]:
+            outer.append(span)
+    return outer
+
+
+def _skip_string(content: str, i: int) -> int:
+    quote = content[i]
+    j = i + 1
+    while j < len(content) and content[j] != quote:
+        j += 2 if content[j] == '\\' else 1
+    return j + 1
+
+
+def _tag_end(content: str, i: int) -> tuple:
+    """Desde ``<`` recorre atributos y devuelve ``(fin, autocerrado)``."""
+    depth = 0
+    j = i + 1
+    n = len(content)
+    while j < n:
+        c = content[j]
+        if c in '\'"`':
+            j = _skip_string(content, j)
+            continue
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+        elif depth == 0 and c == '/' and content.startswith('/>', j):
+            return j + 2, True
+        elif depth == 0 and c == '>':
+            return j + 1, False
+        j += 1
+    return 0, False
+
+
+def _element_end(content: str, start: int, name: str) -> int:
+    end, self_closing = _tag_end(content, start)
+    if not end or self_closing:
+        return end
+    tag = re.compile(rf'<(/?){re.escape(name)}(?=[\s/>])')
+    depth = 1
+    pos = end
+    while depth:
+        m = tag.search(content, pos)
+        if not m:
+            return 0
+        if m.group(1):
+            depth -= 1
+            pos = content.find('>', m.end()) + 1
+        else:
+            inner_end, inner_closing = _tag_end(content, m.start())
+            depth += 0 if inner_closing else 1
+            pos = inner_end
+    return pos
+
+
+def classify_usage(content: str, spans: list, overlay: bool) -> str:
+    if not spans:
+        return 'sin JSX'
+    kinds = set()
+    for start, _ in spans:
+        before = content[:start].rstrip()
+        while before.endswith('('):
+            before = before[:-1].rstrip()
+        route = before.rfind('element={')
+        if route != -1 and before[route:].count('{') > before[route:].count('}'):
+            kinds.add('ruta')
+        elif before.endswith(('&&', '?', ':', '||')) or re.search(r'\breturn$', before):
+            kinds.add('condicional')
+        else:
+            kinds.add('siempre')
+    if kinds == {'condicional'} or kinds == {'ruta'}:
+        return kinds.pop()
+    return 'overlay' if overlay else 'siempre'
+
+
+def component_bindings(module: Module) -> list:
+    """``[(local, Import)]`` de los valores con nombre de componente."""
+    out = []
+    for imp in module.imports:
+        if imp.kind != 'static' or not imp.has_values or not imp.target or imp.target.startswith('npm:'):
+            continue
+        for _, local in imp.bindings():
+            if local[:1].isupper():
+                out.append((local, imp))
+    return out
+
+
+def analyze(graph: Graph, target: str, fallback: str = DEFAULT_FALLBACK) -> list:
+    """Candidatos a ``lazy()`` del archivo destino, con su ahorro simulado.
+
+    Los nombres que salen del mismo módulo (``NewAppointmentModal`` y
+    ``EditAppointmentModal``) se simulan juntos: convertir uno solo no saca
+    nada del chunk principal.
+    """
+    module = graph.modules[target]
+    base = graph.measure(graph.startup()).get('main', (0, 0))
+    groups = {}
+    for name, imp in component_bindings(module):
+        spans = jsx_elements(module.source, name)
+        if not spans or imp.target == SKELETONS:
+            continue
+        provider = graph.provider(imp, name)
+        overlay = graph.modules[provider].overlay if provider in graph.modules else False
+        candidate = Candidate(name, provider, classify_usage(module.source, spans, overlay))
+        groups.setdefault(candidate.module, []).append(candidate)
+    candidates = []
+    for group in groups.values():
+        names = [c.name for c in group]
+        try:
+            new_source, _ = lazify(graph, target, names, fallback)
+        except CodemodError as e:
+            blocked, saving = str(e), (0, 0)
+        else:
+            after = graph.with_source(target, new_source)
+            measured = after.measure(after.startup()).get('main', (0, 0))
+            blocked, saving = '', (base[0] - measured[0], base[1] - measured[1])
+        for c in group:
+            c.saving, c.saving_gzip = saving
+            c.blocked = blocked
+            c.together = [n for n in names if n != c.name]
+        candidates.extend(group)
+    for name in lazy_names(module.source):
+        candidates.append(Candidate(name, '', 'lazy', already_lazy=True))
+    candidates.sort(key=lambda c: (c.already_lazy, -c.saving, c.name))
+    return candidates
+
+
+def lazy_names(source: str) -> list:
+    return re.findall(r'^[ \t]*const\s+([\w$]+)\s*=\s*lazy\(', source, re.M)
+
+
+# ─── Codemod ──────────────────────────────────────────────────────────────
+
+class CodemodError(Exception):
+    pass
+
+
+def relative_spec(importer: str, path: str) -> str:
+    stem = os.path.splitext(path)[0]
+    if posixpath.basename(stem) == 'index':
+        stem = posixpath.dirname(stem)
+    spec = posixpath.relpath(stem, posixpath.dirname(importer))
+    return spec if spec.startswith('.') else f'./{spec}'
+
+
+def lazy_expression(graph: Graph, target: str, imp: Import, imported: str) -> str:
+    """``lazy(() => import('...'))`` que apunta al módulo que define el export."""
+    path, name = imp.target, imported
+    seen = set()
+    while path in graph.modules and name not in graph.modules[path].exports and path not in seen:
+        seen.add(path)
+        hop = next(((r.target, src) for r in graph.modules[path].imports
+                    if r.kind == 'reexport' and r.target and not r.target.startswith('npm:')
+                    for src, exported in r.names if exported == name), None)
+        if hop is None:
+            break
+        path, name = hop
+    spec = imp.spec if path == imp.target else relative_spec(target, path)
+    if name == 'default':
+        return f"lazy(() => import('{spec}'))"
+    return f"lazy(() => import('{spec}').then(m => ({{ default: m.{name} }})))"
+
+
+def format_import(imp: Import, default: str, names: list, source: str) -> str:
+    original = source[imp.start:imp.end]
+    indent = original[:len(original) - len(original.lstrip())]
+    quote = "'" if f"'{imp.spec}'" in original else '"'
+    semi = ';' if original.rstrip().endswith(';') else ''
+    specs = [f'{a} as {b}' if a != b else a for a, b in names]
+    specs += [f'type {a} as {b}' if a != b else f'type {a}' for a, b in imp.type_names]
+    clause = ', '.join(filter(None, [default, f"{{ {', '.join(specs)} }}" if specs else '']))
+    return f'{indent}import {clause} from {quote}{imp.spec}{quote}{semi}'
+
+
+def _ensure_named(source: str, imports: list, graph: Graph, target: str, spec_target: str,
+                  wanted: list, fallback_spec: str) -> tuple:
+    """Edición que agrega ``wanted`` al import de ``spec_target`` (o uno nuevo)."""
+    for imp in imports:
+        if imp.kind == 'static' and not imp.type_only and imp.target == spec_target:
+            have = {local for _, local in imp.names}
+            missing = [n for n in wanted if n not in have]
+            if not missing:
+                return None
+            names = list(imp.names) + [(n, n) for n in missing]
+            return imp.start, imp.end, format_import(imp, imp.default, names, source)
+    static = [imp for imp in imports if imp.kind in ('static', 'side')]
+    if not static:
+        pos = 0
+    elif fallback_spec == 'react':
+        pos = static[0].start
+    else:
+        pos = source.find('\n', static[-1].end) + 1
+    return pos, pos, f"import {{ {', '.join(wanted)} }} from '{fallback_spec}'\n"
+
+
+def lazify(graph: Graph, target: str, names: list, fallback: str = DEFAULT_FALLBACK,
+           fallback_for: dict = None) -> tuple:
+    """Reescribe ``target`` para cargar ``names`` con ``lazy()``.
+
+    Devuelve ``(contenido_nuevo, notas)``. Lanza ``CodemodError`` si algún
+    nombre no se puede convertir sin dejar su módulo en el bundle inicial.
+    """
+    fallback_for = fallback_for or {}
+    module = graph.modules[target]
+    source = module.source
+    bindings = dict(component_bindings(module))
+    existing_lazy = set(lazy_names(source))
+    edits, notes = [], []
+    by_import = {}
+    for name in names:
+        if name in existing_lazy:
+            notes.append(f"⏭️  {name}: ya es lazy")
+            continue
+        imp = bindings.get(name)
+        if imp is None:
+            raise CodemodError(f"{name} no es un componente importado estáticamente en {target}")
+        if imp.namespace:
+            raise CodemodError(f"{name} viene de un import * as {imp.namespace}")
+        by_import.setdefault(id(imp), (imp, []))[1].append(name)
+
+    skeletons = set()
+    wraps = []
+    for imp, selected in by_import.values():
+        keep_default = imp.default if imp.default not in selected else ''
+        keep_names = [(a, b) for a, b in imp.names if b not in selected]
+        if imp.default in selected and keep_names:
+            others = ', '.join(b for _, b in keep_names)
+            raise CodemodError(f"{imp.default} comparte el import con {others}: "
+                               f"el módulo seguiría en el chunk principal")
+        lines = []
+        if keep_default or keep_names or imp.type_names:
+            lines.append(format_import(imp, keep_default, keep_names, source))
+        for imported, local in imp.bindings():
+            if local in selected:
+                lines.append(f'const {local} = {lazy_expression(graph, target, imp, imported)}')
+        edits.append((imp.start, imp.end, '\n'.join(lines)))
+
+        for name in selected:
+            spans = jsx_elements(source, name)
+            provider = graph.provider(imp, name)
+            overlay = graph.modules[provider].overlay if provider in graph.modules else False
+            chosen = fallback_for.get(name, 'null' if overlay else fallback)
+            if chosen != 'null':
+                skeletons.add(chosen)
+            expr = 'null' if chosen == 'null' else f'<{chosen} />'
+            wrapped = sum(1 for start, _ in spans
+                          if not SUSPENSE_OPEN_RE.search(source[max(0, start - 200):start]))
+            wraps.append((name, expr))
+            loose = sum(1 for m in re.finditer(rf'(?<![\w$.]){re.escape(name)}\b', source)
+                        if not imp.start <= m.start() < imp.end and source[max(0, m.start() - 2):m.start()] not in ('</',)
+                        and source[m.start() - 1:m.start()] != '<')
+            detail = f"{wrapped} uso(s) envuelto(s), fallback {expr}"
+            if loose > 0:
+                detail += f" ⚠️ {loose} referencia(s) fuera de JSX: revisar que haya un Suspense arriba"
+            notes.append(f"✅ {name} → lazy ({detail})")
+
+    if not by_import:
+        return source, notes
+    react = graph.resolve(target, 'react')
+    edit = _ensure_named(source, module.imports, graph, target, react, ['lazy', 'Suspense'], 'react')
+    if edit:
+        edits = _merge_import_edit(edits, edit)
+    if skeletons:
+        edit = _ensure_named(source, module.imports, graph, target, SKELETONS, sorted(skeletons),
+                             relative_spec(target, SKELETONS))
+        if edit:
+            edits = _merge_import_edit(edits, edit)
+    edits.sort(key=lambda e: (e[0], e[1]))
+    content = render(source, edits)
+    # Un nombre a la vez: así un elemento convertido puede contener a otro
+    for name, expr in wraps:
+        spans = [span for span in jsx_elements(content, name)
+                 if not SUSPENSE_OPEN_RE.search(content[max(0, span[0] - 200):span[0]])]
+        content = render(content, [(start, end, wrap_suspense(content, start, end, expr))
+                                   for start, end in spans])
+    return content, notes
+
+
+def wrap_suspense(content: str, start: int, end: int, expr: str) -> str:
+    """``<Suspense fallback={expr}>`` alrededor del elemento. Si el elemento
+    ocupa varias líneas y empieza su propia línea, va en bloque e indentado."""
+    element = content[start:end]
+    open_tag = f'<Suspense fallback={{{expr}}}>'
+    indent = content[content.rfind('\n', 0, start) + 1:start]
+    if '\n' not in element or indent.strip():
+        return f'{open_tag}{element}</Suspense>'
+    body = re.sub(r'\n[ \t]+(?=\n)', '\n', element.replace('\n', '\n  '))
+    return f'{open_tag}\n{indent}  {body}\n{indent}</Suspense>'
+
+
+def _merge_import_edit(edits: list, edit: tuple) -> list:
+    """Une ``edit`` con una edición previa del mismo import (si la hay)."""
+    for i, (start, end, text) in enumerate(edits):
+        if (start, end) == edit[:2] and start != end:
+            # El import ya se reescribió: se le agregan los nombres que faltan
+            head, _, rest = text.partition('\n')
+            merged = _add_names(head, edit[2])
+            edits[i] = (start, end, '\n'.join(filter(None, [merged, rest])))
+            return edits
+    return edits + [edit]
+
+
+def _add_names(line: str, with_names: str) -> str:
+    wanted = re.search(r'\{([^}]*)\}', with_names).group(1).split(',')
+    match = re.search(r'\{([^}]*)\}', line)
+    have = [n.strip() for n in match.group(1).split(',') if n.strip()] if match else []
+    names = have + [w.strip() for w in wanted if w.strip() not in have]
+    if match:
+        return f"{line[:match.start()]}{{ {', '.join(names)} }}{line[match.end():]}"
+    return line.replace(' from ', f", {{ {', '.join(names)} }} from ", 1)
+
+
+# ─── Reporte ──────────────────────────────────────────────────────────────
+
+def kb(n: int) -> str:
+    return f'{n / 1024:,.1f} KB'
+
+
+def print_chunks(graph: Graph, label: str) -> dict:
+    nodes = graph.startup()
+    sizes = graph.measure(nodes)
+    main_raw, main_gz = sizes.get('main', (0, 0))
+    app_modules = sum(1 for n in nodes if not n.startswith('npm:'))
+    print(f"📊 {label}: chunk principal {kb(main_raw)} (gzip {kb(main_gz)}), {app_modules} módulos propios")
+    for chunk, (raw, gz) in sorted(sizes.items()):
+        if chunk != 'main':
+            print(f"   ↳ {chunk}: {kb(raw)} (gzip {kb(gz)}) precargado desde el inicio")
+    return sizes
+
+
+def report(graph: Graph, target: str, top: int, fallback: str) -> dict:
+    nodes = graph.startup()
+    sizes = print_chunks(graph, 'Arranque')
+    lazy = graph.dynamic_roots(set(graph.modules))
+    chunked = []
+    for root in sorted(lazy - nodes):
+        own = graph.closure([root]) - nodes
+        chunked.append((graph.measure(own).get('main', (0, 0))[0], root))
+    chunked.sort(reverse=True)
+    print(f"\n📄 Chunks lazy: {len(chunked)} (los 5 más grandes)")
+    for size, root in chunked[:5]:
+        print(f"   {kb(size):>10}  {root}")
+
+    importers = importers_of(graph, nodes)
+    rows = exclusive_savings(graph, nodes)
+    print(f"\n📊 Camino de arranque: lo que sale del chunk principal si el módulo deja de ser estático")
+    print(f"   {'ahorro':>10} {'propio':>10} {'arrastra':>8}  módulo (importado por)")
+    for saving, node, dragged in rows[:top]:
+        by = ', '.join(sorted(posixpath.relpath(p, 'src') for p in importers.get(node, ())))
+        print(f"   {kb(saving):>10} {kb(graph.node_size(node)[0]):>10} {dragged:>8}  {node} ({by})")
+
+    candidates = analyze(graph, target, fallback)
+    print(f"\n🔎 Componentes de {target}")
+    for c in candidates:
+        if c.already_lazy:
+            continue
+        mark = '⚠️' if c.blocked else ('✅' if c.suggested else '  ')
+        extra = f" - {c.blocked}" if c.blocked else ''
+        if c.together and not c.blocked:
+            extra += f" (junto con {', '.join(c.together)})"
+        print(f"   {mark} {c.name:<24} {c.usage:<12} {kb(c.saving):>10} (gzip {kb(c.saving_gzip)}){extra}")
+    already = [c.name for c in candidates if c.already_lazy]
+    if already:
+        print(f"   ⏭️  ya lazy: {', '.join(already)}")
+    suggested = [c.name for c in candidates if c.suggested]
+    if suggested:
+        print(f"\n📝 Sugeridos (--apply-suggested): {','.join(suggested)}")
+    for importer, spec in sorted(set(graph.unresolved)):
+        print(f"⚠️ Sin resolver: {spec} (en {importer})")
+    return {
+        'chunks': {k: {'bytes': v[0], 'gzip': v[1]} for k, v in sizes.items()},
+        'startup': [{'module': n, 'saving': s, 'size': graph.node_size(n)[0], 'drags': d,
+                     'importers': sorted(importers.get(n, ()))} for s, n, d in rows],
+        'lazy_chunks': [{'root': r, 'bytes': s} for s, r in chunked],
+        'candidates': [c.__dict__ | {'suggested': c.suggested} for c in candidates],
+    }
+
+
+def skeleton_names() -> set:
+    if not os.path.exists(SKELETONS):
+        return set()
+    return parse_exports(read_text(SKELETONS)) - {'default'}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Tamaño del bundle inicial y codemod a lazy()')
+    parser.add_argument('--entry', default=ENTRY)
+    parser.add_argument('--target', default=TARGET, help='archivo que recibe el codemod')
+    parser.add_argument('--top', type=int, default=25, help='filas del ranking del camino de arranque')
+    parser.add_argument('--json', metavar='PATH', help='guardar el reporte completo en JSON')
+    parser.add_argument('--package-sizes', metavar='JSON', help='{"paquete": [min, gzip]} medidos')
+    parser.add_argument('--lazy', metavar='A,B', help='componentes del destino a convertir a lazy()')
+    parser.add_argument('--apply-suggested', action='store_true', help='convertir los sugeridos')
+    parser.add_argument('--fallback', default=DEFAULT_FALLBACK,
+                        help='skeleton para componentes que no son overlay (default SkeletonGeneric)')
+    parser.add_argument('--fallback-for', action='append', default=[], metavar='NOMBRE=SKELETON',
+                        help='fallback de un componente: un skeleton o null')
+    parser.add_argument('--dry-run', action='store_true', help='mostrar el diff sin escribir')
+    args = parser.parse_args(argv)
+
+    package_sizes = None
+    if args.package_sizes:
+        with open(args.package_sizes, 'r', encoding='utf-8') as f:
+            package_sizes = PACKAGE_SIZES | {k: tuple(v) for k, v in json.load(f).items()}
+    fallback_for = dict(item.split('=', 1) for item in args.fallback_for)
+    available = skeleton_names() | {'null'}
+    for chosen in [args.fallback, *fallback_for.values()]:
+        if chosen not in available:
+            parser.error(f"{chosen} no está en {SKELETONS} (opciones: {', '.join(sorted(available))})")
+
+    graph = Graph.build(args.entry, package_sizes=package_sizes)
+    if args.target not in graph.modules:
+        parser.error(f'{args.target} no se alcanza desde {args.entry}')
+
+    if not args.lazy and not args.apply_suggested:
+        data = report(graph, args.target, args.top, args.fallback)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            print(f"\n📄 Reporte → {args.json}")
+        return 0
+
+    if args.lazy:
+        names = [n.strip() for n in args.lazy.split(',') if n.strip()]
+    else:
+        names = [c.name for c in analyze(graph, args.target, args.fallback) if c.suggested]
+        if not names:
+            print("⏭️ No hay candidatos sugeridos")
+            return 0
+    try:
+        new_source, notes = lazify(graph, args.target, names, args.fallback, fallback_for)
+    except CodemodError as e:
+        print(f"❌ {e}")
+        return 1
+    for note in notes:
+        print(f"   {note}")
+    old_source = graph.modules[args.target].source
+    if new_source == old_source:
+        print("⏭️ Sin cambios")
+        return 0
+    before = print_chunks(graph, 'Antes  ').get('main', (0, 0))
+    after_graph = graph.with_source(args.target, new_source)
+    after = print_chunks(after_graph, 'Después').get('main', (0, 0))
+    print(f"📊 Chunk principal: -{kb(before[0] - after[0])} (gzip -{kb(before[1] - after[1])})")
+
+    if args.dry_run:
+        print(unified_diff(args.target, old_source, new_source))
+    else:
+        write_atomic(args.target, new_source)
+        print(f"✅ {args.target} actualizado")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,452 @@
+"""Reescribe los ``select('*')`` con la lista de columnas que realmente se usan.
+
+Para cada consulta ``supabase.from('<tabla>').select('*')`` se busca el estado
+que llena (``setAppointments(appointmentsRes.data || [])``, ``setTasks(data)``,
+``setReminderConfigs(opt(0))``), el tipo de ese estado
+(``useState<Appointment[]>``) y la ``interface`` correspondiente en
+src/types/crm.ts o en el mismo archivo. Luego se cruzan los campos de la
+interface con lo que leen los archivos que consumen ese estado:
+
+- accesos ``x.campo`` / ``x?.campo``
+- strings ``'campo'`` (columnas de tablas, ``sortField``, exportaciones)
+- desestructuración ``const { campo } = x`` / ``({ campo }) =>``
+
+Siempre se incluyen ``id`` y las columnas de ``order``/filtros de la propia
+consulta. Si algún consumidor usa la fila completa (``JSON.stringify(fila)``,
+``Object.keys(fila)``, ``fila[clave]``) la tabla se deja en ``*``.
+
+Las consultas que ya tienen columnas explícitas solo se amplían si falta
+alguna que se usa. Uso::
+
+    python column_projection.py            # reporte
+    python column_projection.py --write    # aplica los cambios
+    python column_projection.py --json proyeccion.json
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+from dataclasses import asdict, dataclass, field
+
+from anchor_index import match_close
+from patch_engine import Patch, apply_patches, print_report, read_text
+from query_profiler import find_queries
+
+TYPES_PATH = 'src/types/crm.ts'
+HEAD_ONLY = 'solo cuenta filas (head: true)'
+
+INTERFACE_RE = re.compile(r'(?:export\s+)?interface\s+(\w+)(?:\s+extends\s+([\w\s,<>]+?))?\s*\{')
+FIELD_RE = re.compile(r'^\s*(?:readonly\s+)?[\'"]?(\w+)[\'"]?\??\s*:', re.M)
+INDEX_SIGNATURE_RE = re.compile(r'^\s*\[\s*\w+\s*:', re.M)
+SELECT_COLS_RE = re.compile(r'\.select\(\s*([\'"`])([^\'"`]*)\1')
+HEAD_ONLY_RE = re.compile(r'\bhead:\s*true\b')
+SETTER_RE = re.compile(r'\bset([A-Z]\w*)\(')
+ACCESS_RE = re.compile(r'\??\.\s*([a-zA-Z_]\w*)')
+LITERAL_RE = re.compile(r'[\'"`]([a-zA-Z_]\w*)[\'"`]')
+DESTRUCTURE_RE = re.compile(r'(?:(?:const|let|var)\s*\{([^{}]*)\}\s*=|\(\s*\{([^{}]*)\}\s*(?::[^()]*)?\)\s*=>)')
+COMMENT_RE = re.compile(r'//[^\n]*|/\*.*?\*/', re.S)
+ITERATOR_METHODS = 'map|filter|find|findLast|forEach|some|every|sort|flatMap|findIndex'
+
+
+@dataclass
+class Projection:
+    file: str
+    line: int
+    table: str
+    start: int = 0
+    end: int = 0
+    state: str = ''
+    interface: str = ''
+    current: list = field(default_factory=list)
+    columns: list = field(default_factory=list)
+    dropped: list = field(default_factory=list)
+    consumers: list = field(default_factory=list)
+    reason: str = ''
+
+    @property
+    def rewrite(self) -> bool:
+        if self.reason or not self.columns:
+            return False
+        return self.current == ['*'] or bool(set(self.columns) - set(self.current))
+
+
+def _top_level(body: str) -> str:
+    """Quita los tipos anidados ``{ ... }`` de un cuerpo de interface."""
+    out = []
+    i = 0
+    while i < len(body):
+        if body[i] == '{':
+            end = match_close(body, i)
+            if end == -1:
+                break
+            out.append('{}')
+            i = end
+            continue
+        out.append(body[i])
+        i += 1
+    return ''.join(out)
+
+
+def parse_interfaces(content: str) -> dict:
+    """``{nombre: [campos] | None}``; ``None`` si admite claves arbitrarias."""
+    raw = {}
+    for m in INTERFACE_RE.finditer(content):
+        end = match_close(content, m.end() - 1)
+        if end == -1:
+            continue
+        body = _top_level(content[m.end():end - 1])
+        parents = [p.strip() for p in (m.group(2) or '').split(',') if p.strip()]
+        fields = None if INDEX_SIGNATURE_RE.search(body) else list(dict.fromkeys(FIELD_RE.findall(body)))
+        raw[m.group(1)] = (fields, parents)
+
+    resolved = {}
+
+    def resolve(name, seen=()):
+        if name in resolved:
+            return resolved[name]
+        if name not in raw or name in seen:
+            return None
+        fields, parents = raw[name]
+        if fields is not None:
+            for parent in parents:
+                inherited = resolve(parent, seen + (name,))
+                if inherited is None:
+                    fields = None
+                    break
+                fields = list(dict.fromkeys(inherited + fields))
+        resolved[name] = fields
+        return fields
+
+    for name in raw:
+        resolve(name)
+    return resolved
+
+
+def state_types(content: str) -> dict:
+    """``{setter: (estado, tipo_de_fila)}`` para ``useState<T[]>`` del archivo."""
+    found = {}
+    for m in re.finditer(r'const\s*\[\s*(\w+)\s*,\s*(set\w+)\s*\]\s*=\s*useState\s*<', content):
+        depth = 1
+        i = m.end()
+        while i < len(content) and depth:
+            if content[i] == '<':
+                depth += 1
+            elif content[i] == '>' and content[i - 1] != '=':
+                depth -= 1
+            i += 1
+        generic = content[m.end():i - 1].strip()
+        row = re.fullmatch(r'(?:Array<\s*(\w+)\s*>|(\w+)\s*\[\])', generic)
+        found[m.group(2)] = (m.group(1), (row.group(1) or row.group(2)) if row else '')
+    return found
+
+
+def _statement_start(content: str, pos: int) -> int:
+    """Inicio de la sentencia que contiene ``pos`` (después del ``;``/``{`` previo)."""
+    depth = 0
+    i = pos - 1
+    while i >= 0:
+        c = content[i]
+        if c in ')]}':
+            depth += 1
+        elif c in '([{':
+            if depth:
+                depth -= 1
+            elif c == '{':
+                return i + 1
+        elif depth == 0 and c == ';':
+            return i + 1
+        i -= 1
+    return 0
+
+
+def _last(pattern: str, text: str):
+    found = None
+    for found in re.finditer(pattern, text):
+        pass
+    return found
+
+
+def _function_end(content: str, pos: int) -> int:
+    """Fin del bloque ``{ ... }`` más interno que contiene ``pos``."""
+    depth = 0
+    i = pos - 1
+    while i >= 0:
+        c = content[i]
+        if c == '}':
+            depth += 1
+        elif c == '{':
+            if depth == 0:
+                end = match_close(content, i)
+                return len(content) if end == -1 else end
+            depth -= 1
+        i -= 1
+    return len(content)
+
+
+def target_setter(content: str, start: int, end: int) -> str:
+    """Setter de estado que recibe el resultado de la consulta en ``start:end``.
+
+    Reconoce ``.then(({ data }) => setX(data))``, ``const { data } = await ...``
+    seguido de ``setX(data ...)``, y consultas dentro de
+    ``const [aRes, bRes] = await Promise.all([...])``, ``Promise.all([...]).then(([aRes]) => ...)``
+    y ``const r = await Promise.allSettled([...])`` leído con ``r[i]`` o un helper ``opt(i)``.
+    """
+    chain = content[start:end]
+    m = re.search(r'\.then\(\s*\(?\s*\{\s*data\b', chain)
+    if m:
+        setter = SETTER_RE.search(chain, m.end())
+        return f'set{setter.group(1)}' if setter else ''
+
+    stmt = _statement_start(content, start)
+    head = COMMENT_RE.sub('', content[stmt:start])
+    scope_end = _function_end(content, start)
+    promise = _last(r'Promise\.(?:all|allSettled)\s*\(\s*\[', content[stmt:start])
+    if promise:
+        bracket = stmt + promise.end() - 1
+        close = match_close(content, bracket)
+        if close == -1:
+            return ''
+        position = _element_index(content, bracket + 1, start)
+        before = COMMENT_RE.sub('', content[stmt:stmt + promise.start()])
+        rest = content[close:scope_end]
+        names = re.search(r'(?:const|let)\s*\[([^\]]*)\]\s*=\s*await\s*$', before)
+        then = re.match(r'\s*\)\s*\.then\(\s*\(\s*\[([^\]]*)\]', rest)
+        if names or then:
+            declared = [n.strip() for n in (names or then).group(1).split(',')]
+            name = declared[position] if position < len(declared) else ''
+            use = name and re.search(rf'\bset(\w+)\(\s*(?:\(\s*)?{re.escape(name)}\.data\b', rest)
+            return f'set{use.group(1)}' if use else ''
+        holder = re.search(r'(?:const|let)\s+(\w+)\s*=\s*await\s*$', before)
+        if not holder:
+            return ''
+        helper = re.search(rf'const\s+(\w+)\s*=\s*\(\s*\w+[^)]*\)\s*=>[^\n]*\b{holder.group(1)}\[', rest)
+        if helper:
+            use = re.search(rf'\bset(\w+)\(\s*{helper.group(1)}\(\s*{position}\s*\)', rest)
+        else:
+            use = re.search(rf'\bset(\w+)\(\s*{holder.group(1)}\[\s*{position}\s*\]', rest)
+        return f'set{use.group(1)}' if use else ''
+
+    data = _last(r'(?:const|let)\s*\{\s*data(?:\s*:\s*(\w+))?\b[^{}]*\}\s*=\s*await\s*$', head)
+    if not data:
+        return ''
+    name = data.group(1) or 'data'
+    rest = content[end:scope_end]
+    use = re.search(rf'\bset(\w+)\(\s*(?:\(\s*)?{name}\b', rest)
+    return f'set{use.group(1)}' if use else ''
+
+
+def _element_index(content: str, start: int, pos: int) -> int:
+    """Índice del elemento de un array literal que contiene ``pos``."""
+    index = 0
+    i = start
+    while i < pos:
+        c = content[i]
+        if c in '([{':
+            end = match_close(content, i)
+            if end == -1 or end > pos:
+                break
+            i = end
+            continue
+        if c in '\'"`':
+            i = content.find(c, i + 1) + 1
+            continue
+        if c == ',':
+            index += 1
+        i += 1
+    return index
+
+
+def mapped_fields(content: str, setter: str, pos: int) -> set:
+    """Campos leídos de cada fila si el setter recibe ``data.map(d => ...)``."""
+    m = re.compile(rf'\b{setter}\(').search(content, pos)
+    if not m:
+        return set()
+    end = match_close(content, m.end() - 1)
+    args = content[m.end():end - 1] if end != -1 else ''
+    mapper = re.search(r'\.map\(\s*\(?\s*(\w+)', args)
+    if not mapper:
+        return set()
+    return set(re.findall(rf'\b{mapper.group(1)}\s*\??\.\s*(\w+)', args[mapper.end():]))
+
+
+def source_files(root: str = 'src') -> list:
+    paths = sorted(glob.glob(os.path.join(root, '**', '*.ts'), recursive=True)
+                   + glob.glob(os.path.join(root, '**', '*.tsx'), recursive=True))
+    return [p for p in paths if '__tests__' not in p and os.sep + 'types' + os.sep not in p]
+
+
+def used_names(content: str) -> set:
+    names = set(ACCESS_RE.findall(content)) | set(LITERAL_RE.findall(content))
+    for m in DESTRUCTURE_RE.finditer(content):
+        for part in (m.group(1) or m.group(2)).split(','):
+            key = part.split(':')[0].split('=')[0].strip()
+            if re.fullmatch(r'\w+', key):
+                names.add(key)
+    return names
+
+
+def whole_row_use(content: str, state: str, interface: str) -> str:
+    """Describe el primer uso de la fila completa, o ``''`` si no hay."""
+    aliases = set(re.findall(rf'\b{state}\s*\.\s*(?:{ITERATOR_METHODS})\(\s*\(?\s*(\w+)', content))
+    aliases |= set(re.findall(rf'for\s*\(\s*const\s+(\w+)\s+of\s+{state}\b', content))
+    aliases |= set(re.findall(rf'\b(\w+)\s*:\s*{interface}\b(?!\s*\[)', content))
+    aliases |= set(re.findall(rf'const\s+(\w+)\s*=\s*{state}\s*\.\s*find\(', content))
+    aliases -= {'_', 'prev'}
+    for alias in sorted(aliases):
+        a = re.escape(alias)
+        m = re.search(rf'JSON\.stringify\(\s*{a}\s*\)|Object\.(?:keys|entries|values)\(\s*{a}\s*\)'
+                      rf'|\b{a}\s*\[\s*(?![\'"`\d])', content)
+        if m:
+            line = content.count('\n', 0, m.start()) + 1
+            return f"{line}: {m.group().strip()}"
+    return ''
+
+
+def project(root: str = 'src', types_path: str = TYPES_PATH) -> list:
+    """Calcula la proyección de cada ``select`` que llena un estado tipado."""
+    shared = parse_interfaces(read_text(types_path)) if os.path.exists(types_path) else {}
+    files = source_files(root)
+    contents = {path: read_text(path) for path in files}
+    names_cache = {}
+    # Estados declarados en otro archivo (p. ej. setLeads de CrmContext usado en LeadsView)
+    declared = {}
+    for path in files:
+        for setter, state in state_types(contents[path]).items():
+            declared.setdefault(setter, []).append(state)
+    elsewhere = {setter: found[0] for setter, found in declared.items() if len(set(found)) == 1}
+    projections = []
+    for path in files:
+        content = contents[path]
+        if 'supabase' not in content:
+            continue
+        states = dict(elsewhere, **state_types(content))
+        interfaces = dict(shared, **parse_interfaces(content))
+        for site in find_queries(path, content):
+            if site.operation != 'select':
+                continue
+            proj = Projection(site.file, site.line, site.table, site.start, site.end, current=list(site.columns))
+            projections.append(proj)
+            if HEAD_ONLY_RE.search(content, site.start, site.end):
+                proj.reason = HEAD_ONLY
+                continue
+            setter = target_setter(content, site.start, site.end)
+            if not setter:
+                proj.reason = 'no se encontró el estado que recibe la consulta'
+                continue
+            if setter not in states:
+                proj.reason = f'{setter} no es un useState<T[]> conocido'
+                continue
+            proj.state, proj.interface = states[setter]
+            if not proj.interface or proj.interface in ('any', 'unknown'):
+                proj.reason = f'{proj.state} no tiene un tipo de fila'
+                continue
+            fields = interfaces.get(proj.interface)
+            if fields is None:
+                proj.reason = f'interface {proj.interface} desconocida o con claves arbitrarias'
+                continue
+            if any('(' in c or ':' in c for c in site.columns):
+                proj.reason = 'la consulta usa joins o alias'
+                continue
+            foreign = mapped_fields(content, setter, site.start) - set(fields)
+            if foreign:
+                proj.reason = f"las filas se transforman leyendo {', '.join(sorted(foreign))}"
+                continue
+
+            word = re.compile(rf'\b(?:{re.escape(proj.state)}|{re.escape(proj.interface)})\b')
+            consumers = [p for p in files if p == path or word.search(contents[p])]
+            proj.consumers = consumers
+            used = set()
+            for consumer in consumers:
+                if consumer not in names_cache:
+                    names_cache[consumer] = used_names(contents[consumer])
+                used |= names_cache[consumer]
+                whole = whole_row_use(contents[consumer], proj.state, proj.interface)
+                if whole:
+                    proj.reason = f'{consumer}:{whole} usa la fila completa'
+                    break
+            if proj.reason:
+                continue
+            required = {'id'} | {c for c, _ in site.orders} | {c for _, c in site.filters}
+            proj.columns = [f for f in fields if f in used or f in required]
+            proj.columns += [c for c in sorted(required) if c and c not in proj.columns]
+            if site.columns != ['*']:
+                proj.columns += [c for c in site.columns if c not in proj.columns]
+            proj.dropped = [f for f in fields if f not in proj.columns]
+    return projections
+
+
+def build_patches(projections: list, contents: dict = None) -> dict:
+    """``{archivo: [Patch]}``. Consultas de la misma tabla en un archivo usan la unión de columnas.
+
+    Si alguna consulta de la tabla en ese archivo necesita la fila completa,
+    no se toca ninguna; los conteos ``head: true`` no cuentan.
+    """
+    groups = {}
+    for proj in projections:
+        if proj.reason != HEAD_ONLY:
+            groups.setdefault((proj.file, proj.table), []).append(proj)
+    by_file = {}
+    for (path, table), projs in sorted(groups.items()):
+        if any(p.reason for p in projs) or not any(p.rewrite for p in projs):
+            continue
+        columns = list(dict.fromkeys(c for p in projs for c in p.columns))
+        content = contents[path] if contents and path in contents else read_text(path)
+        anchors = {}
+        for proj in projs:
+            chain = content[proj.start:proj.end]
+            m = SELECT_COLS_RE.search(chain)
+            if not m:
+                continue
+            text = chain[:m.start()] + f".select('{', '.join(columns)}'" + chain[m.end():]
+            anchors.setdefault(chain, [0, text])[0] += 1
+        for n, (anchor, (count, text)) in enumerate(anchors.items()):
+            if anchor != text:
+                by_file.setdefault(path, []).append(Patch(f'project-{table}-{n}', anchor=anchor, text=text,
+                                                          expect=count))
+    return by_file
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reemplaza select('*') por las columnas usadas")
+    parser.add_argument('root', nargs='?', default='src')
+    parser.add_argument('--types', default=TYPES_PATH, help='archivo con las interfaces compartidas')
+    parser.add_argument('--write', action='store_true', help='aplica los cambios (por defecto solo reporta)')
+    parser.add_argument('--json', help='escribe la proyección en JSON')
+    args = parser.parse_args(argv)
+
+    projections = project(args.root, args.types)
+    rewrites = [p for p in projections if p.rewrite]
+    print(f"📊 {len(projections)} selects, {len(rewrites)} con proyección posible\n")
+    for proj in projections:
+        where = f"{proj.file}:{proj.line} {proj.table}"
+        if proj.reason:
+            if proj.current == ['*']:
+                print(f"⏭️  {where}: {proj.reason}")
+            continue
+        if not proj.rewrite:
+            continue
+        print(f"✅ {where} → {proj.state}: {proj.interface} "
+              f"({len(proj.columns)} columnas, {len(proj.dropped)} sin uso)")
+        print(f"      select('{', '.join(proj.columns)}')")
+        if proj.dropped:
+            print(f"      sin uso: {', '.join(proj.dropped)}")
+
+    failed = False
+    if args.write:
+        print()
+        for path, patches in build_patches(projections).items():
+            report = apply_patches(path, patches)
+            print_report(report)
+            failed = failed or not report.ok
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump([dict(asdict(p), rewrite=p.rewrite) for p in projections], f, indent=2, ensure_ascii=False)
+        print(f"\n📝 Proyección: {args.json}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,7 @@
-with open('src/App.tsx', 'r') as f:
-    content = f.read()
+from patch_engine import Patch
+from patch_ledger import run
+
+TARGET = 'src/App.tsx'
 
 # 1. Agregar remindersRes al Promise.all
 old_promise = """const [leadsRes, propsRes, teamRes, mortgagesRes, campaignsRes] = await Promise.all([
@@ -19,8 +21,6 @@ new_promise = """const [leadsRes, propsRes, teamRes, mortgagesRes, campaignsRes,
       supabase.from('reminder_config').select('*').order('lead_category')
     ])"""
 
-content = content.replace(old_promise, new_promise)
-
 # 2. Agregar setReminderConfigs después de setCampaigns
 old_sets = """setLeads(leadsRes.data || [])
     setProperties(propsRes.data || [])
@@ -36,9 +36,11 @@ new_sets = """setLeads(leadsRes.data || [])
     setReminderConfigs(remindersRes.data || [])
     console.log('🔍 Reminders cargados:', remindersRes.data)"""
 
-content = content.replace(old_sets, new_sets)
-
-with open('src/App.tsx', 'w') as f:
-    f.write(content)
+PATCHES = [
+    Patch('promise-all-reminders', anchor=old_promise, text=new_promise),
+    Patch('set-reminder-configs', anchor=old_sets, text=new_sets),
+]
 
-print("✅ Carga de reminders agregada al Promise.all")
+if __name__ == '__main__':
+    run(TARGET, PATCHES)
+    print("✅ Carga de reminders agregada al Promise.all")
@@ -1,20 +1,13 @@
-with open('src/App.tsx', 'r') as f:
-    lines = f.readlines()
+from patch_engine import Patch
+from patch_ledger import run
 
-# Buscar el useEffect que carga datos (después de línea 150, antes de 400)
-# Buscar donde se cargan leads, campaigns, etc y agregar reminders
-insert_at = None
-for i, line in enumerate(lines):
-    if "const { data: leadsData } = await supabase.from('leads')" in line:
-        # Buscar el cierre de este bloque y agregar después
-        for j in range(i, min(i+30, len(lines))):
-            if 'setLeads(' in lines[j]:
-                insert_at = j + 1
-                break
-        break
+TARGET = 'src/App.tsx'
 
-if insert_at:
-    reminder_load = """      
+# Buscar donde se cargan leads y agregar reminders después del primer setLeads(...)
+# (el ancla cubre desde la consulta de leads hasta el final de esa línea)
+leads_block = r"const \{ data: leadsData \} = await supabase\.from\('leads'\)(?:.*\n){0,29}?.*setLeads\(.*\n"
+
+reminder_load = """      
       // Cargar configuración de recordatorios
       const { data: reminders } = await supabase.from('reminder_config').select('*').order('lead_category')
       console.log('🔍 Reminders cargados:', reminders)
@@ -24,11 +17,11 @@ if insert_at:
       }
 
 """
-    lines.insert(insert_at, reminder_load)
-    
-    with open('src/App.tsx', 'w') as f:
-        f.writelines(lines)
-    
-    print(f"✅ Código de carga agregado después de línea {insert_at}")
-else:
-    print("❌ No encontré donde insertar")
+
+PATCHES = [
+    Patch('load-reminder-config', anchor=leads_block, regex=True, action='after', text=reminder_load),
+]
+
+if __name__ == '__main__':
+    run(TARGET, PATCHES)
+    print("✅ Código de carga agregado después de setLeads")
@@ -0,0 +1,391 @@
+"""Sugiere los índices que faltan para las consultas de src/.
+
+Toma la forma de cada ``supabase.from(t).select().eq().gte().order()`` que
+encuentra query_profiler.py (igualdades, rango y orden) y la compara con los
+``CREATE INDEX`` / ``UNIQUE`` / ``PRIMARY KEY`` de migrations/ (y con
+``pg_indexes`` si se da ``--dsn``). Un índice sirve a una consulta si empieza
+por sus columnas de igualdad y sigue con las del ``order`` en el mismo sentido
+(o todas invertidas: Postgres lo recorre al revés); sin ``order``, con la
+columna del rango.
+
+Solo se sugieren índices para formas que valen la pena:
+
+- la tabla tiene al menos ``--min-rows`` filas (``--stats`` de
+  query_profiler.py o ``ROW_ESTIMATES``; las tablas de configuración y
+  catálogo se quedan en ``DEFAULT_ROWS``): en tablas chicas un seq scan más
+  un sort cuesta menos que mantener el índice en cada escritura;
+- la forma tiene algo selectivo: una igualdad que no sea contra
+  ``true``/``false``/``null``, un rango o un orden. ``cancelled = false AND
+  sent = false`` deja pasar media tabla y el planner no usa el índice; por
+  lo mismo esas columnas no entran en los índices compuestos;
+- sin rango, si un índice existente ya resuelve las igualdades, solo queda
+  ordenar unas pocas filas y no hace falta otro.
+
+Con ``--write`` genera la siguiente migración numerada con un índice por
+forma que no esté cubierta; una forma cuyo índice es prefijo de otro
+sugerido se sirve con el más largo. ``--verify-sqlite`` corre
+``EXPLAIN QUERY PLAN`` de cada forma sobre una base creada con
+``migrate.py --sqlite ... --bootstrap`` y marca las que siguen ordenando en
+memoria o recorriendo la tabla completa.
+
+Uso::
+
+    python index_advisor.py                       # reporte
+    python index_advisor.py --write               # migrations/NNN_query_indexes.sql
+    python index_advisor.py --stats stats.json --min-rows 50000
+    python migrate.py --sqlite /tmp/crm.db --bootstrap && python index_advisor.py --verify-sqlite /tmp/crm.db
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import textwrap
+from dataclasses import dataclass, field
+
+from migrate import MIGRATIONS_DIR, discover
+from patch_engine import write_atomic
+from query_profiler import DEFAULT_ROWS, scan_tree
+
+EQUALITY = ('eq', 'is', 'in')
+RANGE = ('gt', 'gte', 'lt', 'lte')
+RESERVED = {'order', 'group', 'user', 'limit', 'offset', 'select', 'from', 'where', 'table', 'desc', 'asc'}
+MIN_ROWS = 10_000
+# Filas esperadas en producción de las tablas que crecen con los leads y la
+# actividad (para ~50k leads); --stats las reemplaza
+ROW_ESTIMATES = {
+    'leads': 50_000,
+    'lead_activities': 500_000,
+    'appointments': 40_000,
+    'mortgage_applications': 15_000,
+    'conversations': 50_000,
+    'documents': 30_000,
+    'scheduled_followups': 150_000,
+    'ai_responses': 200_000,
+    'health_checks': 100_000,
+    'audit_log': 500_000,
+}
+
+INDEX_RE = re.compile(
+    r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?"?(\w+)"?\s+'
+    r'ON\s+(?:ONLY\s+)?(?:public\.)?"?(\w+)"?\s*(?:USING\s+\w+\s*)?\(([^;]*?)\)\s*(WHERE\b[^;]*)?;',
+    re.I | re.S)
+TABLE_RE = re.compile(r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:public\.)?"?(\w+)"?\s*\(', re.I)
+UNIQUE_RE = re.compile(r'\b(?:UNIQUE|PRIMARY\s+KEY)\s*\(([^)]*)\)', re.I)
+COLUMN_KEY_RE = re.compile(r'^\s*"?(\w+)"?\s+[^,]*?\b(?:UNIQUE|PRIMARY\s+KEY)\b', re.I | re.M)
+IDENT_RE = re.compile(r'^\w+$')
+
+
+@dataclass
+class Index:
+    name: str
+    table: str
+    columns: list          # [(col, asc)]
+    source: str = ''
+
+
+@dataclass
+class Shape:
+    table: str
+    equals: tuple
+    range: str
+    orders: tuple          # ((col, asc), ...)
+    sites: list = field(default_factory=list)
+    flags: set = field(default_factory=set)
+
+    @property
+    def keys(self) -> tuple:
+        """Igualdades que van en el índice: las booleanas/nulas se filtran al leer."""
+        return tuple(c for c in self.equals if c not in self.flags)
+
+    @property
+    def selective(self) -> bool:
+        return bool(self.keys or self.range or self.orders)
+
+    @property
+    def tail(self) -> list:
+        if self.orders:
+            return list(self.orders)
+        return [(self.range, True)] if self.range else []
+
+    @property
+    def wanted(self) -> list:
+        return [(col, True) for col in self.keys] + self.tail
+
+    def describe(self) -> str:
+        parts = [f'{c} = ?' for c in self.equals] + ([f'{self.range} >= ?'] if self.range else [])
+        where = f" WHERE {' AND '.join(parts)}" if parts else ''
+        order = ', '.join(f"{c}{'' if asc else ' DESC'}" for c, asc in self.orders)
+        return f"{self.table}{where}{f' ORDER BY {order}' if order else ''}"
+
+
+def _index_columns(body: str) -> list:
+    columns = []
+    for part in body.split(','):
+        m = re.match(r'\s*"?(\w+)"?\s*(ASC|DESC)?\s*(?:NULLS\s+(?:FIRST|LAST))?\s*$', part, re.I)
+        if not m:
+            return []               # índice por expresión: no lo comparamos
+        columns.append((m.group(1), (m.group(2) or 'ASC').upper() == 'ASC'))
+    return columns
+
+
+def _table_body(sql: str, start: int) -> str:
+    depth = 0
+    for i in range(start, len(sql)):
+        if sql[i] == '(':
+            depth += 1
+        elif sql[i] == ')':
+            depth -= 1
+            if depth == 0:
+                return sql[start + 1:i]
+    return ''
+
+
+def parse_indexes(sql: str, source: str = '') -> list:
+    """Índices de ``CREATE INDEX`` (sin los parciales) y llaves de ``CREATE TABLE``."""
+    indexes = []
+    for m in INDEX_RE.finditer(sql):
+        columns = _index_columns(m.group(3))
+        if columns and not m.group(4):
+            indexes.append(Index(m.group(1), m.group(2).lower(), columns, source))
+    for m in TABLE_RE.finditer(sql):
+        table = m.group(1).lower()
+        body = _table_body(sql, m.end() - 1)
+        for key in UNIQUE_RE.findall(body):
+            columns = _index_columns(key)
+            if columns:
+                indexes.append(Index(f'{table}_key', table, columns, source))
+        for col in COLUMN_KEY_RE.findall(body):
+            indexes.append(Index(f'{table}_{col}_key', table, [(col, True)], source))
+    return indexes
+
+
+def existing_indexes(migrations: list, extra: list = ()) -> list:
+    indexes = []
+    for migration in migrations:
+        indexes.extend(parse_indexes(migration.sql, os.path.basename(migration.path)))
+    for definition in extra:
+        indexes.extend(parse_indexes(definition, 'base de datos'))
+    return indexes
+
+
+def query_shapes(root: str = 'src') -> list:
+    """Agrupa los ``select`` de src/ por forma (tabla, igualdades, rango, orden)."""
+    shapes = {}
+    for site in scan_tree(root):
+        if site.operation != 'select':
+            continue
+        equals = tuple(sorted({col for op, col in site.filters if op in EQUALITY and IDENT_RE.match(col)}))
+        ranges = [col for op, col in site.filters if op in RANGE and IDENT_RE.match(col)]
+        orders = tuple((col, asc) for col, asc in site.orders if IDENT_RE.match(col))
+        if equals == ('id',) or (not equals and not ranges and not orders):
+            continue                # por PK o sin nada que indexar
+        key = (site.table, equals, ranges[0] if ranges else '', orders)
+        shape = shapes.setdefault(key, Shape(*key))
+        shape.sites.append(f'{site.file}:{site.line}')
+        shape.flags.update(col for col in site.flags if col in equals)
+    return list(shapes.values())
+
+
+def serves(columns: list, shape: Shape) -> bool:
+    n = len(shape.keys)
+    if len(columns) < n or {c for c, _ in columns[:n]} != set(shape.keys):
+        return False
+    tail = shape.tail
+    rest = columns[n:n + len(tail)]
+    if [c for c, _ in rest] != [c for c, _ in tail]:
+        return False
+    if not shape.orders:
+        return True
+    same = [a == b for (_, a), (_, b) in zip(rest, tail)]
+    return all(same) or not any(same)
+
+
+@dataclass
+class Suggestion:
+    table: str
+    columns: list
+    shapes: list = field(default_factory=list)
+    name: str = ''
+
+    @property
+    def sql(self) -> str:
+        cols = ', '.join(f"{_quote(c)}{'' if asc else ' DESC'}" for c, asc in self.columns)
+        return f'CREATE INDEX IF NOT EXISTS {self.name} ON {self.table}({cols});'
+
+
+def _quote(col: str) -> str:
+    return f'"{col}"' if col.lower() in RESERVED else col
+
+
+def _index_name(table: str, columns: list, taken: set, avoid: set = frozenset()) -> str:
+    """``idx_<tabla>_<columnas>`` sin el ``_at``, salvo que choque con otra columna."""
+    short = []
+    for col, _ in columns:
+        trimmed = re.sub(r'_at$', '', col) or col
+        short.append(col if trimmed in short or trimmed in avoid else trimmed)
+    base = f"idx_{table}_{'_'.join(short)}"
+    name, n = base, 2
+    while name in taken:
+        name, n = f'{base}_{n}', n + 1
+    taken.add(name)
+    return name
+
+
+def _equality_order(shape: Shape, indexes: list) -> list:
+    """Igualdades en el orden de un índice existente que ya empiece por ellas."""
+    n = len(shape.keys)
+    for index in indexes:
+        if index.table == shape.table and {c for c, _ in index.columns[:n]} == set(shape.keys):
+            return [(c, True) for c, _ in index.columns[:n]]
+    return [(c, True) for c in shape.keys]
+
+
+def _keys_indexed(shape: Shape, indexes: list):
+    """Índice que ya resuelve las igualdades; lo que queda es ordenar unas pocas filas."""
+    n = len(shape.keys)
+    if not n or shape.range:
+        return None
+    return next((ix for ix in indexes if ix.table == shape.table
+                 and {c for c, _ in ix.columns[:n]} == set(shape.keys)), None)
+
+
+def table_rows(table: str, rows: dict = None) -> int:
+    return (rows or {}).get(table, ROW_ESTIMATES.get(table, DEFAULT_ROWS))
+
+
+def advise(shapes: list, indexes: list, rows: dict = None, min_rows: int = MIN_ROWS) -> tuple:
+    """Devuelve ``(cubiertas, sugerencias, descartadas)``.
+
+    ``cubiertas`` es ``[(forma, índice)]`` y ``descartadas`` es ``[(forma,
+    motivo)]`` para las formas sin índice que no valen uno.
+    """
+    covered = []
+    missing = []
+    skipped = []
+    for shape in shapes:
+        if not shape.selective:
+            skipped.append((shape, 'solo columnas booleanas/nulas'))
+            continue
+        index = next((ix for ix in indexes if ix.table == shape.table and serves(ix.columns, shape)), None)
+        if index:
+            covered.append((shape, index))
+        elif table_rows(shape.table, rows) < min_rows:
+            skipped.append((shape, f'{table_rows(shape.table, rows):,} filas'))
+        elif _keys_indexed(shape, indexes):
+            skipped.append((shape, f'las igualdades ya usan {_keys_indexed(shape, indexes).name}'))
+        else:
+            missing.append(shape)
+
+    # Primero las formas más largas: sus índices sirven también a sus prefijos
+    suggestions = []
+    for shape in sorted(missing, key=lambda s: (s.table, -len(s.wanted))):
+        target = next((s for s in suggestions if s.table == shape.table and serves(s.columns, shape)), None)
+        if not target:
+            target = Suggestion(shape.table, _equality_order(shape, indexes) + shape.tail)
+            suggestions.append(target)
+        target.shapes.append(shape)
+    taken = {ix.name for ix in indexes}
+    for suggestion in suggestions:
+        avoid = {c for shape in suggestion.shapes for c in shape.equals}
+        suggestion.name = _index_name(suggestion.table, suggestion.columns, taken, avoid)
+    return covered, suggestions, skipped
+
+
+def render_migration(suggestions: list, min_rows: int = MIN_ROWS) -> str:
+    tables = sorted({s.table for s in suggestions})
+    lines = [
+        '-- Migration: indexes for the query shapes in src/',
+        '-- Run this on Supabase SQL Editor',
+        '-- Generated by index_advisor.py from the .from().eq().order() chains it found;',
+        '-- each index lists the queries it serves. Only tables expected to pass',
+        f'-- {min_rows:,} rows get one; boolean-only filters are left to seq scans.',
+    ]
+    wrapped = textwrap.wrap(', '.join(tables), 80, break_on_hyphens=False)
+    lines += [f"-- {'Tables: ' if i == 0 else '        '}{chunk}" for i, chunk in enumerate(wrapped)]
+    for n, table in enumerate(tables, start=1):
+        lines += ['', f'-- {n}. {table}']
+        for suggestion in (s for s in suggestions if s.table == table):
+            for shape in suggestion.shapes:
+                lines.append(f"--    {shape.describe()}  ({', '.join(shape.sites)})")
+            lines.append(suggestion.sql)
+    return '\n'.join(lines) + '\n'
+
+
+def next_migration_path(migrations: list, name: str = 'query_indexes', directory: str = MIGRATIONS_DIR) -> str:
+    version = max((int(m.version) for m in migrations), default=0) + 1
+    return os.path.join(directory, f'{version:03d}_{name}.sql')
+
+
+def verify_sqlite(path: str, shapes: list) -> int:
+    """``EXPLAIN QUERY PLAN`` de cada forma; cuenta las que no usan índice."""
+    conn = sqlite3.connect(path)
+    bad = 0
+    for shape in shapes:
+        where = [f'{_quote(c)} = ?' for c in shape.equals] + ([f'{_quote(shape.range)} >= ?'] if shape.range else [])
+        order = ', '.join(f"{_quote(c)}{'' if asc else ' DESC'}" for c, asc in shape.orders)
+        sql = (f"SELECT * FROM {shape.table}{' WHERE ' + ' AND '.join(where) if where else ''}"
+               f"{' ORDER BY ' + order if order else ''}")
+        try:
+            plan = ' | '.join(row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', [None] * len(where)))
+        except sqlite3.OperationalError as exc:
+            print(f"   ⚠️ {shape.describe()}: {exc}")
+            continue
+        ok = 'TEMP B-TREE' not in plan and 'INDEX' in plan
+        bad += not ok
+        print(f"   {'✅' if ok else '❌'} {shape.describe()}\n      {plan}")
+    return bad
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Sugiere índices para las consultas de src/')
+    parser.add_argument('--root', default='src')
+    parser.add_argument('--dir', default=MIGRATIONS_DIR)
+    parser.add_argument('--stats', help='JSON de query_profiler.py con filas por tabla')
+    parser.add_argument('--min-rows', type=int, default=MIN_ROWS, help='no sugerir índices en tablas más chicas')
+    parser.add_argument('--dsn', help='leer también los índices de pg_indexes')
+    parser.add_argument('--write', action='store_true', help='escribir la migración con los índices faltantes')
+    parser.add_argument('--verify-sqlite', metavar='DB', help='EXPLAIN QUERY PLAN de cada forma en esta base')
+    args = parser.parse_args(argv)
+
+    migrations = discover(args.dir)
+    extra = []
+    if args.dsn:
+        from migrate import PostgresBackend
+        extra = PostgresBackend(args.dsn).indexes()
+    rows = {}
+    if args.stats:
+        with open(args.stats, 'r', encoding='utf-8') as f:
+            rows = {t: v.get('rows', DEFAULT_ROWS) for t, v in json.load(f).get('tables', {}).items()}
+
+    shapes = query_shapes(args.root)
+    indexes = existing_indexes(migrations, extra)
+    covered, suggestions, skipped = advise(shapes, indexes, rows, args.min_rows)
+
+    print(f"📊 {len(shapes)} formas de consulta, {len(indexes)} índices existentes")
+    for shape, index in covered:
+        print(f"   ✅ {shape.describe()} → {index.name} ({index.source})")
+    for shape, reason in skipped:
+        print(f"   ⏭️  {shape.describe()}  ({reason})")
+    for suggestion in suggestions:
+        for shape in suggestion.shapes:
+            print(f"   ❌ {shape.describe()}  [{shape.sites[0]}]")
+        print(f"      → {suggestion.sql}")
+
+    if args.write:
+        if suggestions:
+            path = next_migration_path(migrations, directory=args.dir)
+            write_atomic(path, render_migration(suggestions, args.min_rows))
+            print(f"📝 {path}: {len(suggestions)} índices")
+        else:
+            print("✅ Todas las consultas tienen índice; no hay migración que escribir")
+    if args.verify_sqlite:
+        print(f"🔎 EXPLAIN QUERY PLAN en {args.verify_sqlite}")
+        held = {id(shape) for shape, _ in skipped}
+        return 1 if verify_sqlite(args.verify_sqlite, [s for s in shapes if id(s) not in held]) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
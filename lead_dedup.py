@@ -0,0 +1,478 @@
+"""Detecta leads duplicados y genera planes de fusión.
+
+El modal de importación evita duplicados nuevos comparando teléfonos
+normalizados, pero la tabla ya trae duplicados de antes: el mismo número
+escrito como ``+52 1 55...`` y ``55...``, o el mismo cliente capturado dos
+veces con un dígito mal. Este script lee un export de ``leads`` en una sola
+pasada y agrupa:
+
+- **phone**: misma clave de teléfono (``normalizePhone`` y los últimos
+  ``--phone-digits`` dígitos, así ``+5215512345678`` = ``5512345678``).
+- **name**: mismo nombre difuso (sin acentos, sin ``de/del/la``, tokens
+  ordenados, ``v→b``, ``z→s``...) y teléfonos a un dígito de distancia.
+
+Por lead solo se guardan unos enteros en ``array`` (clave de teléfono, hash
+del nombre, fecha de alta) más el id; los grupos salen de ordenar esos
+arreglos, sin diccionarios del tamaño de la tabla: 1M de leads son ~250 MB y
+~12 s (``--bench 1000000``).
+
+El sobreviviente de cada grupo es el lead más antiguo. El plan remapea
+``lead_id`` en ``appointments``, ``mortgage_applications`` y
+``lead_activities`` (más lo que se pase con ``--fk``). Si se dan exports de
+esas tablas con ``--related``, también se remapean las filas que apuntan a un
+lead que no está en el export pero cuyo ``lead_phone`` cae en un grupo; un
+``lead_id`` que sí está en el export nunca se toca por teléfono. Esos
+huérfanos van a su propia tabla de mapeo en el SQL: solo alimentan los
+UPDATE, y el DELETE borra únicamente duplicados que vienen del export (un
+huérfano puede ser un lead creado después del export).
+
+Los grupos con el mismo teléfono y nombres distintos (``review``: puede ser
+una familia compartiendo número) quedan en el plan pero fuera del SQL, salvo
+con ``--include-review``. El plan se escribe al final, con los ids huérfanos
+que se remapean en cada grupo, para que lo revise una persona antes de
+correr el SQL.
+
+Uso::
+
+    python lead_dedup.py leads.csv --plan merge-plan.jsonl --sql merge.sql
+    python lead_dedup.py leads.jsonl --related appointments=appointments.csv --fk event_registrations
+    python lead_dedup.py --bench 1000000
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+
+PHONE_DIGITS = 10
+MIN_DIGITS = 8
+SQL_CHUNK = 1000
+LEAD_COLUMNS = ('id', 'name', 'phone', 'created_at')
+
+# tabla -> columna de teléfono (None si la tabla no la tiene)
+FOREIGN_KEYS = {
+    'appointments': 'lead_phone',
+    'mortgage_applications': 'lead_phone',
+    'lead_activities': None,
+}
+
+STOPWORDS = {'de', 'del', 'la', 'las', 'los', 'y', 'sr', 'sra', 'srta', 'lic', 'ing', 'dr', 'dra'}
+SOUNDS = [(re.compile(p), r) for p, r in (
+    (r'h', ''), (r'll', 'y'), (r'v', 'b'), (r'z', 's'), (r'c(?=[ei])', 's'),
+    (r'qu', 'k'), (r'c', 'k'), (r'(.)\1+', r'\1'),
+)]
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+NON_DIGIT_RE = re.compile(r'\D')
+ACCENTS = str.maketrans('áéíóúüñàèìòù', 'aeiouunaeiou')
+
+
+def phone_key(phone: str, digits: int = PHONE_DIGITS) -> int:
+    """Últimos ``digits`` dígitos como entero; 0 si el teléfono no es válido.
+
+    Son los dígitos de ``normalizePhone`` (que solo deja dígitos y ``+``).
+    """
+    only = NON_DIGIT_RE.sub('', phone or '')
+    if len(only) < MIN_DIGITS:
+        return 0
+    return int(only[-digits:])
+
+
+@lru_cache(maxsize=1 << 16)
+def _fold_token(token: str) -> str:
+    for pattern, repl in SOUNDS:
+        token = pattern.sub(repl, token)
+    return token
+
+
+@lru_cache(maxsize=1 << 18)
+def name_key(name: str) -> str:
+    """Nombre difuso: sin acentos, sin títulos ni partículas, tokens ordenados."""
+    folded = (name or '').lower().translate(ACCENTS)
+    if not folded.isascii():
+        folded = unicodedata.normalize('NFKD', folded)
+        folded = ''.join(c for c in folded if not unicodedata.combining(c))
+    tokens = [_fold_token(t) for t in NON_ALNUM_RE.split(folded) if t and t not in STOPWORDS]
+    # Un solo token ("Cliente", "Juan") no basta para fusionar por nombre
+    return ' '.join(sorted(tokens)) if len(tokens) >= 2 else ''
+
+
+def _one_digit_apart(a: int, b: int) -> bool:
+    diff = 0
+    while a or b:
+        if a % 10 != b % 10:
+            diff += 1
+            if diff > 1:
+                return False
+        a //= 10
+        b //= 10
+    return diff == 1
+
+
+def _epoch(value: str) -> float:
+    try:
+        return datetime.fromisoformat(value).timestamp() if value else float('inf')
+    except ValueError:
+        return float('inf')
+
+
+def iter_rows(path: str, columns: tuple):
+    """Tuplas con ``columns`` de un export CSV, JSONL o JSON (arreglo)."""
+    if path.endswith('.csv'):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            picks = [header.index(c) if c in header else None for c in columns]
+            width = len(header)
+            for row in reader:
+                if len(row) < width:
+                    row += [''] * (width - len(row))
+                yield tuple(row[i] if i is not None else '' for i in picks)
+        return
+    if path.endswith(('.jsonl', '.ndjson')):
+        with open(path, 'r', encoding='utf-8') as f:
+            records = (json.loads(line) for line in f if line.strip())
+            for record in records:
+                yield tuple(str(record.get(c) or '') for c in columns)
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for record in json.load(f):
+            yield tuple(str(record.get(c) or '') for c in columns)
+
+
+class LeadIndex:
+    """Índice compacto de leads: una posición por lead en arreglos paralelos."""
+
+    def __init__(self, digits: int = PHONE_DIGITS):
+        self.digits = digits
+        self.ids = []
+        self.phones = array('q')
+        self.names = array('q')
+        self.created = array('d')
+        self.parent = array('l')
+        self.by_name = array('b')
+
+    def add(self, lead_id: str, name: str, phone: str, created_at: str) -> None:
+        self.ids.append(lead_id)
+        self.phones.append(phone_key(phone, self.digits))
+        key = name_key(name)
+        self.names.append(hash(key) if key else 0)
+        self.created.append(_epoch(created_at))
+        self.parent.append(len(self.parent))
+        self.by_name.append(0)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return
+        # La raíz es siempre el lead más antiguo: es el sobreviviente
+        if (self.created[rb], rb) < (self.created[ra], ra):
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+
+    def link_phones(self) -> int:
+        """Une leads con la misma clave de teléfono. Devuelve cuántas uniones hizo."""
+        phones = self.phones
+        order = sorted((i for i in range(len(phones)) if phones[i]), key=phones.__getitem__)
+        links = 0
+        for prev, cur in zip(order, order[1:]):
+            if phones[prev] == phones[cur]:
+                self.union(prev, cur)
+                links += 1
+        return links
+
+    def link_names(self) -> int:
+        """Une leads con el mismo nombre difuso y teléfonos a un dígito."""
+        names, phones = self.names, self.phones
+        order = sorted((i for i in range(len(names)) if names[i] and phones[i]), key=names.__getitem__)
+        links = 0
+        start = 0
+        while start < len(order):
+            end = start + 1
+            while end < len(order) and names[order[end]] == names[order[start]]:
+                end += 1
+            if end - start > 1:
+                run = order[start:end]
+                if len({phones[i] for i in run}) > 1:
+                    links += self._link_run(run)
+            start = end
+        return links
+
+    def _link_run(self, run: list) -> int:
+        # Dos teléfonos a un dígito de distancia coinciden en la mitad alta o
+        # en la baja: se comparan solo los que comparten alguna mitad
+        phones = self.phones
+        half = 10 ** (self.digits // 2)
+        buckets = {}
+        for i in run:
+            buckets.setdefault((0, phones[i] // half), []).append(i)
+            buckets.setdefault((1, phones[i] % half), []).append(i)
+        links = 0
+        for bucket in buckets.values():
+            for a, i in enumerate(bucket):
+                for j in bucket[a + 1:]:
+                    if _one_digit_apart(phones[i], phones[j]) and self.find(i) != self.find(j):
+                        self.union(i, j)
+                        self.by_name[i] = self.by_name[j] = 1
+                        links += 1
+        return links
+
+    def clusters(self):
+        """Produce ``(sobreviviente, [duplicados])`` ordenados por sobreviviente."""
+        roots = array('l', (self.find(i) for i in range(len(self))))
+        order = sorted((i for i in range(len(roots)) if roots[i] != i), key=roots.__getitem__)
+        start = 0
+        while start < len(order):
+            root = roots[order[start]]
+            end = start
+            while end < len(order) and roots[order[end]] == root:
+                end += 1
+            yield root, order[start:end]
+            start = end
+
+
+@dataclass
+class Plan:
+    clusters: int = 0
+    merged: int = 0
+    by_name: int = 0
+    review: int = 0
+    held: int = 0
+    groups: list = field(default_factory=list)
+    remap: dict = field(default_factory=dict)
+    orphan_remap: dict = field(default_factory=dict)
+    by_phone: dict = field(default_factory=dict)
+    orphans: dict = field(default_factory=dict)
+    related: dict = field(default_factory=dict)
+
+
+def build_plan(index: LeadIndex, include_review: bool = False) -> Plan:
+    """Arma el mapa ``id viejo -> sobreviviente`` de los grupos que se fusionan."""
+    plan = Plan()
+    for root, members in index.clusters():
+        plan.clusters += 1
+        by_name = any(index.by_name[i] for i in members) or index.by_name[root]
+        plan.by_name += bool(by_name)
+        # Mismo teléfono con nombres distintos: puede ser familia compartiendo número
+        names = {index.names[i] for i in (root, *members) if index.names[i]}
+        review = len(names) > 1
+        plan.review += review
+        survivor = index.ids[root]
+        apply = include_review or not review
+        plan.groups.append({
+            'survivor': survivor,
+            'merged': [index.ids[i] for i in members],
+            'match': 'name' if by_name else 'phone',
+            'review': review,
+            'apply': apply,
+        })
+        if not apply:
+            plan.held += 1
+            continue
+        plan.merged += len(members)
+        for i in members:
+            plan.remap[index.ids[i]] = survivor
+        for i in (root, *members):
+            if index.phones[i]:
+                plan.by_phone[index.phones[i]] = survivor
+    return plan
+
+
+def _in_sorted(items: list, value: str) -> bool:
+    pos = bisect_left(items, value)
+    return pos < len(items) and items[pos] == value
+
+
+def scan_related(table: str, path: str, index: LeadIndex, plan: Plan, phone_column, lead_ids: list) -> None:
+    """Cuenta filas a remapear y agrega ids huérfanos que coinciden por teléfono.
+
+    ``lead_ids`` son los ids del export ordenados: un ``lead_id`` que está
+    ahí es un lead real y no se remapea aunque su teléfono caiga en un grupo.
+    """
+    by_id = by_phone = 0
+    for lead_id, phone in iter_rows(path, ('lead_id', phone_column or 'lead_id')):
+        if lead_id in plan.remap or lead_id in plan.orphan_remap:
+            by_id += 1
+            continue
+        if not phone_column or not lead_id or _in_sorted(lead_ids, lead_id):
+            continue
+        survivor = plan.by_phone.get(phone_key(phone, index.digits))
+        if survivor:
+            plan.orphan_remap[lead_id] = survivor
+            plan.orphans.setdefault(survivor, []).append({'table': table, 'lead_id': lead_id})
+            by_phone += 1
+    plan.related[table] = (by_id, by_phone)
+
+
+def write_plan(path: str, plan: Plan) -> None:
+    """Un grupo por línea, con los huérfanos que se le remapean."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for group in plan.groups:
+            orphans = plan.orphans.get(group['survivor'])
+            f.write(json.dumps(dict(group, orphans=orphans) if orphans else group) + '\n')
+
+
+def _write_mapping(f, table: str, remap: dict) -> None:
+    f.write(f'CREATE TEMP TABLE {table} (old_id uuid PRIMARY KEY, new_id uuid NOT NULL) ON COMMIT DROP;\n')
+    items = list(remap.items())
+    for start in range(0, len(items), SQL_CHUNK):
+        values = ',\n  '.join(f"('{old}', '{new}')" for old, new in items[start:start + SQL_CHUNK])
+        f.write(f'INSERT INTO {table} VALUES\n  {values};\n')
+
+
+def write_sql(path: str, plan: Plan, tables: dict) -> None:
+    """SQL en una transacción: tablas temporales de mapeo y un UPDATE por tabla.
+
+    ``lead_merge`` tiene los duplicados del export y es lo único que se
+    borra; ``lead_orphan_merge`` (huérfanos por teléfono) solo remapea.
+    """
+    mappings = ['lead_merge'] + (['lead_orphan_merge'] if plan.orphan_remap else [])
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('-- Fusion de leads duplicados (generado por lead_dedup.py)\n')
+        f.write('-- Run this on Supabase SQL Editor\n\nBEGIN;\n\n')
+        _write_mapping(f, 'lead_merge', plan.remap)
+        if plan.orphan_remap:
+            _write_mapping(f, 'lead_orphan_merge', plan.orphan_remap)
+        f.write('\n')
+        for table, phone_column in tables.items():
+            for mapping in mappings:
+                if phone_column:
+                    f.write(f'UPDATE {table} t SET lead_id = m.new_id, {phone_column} = l.phone\n'
+                            f'  FROM {mapping} m JOIN leads l ON l.id = m.new_id WHERE t.lead_id = m.old_id;\n')
+                else:
+                    f.write(f'UPDATE {table} t SET lead_id = m.new_id FROM {mapping} m WHERE t.lead_id = m.old_id;\n')
+        f.write('DELETE FROM leads l USING lead_merge m WHERE l.id = m.old_id;\n\nCOMMIT;\n')
+
+
+def dedup(leads_path: str, digits: int = PHONE_DIGITS, names: bool = True, plan_path: str = '',
+          related: dict = None, tables: dict = None, include_review: bool = False) -> tuple:
+    index = LeadIndex(digits)
+    for row in iter_rows(leads_path, LEAD_COLUMNS):
+        index.add(*row)
+    index.link_phones()
+    if names:
+        index.link_names()
+    plan = build_plan(index, include_review)
+    if related:
+        lead_ids = sorted(index.ids)
+        for table, path in related.items():
+            scan_related(table, path, index, plan, (tables or FOREIGN_KEYS).get(table), lead_ids)
+    if plan_path:
+        write_plan(plan_path, plan)
+    return index, plan
+
+
+def write_sample_csv(path: str, rows: int, seed: int = 11) -> None:
+    """Leads sintéticos con ~5% de duplicados (mismo número con otro formato o un dígito mal)."""
+    rnd = random.Random(seed)
+    first = ['Juan', 'José', 'María', 'Ana', 'Luis', 'Carlos', 'Verónica', 'Sofía', 'Héctor', 'Lucía',
+             'Jorge', 'Fernanda', 'Miguel', 'Guadalupe', 'Alejandro', 'Daniela', 'Ricardo', 'Paola']
+    last = ['Pérez', 'González', 'Hernández', 'López', 'Martínez', 'Sánchez', 'Ramírez', 'Cruz', 'Vázquez',
+            'García', 'Rodríguez', 'Flores', 'Gómez', 'Díaz', 'Reyes', 'Morales', 'Jiménez', 'Torres',
+            'Ruiz', 'Mendoza', 'Aguilar', 'Ortiz', 'Castillo', 'Romero', 'Álvarez', 'Chávez']
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        out = csv.writer(f)
+        out.writerow(['id', 'name', 'phone', 'created_at'])
+        previous = []
+        for i in range(rows):
+            if previous and rnd.random() < 0.05:
+                name, phone = rnd.choice(previous)
+                if rnd.random() < 0.5:
+                    phone = '+52 1 ' + phone[-10:]
+                else:
+                    pos = rnd.randrange(len(phone) - 4, len(phone))
+                    phone = phone[:pos] + str((int(phone[pos]) + 1) % 10) + phone[pos + 1:]
+                    name = name.upper().replace('É', 'E').replace('Á', 'A')
+            else:
+                name = f'{rnd.choice(first)} {rnd.choice(last)} {rnd.choice(last)}'
+                phone = str(rnd.randrange(10**9, 10**10))
+                if len(previous) < 10000:
+                    previous.append((name, phone))
+                elif rnd.random() < 0.01:
+                    previous[rnd.randrange(len(previous))] = (name, phone)
+            out.writerow([f'00000000-0000-4000-8000-{i:012d}', name, phone,
+                          f'2025-{1 + i * 12 // rows:02d}-01T00:00:00+00:00'])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Agrupa leads duplicados y genera planes de fusión')
+    parser.add_argument('leads', nargs='?', help='export de leads (.csv, .jsonl o .json) con id, name, phone, created_at')
+    parser.add_argument('--plan', help='plan de fusión en JSONL (un grupo por línea)')
+    parser.add_argument('--sql', help='SQL que remapea llaves foráneas y borra los duplicados')
+    parser.add_argument('--related', action='append', default=[], metavar='TABLA=EXPORT',
+                        help='export de una tabla con lead_id para contar y remapear por teléfono')
+    parser.add_argument('--fk', action='append', default=[], metavar='TABLA[.COLUMNA_TELEFONO]',
+                        help='otra tabla con lead_id a remapear')
+    parser.add_argument('--phone-digits', type=int, default=PHONE_DIGITS)
+    parser.add_argument('--no-names', action='store_true', help='solo agrupar por teléfono')
+    parser.add_argument('--include-review', action='store_true',
+                        help='fusionar también los grupos con nombres distintos (review)')
+    parser.add_argument('--bench', type=int, metavar='ROWS', help='benchmark con ROWS leads sintéticos')
+    args = parser.parse_args(argv)
+
+    tables = dict(FOREIGN_KEYS)
+    for spec in args.fk:
+        table, _, phone_column = spec.partition('.')
+        tables[table] = phone_column or None
+    related = dict(spec.split('=', 1) for spec in args.related)
+
+    tmp = None
+    leads = args.leads
+    if args.bench:
+        tmp = tempfile.TemporaryDirectory()
+        leads = os.path.join(tmp.name, 'leads.csv')
+        write_sample_csv(leads, args.bench)
+        print(f"📄 {args.bench:,} leads sintéticos")
+    elif not leads:
+        parser.error('falta el export de leads')
+
+    try:
+        t0 = time.perf_counter()
+        index, plan = dedup(leads, args.phone_digits, not args.no_names, args.plan or '', related, tables,
+                            args.include_review)
+        seconds = time.perf_counter() - t0
+    finally:
+        if tmp:
+            tmp.cleanup()
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"📊 {len(index):,} leads en {seconds:.2f} s (pico {peak:,.0f} MB)")
+    print(f"   {plan.clusters:,} grupos, {plan.merged:,} duplicados a fusionar")
+    print(f"   {plan.by_name:,} grupos por nombre + teléfono a un dígito")
+    if plan.held:
+        print(f"   ⚠️ {plan.held:,} grupos con nombres distintos quedan fuera del SQL: revisar el plan "
+              f"(--include-review para fusionarlos)")
+    elif plan.review:
+        print(f"   ⚠️ {plan.review:,} grupos con nombres distintos incluidos por --include-review")
+    for table, (by_id, by_phone) in plan.related.items():
+        print(f"   {table}: {by_id:,} filas por lead_id, {by_phone:,} huérfanas por teléfono")
+    if args.plan:
+        print(f"📝 Plan: {args.plan}")
+    if args.sql:
+        write_sql(args.sql, plan, tables)
+        print(f"📝 SQL: {args.sql}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,584 @@
+"""Importador masivo de leads desde CSV, fuera del navegador.
+
+ImportExportModal.tsx lee el CSV completo en memoria y hace un
+``supabase.from('leads').insert(...)`` por fila: 20k filas son 20k viajes.
+Este script lee el CSV en streaming, aplica exactamente las mismas reglas del
+modal (``HEADER_ALIASES``, ``STATUS_REVERSE``, ``normalizePhone``, validación
+de teléfono y duplicados) y envía los leads en lotes, con varios lotes en
+vuelo a la vez. Las tablas de alias se leen del propio .tsx para que no se
+desincronicen.
+
+Cada lote terminado queda en un checkpoint; si el proceso se corta, el
+siguiente run con el mismo CSV salta esos lotes. Los lotes son atómicos (un
+solo INSERT). Si un lote se reintenta después de un timeout o un corte de
+conexión, antes se consulta qué teléfonos del lote ya están en la BD (el
+intento anterior pudo haber llegado) y solo se envía el resto, así que una
+fila se inserta como mucho una vez.
+
+Los errores 4xx no se reintentan: el lote se parte en mitades hasta aislar
+las filas que la BD rechaza, que van al archivo de rechazados, y el resto se
+inserta.
+
+Uso::
+
+    python lead_import.py leads.csv --url https://xxx.supabase.co --key $SUPABASE_SERVICE_KEY
+    python lead_import.py leads.csv --sqlite leads.db --batch-size 500 --jobs 4
+    python lead_import.py --bench 20000 --latency-ms 40   # filas por viaje vs lotes
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from patch_engine import read_text, write_atomic
+
+MODAL_PATH = 'src/components/ImportExportModal.tsx'
+TYPES_PATH = 'src/types/crm.ts'
+BATCH_SIZE = 500
+JOBS = 4
+RETRIES = 3
+PAGE_SIZE = 1000
+IN_CHUNK = 100
+# 408 y 429 son del servidor o del límite de tasa, no de la fila
+RETRYABLE_HTTP = (408, 429)
+
+ENTRY_RE = re.compile(r'(\w+)\s*:\s*[\'"]([^\'"]*)[\'"]')
+PARSE_INT_RE = re.compile(r'\s*([+-]?)(?:0[xX]([0-9a-fA-F]*)|(\d+))')
+LEAD_COLUMNS = ('name', 'phone', 'property_interest', 'budget', 'status', 'score', 'source',
+                'assigned_to', 'temperature', 'credit_status', 'created_at')
+
+
+def _object_literal(content: str, name: str) -> dict:
+    m = re.search(rf'const\s+{name}\s*:[^=]*=\s*\{{', content)
+    if not m:
+        raise ValueError(f"No se encontró {name}")
+    end = content.index('\n}', m.end())
+    return dict(ENTRY_RE.findall(content[m.end():end]))
+
+
+@dataclass
+class Mapping:
+    header_aliases: dict
+    status_labels: dict
+    status_reverse: dict
+
+
+def load_mapping(modal_path: str = MODAL_PATH, types_path: str = TYPES_PATH) -> Mapping:
+    """Lee ``HEADER_ALIASES`` del modal y ``STATUS_LABELS`` de crm.ts."""
+    aliases = _object_literal(read_text(modal_path), 'HEADER_ALIASES')
+    labels = _object_literal(read_text(types_path), 'STATUS_LABELS')
+    return Mapping(aliases, labels, {v.lower(): k for k, v in labels.items()})
+
+
+def normalize_phone(phone: str) -> str:
+    return re.sub(r'[^0-9+]', '', phone)
+
+
+def is_valid_phone(phone: str) -> bool:
+    return 8 <= len(normalize_phone(phone)) <= 15
+
+
+def parse_int(value: str):
+    """``parseInt(value)`` de JS: prefijo numérico (``'3.7'`` → 3, ``'12abc'`` → 12,
+    ``'0x1A'`` → 26) o ``None`` donde JS da ``NaN``."""
+    m = PARSE_INT_RE.match(value)
+    if not m or m.group(2) == '':
+        return None
+    number = int(m.group(2), 16) if m.group(2) else int(m.group(3))
+    return -number if m.group(1) == '-' else number
+
+
+def normalize_header(header: str) -> str:
+    return re.sub(r'[^a-z_]', '', header.lower()).strip()
+
+
+@dataclass
+class Stats:
+    rows: int = 0
+    valid: int = 0
+    invalid: int = 0
+    duplicate_file: int = 0
+    duplicate_db: int = 0
+    inserted: int = 0
+    rejected: int = 0
+    failed: int = 0
+    batches: int = 0
+    resumed: int = 0
+    requests: int = 0
+    errors: Counter = field(default_factory=Counter)
+
+
+def map_row(row: list, columns: dict, mapping: Mapping, team: dict) -> tuple:
+    """Mismas reglas que ``processRows`` del modal. Devuelve ``(lead, errores)``."""
+    lead = {}
+    for idx, key in columns.items():
+        value = (row[idx] if idx < len(row) else '').strip()
+        if not value:
+            continue
+        if key == 'status':
+            reverse = mapping.status_reverse.get(value.lower())
+            if reverse:
+                value = reverse
+            elif value not in mapping.status_labels:
+                value = 'new'
+        if key == 'assigned_to':
+            value = team.get(value.lower(), '')
+        if key == 'score':
+            score = parse_int(value)
+            if score is not None:
+                lead['score'] = max(0, min(100, score))
+            continue
+        lead[key] = value
+    errors = []
+    if not lead.get('name'):
+        errors.append('Nombre requerido')
+    if not lead.get('phone'):
+        errors.append('Telefono requerido')
+    elif not is_valid_phone(lead['phone']):
+        errors.append('Telefono invalido')
+    if lead.get('phone'):
+        lead['phone'] = normalize_phone(lead['phone'])
+    return lead, errors
+
+
+def to_insert(lead: dict, assign_to: str, now: str) -> dict:
+    """El mismo payload que ``handleImport``."""
+    return {
+        'name': lead.get('name') or '',
+        'phone': lead.get('phone') or '',
+        'property_interest': lead.get('property_interest') or '',
+        'budget': lead.get('budget') or '',
+        'status': lead.get('status') or 'new',
+        'score': lead.get('score', 0),
+        'source': lead.get('source') or 'agency_import',
+        'assigned_to': lead.get('assigned_to') or assign_to or None,
+        'temperature': lead.get('temperature') or None,
+        'credit_status': lead.get('credit_status') or None,
+        'created_at': now,
+    }
+
+
+def iter_batches(path: str, mapping: Mapping, team: dict, batch_size: int, stats: Stats, rejects=None):
+    """Lee el CSV fila por fila y produce ``(n_lote, [(fila, lead)])``.
+
+    Los lotes se arman después del filtro de duplicados dentro del archivo,
+    así que la numeración es la misma en cada run (sirve para el checkpoint).
+    """
+    seen = set()
+    batch = []
+    number = 0
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        headers = next(reader, [])
+        columns = {i: mapping.header_aliases[h] for i, h in enumerate(map(normalize_header, headers))
+                   if h in mapping.header_aliases}
+        for index, row in enumerate(reader, start=1):
+            if not any(cell.strip() for cell in row):
+                continue
+            stats.rows += 1
+            lead, errors = map_row(row, columns, mapping, team)
+            if errors:
+                stats.invalid += 1
+                stats.errors.update(errors)
+                if rejects:
+                    rejects.writerow([index, '; '.join(errors)] + row)
+                continue
+            if lead['phone'] in seen:
+                stats.duplicate_file += 1
+                if rejects:
+                    rejects.writerow([index, 'Duplicado en el archivo'] + row)
+                continue
+            seen.add(lead['phone'])
+            stats.valid += 1
+            batch.append((index, lead))
+            if len(batch) == batch_size:
+                yield number, batch
+                number += 1
+                batch = []
+    if batch:
+        yield number, batch
+
+
+class Checkpoint:
+    """Lotes ya insertados de un CSV, guardados como rangos ``[[a, b], ...]``."""
+
+    def __init__(self, path: str, source: str, batch_size: int):
+        self.path = path
+        self.key = {'source': os.path.abspath(source), 'size': os.path.getsize(source), 'batch_size': batch_size}
+        self.done = set()
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('key') != self.key:
+                raise SystemExit(f"❌ {path} es de otro archivo o de otro --batch-size; bórralo para empezar de cero")
+            for a, b in data.get('done', []):
+                self.done.update(range(a, b + 1))
+
+    def mark(self, number: int) -> None:
+        with self.lock:
+            self.done.add(number)
+            if self.path:
+                write_atomic(self.path, json.dumps({'key': self.key, 'done': self._ranges()}) + '\n')
+
+    def _ranges(self) -> list:
+        ranges = []
+        for n in sorted(self.done):
+            if ranges and ranges[-1][1] == n - 1:
+                ranges[-1][1] = n
+            else:
+                ranges.append([n, n])
+        return ranges
+
+
+class PostgrestBackend:
+    """Inserta en PostgREST / Supabase con un POST por lote."""
+
+    def __init__(self, url: str, key: str, table: str = 'leads', upsert_on: str = ''):
+        base = url.rstrip('/')
+        if base.endswith('.supabase.co'):
+            base += '/rest/v1'
+        self.base = base
+        self.table = table
+        self.upsert_on = upsert_on
+        self.headers = {'apikey': key, 'Authorization': f'Bearer {key}', 'Content-Type': 'application/json'}
+
+    def _request(self, path: str, method: str = 'GET', body=None, headers=None):
+        req = urllib.request.Request(f'{self.base}/{path}', method=method,
+                                     data=json.dumps(body).encode('utf-8') if body is not None else None,
+                                     headers=dict(self.headers, **(headers or {})))
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            raw = resp.read()
+            return json.loads(raw) if raw else None
+
+    def _pages(self, table: str, columns: str):
+        offset = 0
+        while True:
+            page = self._request(f'{table}?select={columns}&limit={PAGE_SIZE}&offset={offset}') or []
+            yield from page
+            if len(page) < PAGE_SIZE:
+                return
+            offset += PAGE_SIZE
+
+    def existing_phones(self) -> set:
+        return {normalize_phone(r['phone'] or '') for r in self._pages(self.table, 'phone')}
+
+    def present_phones(self, phones: list) -> set:
+        """Cuáles de ``phones`` ya están en la tabla, tal cual se insertaron."""
+        found = set()
+        for i in range(0, len(phones), IN_CHUNK):
+            values = ','.join('"' + p.replace('"', '') + '"' for p in phones[i:i + IN_CHUNK])
+            query = urllib.parse.quote(f'in.({values})', safe='')
+            found.update(r['phone'] for r in self._request(f'{self.table}?select=phone&phone={query}') or [])
+        return found
+
+    def team(self) -> dict:
+        return {(r['name'] or '').lower(): r['id'] for r in self._pages('team_members', 'id,name')}
+
+    def insert(self, rows: list) -> None:
+        prefer = 'return=minimal'
+        path = self.table
+        if self.upsert_on:
+            prefer += ',resolution=merge-duplicates'
+            path += f'?on_conflict={self.upsert_on}'
+        self._request(path, 'POST', rows, {'Prefer': prefer})
+
+
+class SQLiteBackend:
+    """Stand-in local para probar y medir sin Supabase.
+
+    ``latency_ms`` simula el viaje de red de cada request.
+    """
+
+    def __init__(self, path: str, latency_ms: float = 0.0, upsert_on: str = ''):
+        self.path = path
+        self.latency = latency_ms / 1000
+        self.upsert_on = upsert_on
+        self.local = threading.local()
+        with self._conn() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f"CREATE TABLE IF NOT EXISTS leads (id INTEGER PRIMARY KEY, {', '.join(LEAD_COLUMNS)})")
+            conn.execute('CREATE TABLE IF NOT EXISTS team_members (id TEXT PRIMARY KEY, name TEXT)')
+            if upsert_on:
+                conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_leads_{upsert_on} ON leads({upsert_on})')
+
+    def _conn(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+            self.local.conn = conn
+        return conn
+
+    def existing_phones(self) -> set:
+        return {normalize_phone(p or '') for (p,) in self._conn().execute('SELECT phone FROM leads')}
+
+    def present_phones(self, phones: list) -> set:
+        found = set()
+        for i in range(0, len(phones), IN_CHUNK):
+            chunk = phones[i:i + IN_CHUNK]
+            sql = f"SELECT phone FROM leads WHERE phone IN ({', '.join('?' * len(chunk))})"
+            found.update(p for (p,) in self._conn().execute(sql, chunk))
+        return found
+
+    def team(self) -> dict:
+        return {(name or '').lower(): id_ for id_, name in self._conn().execute('SELECT id, name FROM team_members')}
+
+    def insert(self, rows: list) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        sql = f"INSERT INTO leads ({', '.join(LEAD_COLUMNS)}) VALUES ({', '.join('?' * len(LEAD_COLUMNS))})"
+        if self.upsert_on:
+            updates = ', '.join(f'{c} = excluded.{c}' for c in LEAD_COLUMNS if c != self.upsert_on)
+            sql += f' ON CONFLICT({self.upsert_on}) DO UPDATE SET {updates}'
+        with self._conn() as conn:
+            conn.executemany(sql, [tuple(r[c] for c in LEAD_COLUMNS) for r in rows])
+
+
+def _row_error(exc: Exception) -> bool:
+    """Si la BD rechazó el contenido del lote (reintentarlo no sirve)."""
+    if isinstance(exc, urllib.error.HTTPError):
+        return 400 <= exc.code < 500 and exc.code not in RETRYABLE_HTTP
+    return isinstance(exc, sqlite3.IntegrityError)
+
+
+def _send(backend, rows: list, retries: int) -> None:
+    """Inserta ``rows`` reintentando solo errores transitorios.
+
+    Después de un timeout el INSERT anterior pudo haberse confirmado: antes de
+    cada reintento se quitan las filas cuyo teléfono ya está en la BD.
+    """
+    for attempt in range(retries + 1):
+        if attempt:
+            present = backend.present_phones([r['phone'] for r in rows])
+            rows = [r for r in rows if r['phone'] not in present]
+            if not rows:
+                return
+        try:
+            backend.insert(rows)
+            return
+        except (urllib.error.URLError, sqlite3.OperationalError, TimeoutError) as exc:
+            if attempt == retries or _row_error(exc):
+                raise
+            time.sleep(min(10.0, 0.5 * 2 ** attempt) * (0.5 + random.random()))
+
+
+def _send_split(backend, rows: list, retries: int) -> tuple:
+    """Como ``_send``, pero si la BD rechaza el lote lo parte en mitades.
+
+    Devuelve ``(insertadas, [(fila_csv, motivo)])`` con las filas que la BD
+    rechazó por sí solas. ``rows`` es ``[(fila_csv, payload)]``.
+    """
+    try:
+        _send(backend, [payload for _, payload in rows], retries)
+        return len(rows), []
+    except (urllib.error.HTTPError, sqlite3.IntegrityError) as exc:
+        if not _row_error(exc):
+            raise
+        if len(rows) == 1:
+            return 0, [(rows[0][0], f'Rechazado por la BD: {_reason(exc)}')]
+    half = len(rows) // 2
+    inserted, rejected = _send_split(backend, rows[:half], retries)
+    more, rejected_more = _send_split(backend, rows[half:], retries)
+    return inserted + more, rejected + rejected_more
+
+
+def _reason(exc: Exception) -> str:
+    if isinstance(exc, urllib.error.HTTPError):
+        try:
+            return f"{exc.code} {json.loads(exc.read() or b'{}').get('message', exc.reason)}"
+        except ValueError:
+            return f'{exc.code} {exc.reason}'
+    return str(exc)
+
+
+def import_csv(path: str, backend, batch_size: int = BATCH_SIZE, jobs: int = JOBS, retries: int = RETRIES,
+               checkpoint_path: str = '', assign_to: str = '', mapping: Mapping = None,
+               rejects_path: str = '', progress: bool = True) -> Stats:
+    """Importa ``path`` en lotes de ``batch_size`` con hasta ``jobs`` lotes en vuelo."""
+    mapping = mapping or load_mapping()
+    stats = Stats()
+    checkpoint = Checkpoint(checkpoint_path, path, batch_size)
+    existing = backend.existing_phones()
+    team = backend.team()
+    now = datetime.now(timezone.utc).isoformat()
+    lock = threading.Lock()
+
+    def run_batch(number, rows):
+        result = _send_split(backend, rows, retries)
+        checkpoint.mark(number)
+        return result
+
+    rejects_file = open(rejects_path, 'w', encoding='utf-8', newline='') if rejects_path else None
+    rejects = csv.writer(rejects_file) if rejects_file else None
+    t0 = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            pending = {}
+            for number, batch in iter_batches(path, mapping, team, batch_size, stats, rejects):
+                if number in checkpoint.done:
+                    stats.resumed += len(batch)
+                    continue
+                rows = []
+                for index, lead in batch:
+                    if lead['phone'] in existing:
+                        stats.duplicate_db += 1
+                        if rejects:
+                            rejects.writerow([index, 'Duplicado en BD'])
+                    else:
+                        rows.append((index, to_insert(lead, assign_to, now)))
+                if not rows:
+                    checkpoint.mark(number)
+                    continue
+                stats.batches += 1
+                pending[pool.submit(run_batch, number, rows)] = len(rows)
+                # Acotar lo que se tiene en memoria: como mucho 2 lotes por worker
+                while len(pending) >= jobs * 2:
+                    _collect(pending, stats, lock, FIRST_COMPLETED, rejects)
+                    if progress:
+                        _progress(stats, t0)
+            while pending:
+                _collect(pending, stats, lock, FIRST_COMPLETED, rejects)
+                if progress:
+                    _progress(stats, t0)
+    finally:
+        if rejects_file:
+            rejects_file.close()
+    if progress:
+        print()
+    stats.requests = stats.batches
+    return stats
+
+
+def _collect(pending: dict, stats: Stats, lock, when, rejects=None) -> None:
+    done, _ = wait(list(pending), return_when=when)
+    for future in done:
+        size = pending.pop(future)
+        with lock:
+            try:
+                inserted, rejected = future.result()
+            except Exception as exc:
+                stats.failed += size
+                stats.errors[f'Lote fallido: {type(exc).__name__}'] += 1
+                continue
+            stats.inserted += inserted
+            stats.rejected += len(rejected)
+            for index, reason in rejected:
+                stats.errors[reason] += 1
+                if rejects:
+                    rejects.writerow([index, reason])
+
+
+def _progress(stats: Stats, t0: float) -> None:
+    rate = stats.inserted / max(time.perf_counter() - t0, 1e-9)
+    print(f"\r   {stats.inserted:,} insertados, {stats.failed:,} fallidos · {rate:,.0f} filas/s", end='', flush=True)
+
+
+def print_stats(stats: Stats, seconds: float) -> None:
+    print(f"📊 {stats.rows:,} filas leídas en {seconds:.2f} s")
+    print(f"   ✅ {stats.inserted:,} insertados en {stats.batches:,} lotes ({stats.inserted / max(seconds, 1e-9):,.0f} filas/s)")
+    if stats.resumed:
+        print(f"   ⏭️  {stats.resumed:,} ya importados (checkpoint)")
+    print(f"   ⚠️ {stats.duplicate_file:,} duplicados en el archivo, {stats.duplicate_db:,} ya en la BD")
+    print(f"   ❌ {stats.invalid:,} inválidos, {stats.rejected:,} rechazados por la BD, "
+          f"{stats.failed:,} en lotes fallidos")
+    for error, count in stats.errors.most_common():
+        print(f"      {error}: {count:,}")
+
+
+def write_sample_csv(path: str, rows: int, seed: int = 7) -> None:
+    """CSV sintético con encabezados en español, algunos duplicados e inválidos."""
+    rnd = random.Random(seed)
+    statuses = ['Nuevo', 'Contactado', 'Cita', 'negotiation', 'Perdido', 'desconocido']
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        out = csv.writer(f)
+        out.writerow(['Nombre', 'Telefono', 'Estado', 'Puntaje', 'Desarrollo', 'Presupuesto', 'Origen'])
+        phones = []
+        for i in range(rows):
+            phone = f'+52 1 {rnd.randrange(10**9, 10**10)}' if rnd.random() > 0.01 else '123'
+            if phones and rnd.random() < 0.02:
+                phone = rnd.choice(phones)
+            phones.append(phone)
+            out.writerow([f'Lead {i}', phone, rnd.choice(statuses), rnd.randrange(0, 120),
+                          'Los Encinos, "Fase 2"', f'{rnd.randrange(1, 9)}M', 'portal'])
+
+
+def bench(rows: int, latency_ms: float, batch_size: int, jobs: int, baseline_rows: int = 1000) -> None:
+    """Compara fila por fila (como el modal) contra lotes concurrentes.
+
+    Fila por fila se mide sobre las primeras ``baseline_rows`` filas y se
+    extrapola; con latencia real tardaría minutos.
+    """
+    mapping = load_mapping()
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'leads.csv')
+        write_sample_csv(source, rows)
+        head = os.path.join(tmp, 'head.csv')
+        write_sample_csv(head, min(rows, baseline_rows))
+        print(f"📄 {rows:,} filas sintéticas, latencia simulada {latency_ms:g} ms por request\n")
+        runs = (('fila por fila', head, 1, 1), (f'lotes de {batch_size} x {jobs}', source, batch_size, jobs))
+        for label, path, size, workers in runs:
+            backend = SQLiteBackend(os.path.join(tmp, f'{size}-{workers}.db'), latency_ms)
+            t0 = time.perf_counter()
+            stats = import_csv(path, backend, size, workers, mapping=mapping, progress=False)
+            seconds = time.perf_counter() - t0
+            rate = stats.inserted / max(seconds, 1e-9)
+            note = f', ~{rows / max(rate, 1e-9):.1f} s estimado para {rows:,}' if path == head and rows > baseline_rows else ''
+            print(f"   {label}: {stats.inserted:,} filas, {stats.requests:,} requests, {seconds:.2f} s "
+                  f"({rate:,.0f} filas/s{note})")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Importa leads desde CSV en lotes')
+    parser.add_argument('csv', nargs='?', help='archivo CSV (mismas columnas que el modal de importación)')
+    parser.add_argument('--url', default=os.environ.get('SUPABASE_URL', ''), help='URL de Supabase o PostgREST')
+    parser.add_argument('--key', default=os.environ.get('SUPABASE_SERVICE_KEY', ''), help='API key')
+    parser.add_argument('--sqlite', help='importa a una base SQLite local en vez de PostgREST')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--jobs', '-j', type=int, default=JOBS, help='lotes en vuelo a la vez')
+    parser.add_argument('--retries', type=int, default=RETRIES)
+    parser.add_argument('--checkpoint', help='archivo de checkpoint (por defecto <csv>.checkpoint.json)')
+    parser.add_argument('--assign-to', default='', help='id del vendedor para filas sin vendedor')
+    parser.add_argument('--upsert-on', default='', help='columna única para upsert (p. ej. phone)')
+    parser.add_argument('--rejects', help='CSV con las filas rechazadas y el motivo')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='latencia simulada por request (SQLite)')
+    parser.add_argument('--bench', type=int, metavar='ROWS', help='benchmark con un CSV sintético de ROWS filas')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(args.bench, args.latency_ms or 40.0, args.batch_size, args.jobs)
+        return 0
+    if not args.csv:
+        parser.error('falta el CSV')
+    if args.sqlite:
+        backend = SQLiteBackend(args.sqlite, args.latency_ms, args.upsert_on)
+    elif args.url and args.key:
+        backend = PostgrestBackend(args.url, args.key, upsert_on=args.upsert_on)
+    else:
+        parser.error('indica --sqlite o --url y --key (o SUPABASE_URL / SUPABASE_SERVICE_KEY)')
+
+    t0 = time.perf_counter()
+    stats = import_csv(args.csv, backend, args.batch_size, args.jobs, args.retries,
+                       args.checkpoint or f'{args.csv}.checkpoint.json', args.assign_to,
+                       rejects_path=args.rejects or '')
+    print_stats(stats, time.perf_counter() - t0)
+    if args.rejects:
+        print(f"📝 Rechazados: {args.rejects}")
+    return 1 if stats.failed or stats.rejected else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
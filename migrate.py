@@ -0,0 +1,313 @@
+"""Aplica las migraciones numeradas de migrations/ una sola vez.
+
+Cada archivo ``NNN_nombre.sql`` corre en su propia transacción y queda
+registrado en ``schema_migrations`` con su checksum; los ya aplicados se
+saltan y si alguno cambió después de aplicarse se avisa (no se reaplica).
+
+Contra Postgres/Supabase usa ``psycopg`` (o ``psycopg2``) con ``--dsn`` o
+``DATABASE_URL``. Para probar en local sin Postgres, ``--sqlite`` traduce lo
+básico (``now()``, ``gen_random_uuid()``, ``ADD COLUMN IF NOT EXISTS``...) y
+salta lo que SQLite no tiene (funciones, triggers, policies, ``storage.*``);
+con ``--bootstrap`` crea antes las tablas base de la app (leads,
+appointments...) a partir de las consultas de src/ y de src/types/crm.ts.
+
+Las migraciones que ya se corrieron a mano en el SQL Editor se marcan con
+``--baseline``::
+
+    python migrate.py --status
+    python migrate.py --baseline 003          # 002 y 003 ya estaban aplicadas
+    python migrate.py                          # aplica las pendientes
+    python migrate.py --sqlite /tmp/crm.db --bootstrap
+"""
+import argparse
+import glob
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+
+from patch_engine import read_text
+
+MIGRATIONS_DIR = 'migrations'
+TRACKING_TABLE = 'schema_migrations'
+
+FILE_RE = re.compile(r'^(\d+)_(\w+)\.sql$')
+SQLITE_SKIP_RE = re.compile(
+    r'^\s*(?:CREATE\s+(?:OR\s+REPLACE\s+)?FUNCTION|(?:CREATE|DROP)\s+(?:TRIGGER|POLICY|EXTENSION)'
+    r'|GRANT|REVOKE|COMMENT\s+ON|ALTER\s+TABLE\s+\S+\s+(?:ENABLE|DISABLE|FORCE)'
+    r'|(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|CREATE\s+POLICY.*?\bON)\s+(?!public\.)\w+\.)',
+    re.I | re.S)
+SQLITE_REWRITES = [(re.compile(p, re.I), r) for p, r in (
+    (r'gen_random_uuid\(\)', '(lower(hex(randomblob(16))))'),
+    (r'\bnow\(\)', 'CURRENT_TIMESTAMP'),
+    (r'::\w+(?:\[\])?', ''),
+    (r'(\bON\s+[\w.]+\s*)USING\s+\w+\s*', r'\1'),
+    (r'\b(?:BIG)?SERIAL\b', 'INTEGER'),
+    (r'\b(\w+)\[\]', r'\1'),
+    (r'\bpublic\.', ''),
+)]
+CREATE_TABLE_RE = re.compile(r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:public\.)?(\w+)', re.I)
+ADD_COLUMN_RE = re.compile(r'(ADD\s+COLUMN\s+)IF\s+NOT\s+EXISTS\s+', re.I)
+
+
+@dataclass
+class Migration:
+    version: str
+    name: str
+    path: str
+    sql: str
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode('utf-8')).hexdigest()[:16]
+
+
+def discover(directory: str = MIGRATIONS_DIR) -> list:
+    migrations = []
+    for path in glob.glob(os.path.join(directory, '*.sql')):
+        m = FILE_RE.match(os.path.basename(path))
+        if m:
+            migrations.append(Migration(m.group(1), m.group(2), path, read_text(path)))
+    return sorted(migrations, key=lambda mig: int(mig.version))
+
+
+def split_statements(sql: str) -> list:
+    """Separa por ``;`` de primer nivel (respeta strings, comentarios y ``$$``)."""
+    statements = []
+    buf = []
+    i = 0
+    n = len(sql)
+    while i < n:
+        c = sql[i]
+        if sql.startswith('--', i):
+            j = sql.find('\n', i)
+            i = n if j == -1 else j + 1
+            continue
+        if sql.startswith('/*', i):
+            j = sql.find('*/', i + 2)
+            i = n if j == -1 else j + 2
+            continue
+        if c in '\'"':
+            j = i + 1
+            while j < n:
+                if sql[j] == c and sql[j + 1:j + 2] == c:
+                    j += 2
+                    continue
+                if sql[j] == c:
+                    break
+                j += 1
+            buf.append(sql[i:j + 1])
+            i = j + 1
+            continue
+        m = re.match(r'\$\w*\$', sql[i:i + 64]) if c == '$' else None
+        if m:
+            j = sql.find(m.group(0), i + len(m.group(0)))
+            j = n if j == -1 else j + len(m.group(0))
+            buf.append(sql[i:j])
+            i = j
+            continue
+        if c == ';':
+            statement = ''.join(buf).strip()
+            if statement:
+                statements.append(statement)
+            buf = []
+        else:
+            buf.append(c)
+        i += 1
+    statement = ''.join(buf).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+class PostgresBackend:
+    """Postgres/Supabase con psycopg 3 o psycopg2."""
+
+    def __init__(self, dsn: str):
+        try:
+            import psycopg
+        except ImportError:
+            try:
+                import psycopg2 as psycopg
+            except ImportError:
+                raise SystemExit('❌ Falta psycopg: pip install "psycopg[binary]"')
+        self.conn = psycopg.connect(dsn)
+        self.conn.autocommit = False
+
+    def ensure_tracking(self) -> None:
+        with self.conn.cursor() as cur:
+            cur.execute(f'CREATE TABLE IF NOT EXISTS {TRACKING_TABLE} ('
+                        'version TEXT PRIMARY KEY, name TEXT NOT NULL, checksum TEXT NOT NULL, '
+                        'applied_at TIMESTAMPTZ DEFAULT now())')
+        self.conn.commit()
+
+    def applied(self) -> dict:
+        with self.conn.cursor() as cur:
+            cur.execute(f'SELECT version, checksum FROM {TRACKING_TABLE}')
+            return dict(cur.fetchall())
+
+    def apply(self, migration: Migration, run: bool = True) -> list:
+        try:
+            with self.conn.cursor() as cur:
+                if run:
+                    cur.execute(migration.sql)
+                cur.execute(f'INSERT INTO {TRACKING_TABLE} (version, name, checksum) VALUES (%s, %s, %s)',
+                            (migration.version, migration.name, migration.checksum))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return []
+
+    def indexes(self) -> list:
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT indexdef FROM pg_indexes WHERE schemaname = 'public'")
+            return [row[0] + ';' for row in cur.fetchall()]
+
+
+class SQLiteBackend:
+    """SQLite local: traduce lo básico de Postgres y salta lo que no existe."""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, isolation_level=None)
+
+    def ensure_tracking(self) -> None:
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS {TRACKING_TABLE} ('
+                          'version TEXT PRIMARY KEY, name TEXT NOT NULL, checksum TEXT NOT NULL, '
+                          'applied_at TEXT DEFAULT CURRENT_TIMESTAMP)')
+
+    def applied(self) -> dict:
+        return dict(self.conn.execute(f'SELECT version, checksum FROM {TRACKING_TABLE}'))
+
+    def apply(self, migration: Migration, run: bool = True) -> list:
+        skipped = []
+        self.conn.execute('BEGIN')
+        try:
+            for statement in split_statements(migration.sql) if run else []:
+                if SQLITE_SKIP_RE.match(statement):
+                    skipped.append(statement.split('\n', 1)[0][:80])
+                    continue
+                self._execute(statement)
+            self.conn.execute(f'INSERT INTO {TRACKING_TABLE} (version, name, checksum) VALUES (?, ?, ?)',
+                              (migration.version, migration.name, migration.checksum))
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        return skipped
+
+    def _execute(self, statement: str) -> None:
+        for pattern, repl in SQLITE_REWRITES:
+            statement = pattern.sub(repl, statement)
+        if_not_exists = bool(ADD_COLUMN_RE.search(statement))
+        statement = ADD_COLUMN_RE.sub(r'\1', statement)
+        try:
+            self.conn.execute(statement)
+        except sqlite3.OperationalError as exc:
+            if not (if_not_exists and 'duplicate column' in str(exc)):
+                raise
+
+    def indexes(self) -> list:
+        return [sql + ';' for (sql,) in self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")]
+
+    def bootstrap(self, migrations: list, root: str = 'src') -> list:
+        """Crea las tablas que usa src/ con las columnas de sus consultas y de crm.ts.
+
+        Las tablas que crea alguna migración se dejan a la migración.
+        """
+        from column_projection import TYPES_PATH, parse_interfaces, project
+        from query_profiler import scan_tree
+
+        columns = {}
+        for site in scan_tree(root):
+            cols = columns.setdefault(site.table, {'id'})
+            cols.update(c for c in site.columns if re.fullmatch(r'\w+', c))
+            named = [col for col, _ in site.orders] + [col for _, col in site.filters]
+            cols.update(col for col in named if re.fullmatch(r'\w+', col))
+        interfaces = parse_interfaces(read_text(TYPES_PATH))
+        for projection in project(root):
+            fields = interfaces.get(projection.interface)
+            if projection.table in columns and fields:
+                columns[projection.table].update(fields)
+        owned = {name.lower() for mig in migrations for name in CREATE_TABLE_RE.findall(mig.sql)}
+        created = []
+        for table, cols in sorted(columns.items()):
+            if table in owned:
+                continue
+            others = ', '.join(f'"{c}"' for c in sorted(cols - {'id'}))
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS {table} (id TEXT PRIMARY KEY'
+                              f'{", " + others if others else ""})')
+            created.append(table)
+        return created
+
+
+def connect(args):
+    if args.sqlite:
+        return SQLiteBackend(args.sqlite)
+    dsn = args.dsn or os.environ.get('DATABASE_URL', '')
+    if not dsn:
+        raise SystemExit('❌ Indica --sqlite o --dsn (o DATABASE_URL)')
+    return PostgresBackend(dsn)
+
+
+def migrate(backend, migrations: list, baseline: str = '', dry_run: bool = False) -> int:
+    """Aplica las pendientes en orden. Devuelve 1 si alguna falla o cambió."""
+    backend.ensure_tracking()
+    applied = backend.applied()
+    status = 0
+    for migration in migrations:
+        label = f'{migration.version}_{migration.name}'
+        if migration.version in applied:
+            if applied[migration.version] != migration.checksum:
+                print(f"⚠️ {label} cambió después de aplicarse (no se reaplica; crea una migración nueva)")
+                status = 1
+            else:
+                print(f"⏭️  {label} ya aplicada")
+            continue
+        as_baseline = bool(baseline) and int(migration.version) <= int(baseline)
+        if dry_run:
+            print(f"📝 {label} {'se marcaría como aplicada' if as_baseline else 'pendiente'}")
+            continue
+        t0 = time.perf_counter()
+        try:
+            skipped = backend.apply(migration, run=not as_baseline)
+        except Exception as exc:
+            print(f"❌ {label}: {exc}")
+            return 1
+        if as_baseline:
+            print(f"✅ {label} marcada como aplicada (baseline)")
+            continue
+        print(f"✅ {label} aplicada en {time.perf_counter() - t0:.2f} s")
+        if skipped:
+            print(f"   ⏭️  {len(skipped)} sentencias sin equivalente en SQLite (funciones, triggers, policies, storage)")
+    return status
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Aplica las migraciones de migrations/ con tabla de control')
+    parser.add_argument('--dsn', help='cadena de conexión de Postgres (o DATABASE_URL)')
+    parser.add_argument('--sqlite', help='base SQLite local para probar las migraciones')
+    parser.add_argument('--bootstrap', action='store_true', help='(SQLite) crear antes las tablas base de la app')
+    parser.add_argument('--dir', default=MIGRATIONS_DIR)
+    parser.add_argument('--baseline', default='', metavar='VERSION',
+                        help='marcar como aplicadas (sin correrlas) las migraciones hasta VERSION')
+    parser.add_argument('--status', '--dry-run', dest='dry_run', action='store_true',
+                        help='solo mostrar qué se aplicaría')
+    args = parser.parse_args(argv)
+
+    backend = connect(args)
+    migrations = discover(args.dir)
+    if args.bootstrap:
+        if not isinstance(backend, SQLiteBackend):
+            parser.error('--bootstrap solo aplica con --sqlite')
+        tables = backend.bootstrap(migrations)
+        print(f"📄 {len(tables)} tablas base creadas desde src/")
+    return migrate(backend, migrations, args.baseline, args.dry_run)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
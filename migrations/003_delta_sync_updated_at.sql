@@ -0,0 +1,50 @@
+-- Migration: updated_at watermarks for the CRM background poll
+-- Run this on Supabase SQL Editor
+-- The 30 s poll in CrmContext only fetches rows with updated_at >= its last mark,
+-- so every polled table needs an updated_at that moves on each UPDATE.
+-- Tables: leads, properties, team_members, mortgage_applications,
+--         marketing_campaigns, appointments
+
+-- 1. Trigger function
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+BEGIN
+  NEW.updated_at = now();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 2. Columns (no-op where they already exist)
+ALTER TABLE leads ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();
+ALTER TABLE properties ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();
+ALTER TABLE team_members ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();
+ALTER TABLE mortgage_applications ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();
+ALTER TABLE marketing_campaigns ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();
+ALTER TABLE appointments ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();
+
+-- 3. Triggers
+DROP TRIGGER IF EXISTS trg_leads_updated_at ON leads;
+CREATE TRIGGER trg_leads_updated_at BEFORE UPDATE ON leads
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+DROP TRIGGER IF EXISTS trg_properties_updated_at ON properties;
+CREATE TRIGGER trg_properties_updated_at BEFORE UPDATE ON properties
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+DROP TRIGGER IF EXISTS trg_team_members_updated_at ON team_members;
+CREATE TRIGGER trg_team_members_updated_at BEFORE UPDATE ON team_members
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+DROP TRIGGER IF EXISTS trg_mortgage_applications_updated_at ON mortgage_applications;
+CREATE TRIGGER trg_mortgage_applications_updated_at BEFORE UPDATE ON mortgage_applications
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+DROP TRIGGER IF EXISTS trg_marketing_campaigns_updated_at ON marketing_campaigns;
+CREATE TRIGGER trg_marketing_campaigns_updated_at BEFORE UPDATE ON marketing_campaigns
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+DROP TRIGGER IF EXISTS trg_appointments_updated_at ON appointments;
+CREATE TRIGGER trg_appointments_updated_at BEFORE UPDATE ON appointments
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- 4. Indexes for the updated_at >= mark range scan
+CREATE INDEX IF NOT EXISTS idx_leads_updated ON leads(updated_at);
+CREATE INDEX IF NOT EXISTS idx_properties_updated ON properties(updated_at);
+CREATE INDEX IF NOT EXISTS idx_team_members_updated ON team_members(updated_at);
+CREATE INDEX IF NOT EXISTS idx_mortgage_applications_updated ON mortgage_applications(updated_at);
+CREATE INDEX IF NOT EXISTS idx_marketing_campaigns_updated ON marketing_campaigns(updated_at);
+CREATE INDEX IF NOT EXISTS idx_appointments_updated ON appointments(updated_at);
@@ -0,0 +1,39 @@
+-- Migration: indexes for the query shapes in src/
+-- Run this on Supabase SQL Editor
+-- Generated by index_advisor.py from the .from().eq().order() chains it found;
+-- each index lists the queries it serves. Only tables expected to pass
+-- 10,000 rows get one; boolean-only filters are left to seq scans.
+-- Tables: ai_responses, appointments, conversations, health_checks, leads,
+--         mortgage_applications, scheduled_followups
+
+-- 1. ai_responses
+--    ai_responses WHERE created_at >= ? ORDER BY created_at DESC  (src/views/SaraAiView.tsx:29)
+CREATE INDEX IF NOT EXISTS idx_ai_responses_created ON ai_responses(created_at DESC);
+
+-- 2. appointments
+--    appointments ORDER BY scheduled_date  (src/context/CrmContext.tsx:490, src/context/CrmContext.tsx:585)
+CREATE INDEX IF NOT EXISTS idx_appointments_scheduled_date ON appointments(scheduled_date);
+
+-- 3. conversations
+--    conversations ORDER BY updated_at DESC  (src/views/WhatsAppInboxView.tsx:38)
+CREATE INDEX IF NOT EXISTS idx_conversations_updated ON conversations(updated_at DESC);
+
+-- 4. health_checks
+--    health_checks ORDER BY created_at DESC  (src/views/SaraAiView.tsx:30)
+CREATE INDEX IF NOT EXISTS idx_health_checks_created ON health_checks(created_at DESC);
+
+-- 5. leads
+--    leads ORDER BY created_at DESC  (src/context/CrmContext.tsx:485, src/context/CrmContext.tsx:580, src/views/LeadsView.tsx:838)
+CREATE INDEX IF NOT EXISTS idx_leads_created ON leads(created_at DESC);
+
+-- 6. mortgage_applications
+--    mortgage_applications ORDER BY created_at DESC  (src/context/CrmContext.tsx:488, src/context/CrmContext.tsx:583)
+CREATE INDEX IF NOT EXISTS idx_mortgage_applications_created ON mortgage_applications(created_at DESC);
+
+-- 7. scheduled_followups
+--    scheduled_followups ORDER BY scheduled_at  (src/views/FollowupsView.tsx:55)
+CREATE INDEX IF NOT EXISTS idx_scheduled_followups_scheduled ON scheduled_followups(scheduled_at);
+--    scheduled_followups WHERE sent = ? AND sent_at >= ?  (src/views/FollowupsView.tsx:70)
+CREATE INDEX IF NOT EXISTS idx_scheduled_followups_sent_at ON scheduled_followups(sent_at);
+--    scheduled_followups WHERE cancelled = ? AND created_at >= ?  (src/views/FollowupsView.tsx:76)
+CREATE INDEX IF NOT EXISTS idx_scheduled_followups_created ON scheduled_followups(created_at);
@@ -0,0 +1,39 @@
+-- Migration: audit_log archive bookkeeping and per-entity summary
+-- Run this on Supabase SQL Editor
+-- audit_archive.py walks audit_log by (timestamp, id), writes the old rows to
+-- gzip JSONL partitions, folds them into audit_log_summary and then deletes
+-- them in batches; audit_archive_partitions records every file it wrote.
+-- Tables: audit_log, audit_log_summary, audit_archive_partitions
+
+-- 1. Keyset index: (timestamp, id) > (?, ?) ORDER BY timestamp, id
+CREATE INDEX IF NOT EXISTS idx_audit_log_timestamp_id ON audit_log(timestamp, id);
+
+-- 2. Per-entity summary of the archived history
+CREATE TABLE IF NOT EXISTS audit_log_summary (
+  entity_type TEXT NOT NULL,
+  entity_id TEXT NOT NULL,
+  entity_name TEXT,
+  events INTEGER NOT NULL DEFAULT 0,
+  creates INTEGER NOT NULL DEFAULT 0,
+  updates INTEGER NOT NULL DEFAULT 0,
+  deletes INTEGER NOT NULL DEFAULT 0,
+  status_changes INTEGER NOT NULL DEFAULT 0,
+  first_at TIMESTAMPTZ,
+  last_at TIMESTAMPTZ,
+  last_user_name TEXT,
+  PRIMARY KEY (entity_type, entity_id)
+);
+
+-- 3. Archive files (the watermark is the greatest last_timestamp, last_id)
+CREATE TABLE IF NOT EXISTS audit_archive_partitions (
+  path TEXT PRIMARY KEY,
+  rows INTEGER NOT NULL,
+  sha256 TEXT NOT NULL,
+  first_timestamp TIMESTAMPTZ NOT NULL,
+  first_id TEXT NOT NULL,
+  last_timestamp TIMESTAMPTZ NOT NULL,
+  last_id TEXT NOT NULL,
+  archived_at TIMESTAMPTZ DEFAULT now(),
+  pruned_at TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS idx_audit_archive_partitions_last ON audit_archive_partitions(last_timestamp, last_id);
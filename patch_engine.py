@@ -0,0 +1,315 @@
+"""Motor de parches compartido por los scripts de mantenimiento.
+
+Cada script declara sus cambios como datos (``Patch``) en vez de hacer
+``content.find`` / ``content.replace`` a mano. El motor busca todas las
+anclas de un archivo en una sola pasada, arma el resultado con un solo
+``join`` y escribe el archivo una vez, de forma atómica.
+
+Los parches de una misma llamada no se encadenan: todas las anclas se buscan
+en el contenido original, así que un parche no puede anclarse en el texto que
+inserta otro del mismo lote. Si hace falta, se aplican en dos llamadas.
+
+Uso típico desde un script::
+
+    from patch_engine import Patch, run
+
+    TARGET = 'src/App.tsx'
+    PATCHES = [Patch('mi-parche', anchor='...', text='...', action='after')]
+
+    if __name__ == '__main__':
+        run(TARGET, PATCHES)
+"""
+import difflib
+import os
+import re
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Optional
+
+ACTIONS = ('before', 'after', 'after_line', 'replace')
+# (?i) y compañía solo valen al inicio de la expresión completa
+GLOBAL_FLAGS_RE = re.compile(r'\(\?[aiLmsux]+\)')
+
+
+@dataclass
+class Patch:
+    """Un cambio declarativo sobre un archivo.
+
+    ``action`` puede ser ``before``/``after`` (insertar junto al ancla),
+    ``after_line`` (insertar después de la línea que contiene el ancla) o
+    ``replace``. ``expect`` es el número exacto de coincidencias esperadas;
+    ``None`` acepta cualquier número, incluido cero.
+
+    En lugar de ``anchor`` se puede usar ``at`` con una clave del índice de
+    anclas (``'state:calendarEvents'``, ``'from:leads'``, ``'view:calendar'``,
+    ``'promise_all:0'``); ver ``anchor_index``.
+    """
+    id: str
+    anchor: str = ''
+    text: str = ''
+    action: str = 'replace'
+    expect: Optional[int] = 1
+    regex: bool = False
+    at: str = ''
+
+    def __post_init__(self):
+        if self.action not in ACTIONS:
+            raise ValueError(f"Acción inválida en {self.id}: {self.action}")
+        if not self.anchor and not self.at:
+            raise ValueError(f"Ancla vacía en {self.id}")
+
+    def pattern(self) -> str:
+        return self.anchor if self.regex else re.escape(self.anchor)
+
+    def compiled(self) -> re.Pattern:
+        return re.compile(self.pattern())
+
+    @property
+    def standalone(self) -> bool:
+        """Regex que no se puede concatenar con las demás (grupos, referencias, flags globales)."""
+        if not self.regex or self.at:
+            return False
+        return self.compiled().groups > 0 or bool(GLOBAL_FLAGS_RE.match(self.anchor))
+
+
+@dataclass
+class PatchResult:
+    id: str
+    matches: int = 0
+    ok: bool = False
+    seconds: float = 0.0
+    error: str = ''
+    warning: str = ''
+    skipped: bool = False
+    bytes_changed: int = 0
+    diff: str = ''
+
+
+@dataclass
+class FileReport:
+    path: str
+    results: list = field(default_factory=list)
+    written: bool = False
+    changed: bool = False
+    scan_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+    @property
+    def failed(self) -> list:
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+def read_text(path: str) -> str:
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+@contextmanager
+def atomic_writer(path: str):
+    """Abre un temporal en el mismo directorio y lo renombra encima al salir.
+
+    Si el bloque lanza una excepción el temporal se borra y ``path`` queda
+    intacto.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix='.patch-', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp, os.stat(path).st_mode & 0o777)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def write_atomic(path: str, content: str) -> None:
+    """Escribe en un temporal del mismo directorio y lo renombra encima."""
+    with atomic_writer(path) as f:
+        f.write(content)
+
+
+def _shadows(content: str, span: tuple, other: Patch, compiled: re.Pattern) -> bool:
+    """Si ``other`` tiene una coincidencia que empieza dentro de ``span``."""
+    start, end = span
+    end = max(end, start + 1)
+    if not other.regex:
+        return content.find(other.anchor, start, end - 1 + len(other.anchor)) != -1
+    return any(compiled.match(content, pos) for pos in range(start, min(end, len(content))))
+
+
+def scan(content: str, patches: list, index=None) -> tuple:
+    """Encuentra las anclas de todos los parches en una sola pasada.
+
+    Devuelve ``(found, overlaps)``: ``found`` es ``{indice_de_parche:
+    [(inicio, fin), ...]}`` y ``overlaps`` es ``{indice: indice_del_otro}``
+    para los parches cuya ancla se solapa con la de otro. Las anclas de texto
+    se combinan en una sola expresión regular, donde en un solapamiento gana
+    la primera declarada; por eso cada coincidencia se revisa contra las otras
+    anclas y las que quedaron tapadas se vuelven a buscar por separado. Las
+    regex con grupos o referencias (``standalone``) se buscan siempre por
+    separado. Las anclas ``at`` se resuelven en ``index`` sin recorrer el
+    texto.
+    """
+    found = {i: [] for i in range(len(patches))}
+    overlaps = {}
+    combined, alone = [], []
+    for i, p in enumerate(patches):
+        if p.at:
+            found[i] = list(index.spans(p.at)) if index is not None else []
+        elif p.standalone:
+            alone.append(i)
+        else:
+            combined.append(i)
+    compiled = {i: patches[i].compiled() for i in combined + alone}
+    if combined:
+        regex = re.compile('|'.join(f'(?P<__p{i}>{patches[i].pattern()})' for i in combined))
+        for m in regex.finditer(content):
+            owner = int(m.lastgroup[3:])
+            found[owner].append(m.span())
+            for other in combined:
+                if other != owner and other not in overlaps and \
+                        _shadows(content, m.span(), patches[other], compiled[other]):
+                    overlaps[other] = owner
+    for i in alone + list(overlaps):
+        spans = [m.span() for m in compiled[i].finditer(content)]
+        if spans == found[i]:
+            overlaps.pop(i, None)
+        found[i] = spans
+    return found, overlaps
+
+
+def _edits_for(patch: Patch, content: str, matches: list) -> list:
+    edits = []
+    for start, end in matches:
+        if patch.action == 'before':
+            edits.append((start, start, patch.text))
+        elif patch.action == 'after':
+            edits.append((end, end, patch.text))
+        elif patch.action == 'after_line':
+            eol = content.find('\n', end)
+            pos = len(content) if eol == -1 else eol + 1
+            edits.append((pos, pos, patch.text))
+        else:
+            edits.append((start, end, patch.text))
+    return edits
+
+
+def render(content: str, edits: list) -> str:
+    """Arma el contenido nuevo a partir de ``(inicio, fin, texto)`` ordenados."""
+    parts = []
+    cursor = 0
+    for start, end, text in edits:
+        parts.append(content[cursor:start])
+        parts.append(text)
+        cursor = end
+    parts.append(content[cursor:])
+    return ''.join(parts)
+
+
+def unified_diff(path: str, before: str, after: str) -> str:
+    return ''.join(difflib.unified_diff(before.splitlines(keepends=True), after.splitlines(keepends=True),
+                                        fromfile=f'a/{path}', tofile=f'b/{path}'))
+
+
+def plan(content: str, patches: list, report: FileReport, index=None, diffs: bool = False) -> Optional[list]:
+    """Calcula las ediciones de todos los parches sin tocar el contenido.
+
+    Llena ``report.results`` y devuelve la lista ordenada de ediciones, o
+    ``None`` si algún parche falló (el archivo no se debe escribir). Con
+    ``diffs`` cada resultado lleva el diff unificado de su parche aislado.
+    """
+    t0 = time.perf_counter()
+    found, overlaps = scan(content, patches, index)
+    report.scan_seconds = time.perf_counter() - t0
+    scan_share = report.scan_seconds / len(patches) if patches else 0.0
+
+    edits = []
+    for i, patch in enumerate(patches):
+        t1 = time.perf_counter()
+        matches = found[i]
+        result = PatchResult(patch.id, matches=len(matches))
+        if i in overlaps:
+            result.warning = f"el ancla se solapa con la de {patches[overlaps[i]].id}; se buscó por separado"
+        if patch.expect is not None and len(matches) != patch.expect:
+            result.error = f"se esperaban {patch.expect} coincidencias, hubo {len(matches)}"
+            chained = [p.id for p in patches if p is not patch and patch.anchor and patch.anchor in p.text]
+            if not matches and chained:
+                result.error += f" (el ancla está en el texto que inserta {chained[0]}; los parches no se encadenan)"
+        else:
+            patch_edits = _edits_for(patch, content, matches)
+            result.bytes_changed = sum(len(t) + (e - s) for s, e, t in patch_edits)
+            if diffs and patch_edits:
+                result.diff = unified_diff(report.path, content, render(content, sorted(patch_edits)))
+            # El índice del parche desempata inserciones en la misma posición
+            edits.extend((s, e, i, t) for s, e, t in patch_edits)
+            result.ok = True
+        # La búsqueda es una sola pasada para todos: cada parche carga su parte
+        result.seconds = time.perf_counter() - t1 + scan_share
+        report.results.append(result)
+
+    edits.sort(key=lambda e: (e[0], e[1], e[2]))
+    for prev, cur in zip(edits, edits[1:]):
+        if cur[0] < prev[1]:
+            for r in report.results:
+                if r.id in (patches[prev[2]].id, patches[cur[2]].id) and r.ok:
+                    r.ok = False
+                    r.error = 'se solapa con otro parche'
+    if report.failed:
+        return None
+    return [(s, e, t) for s, e, _, t in edits]
+
+
+def apply_patches(path: str, patches: list, write: bool = True, content: Optional[str] = None,
+                  index=None) -> FileReport:
+    """Aplica ``patches`` a ``path`` en una pasada. Todo o nada."""
+    t0 = time.perf_counter()
+    report = FileReport(path)
+    if content is None:
+        content = read_text(path)
+    edits = plan(content, patches, report, index)
+    if edits is not None:
+        new_content = render(content, edits)
+        report.changed = new_content != content
+        if write and report.changed:
+            write_atomic(path, new_content)
+            report.written = True
+    report.total_seconds = time.perf_counter() - t0
+    return report
+
+
+def print_report(report: FileReport) -> None:
+    print(f"📄 {report.path} (búsqueda {report.scan_seconds * 1000:.2f} ms, total {report.total_seconds * 1000:.2f} ms)")
+    for r in report.results:
+        if r.skipped:
+            print(f"   ⏭️  {r.id}: ya aplicado")
+            continue
+        mark = '✅' if r.ok else '❌'
+        detail = f" - {r.error}" if r.error else ''
+        print(f"   {mark} {r.id}: {r.matches} coincidencia(s), {r.seconds * 1000:.3f} ms{detail}")
+        if r.warning:
+            print(f"      ⚠️ {r.warning}")
+    if not report.ok:
+        print("   ⚠️ No se escribió el archivo: hay anclas que no coinciden")
+    elif not report.changed and not all(r.skipped for r in report.results):
+        print("   ⚠️ Sin cambios")
+
+
+def run(path: str, patches: list, write: bool = True) -> FileReport:
+    """Punto de entrada para los scripts: aplica, imprime y sale con error si falla."""
+    report = apply_patches(path, patches, write=write)
+    print_report(report)
+    if not report.ok:
+        sys.exit(1)
+    return report
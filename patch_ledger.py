@@ -0,0 +1,185 @@
+"""Bitácora de parches aplicados (ledger) para re-ejecuciones idempotentes.
+
+Por cada archivo guarda el hash del contenido después del último run y, por
+cada parche aplicado, el hash de su definición. En el siguiente run:
+
+- si el archivo no cambió y los parches son los mismos, no se hace nada
+  (ni siquiera se busca ninguna ancla);
+- un parche cuya región ya está en el archivo se salta, aunque su definición
+  haya cambiado o lo haya insertado otro script, así que las inserciones no
+  se duplican (el origen de LIMPIAR_DUPLICADOS.py y
+  ELIMINAR_SETAPPOINTMENTS_SUELTO.py). La región es el ``text`` en la
+  posición de su ancla, no en cualquier parte del archivo;
+- solo se aplican los parches cuya región no está en el archivo.
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+
+from anchor_index import load_index
+from patch_engine import FileReport, Patch, PatchResult, apply_patches, print_report, read_text, write_atomic
+
+LEDGER_PATH = '.patch-ledger.json'
+
+
+def sha(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def patch_hash(patch: Patch) -> str:
+    return sha('\0'.join((patch.anchor, patch.at, patch.action, patch.text, str(patch.expect), str(patch.regex))))
+
+
+def _carries(patch: Patch, content: str, span: tuple) -> bool:
+    """Si el ``text`` de una inserción está pegado al ancla en ``span``."""
+    start, end = span
+    if patch.action == 'before':
+        return content[max(0, start - len(patch.text)):start] == patch.text
+    if patch.action == 'after':
+        return content.startswith(patch.text, end)
+    eol = content.find('\n', end)
+    return eol != -1 and content.startswith(patch.text, eol + 1)
+
+
+def is_present(patch: Patch, content: str, index=None) -> bool:
+    """Indica si la región que produce el parche ya está en el contenido.
+
+    Una inserción está aplicada si su ``text`` está junto a alguna
+    coincidencia del ancla, en el lado que indica ``action``; un ``replace``,
+    si su ``text`` está y el ancla solo aparece dentro de él. Para las
+    eliminaciones (``text`` vacío) se considera aplicado cuando el ancla ya no
+    aparece. Las anclas ``at`` se resuelven en ``index``; sin índice el parche
+    se da por pendiente.
+    """
+    if patch.at:
+        if index is None:
+            return False
+        spans = index.spans(patch.at)
+    elif patch.regex:
+        spans = [m.span() for m in patch.compiled().finditer(content)]
+    else:
+        # Todas las apariciones, también las solapadas, como las ve el modo streaming
+        spans = []
+        start = content.find(patch.anchor)
+        while start != -1:
+            spans.append((start, start + len(patch.anchor)))
+            start = content.find(patch.anchor, start + 1)
+    if not patch.text:
+        return not spans
+    if patch.action == 'replace':
+        texts = [m.span() for m in re.finditer(re.escape(patch.text), content)]
+        return bool(texts) and all(any(s <= start and end <= e for s, e in texts) for start, end in spans)
+    return any(_carries(patch, content, span) for span in spans)
+
+
+@dataclass
+class Ledger:
+    path: str = LEDGER_PATH
+    files: dict = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str = LEDGER_PATH) -> 'Ledger':
+        if not os.path.exists(path):
+            return cls(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(path, json.load(f).get('files', {}))
+
+    def save(self) -> None:
+        write_atomic(self.path, json.dumps({'version': 1, 'files': self.files}, indent=2, sort_keys=True) + '\n')
+
+    def entry(self, target: str) -> dict:
+        return self.files.setdefault(os.path.normpath(target), {'file_hash': '', 'patches': {}})
+
+    def knows_all(self, target: str, patches: list) -> bool:
+        recorded = self.files.get(os.path.normpath(target), {}).get('patches', {})
+        return all(p.id in recorded and recorded[p.id]['patch_hash'] == patch_hash(p) for p in patches)
+
+    def unchanged_stat(self, target: str) -> bool:
+        """Atajo sin leer el archivo: mismo tamaño y mtime que al registrar."""
+        entry = self.files.get(os.path.normpath(target))
+        if not entry or 'stat' not in entry:
+            return False
+        st = os.stat(target)
+        return entry['stat'] == [st.st_size, st.st_mtime_ns]
+
+    def unchanged_hash(self, target: str, content_hash: str) -> bool:
+        entry = self.files.get(os.path.normpath(target))
+        return bool(entry) and entry['file_hash'] == content_hash
+
+    def record(self, target: str, content_hash: str, patches: list) -> None:
+        entry = self.entry(target)
+        entry['file_hash'] = content_hash
+        st = os.stat(target)
+        entry['stat'] = [st.st_size, st.st_mtime_ns]
+        now = time.strftime('%Y-%m-%dT%H:%M:%S')
+        for p in patches:
+            previous = entry['patches'].get(p.id, {})
+            entry['patches'][p.id] = {
+                'patch_hash': patch_hash(p),
+                'applied_at': previous.get('applied_at', now)
+                if previous.get('patch_hash') == patch_hash(p) else now,
+            }
+
+
+def pending_patches(content: str, patches: list, present=None, index=None) -> list:
+    """Parches que hay que (re)aplicar: los que no tienen su región en el archivo.
+
+    La región presente manda sobre el registro: un parche modificado, o uno
+    que otro script ya insertó en el mismo lugar, no se inserta por segunda
+    vez. ``index`` resuelve las anclas ``at``.
+
+    ``present(patch)`` reemplaza a ``is_present`` cuando no se tiene el
+    contenido en memoria (modo streaming).
+    """
+    if present is None:
+        def present(p):
+            return is_present(p, content, index)
+    return [p for p in patches if not present(p)]
+
+
+def _all_skipped(target: str, patches: list, t0: float) -> FileReport:
+    report = FileReport(target, [PatchResult(p.id, ok=True, skipped=True) for p in patches])
+    report.total_seconds = time.perf_counter() - t0
+    return report
+
+
+def apply_incremental(target: str, patches: list, ledger: Ledger, write: bool = True) -> FileReport:
+    """Como ``apply_patches`` pero usando la bitácora para saltar trabajo ya hecho."""
+    t0 = time.perf_counter()
+    known = ledger.knows_all(target, patches)
+    if known and ledger.unchanged_stat(target):
+        return _all_skipped(target, patches, t0)
+    content = read_text(target)
+    content_hash = sha(content)
+    if known and ledger.unchanged_hash(target, content_hash):
+        if write:
+            ledger.record(target, content_hash, patches)
+        return _all_skipped(target, patches, t0)
+
+    index = load_index(target, content, save=write) if any(p.at for p in patches) else None
+    pending = pending_patches(content, patches, index=index)
+    pending_ids = {p.id for p in pending}
+    report = apply_patches(target, pending, write=write, content=content, index=index) if pending else FileReport(target)
+    skipped = [PatchResult(p.id, ok=True, skipped=True) for p in patches if p.id not in pending_ids]
+    report.results = skipped + report.results
+    if report.ok and write:
+        new_hash = sha(read_text(target)) if report.written else content_hash
+        ledger.record(target, new_hash, patches)
+    report.total_seconds = time.perf_counter() - t0
+    return report
+
+
+def run(path: str, patches: list, write: bool = True, ledger_path: str = LEDGER_PATH) -> FileReport:
+    """Igual que ``patch_engine.run`` pero idempotente gracias a la bitácora."""
+    ledger = Ledger.load(ledger_path)
+    report = apply_incremental(path, patches, ledger, write=write)
+    print_report(report)
+    if not report.ok:
+        sys.exit(1)
+    if write:
+        ledger.save()
+    return report
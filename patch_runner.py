@@ -0,0 +1,345 @@
+"""Ejecuta todos los scripts de parches del repo en paralelo.
+
+Carga cada script que declare ``TARGET`` y ``PATCHES`` (sin ejecutar su
+bloque ``__main__``), arma un mapa archivo → parches y parchea los archivos
+independientes en un pool de procesos. Los parches de un mismo archivo se
+aplican en orden (por script y dentro de cada script) sobre el contenido en
+memoria, y el archivo se escribe una sola vez al final: o se aplican todos
+los cambios de ese archivo o ninguno.
+
+``TARGET`` puede ser una ruta o un glob (``'src/views/*.tsx'``).
+
+Uso::
+
+    python patch_runner.py                  # todos los scripts
+    python patch_runner.py FIX_MOSTRAR_NOMBRE.py add_debug.py --jobs 4
+    python patch_runner.py --dry-run
+    python patch_runner.py --stream-over 2000000   # archivos > 2 MB por bloques
+    python patch_runner.py --dry-run --diff --report patch-report.json
+    python patch_runner.py --dry-run --report nuevo.json --compare patch-report.json
+"""
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from anchor_index import INDEX_PATH, build_index, load_entries, resolve_index, save_entries
+from patch_engine import FileReport, PatchResult, plan, read_text, render, write_atomic
+from patch_ledger import LEDGER_PATH, Ledger, pending_patches, sha
+from patch_stream import CHUNK_SIZE, chained, file_sha, present_checker, stream_patches, streamable
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass
+class FileOutcome:
+    path: str
+    reports: list = field(default_factory=list)  # [(script, FileReport)]
+    ok: bool = True
+    written: bool = False
+    changed: bool = False
+    size: int = 0
+    seconds: float = 0.0
+    ledger_entry: dict = None
+    index_entry: dict = None
+    error: str = ''
+
+
+def load_script(path: str):
+    """Importa un script de parches sin disparar su bloque ``__main__``."""
+    name = 'patchscript_' + os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def discover(paths: list = None) -> list:
+    """Devuelve ``[(script, target_glob, patches)]`` en orden estable."""
+    if not paths:
+        paths = sorted(glob.glob(os.path.join(ROOT, '*.py')))
+    found = []
+    for path in paths:
+        if os.path.abspath(path) == os.path.abspath(__file__):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            if 'PATCHES' not in f.read():
+                continue
+        module = load_script(path)
+        target = getattr(module, 'TARGET', None)
+        patches = getattr(module, 'PATCHES', None)
+        if target and patches:
+            found.append((os.path.basename(path), target, list(patches)))
+    return found
+
+
+def build_file_map(scripts: list) -> dict:
+    """Mapa ``archivo -> [(script, parches)]`` respetando el orden de los scripts."""
+    file_map = {}
+    for script, target, patches in scripts:
+        targets = sorted(glob.glob(target, recursive=True)) if glob.has_magic(target) else [target]
+        for path in targets:
+            file_map.setdefault(os.path.normpath(path), []).append((script, patches))
+    return file_map
+
+
+def patch_file(path: str, groups: list, ledger_entry: dict, write: bool, stream_over: int = None,
+               diffs: bool = False, index_entry: dict = None) -> FileOutcome:
+    """Aplica en orden los grupos de parches de un archivo; todo o nada.
+
+    Corre dentro de un proceso del pool: recibe solo la entrada de la
+    bitácora de su archivo y la devuelve actualizada. Lo mismo con la entrada
+    del índice de anclas, que el padre guarda una sola vez. Los archivos más
+    grandes que ``stream_over`` bytes se procesan por bloques si todos sus
+    parches son literales (en ese modo no se generan diffs).
+    """
+    if (stream_over is not None and os.path.exists(path) and os.path.getsize(path) > stream_over
+            and all(streamable(patches) for _, patches in groups)):
+        return patch_file_streaming(path, groups, ledger_entry, write)
+    t0 = time.perf_counter()
+    outcome = FileOutcome(path)
+    ledger = Ledger(files={path: ledger_entry} if ledger_entry else {})
+    try:
+        original = content = read_text(path)
+    except OSError as e:
+        outcome.ok = False
+        outcome.error = str(e)
+        return outcome
+    outcome.size = len(original)
+
+    index = None
+    for script, patches in groups:
+        if any(p.at for p in patches) and (index is None or index.sha != sha(content)):
+            # El índice en caché solo vale para el contenido en disco
+            if content is original:
+                index, entry = resolve_index(path, content, index_entry)
+                if write:
+                    outcome.index_entry = entry
+            else:
+                index = build_index(path, content)
+        pending = pending_patches(content, patches, index=index)
+        pending_ids = {p.id for p in pending}
+        report = FileReport(path)
+        edits = plan(content, pending, report, index, diffs=diffs)
+        report.results = [PatchResult(p.id, ok=True, skipped=True) for p in patches
+                          if p.id not in pending_ids] + report.results
+        outcome.reports.append((script, report))
+        if edits is None:
+            # Rollback: no se escribe nada de este archivo
+            outcome.ok = False
+            outcome.seconds = time.perf_counter() - t0
+            return outcome
+        content = render(content, edits)
+        report.changed = bool(edits)
+
+    outcome.changed = content != original
+    if outcome.changed and write:
+        write_atomic(path, content)
+        outcome.written = True
+    if write:
+        for _, patches in groups:
+            ledger.record(path, sha(content), patches)
+        outcome.ledger_entry = ledger.files[path]
+    outcome.seconds = time.perf_counter() - t0
+    return outcome
+
+
+def patch_file_streaming(path: str, groups: list, ledger_entry: dict, write: bool,
+                         chunk_size: int = CHUNK_SIZE) -> FileOutcome:
+    """Como ``patch_file`` pero sin cargar el archivo: cada grupo pasa por un temporal.
+
+    En dry-run no se crean temporales: cada grupo lee el archivo con los
+    grupos anteriores aplicados al vuelo (``chained``).
+    """
+    t0 = time.perf_counter()
+    outcome = FileOutcome(path, size=os.path.getsize(path))
+    ledger = Ledger(files={path: ledger_entry} if ledger_entry else {})
+    directory = os.path.dirname(os.path.abspath(path))
+    current = path
+    temps = []
+    steps = []
+    try:
+        for script, patches in groups:
+            source = current if write else chained(path, steps, chunk_size)
+            pending = pending_patches(None, patches, present=present_checker(source, patches, chunk_size))
+            pending_ids = {p.id for p in pending}
+            if write:
+                dst = None
+                if pending:
+                    fd, dst = tempfile.mkstemp(prefix='.patch-', dir=directory)
+                    os.close(fd)
+                    temps.append(dst)
+                report = stream_patches(current, pending, chunk_size=chunk_size, dst=dst)
+            else:
+                report = stream_patches(path, pending, write=False, chunk_size=chunk_size,
+                                        source=chained(path, steps, chunk_size))
+                steps.append(pending)
+            report.results = [PatchResult(p.id, ok=True, skipped=True) for p in patches
+                              if p.id not in pending_ids] + report.results
+            outcome.reports.append((script, report))
+            if not report.ok:
+                # Rollback: los temporales se borran y el original queda intacto
+                outcome.ok = False
+                return outcome
+            if report.changed:
+                outcome.changed = True
+            if report.written:
+                current = dst
+        if write:
+            if current != path:
+                os.chmod(current, os.stat(path).st_mode & 0o777)
+                os.replace(current, path)
+                temps.remove(current)
+                outcome.written = True
+            digest = file_sha(path, chunk_size)
+            for _, patches in groups:
+                ledger.record(path, digest, patches)
+            outcome.ledger_entry = ledger.files[path]
+        return outcome
+    finally:
+        for tmp in temps:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        outcome.seconds = time.perf_counter() - t0
+
+
+def run_all(file_map: dict, jobs: int = None, write: bool = True, ledger_path: str = LEDGER_PATH,
+            stream_over: int = None, diffs: bool = False, index_path: str = INDEX_PATH) -> list:
+    ledger = Ledger.load(ledger_path)
+    cached = load_entries(index_path)
+    indexes = {}
+    outcomes = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(patch_file, path, groups, ledger.files.get(path), write, stream_over, diffs,
+                               cached.get(path))
+                   for path, groups in file_map.items()]
+        for future in futures:
+            outcome = future.result()
+            if outcome.ledger_entry is not None:
+                ledger.files[outcome.path] = outcome.ledger_entry
+            if outcome.index_entry is not None:
+                indexes[outcome.path] = outcome.index_entry
+            outcomes.append(outcome)
+    if write:
+        ledger.save()
+        save_entries(indexes, index_path)
+    return outcomes
+
+
+def print_summary(outcomes: list, elapsed: float) -> None:
+    total_bytes = sum(o.size for o in outcomes)
+    for o in outcomes:
+        mark = '✅' if o.ok else '❌'
+        state = ('escrito' if o.written else 'cambiaría (dry-run)' if o.changed
+                 else 'sin cambios' if o.ok else 'revertido')
+        print(f"{mark} {o.path} ({state}, {o.seconds * 1000:.1f} ms){' - ' + o.error if o.error else ''}")
+        for script, report in o.reports:
+            for r in report.results:
+                if not r.ok:
+                    print(f"   ❌ {script} / {r.id}: {r.error}")
+                if r.warning:
+                    print(f"   ⚠️ {script} / {r.id}: {r.warning}")
+    failed = sum(1 for o in outcomes if not o.ok)
+    rate = total_bytes / elapsed / 1e6 if elapsed else 0
+    print(f"\n📊 {len(outcomes)} archivo(s), {failed} con errores, {elapsed:.2f} s, {rate:.1f} MB/s")
+
+
+def build_report(outcomes: list, elapsed: float, write: bool) -> dict:
+    """Reporte JSON de todo el set de parches: coincidencias, bytes y tiempos."""
+    files = []
+    totals = {'patches': 0, 'failed': 0, 'skipped': 0, 'noop': 0, 'bytes_changed': 0}
+    for o in outcomes:
+        scripts = []
+        for script, report in o.reports:
+            patches = []
+            for r in report.results:
+                noop = r.ok and not r.skipped and r.bytes_changed == 0
+                totals['patches'] += 1
+                totals['failed'] += not r.ok
+                totals['skipped'] += r.skipped
+                totals['noop'] += noop
+                totals['bytes_changed'] += r.bytes_changed
+                entry = {'id': r.id, 'ok': r.ok, 'skipped': r.skipped, 'noop': noop, 'matches': r.matches,
+                         'bytes_changed': r.bytes_changed, 'seconds': round(r.seconds, 6), 'error': r.error}
+                if r.warning:
+                    entry['warning'] = r.warning
+                if r.diff:
+                    entry['diff'] = r.diff
+                patches.append(entry)
+            scripts.append({'script': script, 'scan_seconds': round(report.scan_seconds, 6), 'patches': patches})
+        files.append({'path': o.path, 'ok': o.ok, 'written': o.written, 'changed': o.changed, 'size': o.size,
+                      'seconds': round(o.seconds, 6), 'error': o.error, 'scripts': scripts})
+    return {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'dry_run': not write,
+        'elapsed_seconds': round(elapsed, 6),
+        'totals': totals,
+        'files': files,
+    }
+
+
+def compare_reports(old: dict, new: dict) -> None:
+    """Imprime cambios de estado y de tiempo por parche entre dos reportes."""
+    def index(report):
+        return {(f['path'], s['script'], p['id']): p
+                for f in report['files'] for s in f['scripts'] for p in s['patches']}
+    before, after = index(old), index(new)
+    print(f"\n🔁 Comparación: {old['elapsed_seconds']:.3f} s → {new['elapsed_seconds']:.3f} s")
+    for key in sorted(before.keys() | after.keys()):
+        a, b = before.get(key), after.get(key)
+        name = ' / '.join(key)
+        if a is None or b is None:
+            print(f"   {'➕' if a is None else '➖'} {name}")
+        elif a['ok'] != b['ok'] or a['noop'] != b['noop']:
+            print(f"   ⚠️ {name}: ok {a['ok']}→{b['ok']}, no-op {a['noop']}→{b['noop']}")
+        elif b['seconds'] > 2 * a['seconds'] and b['seconds'] - a['seconds'] > 0.001:
+            print(f"   🐢 {name}: {a['seconds'] * 1000:.2f} ms → {b['seconds'] * 1000:.2f} ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Aplica todos los scripts de parches en paralelo')
+    parser.add_argument('scripts', nargs='*', help='scripts a cargar (por defecto todos los *.py con PATCHES)')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='procesos del pool (por defecto: núcleos)')
+    parser.add_argument('--dry-run', action='store_true', help='no escribe archivos ni la bitácora')
+    parser.add_argument('--stream-over', type=int, default=None, metavar='BYTES',
+                        help='procesa por bloques los archivos más grandes que BYTES')
+    parser.add_argument('--diff', action='store_true', help='imprime el diff unificado de cada parche')
+    parser.add_argument('--report', metavar='JSON', help='escribe el reporte de coincidencias/bytes/tiempos')
+    parser.add_argument('--compare', metavar='JSON', help='compara contra un reporte anterior')
+    args = parser.parse_args(argv)
+
+    file_map = build_file_map(discover(args.scripts))
+    if not file_map:
+        print("⚠️ No encontré scripts con TARGET/PATCHES")
+        return 0
+    t0 = time.perf_counter()
+    outcomes = run_all(file_map, jobs=args.jobs, write=not args.dry_run, stream_over=args.stream_over,
+                       diffs=args.diff or bool(args.report))
+    elapsed = time.perf_counter() - t0
+    if args.diff:
+        for o in outcomes:
+            for script, report in o.reports:
+                for r in report.results:
+                    if r.diff:
+                        print(f"--- {script} / {r.id}")
+                        print(r.diff, end='')
+    print_summary(outcomes, elapsed)
+    report = build_report(outcomes, elapsed, write=not args.dry_run)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"📝 Reporte: {args.report}")
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare_reports(json.load(f), report)
+    return 0 if all(o.ok for o in outcomes) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""Modo streaming del motor de parches para archivos grandes.
+
+``patch_engine`` lee el archivo completo y arma el resultado en memoria.
+Para archivos grandes (DashboardView.tsx, los App.tsx.backup_*) este módulo
+lee por bloques, aplica las inserciones/reemplazos a medida que pasan sus
+anclas y escribe directo a un temporal que al final reemplaza al original.
+En memoria solo viven un bloque, una ventana del largo del ancla más larga
+y los textos de los parches; no se hacen copias del archivo completo.
+
+Solo admite anclas literales (sin ``regex`` ni ``at``): una regex no tiene
+un largo máximo para la ventana entre bloques.
+"""
+import hashlib
+import re
+import sys
+import time
+
+from patch_engine import FileReport, PatchResult, atomic_writer, print_report
+
+CHUNK_SIZE = 1 << 20
+
+
+class _Rollback(Exception):
+    pass
+
+
+def streamable(patches: list) -> bool:
+    return all(not p.regex and not p.at for p in patches)
+
+
+def iter_chunks(path: str, chunk_size: int = CHUNK_SIZE):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def file_sha(path: str, chunk_size: int = CHUNK_SIZE) -> str:
+    """Mismo hash que ``patch_ledger.sha`` pero sin cargar el archivo."""
+    h = hashlib.sha256()
+    for chunk in iter_chunks(path, chunk_size):
+        h.update(chunk.encode('utf-8'))
+    return h.hexdigest()
+
+
+def contains(source, needles: list, chunk_size: int = CHUNK_SIZE) -> set:
+    """Índices de ``needles`` que aparecen en ``source`` (ruta o bloques de texto).
+
+    Un needle ``(ancla, texto)`` aparece cuando ``texto`` abre la línea que
+    sigue al ancla (la región de un ``after_line``).
+    """
+    found = set()
+    tests = []
+    keep = 1
+    for needle in needles:
+        if isinstance(needle, tuple):
+            anchor, text = needle
+            tests.append(re.compile(re.escape(anchor) + r'[^\n]*\n' + re.escape(text)).search)
+            keep = max(keep, len(anchor) + len(text))
+        else:
+            tests.append(lambda window, needle=needle: needle in window)
+            keep = max(keep, len(needle))
+    lines = any(isinstance(n, tuple) for n in needles)
+    tail = ''
+    chunks = iter_chunks(source, chunk_size) if isinstance(source, str) else source
+    for chunk in chunks:
+        window = tail + chunk
+        for i, test in enumerate(tests):
+            if i not in found and test(window):
+                found.add(i)
+        if len(found) == len(needles):
+            break
+        cut = len(window) - keep + 1
+        if lines:
+            # Un after_line pendiente empieza a más tardar en la línea anterior al último salto
+            cut = min(cut, window.rfind('\n', 0, max(window.rfind('\n'), 0)) + 1 - keep)
+        tail = window[max(0, cut):]
+    return found
+
+
+def _stream(chunks, patches: list, report: FileReport):
+    """Devuelve por partes la misma salida que ``plan`` + ``render`` sin tener el archivo completo.
+
+    Las ediciones se calculan en posiciones del original, igual que en
+    ``patch_engine``: cada ancla se busca por separado (como queda ``scan``
+    con anclas solapadas), las ``after_line`` van después del primer salto de
+    línea del original que sigue al ancla (aunque un ``replace`` lo quite) y
+    se emiten ordenadas por ``(inicio, fin, índice de parche)``. Solo se
+    emite una edición cuando ya no puede aparecer otra antes que ella.
+    ``report`` se llena al agotar el generador.
+    """
+    keep = max(len(p.anchor) for p in patches)
+    results = [PatchResult(p.id) for p in patches]
+    next_pos = [0] * len(patches)     # fin de la última coincidencia de cada ancla
+    waiting = []                      # after_line sin salto de línea todavía: (buscar_desde, i)
+    pending = []                      # (inicio, fin, i, texto) en posiciones del original
+    overlapped = set()
+    base = cursor = 0                 # posición de buf[0] y de lo próximo que se copia del original
+    last = None
+    changed = False
+    buf = ''
+    chunks = iter(chunks)
+    eof = False
+    while not eof:
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+        else:
+            buf += chunk
+        # Solo es seguro aceptar anclas que empiezan donde todavía cabe la más larga
+        limit = base + len(buf) if eof else base + len(buf) - keep + 1
+        if not eof and limit <= base:
+            continue
+
+        def eol_after(pos):
+            eol = buf.find('\n', max(pos, base) - base)
+            return None if eol == -1 else base + eol + 1
+
+        for wait_from, i in waiting[:]:
+            pos = eol_after(wait_from)
+            if pos is not None:
+                waiting.remove((wait_from, i))
+                pending.append((pos, pos, i, patches[i].text))
+        for i, patch in enumerate(patches):
+            t0 = time.perf_counter()
+            j = buf.find(patch.anchor, max(next_pos[i], base) - base)
+            while j != -1 and base + j < limit:
+                start, end = base + j, base + j + len(patch.anchor)
+                if patch.action == 'before':
+                    pending.append((start, start, i, patch.text))
+                elif patch.action == 'after':
+                    pending.append((end, end, i, patch.text))
+                elif patch.action == 'after_line':
+                    pos = eol_after(end)
+                    if pos is None:
+                        waiting.append((end, i))
+                    else:
+                        pending.append((pos, pos, i, patch.text))
+                else:
+                    pending.append((start, end, i, patch.text))
+                results[i].matches += 1
+                results[i].bytes_changed += len(patch.text) + (end - start if patch.action == 'replace' else 0)
+                next_pos[i] = end
+                j = buf.find(patch.anchor, end - base)
+            results[i].seconds += time.perf_counter() - t0
+        if eof:
+            pending.extend((limit, limit, i, patches[i].text) for _, i in waiting)
+            waiting = []
+
+        pending.sort(key=lambda e: (e[0], e[1], e[2]))
+        ready = [e for e in pending if e[0] < limit or eof]
+        pending = pending[len(ready):]
+        for start, end, i, text in ready:
+            if last is not None and start < last[1]:
+                overlapped.update((last[2], i))
+            if start > cursor:
+                yield buf[cursor - base:start - base]
+            yield text
+            changed = changed or text != buf[start - base:end - base]
+            cursor = max(cursor, end)
+            last = (start, end, i)
+        if cursor < limit:
+            yield buf[cursor - base:limit - base]
+            cursor = limit
+        buf = buf[limit - base:]
+        base = limit
+
+    for i, (patch, result) in enumerate(zip(patches, results)):
+        if patch.expect is not None and result.matches != patch.expect:
+            result.error = f"se esperaban {patch.expect} coincidencias, hubo {result.matches}"
+        else:
+            result.ok = True
+    for i in overlapped:
+        if results[i].ok:
+            results[i].ok = False
+            results[i].error = 'se solapa con otro parche'
+    report.results = results
+    report.changed = changed
+
+
+def chained(path: str, steps: list, chunk_size: int = CHUNK_SIZE):
+    """Bloques de ``path`` con cada lista de parches de ``steps`` aplicada en orden.
+
+    Sirve para el dry-run de varios grupos sobre un archivo grande: cada grupo
+    ve los cambios de los anteriores sin que se escriba ningún temporal.
+    """
+    chunks = iter_chunks(path, chunk_size)
+    for patches in steps:
+        if patches:
+            chunks = _stream(chunks, patches, FileReport(path))
+    return chunks
+
+
+def stream_patches(path: str, patches: list, write: bool = True, chunk_size: int = CHUNK_SIZE,
+                   dst: str = None, source=None) -> FileReport:
+    """Aplica ``patches`` a ``path`` por bloques. Todo o nada, como ``apply_patches``.
+
+    Con ``dst`` el resultado se escribe ahí y ``path`` no se toca. ``source``
+    reemplaza la lectura de ``path`` por otros bloques (ver ``chained``).
+    """
+    if not streamable(patches):
+        raise ValueError("El modo streaming solo admite anclas literales (sin regex ni at)")
+    t0 = time.perf_counter()
+    report = FileReport(path)
+    if not patches:
+        return report
+    chunks = iter_chunks(path, chunk_size) if source is None else source
+    if not write:
+        for _ in _stream(chunks, patches, report):
+            pass
+    else:
+        try:
+            with atomic_writer(dst or path) as out:
+                for piece in _stream(chunks, patches, report):
+                    out.write(piece)
+                if not report.ok or not report.changed:
+                    raise _Rollback()
+            report.written = True
+        except _Rollback:
+            pass
+    report.total_seconds = time.perf_counter() - t0
+    return report
+
+
+def _region(patch):
+    """Lo que deja el parche aplicado junto a su ancla, como needle de ``contains``."""
+    if patch.action == 'before':
+        return patch.text + patch.anchor
+    if patch.action == 'after':
+        return patch.anchor + patch.text
+    if patch.action == 'after_line':
+        return patch.anchor, patch.text
+    return patch.text
+
+
+def present_checker(source, patches: list, chunk_size: int = CHUNK_SIZE):
+    """Equivalente streaming de ``patch_ledger.is_present`` para ``pending_patches``.
+
+    Una sola pasada por ``source``. Un ``replace`` cuyo ``text`` contiene el
+    ancla se da por aplicado con solo encontrar el ``text``; en memoria además
+    se comprueba que el ancla no aparezca fuera de él.
+    """
+    n = len(patches)
+    found = contains(source, [p.anchor for p in patches] + [_region(p) for p in patches], chunk_size)
+    by_id = {}
+    for i, p in enumerate(patches):
+        anchor, region = i in found, n + i in found
+        if not p.text:
+            by_id[p.id] = not anchor
+        elif p.action == 'replace':
+            by_id[p.id] = region and (not anchor or p.anchor in p.text)
+        else:
+            by_id[p.id] = region
+    return lambda p: by_id[p.id]
+
+
+def run(path: str, patches: list, write: bool = True, chunk_size: int = CHUNK_SIZE) -> FileReport:
+    report = stream_patches(path, patches, write=write, chunk_size=chunk_size)
+    print_report(report)
+    if not report.ok:
+        sys.exit(1)
+    return report
@@ -0,0 +1,230 @@
+"""Genera la tabla nombre de propiedad → ubicación (link de Maps y coordenadas).
+
+AGREGAR_GPS_CON_SPLIT.py dejó en el handler de WhatsApp un diccionario fijo
+``MAPS_UBICACIONES`` y resuelve el modelo con ``name.split(' ')[0]`` en cada
+mensaje: falla con acentos ("Tulipan" vs "Tulipán"), con nombres de varias
+palabras y pide un parche por cada desarrollo nuevo.
+
+Este paso de build lee el export de ``properties`` (id, name, development,
+gps_link) y genera ``src/lib/propertyLocations.ts`` con un ``Map`` cuyas
+llaves son el nombre exacto, el nombre sin acentos en minúsculas, el modelo
+(primera palabra) y "desarrollo modelo". En el handler la búsqueda es
+``INDEX.get(name)``: el nombre exacto pega directo, sin split ni normalizar;
+solo si no está se intenta con el nombre plegado. Las entradas de
+``MAPS_UBICACIONES`` se conservan como base para los modelos sin
+``gps_link``.
+
+Es incremental: ``.property-locations.json`` guarda un hash por propiedad y
+solo se recalculan las filas que cambiaron (con ``--partial`` el export
+puede traer solo las cambiadas). El módulo se reescribe solo si su contenido
+cambia.
+
+Uso::
+
+    python property_locations.py properties.csv
+    python property_locations.py cambios.jsonl --partial
+    python property_locations.py                      # solo MAPS_UBICACIONES
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import unicodedata
+
+from lead_dedup import iter_rows
+from patch_engine import read_text, write_atomic
+
+OUTPUT = 'src/lib/propertyLocations.ts'
+CACHE_PATH = '.property-locations.json'
+LEGACY_SCRIPT = 'AGREGAR_GPS_CON_SPLIT.py'
+COLUMNS = ('id', 'name', 'development', 'gps_link')
+
+LEGACY_RE = re.compile(r"const MAPS_UBICACIONES[^=]*=\s*\{(.*?)\n\};", re.S)
+ENTRY_RE = re.compile(r"'([^']+)'\s*:\s*'([^']*)'")
+COORDS_RE = re.compile(r'(?:[?&](?:q|query|ll|destination)=|@)(-?\d{1,2}\.\d+),\s*(-?\d{1,3}\.\d+)')
+
+HEADER = """// ═══════════════════════════════════════════════════════════════════════════
+// PROPERTY LOCATIONS — property/model name → Google Maps link and coordinates
+// Keys are the exact names plus accent-folded aliases, so the lookup is a
+// single Map hit. Do not edit: re-run property_locations.py.
+// (generated by property_locations.py)
+// ═══════════════════════════════════════════════════════════════════════════
+"""
+
+FOOTER = """
+export function foldName(name: string): string {
+  return name.normalize('NFD').replace(/[\\u0300-\\u036f]/g, '').toLowerCase().replace(/\\s+/g, ' ').trim()
+}
+
+export function findPropertyLocation(name: string | null | undefined): PropertyLocation | undefined {
+  if (!name) return undefined
+  const i = INDEX.get(name) ?? INDEX.get(foldName(name))
+  return i === undefined ? undefined : LOCATIONS[i]
+}
+
+export function propertyMapsLink(name: string | null | undefined): string {
+  return findPropertyLocation(name)?.link ?? ''
+}
+"""
+
+
+def fold(name: str) -> str:
+    """Igual que ``foldName`` del módulo generado."""
+    folded = unicodedata.normalize('NFD', name or '')
+    folded = ''.join(c for c in folded if not unicodedata.combining(c))
+    return ' '.join(folded.lower().split())
+
+
+def coordinates(link: str) -> tuple:
+    m = COORDS_RE.search(link or '')
+    return (float(m.group(1)), float(m.group(2))) if m else (None, None)
+
+
+def legacy_locations(path: str = LEGACY_SCRIPT) -> dict:
+    """``MAPS_UBICACIONES`` tal como lo parchea AGREGAR_GPS_CON_SPLIT.py."""
+    if not os.path.exists(path):
+        return {}
+    m = LEGACY_RE.search(read_text(path))
+    return dict(ENTRY_RE.findall(m.group(1))) if m else {}
+
+
+def row_hash(row: tuple) -> str:
+    return hashlib.sha1('\x1f'.join(row).encode('utf-8')).hexdigest()[:12]
+
+
+def row_entry(row: tuple) -> dict:
+    """Llaves exactas y alias de una propiedad, y su link (vacío si no tiene)."""
+    _, name, development, link = row
+    words = fold(name).split(' ')
+    aliases = {fold(name), words[0]}
+    if development:
+        aliases.add(fold(f'{development} {words[0]}'))
+    return {'exact': [name.strip()] if name.strip() else [], 'aliases': sorted(a for a in aliases if a),
+            'model': words[0], 'link': (link or '').strip()}
+
+
+class LocationTable:
+    def __init__(self):
+        self.locations = []     # [(link, lat, lng)]
+        self.slots = {}
+        self.exact = {}
+        self.aliases = {}
+        self.conflicts = set()
+
+    def slot(self, link: str) -> int:
+        if link not in self.slots:
+            self.slots[link] = len(self.locations)
+            self.locations.append((link, *coordinates(link)))
+        return self.slots[link]
+
+    def add(self, exact: list, aliases: list, link: str) -> None:
+        i = self.slot(link)
+        for key in exact:
+            self.exact[key] = i
+        for key in aliases:
+            if self.aliases.setdefault(key, i) != i:
+                self.conflicts.add(key)
+
+    def index(self) -> dict:
+        # Un alias que apunta a dos ubicaciones distintas es ambiguo: se quita;
+        # los nombres exactos siempre ganan
+        index = {k: i for k, i in self.aliases.items() if k not in self.conflicts}
+        index.update(self.exact)
+        return index
+
+
+def build(rows: dict, legacy: dict) -> tuple:
+    """Arma la tabla con la base de MAPS_UBICACIONES y las propiedades encima."""
+    table = LocationTable()
+    for model, link in legacy.items():
+        table.add([model], [fold(model)], link)
+    legacy_by_model = {fold(m): link for m, link in legacy.items()}
+    missing = []
+    for entry in rows.values():
+        link = entry['link'] or legacy_by_model.get(entry['model'], '')
+        if not link:
+            missing.append(entry['exact'][0] if entry['exact'] else entry['model'])
+            continue
+        table.add(entry['exact'], entry['aliases'], link)
+    return table, missing
+
+
+def render(table: LocationTable) -> str:
+    def num(v):
+        return 'null' if v is None else repr(v)
+
+    lines = [HEADER, 'export interface PropertyLocation {', '  link: string',
+             '  lat: number | null', '  lng: number | null', '}', '',
+             'const LOCATIONS: PropertyLocation[] = [']
+    for link, lat, lng in table.locations:
+        lines.append(f'  {{ link: {json.dumps(link)}, lat: {num(lat)}, lng: {num(lng)} }},')
+    lines += [']', '', '// name or alias -> index into LOCATIONS', 'const INDEX = new Map<string, number>([']
+    for key, i in sorted(table.index().items()):
+        lines.append(f'  [{json.dumps(key, ensure_ascii=False)}, {i}],')
+    lines.append('])')
+    return '\n'.join(lines) + '\n' + FOOTER
+
+
+def load_cache(path: str) -> dict:
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'rows': {}}
+
+
+def update(cache: dict, source: str, partial: bool) -> tuple:
+    """Recalcula solo las filas cuyo hash cambió. Devuelve ``(iguales, recalculadas, borradas)``."""
+    rows = cache.setdefault('rows', {})
+    seen = set()
+    same = changed = 0
+    for row in iter_rows(source, COLUMNS):
+        key = row[0] or row[1]
+        seen.add(key)
+        digest = row_hash(row)
+        if rows.get(key, {}).get('hash') == digest:
+            same += 1
+            continue
+        rows[key] = dict(row_entry(row), hash=digest)
+        changed += 1
+    removed = 0
+    if not partial:
+        for key in [k for k in rows if k not in seen]:
+            del rows[key]
+            removed += 1
+    return same, changed, removed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Genera la tabla de ubicaciones de propiedades')
+    parser.add_argument('properties', nargs='?', help='export de properties (.csv, .jsonl o .json)')
+    parser.add_argument('--partial', action='store_true', help='el export solo trae propiedades cambiadas')
+    parser.add_argument('--output', default=OUTPUT)
+    parser.add_argument('--cache', default=CACHE_PATH)
+    parser.add_argument('--legacy', default=LEGACY_SCRIPT, help='script con MAPS_UBICACIONES de base')
+    args = parser.parse_args(argv)
+
+    cache = load_cache(args.cache)
+    if args.properties:
+        same, changed, removed = update(cache, args.properties, args.partial)
+        print(f"📊 {changed} propiedades recalculadas, {same} sin cambios, {removed} borradas")
+    table, missing = build(cache.get('rows', {}), legacy_locations(args.legacy))
+    for name in missing:
+        print(f"   ⚠️ {name}: sin gps_link ni modelo en MAPS_UBICACIONES")
+    for key in sorted(table.conflicts):
+        print(f"   ⚠️ alias ambiguo '{key}': apunta a varias ubicaciones, se omite")
+
+    text = render(table)
+    if os.path.exists(args.output) and read_text(args.output) == text:
+        print(f"⏭️  {args.output} sin cambios")
+    else:
+        write_atomic(args.output, text)
+        print(f"✅ {args.output}: {len(table.locations)} ubicaciones, {len(table.index())} llaves")
+    if args.properties:
+        write_atomic(args.cache, json.dumps(cache, ensure_ascii=False) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,39 +1,79 @@
-// SARA CRM Service Worker v1
-const CACHE_NAME = 'sara-crm-v2';
+// SARA CRM Service Worker v3
+// sw_manifest.py (run after vite build) replaces the manifest below with every
+// file in dist/ and its content hash. Vite-hashed assets (/assets/*-[hash].js)
+// are cached by URL, the rest by URL + revision, so a deploy only downloads the
+// files that changed and this file changes whenever any of them does.
+const PRECACHE_MANIFEST = /* @precache-manifest */ [];
+const PRECACHE = 'sara-precache';
+const RUNTIME = 'sara-runtime';
 const OFFLINE_URL = '/offline.html';
+const SHELL_URL = '/index.html';
+const NETWORK_TIMEOUT_MS = 3000;
 
-// Static assets to pre-cache on install
-const PRECACHE_URLS = [
-  '/',
-  '/offline.html',
-  '/icon.svg',
-  '/manifest.json',
-];
+// Without a build (vite dev) only the offline page is precached
+const PRECACHE_ENTRIES = PRECACHE_MANIFEST.length
+  ? PRECACHE_MANIFEST
+  : [{ url: OFFLINE_URL, revision: 'dev', hashed: false }];
 
-// Install: pre-cache app shell
+function cacheKey(entry) {
+  return entry.hashed ? entry.url : `${entry.url}?__rev=${entry.revision}`;
+}
+
+// pathname -> cache key ("/" is the SPA shell)
+const PRECACHE_KEYS = new Map(PRECACHE_ENTRIES.map((entry) => [entry.url, cacheKey(entry)]));
+if (PRECACHE_KEYS.has(SHELL_URL)) PRECACHE_KEYS.set('/', PRECACHE_KEYS.get(SHELL_URL));
+
+function absolute(path) {
+  return new URL(path, self.location.origin).href;
+}
+
+// Install: download only the entries whose key is not cached yet
 self.addEventListener('install', (event) => {
   event.waitUntil(
-    caches.open(CACHE_NAME).then((cache) => {
-      return cache.addAll(PRECACHE_URLS);
+    caches.open(PRECACHE).then(async (cache) => {
+      const cached = new Set((await cache.keys()).map((request) => request.url));
+      const missing = PRECACHE_ENTRIES.filter((entry) => !cached.has(absolute(cacheKey(entry))));
+      await Promise.all(missing.map((entry) =>
+        fetch(entry.url, { cache: entry.hashed ? 'default' : 'no-cache' }).then((response) => {
+          if (!response.ok) throw new Error(`SW: precache failed for ${entry.url} (${response.status})`);
+          return cache.put(cacheKey(entry), response);
+        })
+      ));
     })
   );
   self.skipWaiting();
 });
 
-// Activate: clean old caches
+// Activate: drop precache entries that left the manifest, stale hashed assets
+// from the runtime cache and caches from older service workers (sara-crm-v*)
 self.addEventListener('activate', (event) => {
+  const expected = new Set(PRECACHE_ENTRIES.map((entry) => absolute(cacheKey(entry))));
   event.waitUntil(
-    caches.keys().then((cacheNames) => {
-      return Promise.all(
-        cacheNames
-          .filter((name) => name !== CACHE_NAME)
-          .map((name) => caches.delete(name))
-      );
-    })
+    caches.keys().then((cacheNames) => Promise.all([
+      ...cacheNames
+        .filter((name) => name !== PRECACHE && name !== RUNTIME)
+        .map((name) => caches.delete(name)),
+      caches.open(PRECACHE).then((cache) => cache.keys().then((requests) => Promise.all(
+        requests
+          .filter((request) => !expected.has(request.url))
+          .map((request) => cache.delete(request))
+      ))),
+      caches.open(RUNTIME).then((cache) => cache.keys().then((requests) => Promise.all(
+        requests
+          .filter((request) => new URL(request.url).pathname.startsWith('/assets/'))
+          .map((request) => cache.delete(request))
+      ))),
+    ]))
   );
   self.clients.claim();
 });
 
+function matchPrecache(pathname) {
+  const key = PRECACHE_KEYS.get(pathname);
+  if (!key) return Promise.resolve(undefined);
+  return caches.open(PRECACHE).then((cache) => cache.match(key));
+}
+
 // Helper: fetch with timeout
 function fetchWithTimeout(request, timeoutMs) {
   return new Promise((resolve, reject) => {
@@ -51,6 +91,23 @@ function fetchWithTimeout(request, timeoutMs) {
   });
 }
 
+// Network-first with timeout; when the device reports offline go straight to
+// the cache instead of waiting for the timeout
+function networkFirst(request, fallback) {
+  if (self.navigator && self.navigator.onLine === false) {
+    return caches.match(request).then((cached) => cached || fallback());
+  }
+  return fetchWithTimeout(request.clone(), NETWORK_TIMEOUT_MS)
+    .then((response) => {
+      if (response.ok) {
+        const responseClone = response.clone();
+        caches.open(RUNTIME).then((cache) => cache.put(request, responseClone));
+      }
+      return response;
+    })
+    .catch(() => caches.match(request).then((cached) => cached || fallback()));
+}
+
 // Check if request is an API call (exclude supabase - never cache DB queries)
 function isApiRequest(url) {
   return url.includes('/api/');
@@ -99,30 +156,39 @@ self.addEventListener('fetch', (event) => {
     return;
   }
 
-  // API requests: network-first with 5s timeout, fallback to cache
+  const url = new URL(request.url);
+  const sameOrigin = url.origin === self.location.origin;
+
+  // Navigation requests: the precached SPA shell, no network round trip
+  if (request.mode === 'navigate' && PRECACHE_KEYS.has(SHELL_URL)) {
+    event.respondWith(
+      matchPrecache(SHELL_URL).then((cached) => {
+        return cached || fetch(request).catch(() => matchPrecache(OFFLINE_URL));
+      })
+    );
+    return;
+  }
+
+  // Precached files (hashed assets are immutable): cache-first
+  if (sameOrigin && PRECACHE_KEYS.has(url.pathname) && !url.search) {
+    event.respondWith(
+      matchPrecache(url.pathname).then((cached) => cached || fetch(request))
+    );
+    return;
+  }
+
+  // API requests: network-first with timeout, fallback to cache
   if (isApiRequest(request.url)) {
     event.respondWith(
-      fetchWithTimeout(request.clone(), 5000)
-        .then((response) => {
-          if (response.ok) {
-            const responseClone = response.clone();
-            caches.open(CACHE_NAME).then((cache) => cache.put(request, responseClone));
-          }
-          return response;
-        })
-        .catch(() => {
-          return caches.match(request).then((cached) => {
-            return cached || new Response(JSON.stringify({ error: 'Sin conexion', offline: true }), {
-              status: 503,
-              headers: { 'Content-Type': 'application/json' },
-            });
-          });
-        })
+      networkFirst(request, () => new Response(JSON.stringify({ error: 'Sin conexion', offline: true }), {
+        status: 503,
+        headers: { 'Content-Type': 'application/json' },
+      }))
     );
     return;
   }
 
-  // Static assets: cache-first, fallback to network
+  // Static assets outside the manifest: cache-first, fallback to network
   if (isStaticAsset(request.url)) {
     event.respondWith(
       caches.match(request).then((cached) => {
@@ -130,7 +196,7 @@ self.addEventListener('fetch', (event) => {
         return fetch(request.clone()).then((response) => {
           if (response.ok) {
             const responseClone = response.clone();
-            caches.open(CACHE_NAME).then((cache) => cache.put(request, responseClone));
+            caches.open(RUNTIME).then((cache) => cache.put(request, responseClone));
           }
           return response;
         });
@@ -139,22 +205,10 @@ self.addEventListener('fetch', (event) => {
     return;
   }
 
-  // Navigation requests: network-first, fallback to cached index.html (SPA)
+  // Navigation without a manifest (dev): network-first, fallback to offline page
   if (request.mode === 'navigate') {
     event.respondWith(
-      fetchWithTimeout(request.clone(), 5000)
-        .then((response) => {
-          if (response.ok) {
-            const responseClone = response.clone();
-            caches.open(CACHE_NAME).then((cache) => cache.put(request, responseClone));
-          }
-          return response;
-        })
-        .catch(() => {
-          return caches.match('/').then((cached) => {
-            return cached || caches.match(OFFLINE_URL);
-          });
-        })
+      networkFirst(request, () => matchPrecache(OFFLINE_URL))
     );
     return;
   }
@@ -165,7 +219,7 @@ self.addEventListener('fetch', (event) => {
       .then((response) => {
         if (response.ok) {
           const responseClone = response.clone();
-          caches.open(CACHE_NAME).then((cache) => cache.put(request, responseClone));
+          caches.open(RUNTIME).then((cache) => cache.put(request, responseClone));
         }
         return response;
       })
@@ -0,0 +1,410 @@
+"""Perfil estático del fan-out de consultas a Supabase en src/.
+
+Encuentra cada ``supabase.from('<tabla>')...`` y anota la tabla, la
+operación, las columnas, los ``order``/``limit``/filtros y el contexto en
+que corre:
+
+- ``poll``      dentro de una función que dispara un ``setInterval``
+                (p. ej. ``loadDataSilent`` cada 30 s en CrmContext.tsx)
+- ``realtime``  dentro de un handler ``.on('postgres_changes', ...)``
+- ``load``      alcanzable desde un ``useEffect``
+- ``action``    el resto (botones, guardados, etc.)
+
+Con el tamaño estimado de cada tabla calcula filas y bytes por minuto por
+cliente conectado y marca los ``select('*')`` sin ``.limit``. Las consultas
+delta (``.gt``/``.gte`` sobre ``updated_at`` u otra columna ``*_at`` con un
+watermark en vez de un literal) traen solo las filas que cambiaron desde el
+fetch anterior, más la ventana de solapamiento; los bloques
+``if (Date.now() - x >= N)`` dentro de un poll corren cada ``N`` y no en cada
+tick. Las constantes (``RECONCILE_INTERVAL_MS = 5 * 60_000``) se resuelven en
+todo ``src/``.
+
+Uso::
+
+    python query_profiler.py                       # analiza src/
+    python query_profiler.py --stats stats.json --json perfil.json
+
+``stats.json`` (opcional)::
+
+    {"tables": {"leads": {"rows": 20000, "row_bytes": 1200}},
+     "events_per_min": {"leads": 4}, "changes_per_min": {"leads": 3},
+     "delta_overlap_s": 60, "loads_per_min": 0.1}
+
+``changes_per_min`` (filas que cambian por minuto) toma por defecto el valor
+de ``events_per_min`` de la tabla.
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import sys
+from dataclasses import asdict, dataclass, field
+
+from anchor_index import FROM_RE, chain_end, match_close
+from patch_engine import read_text
+
+DEFAULT_ROWS = 1000
+DEFAULT_ROW_BYTES = 800
+COLUMN_BYTES = 48
+DEFAULT_EVENTS_PER_MIN = 1.0
+DEFAULT_LOADS_PER_MIN = 0.1
+DEFAULT_DELTA_OVERLAP_S = 60    # SYNC_OVERLAP_MS de src/lib/deltaSync.ts
+
+OPERATIONS = ('select', 'insert', 'update', 'upsert', 'delete')
+FILTERS = ('eq', 'neq', 'gt', 'gte', 'lt', 'lte', 'like', 'ilike', 'in', 'is', 'contains', 'match', 'or')
+
+FUNCTION_RE = re.compile(
+    r'(?:async\s+)?function\s+(\w+)\s*\([^)]*\)[^{]*\{'
+    r'|const\s+(\w+)\s*=\s*(?:useCallback\(\s*)?(?:async\s*)?(?:\([^()]*\)|\w+)\s*(?::\s*[^=;]*?)?=>\s*\{'
+)
+REF_RE = re.compile(r'\b(\w+)\b')
+INTERVAL_RE = re.compile(r'\bsetInterval\s*\(')
+EFFECT_RE = re.compile(r'\buseEffect\s*\(')
+REALTIME_RE = re.compile(r'\.on\(\s*[\'"]postgres_changes[\'"]')
+STRING_RE = re.compile(r'[\'"`]([^\'"`]*)[\'"`]')
+LITERAL_RE = re.compile(r'[\'"`][^\'"`]*[\'"`]|-?[\d_.]+')
+DELTA_COLUMN_RE = re.compile(r'updated_at|timestamp|\w+_at')
+CONST_RE = re.compile(r'\bconst\s+([A-Z][A-Z0-9_]*)\s*=\s*([\d_]+(?:\s*\*\s*[\d_]+)*)\s*(?:$|[;\n])', re.M)
+GATE_RE = re.compile(r'\bif\s*\(\s*Date\.now\(\)\s*-\s*[\w.]+\s*>=?\s*([\w\s*]+?)\s*\)\s*\{')
+
+
+@dataclass
+class QuerySite:
+    file: str
+    line: int
+    start: int
+    end: int
+    table: str
+    operation: str = 'select'
+    columns: list = field(default_factory=list)
+    orders: list = field(default_factory=list)
+    filters: list = field(default_factory=list)
+    flags: list = field(default_factory=list)     # columnas comparadas con true/false/null
+    limit: int = None
+    single: bool = False
+    function: str = ''
+    contexts: list = field(default_factory=list)
+    interval_ms: int = None
+    gate_ms: int = None
+    delta: str = ''
+    realtime: str = ''
+
+    @property
+    def period_ms(self):
+        """Cada cuánto corre dentro del poll: un bloque con compuerta corre en el primer tick tras ``gate_ms``."""
+        if not self.interval_ms:
+            return None
+        if not self.gate_ms:
+            return self.interval_ms
+        return self.interval_ms * max(1, math.ceil(self.gate_ms / self.interval_ms))
+
+    @property
+    def unbounded(self) -> bool:
+        by_id = any(col == 'id' for op, col in self.filters if op == 'eq')
+        return (self.operation == 'select' and self.columns == ['*'] and self.limit is None
+                and not self.single and not by_id and not self.delta)
+
+
+def _first_string(args: str) -> str:
+    m = STRING_RE.match(args.strip())
+    return m.group(1) if m else ''
+
+
+def _eval_ms(expr: str, constants: dict = None):
+    expr = expr.strip()
+    if constants and expr in constants:
+        return constants[expr]
+    if not re.fullmatch(r'[\d\s*_]+', expr):
+        return None
+    total = 1
+    for part in expr.replace('_', '').split('*'):
+        total *= int(part)
+    return total
+
+
+def _split_args(args: str) -> list:
+    """Separa argumentos de primer nivel (respeta paréntesis/llaves/strings)."""
+    parts = []
+    depth = 0
+    start = 0
+    i = 0
+    while i < len(args):
+        c = args[i]
+        if c in '\'"`':
+            j = args.find(c, i + 1)
+            i = len(args) if j == -1 else j + 1
+            continue
+        if c in '([{':
+            depth += 1
+        elif c in ')]}':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            parts.append(args[start:i])
+            start = i + 1
+        i += 1
+    parts.append(args[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def parse_chain(site: QuerySite, calls: list) -> None:
+    has_op = False
+    for method, args in calls:
+        if method in OPERATIONS and not has_op:
+            site.operation = method
+            has_op = True
+            if method == 'select':
+                cols = _first_string(args) or '*'
+                site.columns = [c.strip() for c in cols.split(',') if c.strip()]
+        elif method == 'order':
+            col = _first_string(args)
+            site.orders.append((col, not re.search(r'ascending:\s*false', args)))
+        elif method == 'limit':
+            site.limit = _eval_ms(args)
+        elif method in ('single', 'maybeSingle'):
+            site.single = True
+        elif method in FILTERS:
+            col = _first_string(args)
+            site.filters.append((method, col))
+            rest = _split_args(args)[1:]
+            if method in ('eq', 'is') and rest and rest[0] in ('true', 'false', 'null'):
+                site.flags.append(col)
+            if method in ('gt', 'gte') and DELTA_COLUMN_RE.fullmatch(col) and rest \
+                    and not LITERAL_RE.fullmatch(rest[0]):
+                site.delta = col
+        elif method == 'range':
+            bounds = [_eval_ms(a) for a in _split_args(args)]
+            if len(bounds) == 2 and None not in bounds:
+                site.limit = bounds[1] - bounds[0] + 1
+    if site.operation == 'select' and not site.columns:
+        site.columns = ['*']
+
+
+def _function_spans(content: str) -> list:
+    spans = []
+    for m in FUNCTION_RE.finditer(content):
+        end = match_close(content, m.end() - 1)
+        if end != -1:
+            spans.append((m.group(1) or m.group(2), m.start(), end))
+    return spans
+
+
+def _calls_in(content: str, start: int, end: int, names: set) -> set:
+    """Funciones conocidas llamadas o pasadas por referencia (``setInterval(fn, ms)``)."""
+    return {m.group(1) for m in REF_RE.finditer(content, start, end) if m.group(1) in names}
+
+
+def _closure(roots: set, graph: dict) -> set:
+    seen = set()
+    stack = list(roots)
+    while stack:
+        name = stack.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        stack.extend(graph.get(name, ()))
+    return seen
+
+
+def find_constants(content: str) -> dict:
+    """Constantes numéricas del módulo (``const RECONCILE_INTERVAL_MS = 5 * 60_000``)."""
+    return {name: _eval_ms(expr) for name, expr in CONST_RE.findall(content)}
+
+
+def find_queries(path: str, content: str = None, constants: dict = None) -> list:
+    """Todas las consultas ``supabase.from(...)`` de un archivo con su contexto."""
+    if content is None:
+        content = read_text(path)
+    constants = dict(constants or {}, **find_constants(content))
+    functions = _function_spans(content)
+    names = {name for name, _, _ in functions}
+    graph = {name: _calls_in(content, s, e, names) - {name} for name, s, e in functions}
+
+    # Contextos: (tipo, inicio, fin, intervalo, descripción)
+    regions = []
+    for m in INTERVAL_RE.finditer(content):
+        end = match_close(content, m.end() - 1)
+        if end == -1:
+            continue
+        args = _split_args(content[m.end():end - 1])
+        ms = _eval_ms(args[-1], constants) if len(args) > 1 else None
+        regions.append(('poll', m.start(), end, ms, ''))
+    gates = []
+    for m in GATE_RE.finditer(content):
+        end = match_close(content, m.end() - 1)
+        ms = _eval_ms(m.group(1), constants)
+        if end != -1 and ms:
+            gates.append((m.start(), end, ms))
+    for m in REALTIME_RE.finditer(content):
+        paren = content.index('(', m.start())
+        end = match_close(content, paren)
+        if end == -1:
+            continue
+        args = content[paren:end]
+        table = re.search(r'table:\s*[\'"](\w+)[\'"]', args)
+        event = re.search(r'event:\s*[\'"](\w+|\*)[\'"]', args)
+        regions.append(('realtime', m.start(), end, None,
+                        f"{table.group(1) if table else '?'}:{event.group(1) if event else '*'}"))
+    for m in EFFECT_RE.finditer(content):
+        end = match_close(content, m.end() - 1)
+        if end != -1:
+            regions.append(('load', m.start(), end, None, ''))
+
+    # Funciones alcanzables desde cada región (llamadas directas y transitivas)
+    reached = []
+    for kind, start, end, ms, desc in regions:
+        inner = [r for r in regions if r[0] != 'load' and start < r[1] and r[2] <= end] if kind == 'load' else []
+        called = set()
+        cursor = start
+        for _, s, e, _, _ in sorted(inner, key=lambda r: r[1]):
+            called |= _calls_in(content, cursor, s, names)
+            cursor = max(cursor, e)
+        called |= _calls_in(content, cursor, end, names)
+        reached.append((kind, start, end, ms, desc, _closure(called, graph)))
+
+    sites = []
+    for m in FROM_RE.finditer(content):
+        end, calls = chain_end(content, m.end())
+        site = QuerySite(os.path.normpath(path), content.count('\n', 0, m.start()) + 1, m.start(), end, m.group(1))
+        parse_chain(site, calls)
+        enclosing = [f for f in functions if f[1] <= m.start() < f[2]]
+        if enclosing:
+            site.function = min(enclosing, key=lambda f: f[2] - f[1])[0]
+        gated = [ms for start, end, ms in gates if start <= m.start() < end]
+        if gated:
+            site.gate_ms = max(gated)
+        for kind, start, rend, ms, desc, funcs in reached:
+            inside = start <= m.start() < rend
+            via_call = any(f[0] in funcs for f in enclosing)
+            if kind == 'load' and inside:
+                # Dentro de un useEffect pero en un setInterval/handler anidado: ya se cuenta ahí
+                nested = any(r[0] != 'load' and r[1] <= m.start() < r[2] for r in regions if start < r[1])
+                if nested:
+                    continue
+            if inside or via_call:
+                if kind not in site.contexts:
+                    site.contexts.append(kind)
+                if kind == 'poll' and ms:
+                    site.interval_ms = min(site.interval_ms or ms, ms)
+                if kind == 'realtime' and not site.realtime:
+                    site.realtime = desc
+        if not site.contexts:
+            site.contexts.append('action')
+        sites.append(site)
+    return sites
+
+
+def scan_tree(root: str = 'src') -> list:
+    paths = sorted(glob.glob(os.path.join(root, '**', '*.ts'), recursive=True)
+                   + glob.glob(os.path.join(root, '**', '*.tsx'), recursive=True))
+    contents = {path: read_text(path) for path in paths if '__tests__' not in path}
+    constants = {}
+    for content in contents.values():
+        constants.update(find_constants(content))
+    sites = []
+    for path, content in contents.items():
+        if 'supabase' in content:
+            sites.extend(find_queries(path, content, constants))
+    return sites
+
+
+@dataclass
+class Estimate:
+    rows_per_fetch: int = 0
+    bytes_per_fetch: int = 0
+    fetches_per_min: float = 0.0
+    rows_per_min: float = 0.0
+    bytes_per_min: float = 0.0
+
+
+def estimate(site: QuerySite, stats: dict) -> Estimate:
+    table = stats.get('tables', {}).get(site.table, {})
+    rows = table.get('rows', DEFAULT_ROWS)
+    row_bytes = table.get('row_bytes', DEFAULT_ROW_BYTES)
+    est = Estimate()
+    if site.operation != 'select':
+        return est
+    by_id = any(col == 'id' for op, col in site.filters if op == 'eq')
+    est.rows_per_fetch = 1 if site.single or by_id else min(rows, site.limit) if site.limit else rows
+    if site.delta and not by_id:
+        # Solo lo que cambió desde el fetch anterior, más la ventana que se re-lee
+        events = stats.get('events_per_min', {}).get(site.table, DEFAULT_EVENTS_PER_MIN)
+        changes = stats.get('changes_per_min', {}).get(site.table, events)
+        window_min = (site.period_ms or 0) / 60000 + stats.get('delta_overlap_s', DEFAULT_DELTA_OVERLAP_S) / 60
+        est.rows_per_fetch = min(est.rows_per_fetch, math.ceil(changes * window_min))
+    width = row_bytes if site.columns == ['*'] else min(row_bytes, COLUMN_BYTES * len(site.columns))
+    est.bytes_per_fetch = est.rows_per_fetch * width
+    if 'poll' in site.contexts and site.period_ms:
+        est.fetches_per_min += 60000 / site.period_ms
+    if 'realtime' in site.contexts:
+        channel_table = site.realtime.split(':')[0]
+        est.fetches_per_min += stats.get('events_per_min', {}).get(channel_table, DEFAULT_EVENTS_PER_MIN)
+    if 'load' in site.contexts:
+        est.fetches_per_min += stats.get('loads_per_min', DEFAULT_LOADS_PER_MIN)
+    est.rows_per_min = est.rows_per_fetch * est.fetches_per_min
+    est.bytes_per_min = est.bytes_per_fetch * est.fetches_per_min
+    return est
+
+
+def _fmt_bytes(n: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Perfil de consultas a Supabase por cliente')
+    parser.add_argument('root', nargs='?', default='src')
+    parser.add_argument('--stats', help='JSON con filas/tamaño por tabla y eventos por minuto')
+    parser.add_argument('--json', help='escribe el perfil completo en JSON')
+    parser.add_argument('--all', action='store_true', help='muestra también escrituras y consultas sin costo periódico')
+    args = parser.parse_args(argv)
+
+    stats = {}
+    if args.stats:
+        with open(args.stats, 'r', encoding='utf-8') as f:
+            stats = json.load(f)
+    sites = scan_tree(args.root)
+    rows = [(site, estimate(site, stats)) for site in sites]
+    rows.sort(key=lambda r: -r[1].bytes_per_min)
+
+    total_bytes = sum(e.bytes_per_min for _, e in rows)
+    total_rows = sum(e.rows_per_min for _, e in rows)
+    unbounded = [s for s, _ in rows if s.unbounded]
+    print(f"📊 {len(sites)} consultas en {len({s.file for s in sites})} archivos")
+    print(f"   Por cliente: ~{total_rows:,.0f} filas/min, ~{_fmt_bytes(total_bytes)}/min")
+    print(f"   ⚠️ {len(unbounded)} select('*') sin .limit\n")
+    for site, est in rows:
+        if not args.all and est.bytes_per_min == 0:
+            continue
+        flag = '⚠️ ' if site.unbounded else '   '
+        ctx = ','.join(site.contexts)
+        if site.period_ms:
+            ctx += f" c/{site.period_ms // 1000}s"
+        if site.delta:
+            ctx += f" delta({site.delta})"
+        if site.realtime:
+            ctx += f" [{site.realtime}]"
+        order = ' '.join(f"order({c}{'' if asc else ' desc'})" for c, asc in site.orders)
+        limit = f" limit({site.limit})" if site.limit else ''
+        print(f"{flag}{site.file}:{site.line} {site.operation} {site.table}({','.join(site.columns)}) {order}{limit}")
+        print(f"      {ctx} · {est.fetches_per_min:.2f} fetch/min · {est.rows_per_min:,.0f} filas/min · "
+              f"{_fmt_bytes(est.bytes_per_min)}/min")
+
+    if args.json:
+        out = {
+            'totals': {'queries': len(sites), 'rows_per_min': total_rows, 'bytes_per_min': total_bytes,
+                       'unbounded': len(unbounded)},
+            'sites': [dict(asdict(s), unbounded=s.unbounded, estimate=asdict(e)) for s, e in rows],
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(out, f, indent=2, ensure_ascii=False)
+        print(f"\n📝 Perfil: {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,411 @@
+"""Motor de recordatorios: calcula solo los que vencen, sin recorrer todos los leads.
+
+fix_add_reminders.py y fix_load_reminders.py bajan ``reminder_config`` al
+cliente, y saber a quién toca escribirle implica cruzar todos los leads contra
+todas las configuraciones. Aquí cada categoría (HOT, WARM, COLD…) tiene un
+min-heap de leads ordenado por su último contacto, así que vence
+``contacto + reminder_hours`` del tope del heap:
+
+- ``tick(now)`` solo saca del heap lo que ya venció: O(k log n) para k
+  recordatorios, sin importar cuántos leads haya.
+- Cambiar un lead (estado, score, último mensaje) solo toca su entrada: se
+  empuja una nueva y la anterior queda marcada como vieja (borrado perezoso).
+- Cambiar ``reminder_hours`` o la ventana de una categoría es O(1): el heap
+  está ordenado por contacto, no por vencimiento, así que no se reordena.
+- Fuera de ``send_start_hour``–``send_end_hour`` (hora local) la categoría
+  espera; al abrir la ventana sale un solo recordatorio por lead aunque se
+  hayan acumulado varios periodos.
+
+La categoría es ``temperature`` (o ``lead_category``); si no viene se calcula
+como en el backend: negotiation/reserved son HOT, closed/delivered son
+CLIENTE, score >= 35 es WARM y el resto COLD. Los leads cerrados o caídos no
+reciben recordatorios.
+
+La salida es JSONL listo para ``whatsapp_dispatch.py --enqueue``; el ``id``
+es ``reminder:<lead>:<vencimiento>``, así que volver a correr sobre el mismo
+export no duplica mensajes en el outbox.
+
+Uso::
+
+    python reminder_engine.py leads.csv --config reminder_config.csv --out recordatorios.jsonl
+    python reminder_engine.py leads.csv --config reminder_config.csv --follow --interval 1 < cambios.jsonl
+    python reminder_engine.py --bench 500000
+"""
+import argparse
+import heapq
+import json
+import queue
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from lead_dedup import iter_rows
+from patch_engine import write_atomic
+
+UTC_OFFSET = -6             # Puebla/CDMX, sin horario de verano
+STOP_STATUSES = ('closed', 'delivered', 'fallen')
+HOT_STATUSES = ('negotiation', 'reserved')
+STATUS_SCORES = {'new': 10, 'contacted': 20, 'scheduled': 35, 'visited': 50, 'negotiation': 70,
+                 'reserved': 85, 'closed': 100, 'delivered': 100, 'fallen': 0}
+
+CONFIG_COLUMNS = ('lead_category', 'reminder_hours', 'active', 'message_template', 'send_start_hour', 'send_end_hour')
+LEAD_COLUMNS = ('id', 'name', 'phone', 'status', 'score', 'temperature', 'lead_category',
+                'last_message_at', 'status_changed_at', 'created_at')
+
+
+def lead_category(status: str, score, temperature: str = '') -> str:
+    """La categoría del lead como la asigna el backend al cambiar de etapa."""
+    if temperature:
+        return temperature.upper()
+    if status in ('closed', 'delivered'):
+        return 'CLIENTE'
+    if status in HOT_STATUSES:
+        return 'HOT'
+    try:
+        score = float(score)
+    except (TypeError, ValueError):
+        score = STATUS_SCORES.get(status, 0)
+    return 'WARM' if score >= 35 else 'COLD'
+
+
+def to_epoch(value: str) -> float:
+    """Timestamp de Supabase a epoch; sin zona se toma como UTC."""
+    if not value:
+        return 0.0
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return 0.0
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+@dataclass
+class Rule:
+    category: str
+    hours: float
+    active: bool = True
+    template: str = ''
+    start_hour: int = 0
+    end_hour: int = 24
+
+    @property
+    def period(self) -> float:
+        return self.hours * 3600
+
+    def window_open(self, now: float, utc_offset: int = UTC_OFFSET) -> bool:
+        hour = (now / 3600 + utc_offset) % 24
+        if self.start_hour <= self.end_hour:
+            return self.start_hour <= hour < self.end_hour
+        return hour >= self.start_hour or hour < self.end_hour      # ventana que cruza medianoche
+
+    @classmethod
+    def from_row(cls, row: tuple) -> 'Rule':
+        category, hours, active, template, start, end = row
+        return cls(category.upper(), float(hours or 24), str(active).lower() not in ('false', '0', 'f'),
+                   template, int(start or 0), int(end or 24))
+
+
+@dataclass
+class Reminder:
+    lead_id: str
+    category: str
+    due: float
+
+
+class ReminderEngine:
+    def __init__(self, rules=(), utc_offset: int = UTC_OFFSET):
+        self.utc_offset = utc_offset
+        self.rules = {}
+        self.heaps = {}         # categoría -> [(ancla, lead_id, versión)]
+        self.leads = {}         # lead_id -> (categoría, ancla, versión)
+        self.stale = 0
+        # Contador global: una versión nunca se repite, ni tras ``remove`` ni tras
+        # salir por una categoría sin regla, así que una entrada vieja no revive
+        self.version = 0
+        for rule in rules:
+            self.set_rule(rule)
+
+    def __len__(self) -> int:
+        return len(self.leads)
+
+    def set_rule(self, rule: Rule) -> None:
+        """O(1): el vencimiento es ``ancla + periodo`` y el heap no depende del periodo."""
+        self.rules[rule.category] = rule
+        self.heaps.setdefault(rule.category, [])
+
+    def bulk_load(self, leads) -> int:
+        """Carga ``[(lead_id, categoría, último contacto)]`` con un heapify por categoría."""
+        self.heaps = {category: [] for category in self.rules}
+        self.leads = {}
+        self.stale = 0
+        self.version = 1
+        for lead_id, category, anchor in leads:
+            if category in self.heaps:
+                self.leads[lead_id] = (category, anchor, 0)
+                self.heaps[category].append((anchor, lead_id, 0))
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+        return len(self.leads)
+
+    def upsert(self, lead_id: str, category: str, anchor: float) -> None:
+        """Un lead cambió: O(log n), solo su entrada."""
+        old = self.leads.get(lead_id)
+        if old and old[:2] == (category, anchor):
+            return
+        if old:
+            self.stale += 1
+        if category not in self.heaps:
+            self.leads.pop(lead_id, None)
+            return
+        version = self._next_version()
+        self.leads[lead_id] = (category, anchor, version)
+        heapq.heappush(self.heaps[category], (anchor, lead_id, version))
+        self._maybe_compact()
+
+    def _next_version(self) -> int:
+        self.version += 1
+        return self.version
+
+    def remove(self, lead_id: str) -> None:
+        if self.leads.pop(lead_id, None):
+            self.stale += 1
+            self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        # Las entradas viejas se quedan en el heap hasta que salen por arriba;
+        # si ya son más que las vivas se reconstruye todo de una vez
+        if self.stale > max(1024, len(self.leads)):
+            self.heaps = {category: [] for category in self.heaps}
+            for lead_id, (category, anchor, version) in self.leads.items():
+                self.heaps[category].append((anchor, lead_id, version))
+            for heap in self.heaps.values():
+                heapq.heapify(heap)
+            self.stale = 0
+
+    def next_due(self, category: str):
+        heap, rule = self.heaps.get(category), self.rules.get(category)
+        return heap[0][0] + rule.period if heap and rule else None
+
+    def tick(self, now: float, limit: int = None) -> list:
+        """Recordatorios vencidos a ``now``; cada uno reprograma el lead al siguiente periodo."""
+        due = []
+        for category, heap in self.heaps.items():
+            rule = self.rules[category]
+            if not rule.active or rule.period <= 0 or not rule.window_open(now, self.utc_offset):
+                continue
+            period = rule.period
+            while heap and heap[0][0] + period <= now and (limit is None or len(due) < limit):
+                anchor, lead_id, version = heapq.heappop(heap)
+                current = self.leads.get(lead_id)
+                if not current or current[2] != version or current[0] != category:
+                    self.stale -= 1
+                    continue
+                # Periodos acumulados (ventana cerrada, proceso caído) salen como uno solo
+                anchor += (now - anchor) // period * period
+                due.append(Reminder(lead_id, category, anchor))
+                version = self._next_version()
+                self.leads[lead_id] = (category, anchor, version)
+                heapq.heappush(heap, (anchor, lead_id, version))
+        return due
+
+
+def lead_entry(row: tuple):
+    """``(lead_id, categoría, último contacto)`` de una fila de leads, o ``None`` si no aplica."""
+    lead_id, _, _, status, score, temperature, category, last_message, changed, created = row
+    if status in STOP_STATUSES:
+        return None
+    anchor = max(to_epoch(last_message), to_epoch(changed), to_epoch(created))
+    return lead_id, lead_category(status, score, temperature or category), anchor
+
+
+def render(reminder: Reminder, rule: Rule, contact: tuple) -> dict:
+    """Mensaje para ``whatsapp_dispatch.py --enqueue``."""
+    phone, name = contact
+    first = (name or '').split(' ')[0]
+    body = (rule.template or '').replace('{nombre}', first).replace('{name}', first)
+    return {'id': f'reminder:{reminder.lead_id}:{int(reminder.due)}', 'to': phone, 'body': body,
+            'lead_id': reminder.lead_id, 'category': reminder.category,
+            'due_at': datetime.fromtimestamp(reminder.due, timezone.utc).isoformat(timespec='seconds')}
+
+
+def load(leads_path: str, config_path: str, utc_offset: int) -> tuple:
+    engine = ReminderEngine((Rule.from_row(r) for r in iter_rows(config_path, CONFIG_COLUMNS)), utc_offset)
+    contacts = {}
+    entries = []
+    for row in iter_rows(leads_path, LEAD_COLUMNS):
+        entry = lead_entry(row)
+        if entry:
+            entries.append(entry)
+            contacts[row[0]] = (row[2], row[1])
+    engine.bulk_load(entries)
+    return engine, contacts
+
+
+def apply_change(engine: ReminderEngine, contacts: dict, change: dict) -> None:
+    """Un evento de Supabase Realtime (``table``, ``eventType``, ``new``, ``old``)."""
+    record = change.get('new') or {}
+    if change.get('table') == 'reminder_config':
+        if record:
+            engine.set_rule(Rule.from_row(tuple(str(record.get(c, '')) for c in CONFIG_COLUMNS)))
+        return
+    if change.get('eventType') == 'DELETE':
+        lead_id = (change.get('old') or {}).get('id')
+        engine.remove(lead_id)
+        contacts.pop(lead_id, None)
+        return
+    row = tuple(str(record.get(c) or '') for c in LEAD_COLUMNS)
+    entry = lead_entry(row)
+    if entry:
+        engine.upsert(*entry)
+        contacts[row[0]] = (row[2], row[1])
+    else:
+        engine.remove(row[0])
+
+
+def follow(engine: ReminderEngine, contacts: dict, interval: float, out) -> None:
+    """Aplica cambios de stdin (JSONL) y emite lo vencido cada ``interval`` segundos."""
+    changes = queue.Queue()
+
+    def reader():
+        # Una línea mala se registra y se salta; el None final siempre llega
+        try:
+            for number, line in enumerate(sys.stdin, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    change = json.loads(line)
+                except ValueError as exc:
+                    print(f"⚠️ línea {number}: JSON inválido ({exc})", file=sys.stderr)
+                    continue
+                if not isinstance(change, dict):
+                    print(f"⚠️ línea {number}: se esperaba un objeto", file=sys.stderr)
+                    continue
+                changes.put((number, change))
+        finally:
+            changes.put(None)
+
+    threading.Thread(target=reader, daemon=True).start()
+    done = False
+    while not done:
+        deadline = time.time() + interval
+        while True:
+            try:
+                change = changes.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                break
+            if change is None:
+                done = True
+                break
+            number, change = change
+            try:
+                apply_change(engine, contacts, change)
+            except (ValueError, TypeError, AttributeError) as exc:
+                print(f"⚠️ línea {number}: cambio ignorado ({type(exc).__name__}: {exc})", file=sys.stderr)
+        for reminder in engine.tick(time.time()):
+            out.write(json.dumps(render(reminder, engine.rules[reminder.category], contacts[reminder.lead_id]),
+                                 ensure_ascii=False) + '\n')
+        out.flush()
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else 0.0
+
+
+def bench(count: int) -> None:
+    rnd = random.Random(17)
+    now = time.time()
+    rules = [Rule('HOT', 4), Rule('WARM', 24), Rule('COLD', 72), Rule('CLIENTE', 720, False)]
+    periods = {rule.category: rule.period for rule in rules}
+    categories = ('HOT', 'WARM', 'WARM', 'COLD', 'COLD', 'COLD', 'CLIENTE')
+    # Contactos repartidos dentro del periodo de cada categoría: al arrancar no hay rezago
+    leads = [(f'l{i}', c, now - rnd.uniform(0, periods[c]))
+             for i, c in ((i, rnd.choice(categories)) for i in range(count))]
+    engine = ReminderEngine(rules, utc_offset=0)
+
+    t0 = time.perf_counter()
+    engine.bulk_load(leads)
+    print(f"📄 {len(engine):,} leads cargados en {(time.perf_counter() - t0) * 1000:,.0f} ms")
+
+    latencies, emitted = [], 0
+    clock = now
+    for minute in range(24 * 60):
+        clock += 60
+        if minute % 5 == 0:     # mientras tanto llegan mensajes de 200 leads
+            for lead_id, category, _ in rnd.sample(leads, 200):
+                engine.upsert(lead_id, category, clock)
+        t0 = time.perf_counter()
+        emitted += len(engine.tick(clock))
+        latencies.append(time.perf_counter() - t0)
+    print(f"   tick cada minuto por 24 h: p50 {percentile(latencies, .5) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, .99) * 1000:.2f} ms, máx {max(latencies) * 1000:.2f} ms "
+          f"({emitted:,} recordatorios)")
+
+    # Lo de hoy: cruzar todos los leads contra todas las configuraciones en cada revisión
+    clock += 60
+    t0 = time.perf_counter()
+    scan = sum(1 for category, anchor, _ in engine.leads.values()
+               if engine.rules[category].active and anchor + engine.rules[category].period <= clock)
+    scan_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    ticked = len(engine.tick(clock))
+    print(f"   revisión de un minuto: {scan_ms:,.0f} ms recorriendo todo vs "
+          f"{(time.perf_counter() - t0) * 1000:,.2f} ms con heap ({ticked:,} = {scan:,} vencidos)")
+
+    sample = rnd.sample(leads, 50000)
+    t0 = time.perf_counter()
+    for lead_id, category, _ in sample:
+        engine.upsert(lead_id, category, clock - rnd.uniform(0, 3600))
+    print(f"   cambio de un lead: {(time.perf_counter() - t0) / len(sample) * 1e6:.1f} µs")
+    t0 = time.perf_counter()
+    engine.set_rule(Rule('WARM', 12))
+    print(f"   cambio de reminder_hours: {(time.perf_counter() - t0) * 1e6:.1f} µs")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Recordatorios vencidos sin recorrer todos los leads')
+    parser.add_argument('leads', nargs='?', help='export de leads (.csv, .jsonl o .json)')
+    parser.add_argument('--config', help='export de reminder_config')
+    parser.add_argument('--now', help='momento de la revisión (ISO; por defecto ahora)')
+    parser.add_argument('--out', help='JSONL para whatsapp_dispatch.py --enqueue (por defecto stdout)')
+    parser.add_argument('--follow', action='store_true', help='leer cambios de Realtime (JSONL) por stdin')
+    parser.add_argument('--interval', type=float, default=1.0, help='segundos entre ticks con --follow')
+    parser.add_argument('--utc-offset', type=int, default=UTC_OFFSET, help='zona de send_start/end_hour')
+    parser.add_argument('--bench', type=int, metavar='N', help='benchmark con N leads sintéticos')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(args.bench)
+        return 0
+    if not args.leads or not args.config:
+        parser.error('faltan los exports de leads y reminder_config')
+
+    engine, contacts = load(args.leads, args.config, args.utc_offset)
+    print(f"📄 {len(engine):,} leads en {len(engine.rules)} categorías", file=sys.stderr)
+    if args.follow:
+        follow(engine, contacts, args.interval, sys.stdout)
+        return 0
+
+    now = to_epoch(args.now) if args.now else time.time()
+    due = engine.tick(now)
+    lines = [json.dumps(render(r, engine.rules[r.category], contacts[r.lead_id]), ensure_ascii=False) for r in due]
+    if args.out:
+        write_atomic(args.out, ''.join(line + '\n' for line in lines))
+        print(f"✅ {len(lines):,} recordatorios → {args.out}", file=sys.stderr)
+    elif lines:
+        print('\n'.join(lines))
+    for category in sorted(engine.rules):
+        nxt = engine.next_due(category)
+        if nxt and engine.rules[category].active:
+            when = datetime.fromtimestamp(nxt, timezone(timedelta(hours=args.utc_offset)))
+            print(f"   ⏭️  {category}: siguiente {when:%Y-%m-%d %H:%M}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,676 @@
+"""Índice de búsqueda (prefijos + trigramas) para leads, propiedades, equipo y citas.
+
+GlobalSearch.tsx hace ``toLowerCase().includes(q)`` sobre cada lead, propiedad,
+miembro del equipo y cita en cada tecla: lineal en el tamaño de los datos.
+Este índice se arma una vez desde los exports y responde el top-k sin recorrer
+filas:
+
+- Texto: palabras sin acentos en minúsculas (María → maria). El vocabulario va
+  ordenado, así que un prefijo es un rango con ``bisect``; para lo que está en
+  medio de una palabra ("ndez" → hernandez, desde 3 letras) hay trigramas
+  sobre el *vocabulario* (no sobre las filas), que es mucho más chico.
+- Teléfonos: solo dígitos, los últimos 10 como entero en dos arreglos
+  ordenados, uno normal y otro con los dígitos al revés: "222 45…" es un
+  rango del primero y "…4567" un rango del segundo.
+- Los ids internos crecen con la fecha (``updated_at``/``created_at``), así que
+  cada lista de postings recorrida al revés ya va de lo más reciente a lo más
+  viejo y el top-k para sin ver el resto. Orden: palabra exacta, luego
+  prefijo, luego contenido; a igualdad, lo más reciente.
+- Con varias palabras se intersectan sus postings: saltando con ``bisect``
+  desde la más rara, o con AND de bitmaps si todas son comunes; los prefijos
+  muy amplios ("ma") se verifican contra el texto de cada candidato.
+- Cambios incrementales: una fila cambiada se marca como borrada y entra de
+  nuevo con id nuevo; cuando lo borrado pasa de una cuarta parte se compacta.
+
+El índice se guarda en ``search-index.pickle`` y se sirve en
+``http://127.0.0.1:8765/search?q=...&k=5`` (misma forma que ``results`` de
+GlobalSearch: ``{leads, properties, team, appointments}``). ``POST /update``
+recibe JSONL de filas cambiadas (``{"table", "row", "deleted"?}``). Ambas
+piden ``Authorization: Bearer <token>`` (``--token`` o ``SEARCH_INDEX_TOKEN``;
+si no hay, se genera uno y se imprime) y CORS solo se abre para el origen de
+la app (``--origin`` o ``SEARCH_INDEX_ORIGIN``): otra página abierta en el
+navegador no puede leer nombres y teléfonos ni cambiar el índice.
+
+Uso::
+
+    python search_index.py --leads leads.csv --properties properties.csv --team team.csv --appointments appointments.csv
+    python search_index.py --update cambios.jsonl
+    python search_index.py --query "maria hern"
+    python search_index.py --serve --port 8765 --origin https://crm.ejemplo.com
+    python search_index.py --bench 1000000
+"""
+import argparse
+import bisect
+import heapq
+import hmac
+import json
+import os
+import pickle
+import random
+import re
+import secrets
+import signal
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+from urllib.parse import parse_qs, urlparse
+
+from lead_dedup import ACCENTS, iter_rows, phone_key
+
+INDEX_PATH = 'search-index.pickle'
+PORT = 8765
+ORIGIN = 'http://localhost:5173'       # Vite en desarrollo
+TOP_K = 5
+MIN_QUERY = 2
+PHONE_WIDTH = 10
+COMPACT_RATIO = 0.25
+SEEK_LISTS = 16            # palabras con más términos que esto se verifican en vez de intersectar
+SCAN_BUDGET = 20000       # tope de candidatos al verificar palabra por palabra
+DENSE = 2000              # con más ids que esto por palabra se intersecta con bitmaps
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+@dataclass(frozen=True)
+class Spec:
+    text: tuple             # columnas que se buscan como palabras
+    phone: str = ''         # columna de teléfono (solo dígitos)
+    show: tuple = ()        # columnas que regresa cada resultado
+    recency: tuple = ()     # la primera que venga define qué tan reciente es
+
+
+TABLES = {
+    'leads': Spec(('name', 'property_interest'), 'phone', ('name', 'phone', 'property_interest', 'status'),
+                  ('updated_at', 'created_at')),
+    'properties': Spec(('name', 'development_name', 'development', 'city'), '', ('name', 'development', 'city'),
+                       ('created_at',)),
+    'team': Spec(('name',), 'phone', ('name', 'role', 'phone'), ('created_at',)),
+    'appointments': Spec(('lead_name', 'property_name'), '', ('lead_name', 'property_name', 'scheduled_date',
+                                                                'scheduled_time', 'status'),
+                         ('scheduled_date', 'created_at')),
+}
+
+
+def fold(text: str) -> str:
+    """Minúsculas sin acentos; mismas reglas para filas y consultas."""
+    folded = (text or '').lower().translate(ACCENTS)
+    if not folded.isascii():
+        folded = unicodedata.normalize('NFKD', folded)
+        folded = ''.join(c for c in folded if not unicodedata.combining(c))
+    return folded
+
+
+def words(text: str) -> list:
+    return WORD_RE.findall(fold(text))
+
+
+def trigrams(term: str) -> set:
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+
+def _reversed_digits(key: int) -> int:
+    return int(f'{key:0{PHONE_WIDTH}d}'[::-1])
+
+
+class TableIndex:
+    def __init__(self, spec: Spec):
+        self.spec = spec
+        self.rows = []          # id interno -> id de la fila
+        self.shown = []         # id interno -> columnas de ``show``
+        self.texts = []         # id interno -> palabras unidas (para verificar)
+        self.phones = array('q')
+        self.alive = bytearray()
+        self.by_row = {}
+        self.dead = 0
+        self.terms = {}         # palabra -> id de término
+        self.vocab = []         # palabras ordenadas (rangos de prefijo)
+        self.vocab_ids = array('I')
+        self.postings = []      # id de término -> array('I') de ids internos, crecientes
+        self.grams = {}         # trigrama -> array('I') de ids de término
+        self.phone_fwd = (array('q'), array('I'))
+        self.phone_rev = (array('q'), array('I'))
+        self._bitmaps = {}      # id de término -> int con un bit por id interno (caché)
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        state.pop('_bitmaps', None)
+        state.pop('_names', None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._bitmaps = {}
+        self.warm()
+
+    def warm(self) -> None:
+        """Bitmaps de los términos comunes, para que la primera consulta no los arme."""
+        self._bitmap([tid for tid, p in enumerate(self.postings) if len(p) >= DENSE])
+
+    def __len__(self) -> int:
+        return len(self.by_row)
+
+    # ── Carga ───────────────────────────────────────────────────────────────
+
+    def _term(self, term: str) -> int:
+        tid = self.terms.get(term)
+        if tid is None:
+            tid = self.terms[term] = len(self.postings)
+            self.postings.append(array('I'))
+            at = bisect.bisect_left(self.vocab, term)
+            self.vocab.insert(at, term)
+            self.vocab_ids.insert(at, tid)
+            for gram in trigrams(term):
+                self.grams.setdefault(gram, array('I')).append(tid)
+        return tid
+
+    def _add_doc(self, row_id: str, text: str, phone: int, shown: tuple) -> None:
+        doc = len(self.rows)
+        self.rows.append(row_id)
+        self.shown.append(shown)
+        self.texts.append(text)
+        self.phones.append(phone)
+        self.alive.append(1)
+        self.by_row[row_id] = doc
+        for term in set(text.split()):
+            tid = self._term(term)
+            self.postings[tid].append(doc)
+            if tid in self._bitmaps:
+                self._bitmaps[tid] |= 1 << doc
+
+    def _index_phone(self, doc: int, key: int) -> None:
+        for (keys, docs), value in ((self.phone_fwd, key), (self.phone_rev, _reversed_digits(key))):
+            at = bisect.bisect_right(keys, value)
+            keys.insert(at, value)
+            docs.insert(at, doc)
+
+    def _document(self, row: dict) -> tuple:
+        text = ' '.join(w for column in self.spec.text for w in words(row.get(column) or ''))
+        phone = phone_key(row.get(self.spec.phone) or '') if self.spec.phone else 0
+        return text, phone, tuple(row.get(c) or '' for c in self.spec.show)
+
+    def recency(self, row: dict) -> str:
+        return next((row[c] for c in self.spec.recency if row.get(c)), '')
+
+    def bulk_load(self, rows) -> int:
+        """Carga inicial: ids internos en orden de fecha, arreglos de teléfono ordenados una vez."""
+        for row in sorted(rows, key=self.recency):
+            text, phone, shown = self._document(row)
+            self._add_doc(str(row['id']), text, phone, shown)
+        self._rebuild_phones()
+        self.warm()
+        return len(self)
+
+    def _rebuild_phones(self) -> None:
+        live = [d for d in range(len(self.rows)) if self.alive[d] and self.phones[d]]
+        for target, key in ((self, 'phone_fwd'), (self, 'phone_rev')):
+            reverse = key == 'phone_rev'
+            pairs = sorted((_reversed_digits(self.phones[d]) if reverse else self.phones[d], d) for d in live)
+            setattr(target, key, (array('q', (k for k, _ in pairs)), array('I', (d for _, d in pairs))))
+
+    def upsert(self, row: dict) -> None:
+        """Fila nueva o cambiada: entra como el documento más reciente."""
+        self.delete(str(row['id']))
+        text, phone, shown = self._document(row)
+        self._add_doc(str(row['id']), text, phone, shown)
+        if phone:
+            self._index_phone(len(self.rows) - 1, phone)
+
+    def delete(self, row_id: str) -> None:
+        doc = self.by_row.pop(row_id, None)
+        if doc is not None:
+            self.alive[doc] = 0
+            self.dead += 1
+
+    def maybe_compact(self) -> bool:
+        if self.dead <= COMPACT_RATIO * max(1, len(self.rows)):
+            return False
+        live = [d for d in range(len(self.rows)) if self.alive[d]]
+        fresh = TableIndex(self.spec)
+        for d in live:
+            fresh._add_doc(self.rows[d], self.texts[d], self.phones[d], self.shown[d])
+        fresh._rebuild_phones()
+        fresh.warm()
+        self.__dict__.update(fresh.__dict__)
+        return True
+
+    # ── Consulta ────────────────────────────────────────────────────────────
+
+    def _prefix_terms(self, token: str) -> list:
+        lo = bisect.bisect_left(self.vocab, token)
+        hi = bisect.bisect_left(self.vocab, token + '\x7f', lo)
+        return self.vocab_ids[lo:hi]
+
+    def _infix_terms(self, token: str) -> list:
+        grams = sorted((self.grams.get(g, ()) for g in trigrams(token)), key=len)
+        if not grams or not grams[0]:
+            return []
+        candidates = set(grams[0]).intersection(*grams[1:]) if len(grams) > 1 else grams[0]
+        prefixed = set(self._prefix_terms(token))
+        vocab = self._term_names()
+        return [t for t in candidates if t not in prefixed and token in vocab[t]]
+
+    def _term_names(self) -> list:
+        names = getattr(self, '_names', None)
+        if names is None or len(names) != len(self.postings):
+            names = [''] * len(self.postings)
+            for term, tid in self.terms.items():
+                names[tid] = term
+            self._names = names
+        return names
+
+    def _phone_docs(self, digits: str) -> list:
+        """Ids con teléfono que empieza o termina con ``digits``, crecientes como los postings."""
+        if len(digits) > PHONE_WIDTH:
+            digits = digits[-PHONE_WIDTH:]
+        span = 10 ** (PHONE_WIDTH - len(digits))
+        found = set()
+        for (keys, docs), value in ((self.phone_fwd, int(digits)), (self.phone_rev, int(digits[::-1]))):
+            lo = bisect.bisect_left(keys, value * span)
+            hi = bisect.bisect_left(keys, (value + 1) * span, lo)
+            found.update(docs[lo:hi])
+        return sorted(found)
+
+    def _tiers(self, token: str):
+        """Listas de ids por nivel (exacta, prefijo, contenido, teléfono); se calculan al pedirlas."""
+        exact = self.terms.get(token)
+        if exact is not None:
+            yield [self.postings[exact]]
+        yield [self.postings[t] for t in self._prefix_terms(token) if t != exact]
+        if len(token) >= 3:
+            yield [self.postings[t] for t in self._infix_terms(token)]
+        if token.isdigit() and len(token) >= 3 and self.spec.phone:
+            yield [self._phone_docs(token)]
+
+    def _walk(self, tiers, seen: set):
+        for lists in tiers:
+            if not lists:
+                continue
+            merged = heapq.merge(*(reversed(p) for p in lists), reverse=True) if len(lists) > 1 else reversed(lists[0])
+            for doc in merged:
+                if doc not in seen and self.alive[doc]:
+                    seen.add(doc)
+                    yield doc
+
+    def _verify(self, doc: int, tokens: list, digits: list, anywhere: bool) -> bool:
+        text = ' ' + self.texts[doc]
+        if digits:
+            phone = f'{self.phones[doc]:0{PHONE_WIDTH}d}' if self.phones[doc] else ''
+            if not all(d in phone or d in text for d in digits):
+                return False
+        if anywhere:
+            return all(token in text for token in tokens)
+        return all(' ' + token in text for token in tokens)
+
+    def _bitmap(self, tids) -> int:
+        """OR de los postings de ``tids`` como un entero (bit ``d`` = id interno ``d``)."""
+        out = 0
+        for tid in tids:
+            bits = self._bitmaps.get(tid)
+            if bits is None:
+                raw = bytearray((len(self.rows) >> 3) + 1)
+                for d in self.postings[tid]:
+                    raw[d >> 3] |= 1 << (d & 7)
+                bits = int.from_bytes(raw, 'little')
+                if len(self.postings[tid]) >= DENSE:
+                    self._bitmaps[tid] = bits
+            out |= bits
+        return out
+
+    def _intersect(self, cursors: list, rest: list, digits: list, k: int) -> list:
+        """Ids en todas las palabras de ``cursors`` (listas de términos), de mayor a menor.
+
+        Si la palabra más rara tiene pocos ids se recorre y las demás se buscan
+        con ``bisect`` (leapfrog); si todas son densas se hace AND de bitmaps,
+        que para listas largas es mucho más barato que saltar. ``rest`` son
+        palabras demasiado amplias para intersectar y ``digits`` grupos de dígitos:
+        ambos se verifican en el texto.
+        """
+        def seek(tids, target):
+            best = -1
+            for tid in tids:
+                p = self.postings[tid]
+                i = bisect.bisect_right(p, target) - 1
+                if i >= 0 and p[i] > best:
+                    best = p[i]
+            return best
+
+        hits = []
+        sizes = [sum(len(self.postings[t]) for t in tids) for tids in cursors]
+        if min(sizes) > DENSE:
+            common = self._bitmap(cursors[0])
+            for tids in cursors[1:]:
+                common &= self._bitmap(tids)
+            checked = 0
+            while common and len(hits) < k and checked < SCAN_BUDGET:
+                doc = common.bit_length() - 1
+                common ^= 1 << doc
+                checked += 1
+                if self.alive[doc] and (not (rest or digits) or self._verify(doc, rest, digits, False)):
+                    hits.append(doc)
+            return hits
+
+        target = len(self.rows)
+        while len(hits) < k:
+            doc = seek(cursors[0], target)
+            if doc < 0:
+                break
+            for tids in cursors[1:]:
+                other = seek(tids, doc)
+                if other < 0:
+                    return hits
+                if other != doc:
+                    target = other
+                    break
+            else:
+                if self.alive[doc] and (not (rest or digits) or self._verify(doc, rest, digits, False)):
+                    hits.append(doc)
+                target = doc - 1
+        return hits
+
+    def search(self, query: str, k: int = TOP_K) -> list:
+        tokens = words(query)
+        if not tokens or len(query.strip()) < MIN_QUERY:
+            return []
+        if all(t.isdigit() for t in tokens):
+            tokens = [''.join(tokens)]      # "222 123 4567" es un solo teléfono
+        tokens = sorted(set(tokens), key=len, reverse=True)
+        if len(tokens) == 1:
+            hits = list(islice(self._walk(self._tiers(tokens[0]), set()), k))
+        else:
+            hits = self._search_words(tokens, k)
+        return [dict(zip(self.spec.show, self.shown[d]), id=self.rows[d]) for d in hits]
+
+    def _search_words(self, tokens: list, k: int) -> list:
+        # Cada palabra debe ser prefijo de alguna palabra de la fila; los grupos
+        # de dígitos solo se verifican (pueden estar en cualquier parte del teléfono)
+        digits = [t for t in tokens if t.isdigit()]
+        tokens = [t for t in tokens if not t.isdigit()]
+        plans = []
+        for token in tokens:
+            tids = self._prefix_terms(token)
+            plans.append((sum(len(self.postings[t]) for t in tids), token, tids))
+        plans.sort(key=lambda plan: plan[0])
+        if plans[0][0] == 0:
+            hits = []
+        elif len(plans[0][2]) <= SEEK_LISTS:
+            cursors = [tids for _, _, tids in plans if len(tids) <= SEEK_LISTS]
+            rest = [token for _, token, tids in plans if len(tids) > SEEK_LISTS]
+            hits = self._intersect(cursors, rest, digits, k)
+        else:
+            lists = [self.postings[t] for t in plans[0][2]]
+            hits = self._scan([lists], [t for _, t, _ in plans[1:]], digits, k, False, set())
+        if len(hits) < k and any(len(t) >= 3 and self._infix_terms(t) for t in tokens):
+            # Sin suficientes por prefijo y alguna palabra aparece dentro de otras: como includes()
+            driver = min(tokens, key=lambda t: sum(len(p) for lists in self._tiers(t) for p in lists))
+            rest = [t for t in tokens if t != driver]
+            hits += self._scan(self._tiers(driver), rest, digits, k - len(hits), True, set(hits))
+        return hits
+
+    def _scan(self, tiers, rest: list, digits: list, k: int, anywhere: bool, seen: set) -> list:
+        hits = []
+        for n, doc in enumerate(self._walk(tiers, seen)):
+            if n >= SCAN_BUDGET:
+                break
+            if self._verify(doc, rest, digits, anywhere):
+                hits.append(doc)
+                if len(hits) >= k:
+                    break
+        return hits
+
+
+class SearchIndex:
+    def __init__(self):
+        self.tables = {}
+
+    def search(self, query: str, k: int = TOP_K, tables=None) -> dict:
+        return {name: index.search(query, k) for name, index in self.tables.items() if not tables or name in tables}
+
+    def apply(self, changes) -> int:
+        """Cambios ``{"table", "row", "deleted"?}``; devuelve cuántos aplicó."""
+        applied = 0
+        touched = set()
+        for change in changes:
+            index = self.tables.get(change.get('table'))
+            if index is None:
+                continue
+            row = change.get('row') or {}
+            if change.get('deleted'):
+                index.delete(str(row.get('id')))
+            else:
+                index.upsert(row)
+            touched.add(change['table'])
+            applied += 1
+        for name in touched:
+            self.tables[name].maybe_compact()
+        return applied
+
+    def save(self, path: str) -> None:
+        tmp = f'{path}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(self.tables, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'SearchIndex':
+        index = cls()
+        with open(path, 'rb') as f:
+            index.tables = pickle.load(f)
+        return index
+
+
+def load_rows(path: str, spec: Spec):
+    columns = tuple(dict.fromkeys(('id',) + spec.text + ((spec.phone,) if spec.phone else ()) + spec.show + spec.recency))
+    for values in iter_rows(path, columns):
+        yield dict(zip(columns, values))
+
+
+def make_server(index: SearchIndex, port: int, token: str, origin: str = ORIGIN) -> ThreadingHTTPServer:
+    """Servidor de ``/search`` y ``/update`` en 127.0.0.1; ``server.lock`` protege el índice."""
+    lock = threading.Lock()
+    expected = f'Bearer {token}'.encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        def _cors(self) -> None:
+            if self.headers.get('Origin') == origin:
+                self.send_header('Access-Control-Allow-Origin', origin)
+            self.send_header('Vary', 'Origin')
+
+        def _reply(self, status: int, payload) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self._cors()
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _authorized(self) -> bool:
+            given = self.headers.get('Authorization', '').encode('utf-8')
+            if hmac.compare_digest(given, expected):
+                return True
+            self._reply(401, {'error': 'unauthorized'})
+            return False
+
+        def do_OPTIONS(self):
+            # Preflight del navegador: el header Authorization lo hace obligatorio
+            self.send_response(204)
+            self._cors()
+            self.send_header('Access-Control-Allow-Methods', 'GET, POST')
+            self.send_header('Access-Control-Allow-Headers', 'Authorization, Content-Type')
+            self.end_headers()
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/search':
+                return self._reply(404, {'error': 'not found'})
+            if not self._authorized():
+                return
+            params = parse_qs(url.query)
+            q = params.get('q', [''])[0]
+            k = min(int(params.get('k', [TOP_K])[0]), 50)
+            tables = params.get('tables', [''])[0].split(',') if params.get('tables') else None
+            start = time.perf_counter()
+            with lock:
+                results = index.search(q, k, tables)
+            self._reply(200, dict(results, took_ms=round((time.perf_counter() - start) * 1000, 3)))
+
+        def do_POST(self):
+            if urlparse(self.path).path != '/update':
+                return self._reply(404, {'error': 'not found'})
+            if not self._authorized():
+                return
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode('utf-8')
+            with lock:
+                applied = index.apply(json.loads(line) for line in body.splitlines() if line.strip())
+            self._reply(200, {'applied': applied})
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.lock = lock
+    return server
+
+
+def serve(index: SearchIndex, path: str, port: int, token: str = '', origin: str = ORIGIN) -> None:
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)     # guardar también al detener el servicio
+    if not token:
+        token = secrets.token_urlsafe(24)
+        print(f"🔑 Token generado (Authorization: Bearer ...): {token}")
+    server = make_server(index, port, token, origin)
+    print(f"🔎 Sirviendo http://127.0.0.1:{port}/search?q=... para {origin} (Ctrl+C para guardar y salir)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        with server.lock:
+            index.save(path)
+        print(f"✅ Índice guardado en {path}")
+
+
+# ── Benchmark ────────────────────────────────────────────────────────────────
+
+FIRST = ('María', 'José', 'Juan', 'Luis', 'Ana', 'Sofía', 'Jesús', 'Andrés', 'Fernanda', 'Rocío', 'Ángel',
+         'Guadalupe', 'Carlos', 'Mónica', 'Raúl', 'Verónica', 'Iván', 'Nayeli', 'Héctor', 'Itzel', 'Óscar')
+LAST = ('Hernández', 'García', 'Martínez', 'López', 'González', 'Pérez', 'Rodríguez', 'Sánchez', 'Ramírez',
+        'Cruz', 'Flores', 'Gómez', 'Díaz', 'Reyes', 'Morales', 'Jiménez', 'Ruiz', 'Álvarez', 'Méndez', 'Ortíz',
+        'Castañeda', 'Ibáñez', 'Zúñiga', 'Peña', 'Muñoz', 'Velázquez', 'Xicoténcatl', 'Tlatelpa')
+MODELS = ('Cedro', 'Abeto', 'Nogal', 'Tulipán', 'Orquídea', 'Águila', 'Halcón', 'Jacaranda', 'Madroño')
+
+
+def synthetic_leads(count: int, seed: int = 19):
+    rnd = random.Random(seed)
+    # Apellidos raros para que el vocabulario se parezca al real (decenas de miles de palabras)
+    rare = [''.join(rnd.choice('bcdfgjklmnprstvxz') + rnd.choice('aeiou') for _ in range(rnd.randint(3, 5)))
+            for _ in range(30000)]
+    for i in range(count):
+        last = rnd.choice(LAST) if rnd.random() < 0.7 else rnd.choice(rare).capitalize()
+        yield {'id': f'l{i}', 'name': f'{rnd.choice(FIRST)} {last} {rnd.choice(LAST)}',
+               'phone': f'+52 1 {rnd.randrange(10**9, 10**10)}', 'property_interest': rnd.choice(MODELS),
+               'status': 'new', 'created_at': f'2026-{1 + i * 9 // count:02d}-01T00:00:00Z'}
+
+
+def bench(count: int) -> None:
+    rows = list(synthetic_leads(count))
+    t0 = time.perf_counter()
+    index = TableIndex(TABLES['leads'])
+    index.bulk_load(rows)
+    build_s = time.perf_counter() - t0
+    print(f"📄 {len(index):,} leads indexados en {build_s:,.1f} s, {len(index.vocab):,} palabras")
+
+    rnd = random.Random(7)
+    sample = rnd.sample(rows, 300)
+    queries = {
+        'prefijo corto': [r['name'].split()[1][:2] for r in sample],
+        'prefijo': [r['name'].split()[1][:4] for r in sample],
+        'nombre completo': [r['name'] for r in sample],
+        'dos palabras': [f"{r['name'].split()[0][:3]} {r['name'].split()[1][:4]}" for r in sample],
+        'contenido': [fold(r['name'].split()[1])[2:6] for r in sample],
+        'teléfono (final)': [r['phone'][-4:] for r in sample],
+        'teléfono (inicio)': [r['phone'].replace(' ', '')[3:9] for r in sample],
+    }
+    for label, qs in queries.items():
+        times = []
+        for q in qs:
+            t0 = time.perf_counter()
+            index.search(q)
+            times.append(time.perf_counter() - t0)
+        times.sort()
+        print(f"   {label:18s} p50 {times[len(times) // 2] * 1000:6.2f} ms   p99 {times[int(len(times) * .99)] * 1000:6.2f} ms")
+
+    # Lo que hace hoy GlobalSearch en cada tecla
+    lowered = [(r['name'].lower(), r['phone'], r['property_interest'].lower()) for r in rows]
+    q = 'hern'
+    t0 = time.perf_counter()
+    [r for r in lowered if q in r[0] or q in r[1] or q in r[2]][:5]
+    print(f"   includes() lineal: {(time.perf_counter() - t0) * 1000:,.0f} ms por consulta")
+
+    t0 = time.perf_counter()
+    for i, row in enumerate(rnd.sample(rows, 2000)):
+        index.upsert(dict(row, name=row['name'] + ' Editado', updated_at='2026-12-01'))
+    print(f"   actualización incremental: {(time.perf_counter() - t0) / 2000 * 1000:.2f} ms por fila")
+    assert index.search('editado', 1)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Índice de búsqueda para GlobalSearch')
+    for table in TABLES:
+        parser.add_argument(f'--{table}', metavar='EXPORT', help=f'export de {table} (.csv, .jsonl o .json)')
+    parser.add_argument('--index', default=INDEX_PATH)
+    parser.add_argument('--update', metavar='JSONL', help='filas cambiadas: {"table", "row", "deleted"?}')
+    parser.add_argument('--query', help='buscar en el índice guardado')
+    parser.add_argument('-k', type=int, default=TOP_K)
+    parser.add_argument('--serve', action='store_true', help='servir /search y /update en localhost')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--token', default=os.environ.get('SEARCH_INDEX_TOKEN', ''),
+                        help='token que deben mandar /search y /update (por defecto se genera uno)')
+    parser.add_argument('--origin', default=os.environ.get('SEARCH_INDEX_ORIGIN', ORIGIN),
+                        help='origen de la app al que se le permite CORS')
+    parser.add_argument('--bench', type=int, metavar='N', help='benchmark con N leads sintéticos')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(args.bench)
+        return 0
+
+    exports = {table: getattr(args, table) for table in TABLES if getattr(args, table)}
+    if exports:
+        index = SearchIndex.load(args.index) if os.path.exists(args.index) else SearchIndex()
+        for table, path in exports.items():
+            t0 = time.perf_counter()
+            index.tables[table] = TableIndex(TABLES[table])
+            count = index.tables[table].bulk_load(load_rows(path, TABLES[table]))
+            print(f"📄 {table}: {count:,} filas en {time.perf_counter() - t0:,.1f} s")
+        index.save(args.index)
+        print(f"✅ Índice → {args.index}")
+    elif not os.path.exists(args.index):
+        parser.error(f'no existe {args.index}: primero constrúyelo con --leads/--properties/...')
+    else:
+        index = SearchIndex.load(args.index)
+
+    if args.update:
+        with open(args.update, 'r', encoding='utf-8') as f:
+            applied = index.apply(json.loads(line) for line in f if line.strip())
+        index.save(args.index)
+        print(f"🔁 {applied:,} cambios aplicados")
+    if args.query:
+        t0 = time.perf_counter()
+        results = index.search(args.query, args.k)
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        print(f"   {(time.perf_counter() - t0) * 1000:.2f} ms", file=sys.stderr)
+    if args.serve:
+        serve(index, args.index, args.port, args.token, args.origin)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,14 +3,26 @@ import { useCrm } from './context/CrmContext'
 import type { View } from './types/crm'
 import type { Lead, Promotion, CRMEvent, Appointment } from './types/crm'
 import { API_BASE, safeFetch } from './types/crm'
-import { PropertyModal, LeadModal, MemberModal, MortgageModal, CampaignModal, PromotionModal, CrmEventModal, SendPromoModal, InviteEventModal, NewAppointmentModal, EditAppointmentModal, ConfirmModal, InputModal } from './components/modals'
+const PropertyModal = lazy(() => import('./components/modals/PropertyModal'))
+const LeadModal = lazy(() => import('./components/modals/LeadModal'))
+const MemberModal = lazy(() => import('./components/modals/MemberModal'))
+const MortgageModal = lazy(() => import('./components/modals/MortgageModal'))
+const CampaignModal = lazy(() => import('./components/modals/CampaignModal'))
+const PromotionModal = lazy(() => import('./components/modals/PromotionModal'))
+const CrmEventModal = lazy(() => import('./components/modals/CrmEventModal'))
+const SendPromoModal = lazy(() => import('./components/modals/SendPromoModal'))
+const InviteEventModal = lazy(() => import('./components/modals/InviteEventModal'))
+const NewAppointmentModal = lazy(() => import('./components/modals/AppointmentModals').then(m => ({ default: m.NewAppointmentModal })))
+const EditAppointmentModal = lazy(() => import('./components/modals/AppointmentModals').then(m => ({ default: m.EditAppointmentModal })))
+const ConfirmModal = lazy(() => import('./components/modals/ConfirmModal'))
+const InputModal = lazy(() => import('./components/modals/InputModal'))
 import Sidebar from './components/Sidebar'
-import NotificationDrawer from './components/NotificationDrawer'
-import GlobalSearch from './components/GlobalSearch'
+const NotificationDrawer = lazy(() => import('./components/NotificationDrawer'))
+const GlobalSearch = lazy(() => import('./components/GlobalSearch'))
 const CommandPalette = lazy(() => import('./components/CommandPalette'))
 const KeyboardShortcuts = lazy(() => import('./components/KeyboardShortcuts'))
 import LoginScreen, { getSession, clearSession, getSessionTimeRemaining, extendSession } from './components/LoginScreen'
-import SecuritySettings from './components/SecuritySettings'
+const SecuritySettings = lazy(() => import('./components/SecuritySettings'))
 import { SkeletonDashboard, SkeletonTable, SkeletonCards, SkeletonCalendar, SkeletonGeneric } from './components/Skeletons'
 import { Bell, Search, AlertTriangle, Clock } from 'lucide-react'
 
@@ -298,15 +310,19 @@ export default function App() {
           <button onClick={() => setShowGlobalSearch(true)} className="p-2 bg-slate-800 rounded-lg"><Search size={16} className="text-slate-400" /></button>
         </div>
 
-        <NotificationDrawer open={notifDrawerOpen} onClose={() => setNotifDrawerOpen(false)}
-          onSelectLead={(leadId) => {
-            const lead = leads.find(l => l.id === leadId)
-            if (lead) selectLead(lead)
-          }} />
+        <Suspense fallback={null}>
+          <NotificationDrawer open={notifDrawerOpen} onClose={() => setNotifDrawerOpen(false)}
+            onSelectLead={(leadId) => {
+              const lead = leads.find(l => l.id === leadId)
+              if (lead) selectLead(lead)
+            }} />
+        </Suspense>
 
-        <GlobalSearch show={showGlobalSearch} onClose={() => setShowGlobalSearch(false)}
-          leads={leads} properties={properties} team={team} appointments={appointments}
-          onSelectLead={lead => setSelectedLead(lead)} setView={setView} />
+        <Suspense fallback={null}>
+          <GlobalSearch show={showGlobalSearch} onClose={() => setShowGlobalSearch(false)}
+            leads={leads} properties={properties} team={team} appointments={appointments}
+            onSelectLead={lead => setSelectedLead(lead)} setView={setView} />
+        </Suspense>
 
         <Suspense fallback={null}><CommandPalette /></Suspense>
         <Suspense fallback={null}><KeyboardShortcuts /></Suspense>
@@ -363,17 +379,17 @@ export default function App() {
       </div>
 
       {/* Modals */}
-      {showNewAppointment && <NewAppointmentModal newAppointment={newAppointment} setNewAppointment={setNewAppointment} leads={leads} properties={properties} team={team} saving={saving} setSaving={setSaving} onClose={() => { setShowNewAppointment(false); setNewAppointment({}) }} onSaved={loadData} showToast={showToast} />}
-      {editingAppointment && <EditAppointmentModal appointment={editingAppointment} setAppointment={setEditingAppointment} team={team} properties={properties} saving={saving} setSaving={setSaving} onSaved={loadData} showToast={showToast} />}
-      {(editingProperty || showNewProperty) && <PropertyModal property={editingProperty} onSave={handleSaveProperty} onClose={() => { setEditingProperty(null); setShowNewProperty(false) }} />}
-      {editingLead && <LeadModal lead={editingLead} properties={properties} team={team} onSave={handleSaveLead} onClose={() => setEditingLead(null)} />}
-      {(editingMember || showNewMember) && <MemberModal member={editingMember} onSave={handleSaveMember} onClose={() => { setEditingMember(null); setShowNewMember(false) }} />}
-      {(editingMortgage || showNewMortgage) && <MortgageModal mortgage={editingMortgage} leads={leads} properties={properties} asesores={team.filter(t => t.role === 'asesor')} onSave={handleSaveMortgage} onClose={() => { setEditingMortgage(null); setShowNewMortgage(false) }} />}
-      {(editingCampaign || showNewCampaign) && <CampaignModal campaign={editingCampaign} onSave={handleSaveCampaign} onClose={() => { setEditingCampaign(null); setShowNewCampaign(false) }} />}
-      {(editingPromotion || showNewPromotion) && <PromotionModal promotion={editingPromotion} onSave={handleSavePromotion} onClose={() => { setEditingPromotion(null); setShowNewPromotion(false) }} leads={leads} properties={properties} />}
-      {(editingCrmEvent || showNewCrmEvent) && <CrmEventModal event={editingCrmEvent} onSave={handleSaveCrmEvent} onClose={() => { setEditingCrmEvent(null); setShowNewCrmEvent(false) }} leads={leads} properties={properties} />}
-      {showInviteEventModal && selectedEventForInvite && <InviteEventModal event={selectedEventForInvite} onSend={sendEventInvitations} onClose={() => { setShowInviteEventModal(false); setSelectedEventForInvite(null) }} sending={inviteSending} />}
-      {showSendPromoModal && selectedPromoToSend && <SendPromoModal promo={selectedPromoToSend} onSend={sendPromoReal} onClose={() => { setShowSendPromoModal(false); setSelectedPromoToSend(null) }} sending={promoSending} leads={leads} properties={properties} team={team} />}
+      {showNewAppointment && <Suspense fallback={null}><NewAppointmentModal newAppointment={newAppointment} setNewAppointment={setNewAppointment} leads={leads} properties={properties} team={team} saving={saving} setSaving={setSaving} onClose={() => { setShowNewAppointment(false); setNewAppointment({}) }} onSaved={loadData} showToast={showToast} /></Suspense>}
+      {editingAppointment && <Suspense fallback={null}><EditAppointmentModal appointment={editingAppointment} setAppointment={setEditingAppointment} team={team} properties={properties} saving={saving} setSaving={setSaving} onSaved={loadData} showToast={showToast} /></Suspense>}
+      {(editingProperty || showNewProperty) && <Suspense fallback={null}><PropertyModal property={editingProperty} onSave={handleSaveProperty} onClose={() => { setEditingProperty(null); setShowNewProperty(false) }} /></Suspense>}
+      {editingLead && <Suspense fallback={null}><LeadModal lead={editingLead} properties={properties} team={team} onSave={handleSaveLead} onClose={() => setEditingLead(null)} /></Suspense>}
+      {(editingMember || showNewMember) && <Suspense fallback={null}><MemberModal member={editingMember} onSave={handleSaveMember} onClose={() => { setEditingMember(null); setShowNewMember(false) }} /></Suspense>}
+      {(editingMortgage || showNewMortgage) && <Suspense fallback={null}><MortgageModal mortgage={editingMortgage} leads={leads} properties={properties} asesores={team.filter(t => t.role === 'asesor')} onSave={handleSaveMortgage} onClose={() => { setEditingMortgage(null); setShowNewMortgage(false) }} /></Suspense>}
+      {(editingCampaign || showNewCampaign) && <Suspense fallback={null}><CampaignModal campaign={editingCampaign} onSave={handleSaveCampaign} onClose={() => { setEditingCampaign(null); setShowNewCampaign(false) }} /></Suspense>}
+      {(editingPromotion || showNewPromotion) && <Suspense fallback={null}><PromotionModal promotion={editingPromotion} onSave={handleSavePromotion} onClose={() => { setEditingPromotion(null); setShowNewPromotion(false) }} leads={leads} properties={properties} /></Suspense>}
+      {(editingCrmEvent || showNewCrmEvent) && <Suspense fallback={null}><CrmEventModal event={editingCrmEvent} onSave={handleSaveCrmEvent} onClose={() => { setEditingCrmEvent(null); setShowNewCrmEvent(false) }} leads={leads} properties={properties} /></Suspense>}
+      {showInviteEventModal && selectedEventForInvite && <Suspense fallback={null}><InviteEventModal event={selectedEventForInvite} onSend={sendEventInvitations} onClose={() => { setShowInviteEventModal(false); setSelectedEventForInvite(null) }} sending={inviteSending} /></Suspense>}
+      {showSendPromoModal && selectedPromoToSend && <Suspense fallback={null}><SendPromoModal promo={selectedPromoToSend} onSend={sendPromoReal} onClose={() => { setShowSendPromoModal(false); setSelectedPromoToSend(null) }} sending={promoSending} leads={leads} properties={properties} team={team} /></Suspense>}
 
       {selectedLead && (
         <Suspense fallback={null}>
@@ -388,18 +404,20 @@ export default function App() {
         </Suspense>
       )}
 
-      {confirmModal && <ConfirmModal title={confirmModal.title} message={confirmModal.message} onConfirm={confirmModal.onConfirm} onClose={() => setConfirmModal(null)} />}
-      {inputModal && <InputModal title={inputModal.title} fields={inputModal.fields} onSubmit={inputModal.onSubmit} onClose={() => setInputModal(null)} />}
+      {confirmModal && <Suspense fallback={null}><ConfirmModal title={confirmModal.title} message={confirmModal.message} onConfirm={confirmModal.onConfirm} onClose={() => setConfirmModal(null)} /></Suspense>}
+      {inputModal && <Suspense fallback={null}><InputModal title={inputModal.title} fields={inputModal.fields} onSubmit={inputModal.onSubmit} onClose={() => setInputModal(null)} /></Suspense>}
 
       {/* Security Settings Modal */}
       {showSecuritySettings && currentUser && (
-        <SecuritySettings
-          userId={currentUser.id}
-          userName={currentUser.name}
-          onClose={() => setShowSecuritySettings(false)}
-          showToast={showToast}
-          onLogout={handleLogout}
-        />
+        <Suspense fallback={null}>
+          <SecuritySettings
+            userId={currentUser.id}
+            userName={currentUser.name}
+            onClose={() => setShowSecuritySettings(false)}
+            showToast={showToast}
+            onLogout={handleLogout}
+          />
+        </Suspense>
       )}
 
       {/* Session Timeout Warning */}
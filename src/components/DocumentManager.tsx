@@ -88,7 +88,7 @@ export default function DocumentManager({ entityType, entityId, currentUser }: D
     setLoading(true)
     const { data, error: fetchError } = await supabase
       .from('documents')
-      .select('*')
+      .select('id, entity_type, entity_id, name, file_url, file_type, file_size, category, uploaded_by_name, notes, created_at')
       .eq('entity_type', entityType)
       .eq('entity_id', entityId)
       .order('created_at', { ascending: false })
@@ -645,7 +645,7 @@ function CustomFieldsSection({ lead, setLeads, leads, showToast }: {
   useEffect(() => {
     supabase
       .from('custom_fields')
-      .select('*')
+      .select('id, entity_type, field_name, field_label, field_type, options, required, visible, order, created_at')
       .eq('entity_type', 'lead')
       .eq('visible', true)
       .order('order', { ascending: true })
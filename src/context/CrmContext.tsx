@@ -1,6 +1,8 @@
 import { createContext, useContext, useState, useEffect, useRef, useMemo, useCallback, type ReactNode } from 'react'
 import { useNavigate, useLocation } from 'react-router-dom'
 import { supabase } from '../lib/supabase'
+import { mergeRealtimeRow } from '../lib/realtimeMerge'
+import { highWaterMark, keepIds, mergeDelta, watermarkSince, withUpdatedAt, NO_CHANGES, RECONCILE_INTERVAL_MS, type Watermarks } from '../lib/deltaSync'
 // Auth simplified: phone/email lookup only, no Supabase Auth
 import type {
   Lead, Property, TeamMember, MortgageApplication, Campaign,
@@ -233,6 +235,63 @@ function viewToPath(v: View): string {
   return v === 'dashboard' ? '/' : '/' + v
 }
 
+// Derived from state, so it recomputes on every merge (load, delta poll, realtime)
+function buildInsights(leadsData: Lead[], teamData: TeamMember[], campaignsData: Campaign[]): Insight[] {
+  const newInsights: Insight[] = []
+
+  const hotLeadsNoActivity = leadsData.filter(l => {
+    if (l.score >= 8 && l.status === 'new') {
+      const updatedAt = new Date(l.updated_at || l.created_at)
+      return (Date.now() - updatedAt.getTime()) / (1000 * 60 * 60) > 2
+    }
+    return false
+  })
+  if (hotLeadsNoActivity.length > 0) {
+    newInsights.push({ type: 'warning', title: `${hotLeadsNoActivity.length} leads HOT sin atencion`, description: 'Tienes leads calificados que no han recibido seguimiento en las ultimas 2 horas', action: 'Contactar urgente', icon: Flame })
+  }
+
+  const highCPLCampaigns = campaignsData.filter(c => {
+    const cpl = c.leads_generated > 0 ? c.spent / c.leads_generated : 0
+    return cpl > 1000 && c.status === 'active'
+  })
+  if (highCPLCampaigns.length > 0) {
+    newInsights.push({ type: 'warning', title: `CPL alto en ${highCPLCampaigns[0].name}`, description: `El costo por lead es de $${(highCPLCampaigns[0].spent / highCPLCampaigns[0].leads_generated).toFixed(0)}. Considera ajustar segmentacion`, action: 'Revisar campana', icon: TrendingDown })
+  }
+
+  const mostInterested = leadsData.reduce((acc: Record<string, number>, l) => { if (l.property_interest) { acc[l.property_interest] = (acc[l.property_interest] || 0) + 1 }; return acc }, {})
+  const topProperty = Object.entries(mostInterested).sort((a, b) => b[1] - a[1])[0]
+  if (topProperty && topProperty[1] > 5) {
+    newInsights.push({ type: 'success', title: `${topProperty[0]} tiene alta demanda`, description: `${topProperty[1]} leads interesados. Considera aumentar precio o crear campana especifica`, action: 'Ver propiedad', icon: TrendingUp })
+  }
+
+  const topSeller = teamData.filter(t => t.role === 'vendedor').sort((a, b) => (b.sales_count || 0) - (a.sales_count || 0))[0]
+  if (topSeller && topSeller.sales_count > 0) {
+    newInsights.push({ type: 'success', title: `${topSeller.name} lidera en ventas`, description: `${topSeller.sales_count} ventas cerradas`, action: 'Ver estadisticas', icon: Award })
+  }
+
+  const negROI = campaignsData.filter(c => { const roi = c.spent > 0 ? ((c.revenue_generated - c.spent) / c.spent * 100) : 0; return roi < -20 && c.status === 'active' })
+  if (negROI.length > 0) {
+    newInsights.push({ type: 'warning', title: `${negROI.length} campanas con ROI negativo`, description: 'Revisa la efectividad de estas campanas', action: 'Ver campanas', icon: AlertCircle })
+  }
+
+  const qualifiedLeads = leadsData.filter(l => l.score >= 7 && l.status === 'qualified')
+  if (qualifiedLeads.length > 3) {
+    newInsights.push({ type: 'opportunity', title: `${qualifiedLeads.length} clientes listos para cerrar`, description: 'Tienes leads calificados en etapa final', action: 'Ver leads', icon: Target })
+  }
+
+  const stuckReserved = leadsData.filter(l => {
+    if (l.status === 'reserved' || l.status === 'Reservado') {
+      return (Date.now() - new Date(l.updated_at || l.created_at).getTime()) / (1000 * 60 * 60 * 24) > 7
+    }
+    return false
+  })
+  if (stuckReserved.length > 0) {
+    newInsights.push({ type: 'warning', title: `${stuckReserved.length} reservados estancados`, description: 'Llevan mas de 7 dias sin avance en credito', action: 'Ver leads', icon: Clock })
+  }
+
+  return newInsights
+}
+
 // Inner provider that uses Router hooks (must be inside a Router)
 function CrmProviderWithRouter({ children }: { children: ReactNode }) {
   const navigate = useNavigate()
@@ -287,7 +346,7 @@ function CrmProviderInner({ children, navigate, locationPathname }: {
   const [promotions, setPromotions] = useState<Promotion[]>([])
   const [crmEvents, setCrmEvents] = useState<CRMEvent[]>([])
   const [eventRegistrations, setEventRegistrations] = useState<EventRegistration[]>([])
-  const [insights, setInsights] = useState<Insight[]>([])
+  const insights = useMemo(() => buildInsights(leads, team, campaigns), [leads, team, campaigns])
   const [customFields, setCustomFields] = useState<CustomField[]>([])
   const [auditLog, setAuditLog] = useState<AuditEntry[]>([])
   const [fieldPermissions, setFieldPermissions] = useState<FieldPermission[]>([])
@@ -413,62 +472,9 @@ function CrmProviderInner({ children, navigate, locationPathname }: {
     return map[src] || src
   }, [])
 
-  // ---- Insights ----
-  function generateInsights(leadsData: Lead[], teamData: TeamMember[], campaignsData: Campaign[]) {
-    const newInsights: Insight[] = []
-
-    const hotLeadsNoActivity = leadsData.filter(l => {
-      if (l.score >= 8 && l.status === 'new') {
-        const updatedAt = new Date(l.updated_at || l.created_at)
-        return (Date.now() - updatedAt.getTime()) / (1000 * 60 * 60) > 2
-      }
-      return false
-    })
-    if (hotLeadsNoActivity.length > 0) {
-      newInsights.push({ type: 'warning', title: `${hotLeadsNoActivity.length} leads HOT sin atencion`, description: 'Tienes leads calificados que no han recibido seguimiento en las ultimas 2 horas', action: 'Contactar urgente', icon: Flame })
-    }
-
-    const highCPLCampaigns = campaignsData.filter(c => {
-      const cpl = c.leads_generated > 0 ? c.spent / c.leads_generated : 0
-      return cpl > 1000 && c.status === 'active'
-    })
-    if (highCPLCampaigns.length > 0) {
-      newInsights.push({ type: 'warning', title: `CPL alto en ${highCPLCampaigns[0].name}`, description: `El costo por lead es de $${(highCPLCampaigns[0].spent / highCPLCampaigns[0].leads_generated).toFixed(0)}. Considera ajustar segmentacion`, action: 'Revisar campana', icon: TrendingDown })
-    }
-
-    const mostInterested = leadsData.reduce((acc: Record<string, number>, l) => { if (l.property_interest) { acc[l.property_interest] = (acc[l.property_interest] || 0) + 1 }; return acc }, {})
-    const topProperty = Object.entries(mostInterested).sort((a, b) => b[1] - a[1])[0]
-    if (topProperty && topProperty[1] > 5) {
-      newInsights.push({ type: 'success', title: `${topProperty[0]} tiene alta demanda`, description: `${topProperty[1]} leads interesados. Considera aumentar precio o crear campana especifica`, action: 'Ver propiedad', icon: TrendingUp })
-    }
-
-    const topSeller = teamData.filter(t => t.role === 'vendedor').sort((a, b) => (b.sales_count || 0) - (a.sales_count || 0))[0]
-    if (topSeller && topSeller.sales_count > 0) {
-      newInsights.push({ type: 'success', title: `${topSeller.name} lidera en ventas`, description: `${topSeller.sales_count} ventas cerradas`, action: 'Ver estadisticas', icon: Award })
-    }
-
-    const negROI = campaignsData.filter(c => { const roi = c.spent > 0 ? ((c.revenue_generated - c.spent) / c.spent * 100) : 0; return roi < -20 && c.status === 'active' })
-    if (negROI.length > 0) {
-      newInsights.push({ type: 'warning', title: `${negROI.length} campanas con ROI negativo`, description: 'Revisa la efectividad de estas campanas', action: 'Ver campanas', icon: AlertCircle })
-    }
-
-    const qualifiedLeads = leadsData.filter(l => l.score >= 7 && l.status === 'qualified')
-    if (qualifiedLeads.length > 3) {
-      newInsights.push({ type: 'opportunity', title: `${qualifiedLeads.length} clientes listos para cerrar`, description: 'Tienes leads calificados en etapa final', action: 'Ver leads', icon: Target })
-    }
-
-    const stuckReserved = leadsData.filter(l => {
-      if (l.status === 'reserved' || l.status === 'Reservado') {
-        return (Date.now() - new Date(l.updated_at || l.created_at).getTime()) / (1000 * 60 * 60 * 24) > 7
-      }
-      return false
-    })
-    if (stuckReserved.length > 0) {
-      newInsights.push({ type: 'warning', title: `${stuckReserved.length} reservados estancados`, description: 'Llevan mas de 7 dias sin avance en credito', action: 'Ver leads', icon: Clock })
-    }
-
-    setInsights(newInsights)
-  }
+  // ---- Delta sync: highest updated_at seen per polled table ----
+  const syncWatermarks = useRef<Watermarks>({})
+  const lastReconcile = useRef(0)
 
   // ---- Data Loading ----
   async function loadData() {
@@ -476,12 +482,12 @@ function CrmProviderInner({ children, navigate, locationPathname }: {
     try {
       // Core tables (must succeed)
       const [leadsRes, propsRes, teamRes, mortgagesRes, campaignsRes, appointmentsRes] = await Promise.all([
-        supabase.from('leads').select('*').order('created_at', { ascending: false }),
-        supabase.from('properties').select('*'),
-        supabase.from('team_members').select('*'),
+        supabase.from('leads').select('id, name, phone, property_interest, budget, score, status, created_at, conversation_history, assigned_to, source, campaign_id, updated_at, fallen_reason, notes, credit_status, status_changed_at, survey_completed, survey_rating, temperature, needs_mortgage, last_message_at, referred_by, referred_by_name, referral_date, custom_data').order('created_at', { ascending: false }),
+        withUpdatedAt('properties', hasUpdatedAt => supabase.from('properties').select(hasUpdatedAt ? 'id, name, category, price, price_equipped, land_size, bedrooms, bathrooms, area_m2, total_units, sold_units, photo_url, description, neighborhood, city, development, ideal_client, sales_phrase, youtube_link, matterport_link, gps_link, brochure_urls, gallery_urls, floors, updated_at' : 'id, name, category, price, price_equipped, land_size, bedrooms, bathrooms, area_m2, total_units, sold_units, photo_url, description, neighborhood, city, development, ideal_client, sales_phrase, youtube_link, matterport_link, gps_link, brochure_urls, gallery_urls, floors')),
+        withUpdatedAt('team_members', hasUpdatedAt => supabase.from('team_members').select(hasUpdatedAt ? 'id, name, phone, role, sales_count, commission, active, photo_url, email, vacation_start, vacation_end, is_on_duty, work_start, work_end, working_days, hora_inicio, hora_fin, updated_at' : 'id, name, phone, role, sales_count, commission, active, photo_url, email, vacation_start, vacation_end, is_on_duty, work_start, work_end, working_days, hora_inicio, hora_fin')),
         supabase.from('mortgage_applications').select('*').order('created_at', { ascending: false }),
-        supabase.from('marketing_campaigns').select('*').order('created_at', { ascending: false }),
-        supabase.from('appointments').select('*').order('scheduled_date', { ascending: true }),
+        withUpdatedAt('marketing_campaigns', hasUpdatedAt => supabase.from('marketing_campaigns').select(hasUpdatedAt ? 'id, name, channel, status, budget, spent, impressions, clicks, leads_generated, sales_closed, revenue_generated, start_date, end_date, notes, target_audience, created_at, updated_at' : 'id, name, channel, status, budget, spent, impressions, clicks, leads_generated, sales_closed, revenue_generated, start_date, end_date, notes, target_audience, created_at').order('created_at', { ascending: false })),
+        supabase.from('appointments').select('id, lead_id, lead_phone, lead_name, property_name, vendedor_id, vendedor_name, asesor_id, asesor_name, scheduled_date, scheduled_time, status, appointment_type, duration_minutes, google_event_vendedor_id, cancelled_by, created_at, updated_at, mode, notificar, confirmation_sent, client_responded, team_member_id').order('scheduled_date', { ascending: true }),
       ])
       setLeads(leadsRes.data || [])
       setProperties(propsRes.data || [])
@@ -489,17 +495,25 @@ function CrmProviderInner({ children, navigate, locationPathname }: {
       setMortgages(mortgagesRes.data || [])
       setCampaigns(campaignsRes.data || [])
       setAppointments(appointmentsRes.data || [])
-      generateInsights(leadsRes.data || [], teamRes.data || [], campaignsRes.data || [])
+      syncWatermarks.current = {
+        leads: highWaterMark(leadsRes.data),
+        properties: highWaterMark(propsRes.data),
+        team_members: highWaterMark(teamRes.data),
+        mortgage_applications: highWaterMark(mortgagesRes.data),
+        marketing_campaigns: highWaterMark(campaignsRes.data),
+        appointments: highWaterMark(appointmentsRes.data),
+      }
+      lastReconcile.current = Date.now()
 
       // Optional tables (don't break app if missing)
       const optional = await Promise.allSettled([
-        supabase.from('reminder_config').select('*').order('lead_category'),
-        supabase.from('alert_settings').select('*').order('category').order('stage'),
-        supabase.from('promotions').select('*').order('start_date', { ascending: false }),
-        supabase.from('events').select('*').order('event_date', { ascending: true }),
-        supabase.from('custom_fields').select('*').order('order', { ascending: true }),
-        supabase.from('audit_log').select('*').order('timestamp', { ascending: false }).limit(500),
-        supabase.from('field_permissions').select('*'),
+        supabase.from('reminder_config').select('id, lead_category, reminder_hours, active, message_template, send_start_hour, send_end_hour').order('lead_category'),
+        supabase.from('alert_settings').select('id, category, stage, max_days').order('category').order('stage'),
+        supabase.from('promotions').select('id, name, description, start_date, end_date, message, image_url, video_url, pdf_url, target_segment, segment_filters, reminder_enabled, reminder_frequency, reminders_sent_count, total_reached, total_responses, status, created_at, updated_at').order('start_date', { ascending: false }),
+        supabase.from('events').select('id, name, description, event_type, event_date, event_time, location, location_url, max_capacity, registered_count, image_url, video_url, pdf_url, invitation_message, segment_filters, status, created_at').order('event_date', { ascending: true }),
+        supabase.from('custom_fields').select('id, entity_type, field_name, field_label, field_type, options, required, visible, order, created_at').order('order', { ascending: true }),
+        supabase.from('audit_log').select('id, entity_type, entity_id, entity_name, action, changes, user_id, user_name, timestamp').order('timestamp', { ascending: false }).limit(500),
+        supabase.from('field_permissions').select('id, entity_type, field_name, role, can_view, can_edit'),
       ])
       const opt = (i: number) => optional[i].status === 'fulfilled' ? (optional[i] as any).value.data || [] : []
       setReminderConfigs(opt(0))
@@ -537,22 +551,61 @@ function CrmProviderInner({ children, navigate, locationPathname }: {
 
   async function loadDataSilent() {
     try {
+      const marks = syncWatermarks.current
+      // Tables without updated_at yet are only re-read on reconcile
+      const reconcile = Date.now() - lastReconcile.current >= RECONCILE_INTERVAL_MS
       const [leadsRes, propsRes, teamRes, mortgagesRes, campaignsRes, appointmentsRes] = await Promise.all([
-        supabase.from('leads').select('*').order('created_at', { ascending: false }),
-        supabase.from('properties').select('*'),
-        supabase.from('team_members').select('*'),
-        supabase.from('mortgage_applications').select('*').order('created_at', { ascending: false }),
-        supabase.from('marketing_campaigns').select('*').order('created_at', { ascending: false }),
-        supabase.from('appointments').select('*').order('scheduled_date', { ascending: true })
+        withUpdatedAt('leads', hasUpdatedAt => hasUpdatedAt
+          ? supabase.from('leads').select('id, name, phone, property_interest, budget, score, status, created_at, conversation_history, assigned_to, source, campaign_id, updated_at, fallen_reason, notes, credit_status, status_changed_at, survey_completed, survey_rating, temperature, needs_mortgage, last_message_at, referred_by, referred_by_name, referral_date, custom_data').gte('updated_at', watermarkSince(marks.leads)).order('updated_at', { ascending: true })
+          : reconcile ? supabase.from('leads').select('id, name, phone, property_interest, budget, score, status, created_at, conversation_history, assigned_to, source, campaign_id, fallen_reason, notes, credit_status, status_changed_at, survey_completed, survey_rating, temperature, needs_mortgage, last_message_at, referred_by, referred_by_name, referral_date, custom_data').order('created_at', { ascending: false }) : NO_CHANGES),
+        withUpdatedAt('properties', hasUpdatedAt => hasUpdatedAt
+          ? supabase.from('properties').select('id, name, category, price, price_equipped, land_size, bedrooms, bathrooms, area_m2, total_units, sold_units, photo_url, description, neighborhood, city, development, ideal_client, sales_phrase, youtube_link, matterport_link, gps_link, brochure_urls, gallery_urls, floors, updated_at').gte('updated_at', watermarkSince(marks.properties)).order('updated_at', { ascending: true })
+          : reconcile ? supabase.from('properties').select('id, name, category, price, price_equipped, land_size, bedrooms, bathrooms, area_m2, total_units, sold_units, photo_url, description, neighborhood, city, development, ideal_client, sales_phrase, youtube_link, matterport_link, gps_link, brochure_urls, gallery_urls, floors') : NO_CHANGES),
+        withUpdatedAt('team_members', hasUpdatedAt => hasUpdatedAt
+          ? supabase.from('team_members').select('id, name, phone, role, sales_count, commission, active, photo_url, email, vacation_start, vacation_end, is_on_duty, work_start, work_end, working_days, hora_inicio, hora_fin, updated_at').gte('updated_at', watermarkSince(marks.team_members)).order('updated_at', { ascending: true })
+          : reconcile ? supabase.from('team_members').select('id, name, phone, role, sales_count, commission, active, photo_url, email, vacation_start, vacation_end, is_on_duty, work_start, work_end, working_days, hora_inicio, hora_fin') : NO_CHANGES),
+        withUpdatedAt('mortgage_applications', hasUpdatedAt => hasUpdatedAt
+          ? supabase.from('mortgage_applications').select('*').gte('updated_at', watermarkSince(marks.mortgage_applications)).order('updated_at', { ascending: true })
+          : reconcile ? supabase.from('mortgage_applications').select('*').order('created_at', { ascending: false }) : NO_CHANGES),
+        withUpdatedAt('marketing_campaigns', hasUpdatedAt => hasUpdatedAt
+          ? supabase.from('marketing_campaigns').select('id, name, channel, status, budget, spent, impressions, clicks, leads_generated, sales_closed, revenue_generated, start_date, end_date, notes, target_audience, created_at, updated_at').gte('updated_at', watermarkSince(marks.marketing_campaigns)).order('updated_at', { ascending: true })
+          : reconcile ? supabase.from('marketing_campaigns').select('id, name, channel, status, budget, spent, impressions, clicks, leads_generated, sales_closed, revenue_generated, start_date, end_date, notes, target_audience, created_at').order('created_at', { ascending: false }) : NO_CHANGES),
+        withUpdatedAt('appointments', hasUpdatedAt => hasUpdatedAt
+          ? supabase.from('appointments').select('id, lead_id, lead_phone, lead_name, property_name, vendedor_id, vendedor_name, asesor_id, asesor_name, scheduled_date, scheduled_time, status, appointment_type, duration_minutes, google_event_vendedor_id, cancelled_by, created_at, updated_at, mode, notificar, confirmation_sent, client_responded, team_member_id').gte('updated_at', watermarkSince(marks.appointments)).order('updated_at', { ascending: true })
+          : reconcile ? supabase.from('appointments').select('id, lead_id, lead_phone, lead_name, property_name, vendedor_id, vendedor_name, asesor_id, asesor_name, scheduled_date, scheduled_time, status, appointment_type, duration_minutes, google_event_vendedor_id, cancelled_by, created_at, mode, notificar, confirmation_sent, client_responded, team_member_id').order('scheduled_date', { ascending: true }) : NO_CHANGES)
       ])
-      setLeads(leadsRes.data || [])
-      setProperties(propsRes.data || [])
-      setTeam(teamRes.data || [])
-      setMortgages(mortgagesRes.data || [])
-      setCampaigns(campaignsRes.data || [])
-      setAppointments(appointmentsRes.data || [])
+      setLeads(prev => mergeDelta(prev, leadsRes.data, { column: 'created_at', ascending: false }))
+      setProperties(prev => mergeDelta(prev, propsRes.data))
+      setTeam(prev => mergeDelta(prev, teamRes.data))
+      setMortgages(prev => mergeDelta(prev, mortgagesRes.data, { column: 'created_at', ascending: false }))
+      setCampaigns(prev => mergeDelta(prev, campaignsRes.data, { column: 'created_at', ascending: false }))
+      setAppointments(prev => mergeDelta(prev, appointmentsRes.data, { column: 'scheduled_date', ascending: true }))
+      syncWatermarks.current = {
+        leads: highWaterMark(leadsRes.data, marks.leads),
+        properties: highWaterMark(propsRes.data, marks.properties),
+        team_members: highWaterMark(teamRes.data, marks.team_members),
+        mortgage_applications: highWaterMark(mortgagesRes.data, marks.mortgage_applications),
+        marketing_campaigns: highWaterMark(campaignsRes.data, marks.marketing_campaigns),
+        appointments: highWaterMark(appointmentsRes.data, marks.appointments),
+      }
+      if (reconcile) {
+        lastReconcile.current = Date.now()
+        const [leadsIds, propsIds, teamIds, mortgagesIds, campaignsIds, appointmentsIds] = await Promise.all([
+          supabase.from('leads').select('id').order('created_at', { ascending: false }),
+          supabase.from('properties').select('id'),
+          supabase.from('team_members').select('id'),
+          supabase.from('mortgage_applications').select('id').order('created_at', { ascending: false }),
+          supabase.from('marketing_campaigns').select('id').order('created_at', { ascending: false }),
+          supabase.from('appointments').select('id').order('scheduled_date', { ascending: true })
+        ])
+        setLeads(prev => keepIds(prev, leadsIds.data))
+        setProperties(prev => keepIds(prev, propsIds.data))
+        setTeam(prev => keepIds(prev, teamIds.data))
+        setMortgages(prev => keepIds(prev, mortgagesIds.data))
+        setCampaigns(prev => keepIds(prev, campaignsIds.data))
+        setAppointments(prev => keepIds(prev, appointmentsIds.data))
+      }
       setLastRefresh(new Date())
-      generateInsights(leadsRes.data || [], teamRes.data || [], campaignsRes.data || [])
     } catch (err) {
       console.error('Error loading data (silent):', err)
     }
@@ -575,13 +628,13 @@ function CrmProviderInner({ children, navigate, locationPathname }: {
           category: 'citas',
           leadId: apt.lead_id,
         })
-        supabase.from('appointments').select('*').order('scheduled_date', { ascending: true }).then(({ data }) => { if (data) setAppointments(data) })
+        setAppointments(prev => mergeRealtimeRow(prev, payload, { column: 'scheduled_date', ascending: true }))
       })
-      .on('postgres_changes', { event: 'UPDATE', schema: 'public', table: 'appointments' }, () => {
-        supabase.from('appointments').select('*').order('scheduled_date', { ascending: true }).then(({ data }) => { if (data) setAppointments(data) })
+      .on('postgres_changes', { event: 'UPDATE', schema: 'public', table: 'appointments' }, (payload) => {
+        setAppointments(prev => mergeRealtimeRow(prev, payload, { column: 'scheduled_date', ascending: true }))
       })
-      .on('postgres_changes', { event: 'DELETE', schema: 'public', table: 'appointments' }, () => {
-        supabase.from('appointments').select('*').order('scheduled_date', { ascending: true }).then(({ data }) => { if (data) setAppointments(data) })
+      .on('postgres_changes', { event: 'DELETE', schema: 'public', table: 'appointments' }, (payload) => {
+        setAppointments(prev => mergeRealtimeRow(prev, payload, { column: 'scheduled_date', ascending: true }))
       })
       .subscribe()
 
@@ -597,7 +650,7 @@ function CrmProviderInner({ children, navigate, locationPathname }: {
           category: 'leads',
           leadId: lead.id,
         })
-        supabase.from('leads').select('*').order('created_at', { ascending: false }).then(({ data }) => { if (data) setLeads(data) })
+        setLeads(prev => mergeRealtimeRow(prev, payload, { column: 'created_at', ascending: false }))
       })
       .on('postgres_changes', { event: 'UPDATE', schema: 'public', table: 'leads' }, (payload) => {
         const newLead = payload.new as any
@@ -611,10 +664,10 @@ function CrmProviderInner({ children, navigate, locationPathname }: {
             leadId: newLead.id,
           })
         }
-        supabase.from('leads').select('*').order('created_at', { ascending: false }).then(({ data }) => { if (data) setLeads(data) })
+        setLeads(prev => mergeRealtimeRow(prev, payload, { column: 'created_at', ascending: false }))
       })
-      .on('postgres_changes', { event: 'DELETE', schema: 'public', table: 'leads' }, () => {
-        supabase.from('leads').select('*').order('created_at', { ascending: false }).then(({ data }) => { if (data) setLeads(data) })
+      .on('postgres_changes', { event: 'DELETE', schema: 'public', table: 'leads' }, (payload) => {
+        setLeads(prev => mergeRealtimeRow(prev, payload, { column: 'created_at', ascending: false }))
       })
       .subscribe()
 
@@ -628,7 +681,7 @@ function CrmProviderInner({ children, navigate, locationPathname }: {
           type: 'info',
           category: 'sistema',
         })
-        supabase.from('mortgage_applications').select('*').order('created_at', { ascending: false }).then(({ data }) => { if (data) setMortgages(data) })
+        setMortgages(prev => mergeRealtimeRow(prev, payload, { column: 'created_at', ascending: false }))
       })
       .on('postgres_changes', { event: 'UPDATE', schema: 'public', table: 'mortgage_applications' }, (payload) => {
         const newMort = payload.new as any
@@ -645,7 +698,7 @@ function CrmProviderInner({ children, navigate, locationPathname }: {
             category: 'sistema',
           })
         }
-        supabase.from('mortgage_applications').select('*').order('created_at', { ascending: false }).then(({ data }) => { if (data) setMortgages(data) })
+        setMortgages(prev => mergeRealtimeRow(prev, payload, { column: 'created_at', ascending: false }))
       })
       .subscribe()
 
@@ -1001,7 +1054,7 @@ function CrmProviderInner({ children, navigate, locationPathname }: {
         if (error) throw error
         showToast('Campo creado', 'success')
       }
-      const { data } = await supabase.from('custom_fields').select('*').order('order', { ascending: true })
+      const { data } = await supabase.from('custom_fields').select('id, entity_type, field_name, field_label, field_type, options, required, visible, order, created_at').order('order', { ascending: true })
       setCustomFields(data || [])
     } catch (err) {
       console.error('Error saving custom field:', err)
@@ -1017,7 +1070,7 @@ function CrmProviderInner({ children, navigate, locationPathname }: {
         try {
           const { error } = await supabase.from('custom_fields').delete().eq('id', id)
           if (error) throw error
-          const { data } = await supabase.from('custom_fields').select('*').order('order', { ascending: true })
+          const { data } = await supabase.from('custom_fields').select('id, entity_type, field_name, field_label, field_type, options, required, visible, order, created_at').order('order', { ascending: true })
           setCustomFields(data || [])
           showToast('Campo eliminado', 'success')
         } catch (err) {
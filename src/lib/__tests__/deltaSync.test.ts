@@ -0,0 +1,97 @@
+import { describe, it, expect, beforeEach, vi } from 'vitest'
+import { highWaterMark, watermarkSince, mergeDelta, keepIds, withUpdatedAt, resetUpdatedAtFallback, NO_CHANGES } from '../deltaSync'
+
+interface Row { id: string; created_at: string | null; updated_at?: string; name?: string; extra?: string }
+
+const rows: Row[] = [
+  { id: 'c', created_at: '2026-03-03' },
+  { id: 'b', created_at: '2026-02-02' },
+  { id: 'a', created_at: '2026-01-01' },
+]
+const desc = { column: 'created_at' as const, ascending: false }
+
+describe('highWaterMark', () => {
+  it('keeps the latest updated_at, comparing as timestamps', () => {
+    const mark = highWaterMark([
+      { updated_at: '2026-05-01T10:00:00+00:00' },
+      { updated_at: '2026-05-01T12:00:00.5+02:00' },
+      { updated_at: '2026-05-01T10:30:00+00:00' },
+    ])
+    expect(mark).toBe('2026-05-01T10:30:00+00:00')
+  })
+
+  it('never moves backwards', () => {
+    expect(highWaterMark([{ updated_at: '2026-01-01T00:00:00Z' }], '2026-02-01T00:00:00Z')).toBe('2026-02-01T00:00:00Z')
+    expect(highWaterMark(null, '2026-02-01T00:00:00Z')).toBe('2026-02-01T00:00:00Z')
+  })
+})
+
+describe('watermarkSince', () => {
+  it('starts from the epoch without a mark and re-reads the overlap window', () => {
+    expect(watermarkSince(null)).toBe('1970-01-01T00:00:00.000Z')
+    expect(watermarkSince('2026-05-01T10:01:00Z', 60_000)).toBe('2026-05-01T10:00:00.000Z')
+  })
+})
+
+describe('mergeDelta', () => {
+  it('returns the same array when nothing changed', () => {
+    expect(mergeDelta(rows, [], desc)).toBe(rows)
+  })
+
+  it('inserts new rows and moves updated ones in sort order', () => {
+    const next = mergeDelta(rows, [
+      { id: 'x', created_at: '2026-02-15' },
+      { id: 'a', created_at: '2026-04-04', name: 'Ana' },
+    ], desc)
+    expect(next.map(r => r.id)).toEqual(['a', 'c', 'x', 'b'])
+    expect(next[0].name).toBe('Ana')
+    expect(rows).toHaveLength(3)
+  })
+
+  it('keeps columns that only the state had', () => {
+    const withExtra = [{ id: 'a', created_at: '2026-01-01', extra: 'realtime' }]
+    const next = mergeDelta(withExtra, [{ id: 'a', created_at: '2026-01-01', name: 'Ana' }], desc)
+    expect(next[0]).toEqual({ id: 'a', created_at: '2026-01-01', extra: 'realtime', name: 'Ana' })
+  })
+
+  it('replaces in place and appends when there is no sort', () => {
+    const next = mergeDelta(rows, [{ id: 'b', created_at: '2026-09-09' }, { id: 'z', created_at: null }])
+    expect(next.map(r => r.id)).toEqual(['c', 'b', 'a', 'z'])
+  })
+})
+
+describe('keepIds', () => {
+  it('drops rows deleted on the server', () => {
+    expect(keepIds(rows, [{ id: 'a' }, { id: 'c' }]).map(r => r.id)).toEqual(['c', 'a'])
+  })
+
+  it('returns the same array when every row is still there', () => {
+    expect(keepIds(rows, [{ id: 'a' }, { id: 'b' }, { id: 'c' }])).toBe(rows)
+    expect(keepIds(rows, null)).toBe(rows)
+  })
+})
+
+describe('withUpdatedAt', () => {
+  const missing = (column: string) => ({ data: null, error: { code: '42703', message: `column properties.${column} does not exist` } })
+
+  beforeEach(() => {
+    resetUpdatedAtFallback()
+    vi.spyOn(console, 'warn').mockImplementation(() => {})
+  })
+
+  it('re-runs the read without updated_at and remembers the table', async () => {
+    const query = vi.fn(async (has: boolean) => has ? missing('updated_at') : { data: [{ id: 'a' }], error: null })
+    expect((await withUpdatedAt('properties', query)).data).toEqual([{ id: 'a' }])
+    await withUpdatedAt('properties', query)
+    expect(query.mock.calls.map(c => c[0])).toEqual([true, false, false])
+  })
+
+  it('leaves other missing columns and other tables alone', async () => {
+    const query = vi.fn(async () => missing('floors'))
+    expect((await withUpdatedAt('properties', query)).error?.code).toBe('42703')
+    expect(query).toHaveBeenCalledTimes(1)
+    const ok = vi.fn(async () => NO_CHANGES)
+    await withUpdatedAt('leads', ok)
+    expect(ok).toHaveBeenCalledWith(true)
+  })
+})
@@ -0,0 +1,25 @@
+import { describe, it, expect } from 'vitest'
+import { foldName, findPropertyLocation, propertyMapsLink } from '../propertyLocations'
+
+describe('foldName', () => {
+  it('drops accents, case and extra spaces', () => {
+    expect(foldName('  Tulipán   PLUS ')).toBe('tulipan plus')
+  })
+})
+
+describe('findPropertyLocation', () => {
+  it('hits the exact name without folding', () => {
+    expect(findPropertyLocation('Ceiba')).toEqual({ link: 'https://www.google.com/maps?q=19.0319,-98.2063', lat: 19.0319, lng: -98.2063 })
+  })
+
+  it('falls back to the accent-folded name', () => {
+    expect(propertyMapsLink('tulipan')).toBe(propertyMapsLink('Tulipán'))
+    expect(propertyMapsLink('ÁGUILA')).toBe('https://www.google.com/maps?q=19.0450,-98.1850')
+  })
+
+  it('returns nothing for unknown or empty names', () => {
+    expect(findPropertyLocation('Departamento 5')).toBeUndefined()
+    expect(propertyMapsLink(null)).toBe('')
+    expect(propertyMapsLink('constructor')).toBe('')
+  })
+})
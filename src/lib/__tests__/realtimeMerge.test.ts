@@ -0,0 +1,42 @@
+import { describe, it, expect } from 'vitest'
+import { mergeRealtimeRow } from '../realtimeMerge'
+
+interface Row { id: string; created_at: string | null; name?: string }
+
+const rows: Row[] = [
+  { id: 'c', created_at: '2026-03-03' },
+  { id: 'b', created_at: '2026-02-02' },
+  { id: 'a', created_at: '2026-01-01' },
+]
+const desc = { column: 'created_at' as const, ascending: false }
+
+describe('mergeRealtimeRow', () => {
+  it('inserts a new row in sort order', () => {
+    const next = mergeRealtimeRow(rows, { eventType: 'INSERT', new: { id: 'x', created_at: '2026-02-15' }, old: {} }, desc)
+    expect(next.map(r => r.id)).toEqual(['c', 'x', 'b', 'a'])
+    expect(rows).toHaveLength(3)
+  })
+
+  it('updates a row in place when the sort key is unchanged', () => {
+    const next = mergeRealtimeRow(rows, { eventType: 'UPDATE', new: { id: 'b', created_at: '2026-02-02', name: 'Ana' }, old: { id: 'b' } }, desc)
+    expect(next.map(r => r.id)).toEqual(['c', 'b', 'a'])
+    expect(next[1].name).toBe('Ana')
+  })
+
+  it('moves a row when the sort key changes', () => {
+    const next = mergeRealtimeRow(rows, { eventType: 'UPDATE', new: { id: 'a', created_at: '2026-04-04' }, old: { id: 'a' } }, desc)
+    expect(next.map(r => r.id)).toEqual(['a', 'c', 'b'])
+  })
+
+  it('removes a row on delete and ignores unknown ids', () => {
+    expect(mergeRealtimeRow(rows, { eventType: 'DELETE', new: {}, old: { id: 'b' } }, desc).map(r => r.id)).toEqual(['c', 'a'])
+    expect(mergeRealtimeRow(rows, { eventType: 'DELETE', new: {}, old: { id: 'zz' } }, desc)).toBe(rows)
+  })
+
+  it('keeps nulls last when ascending', () => {
+    const asc = { column: 'created_at' as const, ascending: true }
+    const base: Row[] = [{ id: 'a', created_at: '2026-01-01' }, { id: 'n', created_at: null }]
+    const next = mergeRealtimeRow(base, { eventType: 'INSERT', new: { id: 'b', created_at: '2026-02-02' }, old: {} }, asc)
+    expect(next.map(r => r.id)).toEqual(['a', 'b', 'n'])
+  })
+})
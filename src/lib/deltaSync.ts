@@ -0,0 +1,126 @@
+// ═══════════════════════════════════════════════════════════════════════════
+// DELTA SYNC — updated_at watermarks for the 30 s background poll
+// Each polled table keeps the highest updated_at it has seen; the poll only
+// asks for rows at or after that mark and merges them into state by id.
+// Deletes are caught by a periodic id-only reconciliation.
+// (generated by SINCRONIZAR_DELTA_WATERMARK.py)
+// ═══════════════════════════════════════════════════════════════════════════
+
+import { compareValues, type SortSpec } from './realtimeMerge'
+
+export type Watermarks = Record<string, string | null | undefined>
+
+// Re-read a small window before the mark: a transaction that commits late
+// can carry an updated_at older than rows already seen
+export const SYNC_OVERLAP_MS = 60_000
+
+// How often the poll also fetches ids to drop rows deleted on the server
+export const RECONCILE_INTERVAL_MS = 5 * 60_000
+
+const EPOCH = '1970-01-01T00:00:00.000Z'
+
+export interface QueryResult<T> {
+  data: T[] | null
+  error: { code?: string; message?: string } | null
+}
+
+// Stands in for a poll query that is skipped this round
+export const NO_CHANGES: QueryResult<never> = { data: null, error: null }
+
+// Tables where PostgREST reported updated_at as missing (migrations/003 not run yet)
+const withoutUpdatedAt = new Set<string>()
+
+export function resetUpdatedAtFallback(): void {
+  withoutUpdatedAt.clear()
+}
+
+function missingUpdatedAt(error: QueryResult<unknown>['error']): boolean {
+  return error?.code === '42703' && /\bupdated_at\b/.test(error.message || '')
+}
+
+// Runs `query(true)`, the read that names updated_at. If the server answers
+// 42703 for updated_at, the table is remembered and `query(false)` runs
+// instead: the caller's own read without updated_at in its select list or
+// filter. Any other error, and any other column, is returned as is.
+export async function withUpdatedAt<T>(
+  table: string,
+  query: (hasUpdatedAt: boolean) => PromiseLike<QueryResult<T>> | QueryResult<T>,
+): Promise<QueryResult<T>> {
+  if (withoutUpdatedAt.has(table)) return query(false)
+  const res = await query(true)
+  if (!missingUpdatedAt(res.error)) return res
+  withoutUpdatedAt.add(table)
+  console.warn(`${table}.updated_at does not exist yet (run migrations/003); polling ${table} only on reconcile`)
+  return query(false)
+}
+
+export function highWaterMark(rows: { updated_at?: string | null }[] | null | undefined, current?: string | null): string | null {
+  let best = current ?? null
+  let bestMs = best ? Date.parse(best) : -Infinity
+  for (const row of rows || []) {
+    const ms = row.updated_at ? Date.parse(row.updated_at) : NaN
+    if (ms > bestMs) {
+      best = row.updated_at as string
+      bestMs = ms
+    }
+  }
+  return best
+}
+
+export function watermarkSince(mark: string | null | undefined, overlapMs = SYNC_OVERLAP_MS): string {
+  if (!mark) return EPOCH
+  const ms = Date.parse(mark)
+  return Number.isNaN(ms) ? EPOCH : new Date(ms - overlapMs).toISOString()
+}
+
+// Merges changed rows by id, keeping `sort` order. Rows already in state are
+// shallow-merged so columns that only arrived through realtime are kept.
+export function mergeDelta<T extends { id: string }>(rows: T[], changed: T[] | null | undefined, sort?: SortSpec<T>): T[] {
+  if (!changed || changed.length === 0) return rows
+  const incoming = new Map<string, T>()
+  for (const row of changed) incoming.set(row.id, row)
+
+  if (!sort) {
+    const next = rows.map(r => {
+      const row = incoming.get(r.id)
+      if (!row) return r
+      incoming.delete(r.id)
+      return { ...r, ...row }
+    })
+    return [...next, ...incoming.values()]
+  }
+
+  const kept: T[] = []
+  const moved: T[] = []
+  for (const r of rows) {
+    const row = incoming.get(r.id)
+    if (!row) {
+      kept.push(r)
+      continue
+    }
+    incoming.delete(r.id)
+    moved.push({ ...r, ...row })
+  }
+  const fresh = [...moved, ...incoming.values()]
+  fresh.sort((a, b) => compareValues(a[sort.column], b[sort.column], sort.ascending))
+
+  // Linear merge of two sorted lists; on ties existing rows go first
+  const next: T[] = []
+  let i = 0
+  let j = 0
+  while (i < kept.length && j < fresh.length) {
+    if (compareValues(kept[i][sort.column], fresh[j][sort.column], sort.ascending) <= 0) next.push(kept[i++])
+    else next.push(fresh[j++])
+  }
+  while (i < kept.length) next.push(kept[i++])
+  while (j < fresh.length) next.push(fresh[j++])
+  return next
+}
+
+// Drops rows whose id the server no longer returns
+export function keepIds<T extends { id: string }>(rows: T[], ids: { id: string }[] | null | undefined): T[] {
+  if (!ids) return rows
+  const alive = new Set(ids.map(r => r.id))
+  const next = rows.filter(r => alive.has(r.id))
+  return next.length === rows.length ? rows : next
+}
@@ -0,0 +1,84 @@
+// ═══════════════════════════════════════════════════════════════════════════
+// PROPERTY LOCATIONS — property/model name → Google Maps link and coordinates
+// Keys are the exact names plus accent-folded aliases, so the lookup is a
+// single Map hit. Do not edit: re-run property_locations.py.
+// (generated by property_locations.py)
+// ═══════════════════════════════════════════════════════════════════════════
+
+export interface PropertyLocation {
+  link: string
+  lat: number | null
+  lng: number | null
+}
+
+const LOCATIONS: PropertyLocation[] = [
+  { link: "https://www.google.com/maps?q=19.0319,-98.2063", lat: 19.0319, lng: -98.2063 },
+  { link: "https://www.google.com/maps?q=19.0325,-98.2070", lat: 19.0325, lng: -98.207 },
+  { link: "https://www.google.com/maps?q=19.0330,-98.2075", lat: 19.033, lng: -98.2075 },
+  { link: "https://www.google.com/maps?q=19.0315,-98.2055", lat: 19.0315, lng: -98.2055 },
+  { link: "https://www.google.com/maps?q=19.0340,-98.2080", lat: 19.034, lng: -98.208 },
+  { link: "https://www.google.com/maps?q=19.0310,-98.2050", lat: 19.031, lng: -98.205 },
+  { link: "https://www.google.com/maps?q=19.0450,-98.1850", lat: 19.045, lng: -98.185 },
+  { link: "https://www.google.com/maps?q=19.0460,-98.1860", lat: 19.046, lng: -98.186 },
+  { link: "https://www.google.com/maps?q=19.0200,-98.2200", lat: 19.02, lng: -98.22 },
+]
+
+// name or alias -> index into LOCATIONS
+const INDEX = new Map<string, number>([
+  ["Abeto", 1],
+  ["Almendro", 4],
+  ["Avellano", 2],
+  ["Azalea", 3],
+  ["Cedro", 0],
+  ["Ceiba", 0],
+  ["Dalia", 8],
+  ["Eucalipto", 0],
+  ["Fresno", 1],
+  ["Gardenia", 5],
+  ["Girasol", 5],
+  ["Halcón", 6],
+  ["Lavanda", 3],
+  ["Madroño", 2],
+  ["Nogal", 7],
+  ["Olivo", 4],
+  ["Orquídea", 8],
+  ["Roble", 1],
+  ["Sauce", 7],
+  ["Tulipán", 3],
+  ["abeto", 1],
+  ["aguila", 6],
+  ["almendro", 4],
+  ["avellano", 2],
+  ["azalea", 3],
+  ["cedro", 0],
+  ["ceiba", 0],
+  ["dalia", 8],
+  ["eucalipto", 0],
+  ["fresno", 1],
+  ["gardenia", 5],
+  ["girasol", 5],
+  ["halcon", 6],
+  ["lavanda", 3],
+  ["madrono", 2],
+  ["nogal", 7],
+  ["olivo", 4],
+  ["orquidea", 8],
+  ["roble", 1],
+  ["sauce", 7],
+  ["tulipan", 3],
+  ["Águila", 6],
+])
+
+export function foldName(name: string): string {
+  return name.normalize('NFD').replace(/[\u0300-\u036f]/g, '').toLowerCase().replace(/\s+/g, ' ').trim()
+}
+
+export function findPropertyLocation(name: string | null | undefined): PropertyLocation | undefined {
+  if (!name) return undefined
+  const i = INDEX.get(name) ?? INDEX.get(foldName(name))
+  return i === undefined ? undefined : LOCATIONS[i]
+}
+
+export function propertyMapsLink(name: string | null | undefined): string {
+  return findPropertyLocation(name)?.link ?? ''
+}
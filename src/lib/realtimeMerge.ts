@@ -0,0 +1,64 @@
+// ═══════════════════════════════════════════════════════════════════════════
+// REALTIME MERGE — Applies a postgres_changes event to an in-memory array
+// Replaces the full-table refetch on every INSERT/UPDATE/DELETE event
+// (generated by FUSIONAR_REALTIME_INCREMENTAL.py)
+// ═══════════════════════════════════════════════════════════════════════════
+
+export interface RealtimeChange {
+  eventType: 'INSERT' | 'UPDATE' | 'DELETE'
+  new: Record<string, any>
+  old: Record<string, any>
+}
+
+export interface SortSpec<T> {
+  column: keyof T
+  ascending: boolean
+}
+
+// Same ordering as Postgres: NULLS LAST for ascending, NULLS FIRST for descending
+export function compareValues(a: unknown, b: unknown, ascending: boolean): number {
+  const aNull = a === null || a === undefined
+  const bNull = b === null || b === undefined
+  if (aNull || bNull) {
+    if (aNull && bNull) return 0
+    return aNull === ascending ? 1 : -1
+  }
+  const cmp = (a as any) < (b as any) ? -1 : (a as any) > (b as any) ? 1 : 0
+  return ascending ? cmp : -cmp
+}
+
+// First index whose row sorts strictly after `row` (keeps insertion stable)
+function upperBound<T>(rows: T[], row: T, sort: SortSpec<T>): number {
+  let lo = 0
+  let hi = rows.length
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1
+    if (compareValues(rows[mid][sort.column], row[sort.column], sort.ascending) <= 0) lo = mid + 1
+    else hi = mid
+  }
+  return lo
+}
+
+export function mergeRealtimeRow<T extends { id: string }>(rows: T[], change: RealtimeChange, sort?: SortSpec<T>): T[] {
+  if (change.eventType === 'DELETE') {
+    const id = change.old?.id
+    const idx = rows.findIndex(r => r.id === id)
+    if (idx === -1) return rows
+    return [...rows.slice(0, idx), ...rows.slice(idx + 1)]
+  }
+
+  const incoming = change.new as Partial<T>
+  if (!incoming || incoming.id === undefined) return rows
+  const idx = rows.findIndex(r => r.id === incoming.id)
+  const row = (idx === -1 ? incoming : { ...rows[idx], ...incoming }) as T
+
+  if (idx !== -1 && (!sort || rows[idx][sort.column] === row[sort.column])) {
+    const next = rows.slice()
+    next[idx] = row
+    return next
+  }
+
+  const rest = idx === -1 ? rows : [...rows.slice(0, idx), ...rows.slice(idx + 1)]
+  const pos = sort ? upperBound(rest, row, sort) : rest.length
+  return [...rest.slice(0, pos), row, ...rest.slice(pos)]
+}
@@ -135,6 +135,7 @@ export interface Property {
   gallery_urls: string
   address: string
   floors: number
+  updated_at?: string
 }
 
 export interface TeamMember {
@@ -155,6 +156,7 @@ export interface TeamMember {
   working_days?: number[]
   hora_inicio?: number
   hora_fin?: number
+  updated_at?: string
 }
 
 export interface MortgageApplication {
@@ -222,6 +224,7 @@ export interface Campaign {
   target_audience: string
   creative_url: string
   created_at: string
+  updated_at?: string
 }
 
 export interface Appointment {
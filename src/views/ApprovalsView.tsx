@@ -97,8 +97,8 @@ export default function ApprovalsView() {
     setLoading(true)
     try {
       const [reqRes, ruleRes] = await Promise.all([
-        supabase.from('approval_requests').select('*').order('created_at', { ascending: false }),
-        supabase.from('approval_rules').select('*').order('type'),
+        supabase.from('approval_requests').select('id, type, entity_type, entity_name, requested_by_name, approved_by_name, status, details, reason, rejection_reason, created_at, resolved_at').order('created_at', { ascending: false }),
+        supabase.from('approval_rules').select('id, type, description, requires_role, auto_approve_threshold, active').order('type'),
       ])
       if (reqRes.data) setRequests(reqRes.data)
       if (ruleRes.data) {
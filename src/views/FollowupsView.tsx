@@ -48,13 +48,13 @@ export default function FollowupsView({ supabase }: { supabase: any }) {
 
     const { data: rulesData } = await supabase
       .from('followup_rules')
-      .select('*')
+      .select('id, name, funnel, trigger_event, trigger_status, requires_no_response, delay_hours, is_active, sequence_order')
       .order('funnel')
       .order('sequence_order')
 
     const { data: scheduledData } = await supabase
       .from('scheduled_followups')
-      .select('*')
+      .select('id, lead_id, lead_phone, lead_name, desarrollo, message, scheduled_at, sent, sent_at, cancelled, cancel_reason, created_at')
       .order('scheduled_at', { ascending: true })
       .limit(100)
 
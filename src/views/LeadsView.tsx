@@ -835,7 +835,7 @@ export default function LeadsView({ onSelectLead }: LeadsViewProps) {
                   if (error) { showToast('Error: ' + error.message, 'error'); return }
                   setShowNewLead(false)
                   setNewLead({ name: '', phone: '', property_interest: '', budget: '', status: 'new' })
-                  const { data } = await supabase.from('leads').select('*').order('created_at', { ascending: false })
+                  const { data } = await supabase.from('leads').select('id, name, phone, property_interest, budget, score, status, created_at, conversation_history, assigned_to, source, campaign_id, updated_at, fallen_reason, notes, credit_status, status_changed_at, survey_completed, survey_rating, temperature, needs_mortgage, last_message_at, referred_by, referred_by_name, referral_date, custom_data').order('created_at', { ascending: false })
                   if (data) setLeads(data)
                 } finally { setSaving(false) }
               }} className="w-full py-3 bg-green-600 rounded-xl font-semibold hover:bg-green-700 disabled:opacity-50 disabled:cursor-not-allowed">
@@ -365,7 +365,7 @@ export default function TasksView() {
     try {
       const { data, error } = await supabase
         .from('tasks')
-        .select('*')
+        .select('id, title, description, due_date, due_time, priority, status, category, assigned_to, assigned_to_name, lead_id, lead_name, property_id, property_name, completed_at, created_at, updated_at')
         .order('created_at', { ascending: false })
       if (error) throw error
       setTasks(data || [])
@@ -37,7 +37,7 @@ export default function WhatsAppInboxView() {
     try {
       const { data, error } = await supabase
         .from('conversations')
-        .select('*')
+        .select('id, lead_id, phone, messages, updated_at')
         .order('updated_at', { ascending: false })
 
       if (error) throw error
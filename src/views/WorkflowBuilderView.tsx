@@ -115,7 +115,7 @@ export default function WorkflowBuilderView() {
     setLoading(true)
     const { data, error } = await supabase
       .from('workflows')
-      .select('*')
+      .select('id, name, description, active, trigger, conditions, actions, created_at, updated_at, executions_count')
       .order('created_at', { ascending: false })
     if (error) {
       console.error('Error loading workflows:', error)
@@ -0,0 +1,272 @@
+"""Manifest de precache con hash de contenido para el service worker.
+
+``public/sw.js`` tenía un ``CACHE_NAME`` fijo y borraba todos los caches en
+``activate``: cada deploy obligaba a los asesores a bajar todo de nuevo por
+datos móviles. Este paso de build corre después de ``vite build``:
+
+- Recorre ``dist/`` y saca el sha256 de cada archivo. Lo que Vite ya nombra
+  con hash (``assets/index-3fA9_kQz.js``) se cachea por URL: si el contenido
+  cambia, cambia el nombre. El resto (``index.html``, ``offline.html``,
+  íconos, ``manifest.json``) se cachea por URL + revisión.
+- Inyecta el manifest en ``dist/sw.js``, en el marcador
+  ``/* @precache-manifest */ []``. El navegador ve un sw.js distinto, el
+  ``install`` nuevo baja solo las entradas cuya llave no está en el cache y
+  el ``activate`` borra las que ya no están en el manifest.
+- Deja una copia en ``dist/precache-manifest.json`` para comparar builds.
+
+``--upgrade ANTERIOR NUEVO`` mide los bytes que cuesta pasar de un build a
+otro con el manifest, contra lo que se bajaba antes (todo de nuevo). Da el
+tamaño en crudo y en gzip (lo que viaja con la compresión de Vercel).
+
+Uso::
+
+    python sw_manifest.py                          # después de vite build
+    python sw_manifest.py --dist build --exclude 'icon-512.png'
+    python sw_manifest.py --upgrade dist-anterior dist
+    python sw_manifest.py --bench 120
+"""
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass
+
+from patch_engine import read_text, write_atomic
+
+DIST_DIR = 'dist'
+SW_FILE = 'sw.js'
+MANIFEST_FILE = 'precache-manifest.json'
+EXCLUDE = ('*.map', SW_FILE, MANIFEST_FILE, '.*')
+# Nombres de Vite: [name]-[hash].[ext] dentro de assets/
+HASHED_RE = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8}\.\w+$')
+MARKER_RE = re.compile(r'/\* @precache-manifest \*/\s*\[.*?\](?=;)', re.S)
+CHUNK = 1 << 16
+
+
+@dataclass
+class Entry:
+    url: str
+    revision: str
+    size: int
+    hashed: bool
+
+    @property
+    def key(self) -> str:
+        """Llave en el cache del service worker (igual que ``cacheKey`` en sw.js)."""
+        return self.url if self.hashed else f'{self.url}?__rev={self.revision}'
+
+    def to_json(self) -> dict:
+        return {'url': self.url, 'revision': self.revision, 'size': self.size, 'hashed': self.hashed}
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def excluded(rel: str, patterns) -> bool:
+    name = os.path.basename(rel)
+    return any(fnmatch.fnmatch(rel, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def build_manifest(dist: str, exclude=EXCLUDE) -> list:
+    """Una entrada por archivo de ``dist``, ordenadas por URL."""
+    entries = []
+    for root, dirs, files in os.walk(dist):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in files:
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, dist).replace(os.sep, '/')
+            if excluded(rel, exclude):
+                continue
+            entries.append(Entry(f'/{rel}', file_hash(path), os.path.getsize(path), bool(HASHED_RE.match(rel))))
+    entries.sort(key=lambda e: e.url)
+    return entries
+
+
+def render_manifest(entries: list) -> str:
+    lines = ',\n'.join(f'  {json.dumps(e.to_json(), separators=(",", ":"))}' for e in entries)
+    return f'/* @precache-manifest */ [\n{lines}\n]' if entries else '/* @precache-manifest */ []'
+
+
+def inject(sw_path: str, entries: list) -> bool:
+    """Reemplaza el marcador de ``sw_path``. Devuelve si el archivo cambió."""
+    source = read_text(sw_path)
+    if not MARKER_RE.search(source):
+        raise ValueError(f'{sw_path} no tiene el marcador /* @precache-manifest */ []')
+    updated = MARKER_RE.sub(lambda _: render_manifest(entries), source, count=1)
+    if updated == source:
+        return False
+    write_atomic(sw_path, updated)
+    return True
+
+
+def write_manifest(dist: str, entries: list) -> None:
+    write_atomic(os.path.join(dist, MANIFEST_FILE),
+                 json.dumps([e.to_json() for e in entries], indent=1) + '\n')
+
+
+def load_manifest(dist: str, exclude=EXCLUDE) -> list:
+    """El manifest que dejó el build, o uno calculado al vuelo."""
+    path = os.path.join(dist, MANIFEST_FILE)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return [Entry(**row) for row in json.load(f)]
+    return build_manifest(dist, exclude)
+
+
+# ─── Costo de una actualización ───────────────────────────────────────────
+
+def gzip_size(path: str) -> int:
+    with open(path, 'rb') as f:
+        return len(zlib.compress(f.read(), 6))
+
+
+def upgrade_cost(old_dist: str, new_dist: str, exclude=EXCLUDE) -> dict:
+    """Bytes que baja un cliente con ``old_dist`` en cache al recibir ``new_dist``.
+
+    Con manifest: sw.js más las entradas cuya llave no estaba. Antes: sw.js
+    más todo (el ``activate`` borraba los caches y se volvía a bajar cada
+    archivo).
+    """
+    old_keys = {e.key for e in load_manifest(old_dist, exclude)}
+    new = load_manifest(new_dist, exclude)
+    changed = [e for e in new if e.key not in old_keys]
+    sw_path = os.path.join(new_dist, SW_FILE)
+    sw = (os.path.getsize(sw_path), gzip_size(sw_path)) if os.path.exists(sw_path) else (0, 0)
+    gz = {e.url: gzip_size(os.path.join(new_dist, e.url.lstrip('/'))) for e in new}
+    return {
+        'files': len(new),
+        'changed': [e.url for e in changed],
+        'removed': len(old_keys - {e.key for e in new}),
+        'manifest': (sw[0] + sum(e.size for e in changed), sw[1] + sum(gz[e.url] for e in changed)),
+        'full': (sw[0] + sum(e.size for e in new), sw[1] + sum(gz.values())),
+    }
+
+
+def kb(n: int) -> str:
+    return f'{n / 1024:,.1f} KB'
+
+
+def print_upgrade(cost: dict) -> None:
+    manifest, full = cost['manifest'], cost['full']
+    print(f"📊 {len(cost['changed'])} de {cost['files']} archivos cambiaron, {cost['removed']} salen del cache")
+    for url in cost['changed'][:20]:
+        print(f"   🔁 {url}")
+    if len(cost['changed']) > 20:
+        print(f"   ... y {len(cost['changed']) - 20} más")
+    print(f"   Antes (bajar todo):   {kb(full[0]):>12}  (gzip {kb(full[1])})")
+    print(f"   Con manifest:         {kb(manifest[0]):>12}  (gzip {kb(manifest[1])})")
+    if full[1]:
+        print(f"   Ahorro: {1 - manifest[1] / full[1]:.0%} de los bytes por actualización")
+
+
+# ─── Benchmark ────────────────────────────────────────────────────────────
+
+def _chunk_text(rng: random.Random, size: int) -> bytes:
+    words = ['const', 'return', 'function', 'useState', 'className', 'props', 'leads', 'null', '=>', '{', '}']
+    out = []
+    total = 0
+    while total < size:
+        word = rng.choice(words) + str(rng.randint(0, 999))
+        out.append(word)
+        total += len(word) + 1
+    return ' '.join(out).encode('utf-8')[:size]
+
+
+def _vite_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:8]
+
+
+def _write_build(dist: str, chunks: dict, shell: bytes) -> None:
+    os.makedirs(os.path.join(dist, 'assets'), exist_ok=True)
+    for name, data in chunks.items():
+        with open(os.path.join(dist, 'assets', f'{name}-{_vite_hash(data)}.js'), 'wb') as f:
+            f.write(data)
+    for rel, data in (('index.html', shell), ('offline.html', b'<html>offline</html>' * 40),
+                      ('manifest.json', b'{"name": "SARA CRM"}' * 20), ('icon.svg', b'<svg/>' * 300)):
+        with open(os.path.join(dist, rel), 'wb') as f:
+            f.write(data)
+    with open(os.path.join(dist, SW_FILE), 'w', encoding='utf-8') as f:
+        f.write('const PRECACHE_MANIFEST = /* @precache-manifest */ [];\n')
+
+
+def bench(n: int, changed_pct: float = 0.05) -> None:
+    rng = random.Random(7)
+    chunks = {f'chunk{i:03d}': _chunk_text(rng, rng.randint(2_000, 80_000)) for i in range(n)}
+    workdir = tempfile.mkdtemp(prefix='sw-manifest-')
+    try:
+        old, new = os.path.join(workdir, 'old'), os.path.join(workdir, 'new')
+        _write_build(old, chunks, b'<script src="/assets/index.js"></script>' * 10)
+        touched = rng.sample(sorted(chunks), max(1, int(n * changed_pct)))
+        for name in touched:
+            chunks[name] = chunks[name] + b' // cambio'
+        _write_build(new, chunks, b'<script src="/assets/index2.js"></script>' * 10)
+
+        for dist in (old, new):
+            t0 = time.perf_counter()
+            entries = build_manifest(dist)
+            inject(os.path.join(dist, SW_FILE), entries)
+            write_manifest(dist, entries)
+            elapsed = time.perf_counter() - t0
+        total = sum(e.size for e in entries)
+        print(f"📄 Build sintético: {len(entries)} archivos, {kb(total)}; manifest + inyección en {elapsed * 1000:,.1f} ms")
+        print(f"📝 Deploy nuevo: {len(touched)} chunks y index.html cambian")
+        print_upgrade(upgrade_cost(old, new))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Manifest de precache para public/sw.js')
+    parser.add_argument('--dist', default=DIST_DIR, help='salida de vite build (default dist/)')
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help='archivos que no se precargan (se agregan a *.map, sw.js, ...)')
+    parser.add_argument('--upgrade', nargs=2, metavar=('ANTERIOR', 'NUEVO'),
+                        help='bytes que cuesta actualizar de un build a otro')
+    parser.add_argument('--bench', type=int, metavar='N', help='benchmark con un build sintético de N chunks')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(args.bench)
+        return 0
+    exclude = EXCLUDE + tuple(args.exclude)
+    if args.upgrade:
+        for dist in args.upgrade:
+            if not os.path.isdir(dist):
+                parser.error(f'no existe {dist}')
+        print_upgrade(upgrade_cost(*args.upgrade, exclude=exclude))
+        return 0
+
+    sw_path = os.path.join(args.dist, SW_FILE)
+    if not os.path.exists(sw_path):
+        print(f"❌ No existe {sw_path}: primero corre vite build")
+        return 1
+    t0 = time.perf_counter()
+    entries = build_manifest(args.dist, exclude)
+    try:
+        changed = inject(sw_path, entries)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    write_manifest(args.dist, entries)
+    hashed = sum(1 for e in entries if e.hashed)
+    total = sum(e.size for e in entries)
+    print(f"📊 {len(entries)} archivos ({hashed} con hash de Vite), {kb(total)} en {(time.perf_counter() - t0) * 1000:,.1f} ms")
+    print(f"✅ Manifest → {sw_path}" if changed else f"⏭️ {sw_path} ya tenía este manifest")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
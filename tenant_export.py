@@ -0,0 +1,759 @@
+"""Respaldo por tenant: cada tabla del CRM partida por ``tenant_id``.
+
+Los respaldos y la analítica tratan leads/appointments/mortgage_applications
+como una sola tabla grande: un tenant con cientos de miles de filas retrasa a
+todos los demás y restaurar una sola organización obliga a leer todo. Este
+job:
+
+1. Descubre las tablas que consulta ``src/`` (las mismas que usa
+   ``migrate.py --bootstrap``) y las que tienen ``tenant_id``. Las filas sin
+   tenant, y las tablas sin la columna, van al tenant ``default`` (igual que
+   en analytics_snapshot.py).
+2. Cada par (tenant, tabla) es una unidad de trabajo que corre en un proceso
+   del pool (``--workers``), con su propia conexión, y recorre su partición
+   con paginación keyset (``WHERE tenant_id = ? AND id > ? ORDER BY id``).
+   Ningún tenant ocupa más de ``--per-tenant`` procesos: el más grande
+   arranca de inmediato con su tope y el resto del pool atiende primero a
+   los tenants chicos, que terminan sin esperar al grande.
+3. Escribe ``<out>/<tenant>/<corrida>-full/<tabla>.jsonl.gz`` (``.part`` y
+   rename) con la lista de ids y el sha256 de cada archivo. Cuando terminan
+   todas las tablas de un tenant, su corrida se registra en
+   ``<out>/<tenant>/manifest.json``; ``<out>/manifest.json`` resume corridas y
+   tenants. Directorios de corridas sin registrar se borran al arrancar.
+4. Las corridas siguientes son incrementales por tenant: solo las filas con
+   ``updated_at`` (o ``timestamp``/``created_at``) mayor que el watermark de
+   la corrida anterior, menos ``--overlap`` segundos por transacciones que
+   confirman tarde. Los borrados salen de comparar los ids actuales con los
+   de la corrida anterior. Tras ``--max-chain`` incrementales el tenant
+   vuelve a hacer una completa, así que restaurar nunca lee más de una
+   completa y ``--max-chain`` deltas.
+
+``--restore TENANT`` aplica la última completa y sus incrementales sobre
+``--sqlite``/``--dsn`` (verifica el sha256 de cada archivo). El keyset por
+tenant necesita índices; en Postgres el job avisa cuáles faltan y
+``--print-indexes`` imprime el DDL.
+
+Uso::
+
+    python tenant_export.py --dsn "$DATABASE_URL" --workers 4
+    python tenant_export.py --sqlite crm.db --full --tables leads,appointments
+    python tenant_export.py --dsn "$DATABASE_URL" --print-indexes
+    python tenant_export.py --sqlite restaurado.db --restore 3f2c0e1a-...
+    python tenant_export.py --bench 300000
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from audit_archive import Store, batched, iso
+from migrate import MIGRATIONS_DIR, SQLiteBackend, connect, discover
+from patch_engine import write_atomic
+
+OUT_DIR = 'tenant-backups'
+DEFAULT_TENANT = 'default'
+CHANGE_COLUMNS = ('updated_at', 'timestamp', 'created_at')
+PAGE_SIZE = 5000
+WORKERS = 4
+MAX_CHAIN = 7
+KEEP_FULLS = 2
+OVERLAP = 60
+RESTORE_BATCH = 1000
+RUN_RE = re.compile(r'^\d{8}T\d{6}Z-(full|incr)$')
+
+
+def folder(tenant) -> str:
+    return DEFAULT_TENANT if tenant is None else re.sub(r'[^\w.-]', '_', str(tenant))
+
+
+def encode(value):
+    """Tipos de psycopg que json no conoce."""
+    if isinstance(value, datetime):
+        return iso(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, memoryview):
+        return value.tobytes().hex()
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return str(value)           # Decimal, UUID, ...
+
+
+def shift(stamp: str, seconds: int) -> str:
+    """``stamp`` menos ``seconds``, en el mismo formato de texto."""
+    try:
+        moved = datetime.fromisoformat(stamp) - timedelta(seconds=seconds)
+    except ValueError:
+        return stamp
+    return moved.isoformat() if 'T' in stamp else moved.isoformat(sep=' ')
+
+
+def sha256_of(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def index_ddl(table: str, change: str) -> list:
+    cols = '(tenant_id, id)' if not change else f'(tenant_id, "{change}", id)'
+    suffix = 'id' if not change else change
+    ddl = [f'CREATE INDEX IF NOT EXISTS idx_{table}_tenant_id ON {table}(tenant_id, id);']
+    if change:
+        ddl.append(f'CREATE INDEX IF NOT EXISTS idx_{table}_tenant_{suffix} ON {table}{cols};')
+    return ddl
+
+
+# ─── Base ─────────────────────────────────────────────────────────────────
+
+@dataclass
+class Unit:
+    tenant: str                 # carpeta del tenant
+    value: object               # valor de tenant_id (None = sin tenant)
+    table: str
+    columns: tuple
+    partitioned: bool           # la tabla tiene tenant_id
+    change: str                 # columna de cambios ('' si no hay)
+    rows: int                   # estimado para ordenar
+    run_dir: str
+    since: str = ''             # incremental: filas con change > since
+    watermark: str = ''         # incremental: watermark anterior, sin restarle --overlap
+    prev_ids: str = ''          # ids de la corrida anterior (para borrados)
+
+
+class TenantStore(Store):
+    """Consultas por partición sobre la conexión de migrate.py."""
+
+    def tables(self) -> list:
+        if self.pg:
+            rows = self._read("SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'")
+        else:
+            rows = self._read("SELECT name FROM sqlite_master WHERE type = 'table'")
+        return sorted(r[0] for r in rows)
+
+    def columns(self, table: str) -> tuple:
+        if self.pg:
+            rows = self._read('SELECT column_name FROM information_schema.columns '
+                              "WHERE table_schema = 'public' AND table_name = ? ORDER BY ordinal_position", (table,))
+            return tuple(r[0] for r in rows)
+        return tuple(r[1] for r in self._read(f'PRAGMA table_info("{table}")'))
+
+    def tenant_counts(self, table: str, partitioned: bool) -> dict:
+        if not partitioned:
+            return {None: self._read(f'SELECT count(*) FROM "{table}"')[0][0]}
+        return dict(self._read(f'SELECT tenant_id, count(*) FROM "{table}" GROUP BY tenant_id'))
+
+    def missing_indexes(self, table: str, change: str) -> list:
+        """DDL de los índices por tenant que faltan (solo Postgres)."""
+        if not self.pg:
+            return []
+        defs = [d for (d,) in self._read('SELECT indexdef FROM pg_indexes WHERE tablename = ?', (table,))]
+        wanted = index_ddl(table, change)
+        keys = ['(tenant_id, id)'] + ([f'(tenant_id, {change}, id)'] if change else [])
+        return [ddl for ddl, key in zip(wanted, keys) if not any(key in d.replace('"', '') for d in defs)]
+
+    def _where(self, unit: Unit) -> tuple:
+        if not unit.partitioned:
+            return [], []
+        if unit.value is None:
+            return ['tenant_id IS NULL'], []
+        return ['tenant_id = ?'], [unit.value]
+
+    def page(self, unit: Unit, after, size: int, columns=None, by_change: bool = False) -> list:
+        where, params = self._where(unit)
+        cols = ', '.join(f'"{c}"' for c in (columns or unit.columns))
+        if by_change:
+            order = f'"{unit.change}", id'
+            if after is None:
+                where.append(f'"{unit.change}" > {self.ts}')
+                params.append(unit.since)
+            else:
+                where.append(f'("{unit.change}", id) > ({self.ts}, ?)')
+                params.extend(after)
+        else:
+            order = 'id'
+            if after is not None:
+                where.append('id > ?')
+                params.append(after)
+        sql = f'SELECT {cols} FROM "{unit.table}"'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        return self._read(f'{sql} ORDER BY {order} LIMIT ?', params + [size])
+
+    def stream(self, unit: Unit, size: int = PAGE_SIZE, by_change: bool = False):
+        """Filas de la partición como dicts, página por página."""
+        id_pos = unit.columns.index('id')
+        change_pos = unit.columns.index(unit.change) if unit.change else None
+        after = None
+        while True:
+            rows = self.page(unit, after, size, by_change=by_change)
+            for row in rows:
+                yield dict(zip(unit.columns, row))
+            if len(rows) < size:
+                return
+            last = rows[-1]
+            after = (iso(last[change_pos]), last[id_pos]) if by_change else last[id_pos]
+
+    def stream_ids(self, unit: Unit, size: int = PAGE_SIZE * 4):
+        after = None
+        while True:
+            rows = self.page(unit, after, size, columns=('id',))
+            for (row_id,) in rows:
+                yield row_id
+            if len(rows) < size:
+                return
+            after = rows[-1][0]
+
+    def upsert(self, table: str, rows: list) -> None:
+        columns = list(rows[0])
+        cols = ', '.join(f'"{c}"' for c in columns)
+        updates = ', '.join(f'"{c}" = excluded."{c}"' for c in columns if c != 'id')
+        sql = (f'INSERT INTO "{table}" ({cols}) VALUES ({", ".join("?" * len(columns))}) '
+               f'ON CONFLICT (id) DO ' + (f'UPDATE SET {updates}' if updates else 'NOTHING'))
+        values = [tuple(json.dumps(row[c], ensure_ascii=False) if isinstance(row[c], (dict, list)) else row[c]
+                        for c in columns) for row in rows]
+        self._run(sql, values, many=True)
+
+    def delete_ids(self, table: str, ids: list) -> int:
+        if self.pg:
+            return self._run(f'DELETE FROM "{table}" WHERE id::text = ANY(?)', ([str(i) for i in ids],))
+        return self._run(f'DELETE FROM "{table}" WHERE id IN ({", ".join("?" * len(ids))})', ids)
+
+    def clear_tenant(self, table: str, tenant) -> int:
+        if tenant is None:
+            return self._run(f'DELETE FROM "{table}" WHERE tenant_id IS NULL')
+        return self._run(f'DELETE FROM "{table}" WHERE tenant_id = ?', (tenant,))
+
+
+# ─── Workers ──────────────────────────────────────────────────────────────
+
+_STORE = None
+
+
+def _init_worker(conn: dict) -> None:
+    global _STORE
+    _STORE = TenantStore(connect(SimpleNamespace(**conn)))
+
+
+def read_ids(path: str) -> list:
+    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+        return [json.loads(line) for line in fh]
+
+
+def write_gz_lines(path: str, lines) -> tuple:
+    """Escribe ``path`` vía ``.part`` + rename; devuelve ``(líneas, bytes, sha256)``."""
+    count = 0
+    with gzip.open(path + '.part', 'wt', encoding='utf-8', compresslevel=6) as fh:
+        for line in lines:
+            fh.write(line + '\n')
+            count += 1
+    digest = sha256_of(path + '.part')
+    os.replace(path + '.part', path)
+    return count, os.path.getsize(path), digest
+
+
+def export_unit(unit: Unit, out: str, page_size: int = PAGE_SIZE) -> dict:
+    """Exporta una partición (tenant, tabla). Corre en un proceso del pool."""
+    t0 = time.perf_counter()
+    store = _STORE
+    base = os.path.join(out, unit.tenant, unit.run_dir)
+    os.makedirs(base, exist_ok=True)
+    incremental = bool(unit.since)
+    ids = []
+    mark = [None, None]
+
+    def rows():
+        for row in store.stream(unit, page_size, by_change=incremental):
+            if not incremental:
+                ids.append(row['id'])
+            if unit.change and row[unit.change] is not None:
+                stamp = iso(row[unit.change])
+                if mark[0] is None or (stamp, str(row['id'])) > (mark[0], str(mark[1])):
+                    mark[:] = [stamp, row['id']]
+            yield json.dumps(row, default=encode, ensure_ascii=False, separators=(',', ':'))
+
+    data_file = f'{unit.table}.jsonl.gz'
+    count, size, digest = write_gz_lines(os.path.join(base, data_file), rows())
+    if incremental:
+        ids = list(store.stream_ids(unit))
+    deleted = []
+    if unit.prev_ids and os.path.exists(unit.prev_ids):
+        # psycopg 3 devuelve uuid.UUID y el archivo guarda texto: se comparan ya codificados
+        current = {encode(i) for i in ids}
+        deleted = [i for i in read_ids(unit.prev_ids) if encode(i) not in current]
+    ids_file = f'{unit.table}.ids.gz'
+    write_gz_lines(os.path.join(base, ids_file), (json.dumps(i, default=encode) for i in ids))
+    entry = {'file': data_file, 'rows': count, 'bytes': size, 'sha256': digest, 'ids': ids_file,
+             'live': len(ids), 'watermark': max(mark[0] or '', unit.watermark)}
+    if deleted:
+        entry['deleted_file'] = f'{unit.table}.deleted.gz'
+        entry['deleted'] = write_gz_lines(os.path.join(base, entry['deleted_file']),
+                                          (json.dumps(i, default=encode) for i in deleted))[0]
+    entry['seconds'] = round(time.perf_counter() - t0, 3)
+    return entry
+
+
+# ─── Manifests ────────────────────────────────────────────────────────────
+
+def load_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def save_json(path: str, data) -> None:
+    write_atomic(path, json.dumps(data, indent=1, ensure_ascii=False, default=encode) + '\n')
+
+
+def tenant_manifest(out: str, tenant: str) -> dict:
+    return load_json(os.path.join(out, tenant, 'manifest.json'), {'tenant': tenant, 'value': None, 'runs': []})
+
+
+def current_chain(manifest: dict) -> list:
+    """Última completa y los incrementales que la siguen."""
+    runs = manifest['runs']
+    starts = [i for i, run in enumerate(runs) if run['kind'] == 'full']
+    return runs[starts[-1]:] if starts else []
+
+
+def clean_orphans(out: str) -> int:
+    """Borra corridas que no llegaron a registrarse en el manifest de su tenant."""
+    removed = 0
+    if not os.path.isdir(out):
+        return 0
+    for tenant in sorted(os.listdir(out)):
+        base = os.path.join(out, tenant)
+        if not os.path.isdir(base):
+            continue
+        known = {run['dir'] for run in tenant_manifest(out, tenant)['runs']}
+        for name in os.listdir(base):
+            if RUN_RE.match(name) and name not in known:
+                shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+                removed += 1
+    return removed
+
+
+def prune_runs(out: str, manifest: dict, keep_fulls: int) -> int:
+    fulls = [i for i, run in enumerate(manifest['runs']) if run['kind'] == 'full']
+    if len(fulls) <= keep_fulls:
+        return 0
+    cut = fulls[-keep_fulls]
+    for run in manifest['runs'][:cut]:
+        shutil.rmtree(os.path.join(out, manifest['tenant'], run['dir']), ignore_errors=True)
+    manifest['runs'] = manifest['runs'][cut:]
+    return cut
+
+
+# ─── Plan y ejecución ─────────────────────────────────────────────────────
+
+def crm_tables(root: str = 'src') -> set:
+    from query_profiler import scan_tree
+    return {site.table for site in scan_tree(root)}
+
+
+def plan(store: TenantStore, out: str, tables: list, run_id: str, full: bool = False,
+         max_chain: int = MAX_CHAIN, overlap: int = OVERLAP) -> tuple:
+    """Unidades de la corrida y el tipo (full/incr) de cada tenant."""
+    schema = {}
+    counts = {}
+    for table in tables:
+        columns = store.columns(table)
+        if 'id' not in columns:
+            print(f"⏭️  {table}: sin columna id")
+            continue
+        partitioned = 'tenant_id' in columns
+        change = next((c for c in CHANGE_COLUMNS if c in columns), '')
+        schema[table] = (columns, partitioned, change)
+        for value, rows in store.tenant_counts(table, partitioned).items():
+            if rows:
+                counts[(value, table)] = rows
+        if partitioned:
+            for ddl in store.missing_indexes(table, change):
+                print(f"⚠️ Falta índice: {ddl}")
+
+    tenants = {value for value, _ in counts}
+    manifests = {}
+    for name in (os.listdir(out) if os.path.isdir(out) else []):
+        manifest = tenant_manifest(out, name)
+        if manifest['runs']:
+            manifests[name] = manifest
+            tenants.add(manifest['value'])
+
+    kinds, units = {}, []
+    for value in tenants:
+        tenant = folder(value)
+        manifest = manifests.get(tenant, {'runs': []})
+        chain = current_chain(manifest)
+        kind = 'full' if full or not chain or len(chain) > max_chain else 'incr'
+        kinds[tenant] = kind
+        previous = {}
+        for run in chain:
+            for table, entry in run['tables'].items():
+                previous[table] = (run['dir'], entry)
+        run_dir = f'{run_id}-{kind}'
+        for table, (columns, partitioned, change) in schema.items():
+            if not partitioned and value is not None:
+                continue
+            rows = counts.get((value, table), 0)
+            prev = previous.get(table)
+            if not rows and not prev:
+                continue
+            unit = Unit(tenant, value, table, columns, partitioned, change, rows, run_dir)
+            if kind == 'incr' and prev:
+                prev_dir, entry = prev
+                unit.prev_ids = os.path.join(out, tenant, prev_dir, entry['ids'])
+                if change and entry.get('watermark'):
+                    # Sin filas nuevas se guarda el mismo watermark, no ``since``: si no,
+                    # cada corrida vacía lo atrasaría otros ``overlap`` segundos
+                    unit.watermark = entry['watermark']
+                    unit.since = shift(entry['watermark'], overlap)
+            units.append(unit)
+    return units, kinds
+
+
+def schedule(units: list, per_tenant: int):
+    """Orden de envío de las unidades.
+
+    El tenant más grande que queda arranca de inmediato con hasta
+    ``per_tenant`` procesos (es el que marca cuánto dura la corrida); los
+    demás procesos van a los tenants más chicos primero, que así terminan en
+    segundos aunque el grande tarde minutos.
+    """
+    totals = Counter()
+    for unit in units:
+        totals[unit.tenant] += unit.rows
+    pending = sorted(units, key=lambda u: (totals[u.tenant], u.tenant, -u.rows, u.table))
+    running = Counter()
+
+    def next_unit():
+        ready = [i for i, unit in enumerate(pending) if running[unit.tenant] < per_tenant]
+        if not ready:
+            return None
+        largest = pending[-1].tenant
+        i = next((i for i in ready if pending[i].tenant == largest), ready[0])
+        running[pending[i].tenant] += 1
+        return pending.pop(i)
+
+    def release(unit):
+        running[unit.tenant] -= 1
+
+    return pending, next_unit, release
+
+
+def export(conn: dict, out: str, tables: list = None, workers: int = WORKERS, per_tenant: int = 0,
+           full: bool = False, max_chain: int = MAX_CHAIN, keep_fulls: int = KEEP_FULLS,
+           overlap: int = OVERLAP, page_size: int = PAGE_SIZE, quiet: bool = False) -> dict:
+    """Una corrida completa: plan, pool de procesos y manifests. Devuelve estadísticas."""
+    started = time.perf_counter()
+    store = TenantStore(connect(SimpleNamespace(**conn)))
+    os.makedirs(out, exist_ok=True)
+    removed = clean_orphans(out)
+    if removed:
+        print(f"🔁 {removed} corridas sin registrar de una ejecución anterior: se borraron")
+    if tables is None:
+        existing = set(store.tables())
+        tables = sorted(crm_tables() & existing)
+    run_id = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    units, kinds = plan(store, out, tables, run_id, full, max_chain, overlap)
+    per_tenant = per_tenant or max(1, workers // 2)
+
+    pending_by_tenant = Counter(u.tenant for u in units)
+    results = {tenant: {} for tenant in pending_by_tenant}
+    values = {u.tenant: u.value for u in units}
+    failed = {}
+    finished = {}
+    stats = {'run': run_id, 'units': len(units), 'rows': 0, 'bytes': 0, 'deleted': 0, 'tenants': 0}
+
+    def finish_tenant(tenant):
+        manifest = tenant_manifest(out, tenant)
+        manifest['value'] = values[tenant]
+        run = {'dir': f'{run_id}-{kinds[tenant]}', 'kind': kinds[tenant],
+               'finished_at': datetime.now(timezone.utc).isoformat(), 'tables': results[tenant]}
+        manifest['runs'].append(run)
+        prune_runs(out, manifest, keep_fulls)
+        save_json(os.path.join(out, tenant, 'manifest.json'), manifest)
+        finished[tenant] = time.perf_counter() - started
+        rows = sum(e['rows'] for e in results[tenant].values())
+        size = sum(e['bytes'] for e in results[tenant].values())
+        stats['tenants'] += 1
+        if not quiet:
+            print(f"✅ {tenant} ({kinds[tenant]}): {rows:,} filas, {size / 1e6:.2f} MB, "
+                  f"cadena {len(current_chain(manifest))}, {finished[tenant]:.1f} s")
+
+    pending, next_unit, release = schedule(units, per_tenant)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(conn,)) as pool:
+        running = {}
+        while pending or running:
+            while len(running) < workers:
+                unit = next_unit()
+                if unit is None:
+                    break
+                running[pool.submit(export_unit, unit, out, page_size)] = unit
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                unit = running.pop(future)
+                release(unit)
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    failed.setdefault(unit.tenant, f'{unit.table}: {e}')
+                    entry = None
+                if entry is not None:
+                    results[unit.tenant][unit.table] = entry
+                    stats['rows'] += entry['rows']
+                    stats['bytes'] += entry['bytes']
+                    stats['deleted'] += entry.get('deleted', 0)
+                pending_by_tenant[unit.tenant] -= 1
+                if pending_by_tenant[unit.tenant] == 0:
+                    if unit.tenant in failed:
+                        shutil.rmtree(os.path.join(out, unit.tenant, unit.run_dir), ignore_errors=True)
+                        print(f"❌ {unit.tenant}: {failed[unit.tenant]} (la corrida de este tenant se descartó)")
+                    else:
+                        finish_tenant(unit.tenant)
+
+    stats['seconds'] = time.perf_counter() - started
+    stats['failed'] = failed
+    stats['finished'] = finished
+    summary = load_json(os.path.join(out, 'manifest.json'), {'runs': [], 'tenants': {}})
+    summary['runs'].append({'run': run_id, 'workers': workers, 'units': len(units), 'rows': stats['rows'],
+                            'bytes': stats['bytes'], 'deleted': stats['deleted'],
+                            'seconds': round(stats['seconds'], 3), 'failed': sorted(failed)})
+    for tenant in finished:
+        chain = current_chain(tenant_manifest(out, tenant))
+        summary['tenants'][tenant] = {
+            'last_run': chain[-1]['dir'], 'chain': len(chain),
+            'restore_bytes': sum(e['bytes'] for run in chain for e in run['tables'].values()),
+            'restore_rows': sum(e['rows'] for run in chain for e in run['tables'].values()),
+        }
+    save_json(os.path.join(out, 'manifest.json'), summary)
+    return stats
+
+
+def restore(store: TenantStore, out: str, tenant: str, batch: int = RESTORE_BATCH) -> dict:
+    """Aplica la cadena vigente del tenant (completa + incrementales) sobre ``store``."""
+    manifest = tenant_manifest(out, tenant)
+    chain = current_chain(manifest)
+    if not chain:
+        raise SystemExit(f'❌ {tenant} no tiene ninguna corrida completa en {out}')
+    stats = {'rows': 0, 'deleted': 0, 'files': 0}
+    for run in chain:
+        base = os.path.join(out, tenant, run['dir'])
+        for table, entry in sorted(run['tables'].items()):
+            path = os.path.join(base, entry['file'])
+            if sha256_of(path) != entry['sha256']:
+                raise SystemExit(f'❌ {path}: sha256 distinto; no se restaura')
+            partitioned = 'tenant_id' in store.columns(table)
+            with store.transaction():
+                if run['kind'] == 'full' and partitioned:
+                    store.clear_tenant(table, manifest['value'])
+                with gzip.open(path, 'rt', encoding='utf-8') as fh:
+                    for rows in batched((json.loads(line) for line in fh), batch):
+                        store.upsert(table, rows)
+                        stats['rows'] += len(rows)
+                if entry.get('deleted_file'):
+                    for ids in batched(read_ids(os.path.join(base, entry['deleted_file'])), batch):
+                        stats['deleted'] += store.delete_ids(table, ids)
+            stats['files'] += 1
+    stats['chain'] = len(chain)
+    return stats
+
+
+# ─── Benchmark ────────────────────────────────────────────────────────────
+
+BENCH_TABLES = {'leads': 0.6, 'appointments': 0.3, 'mortgage_applications': 0.1}
+
+
+def _bench_db(path: str) -> TenantStore:
+    backend = SQLiteBackend(path)
+    migrations = discover(MIGRATIONS_DIR)
+    backend.ensure_tracking()
+    backend.bootstrap(migrations)
+    for migration in migrations:
+        backend.apply(migration)
+    store = TenantStore(backend)
+    for table in BENCH_TABLES:
+        if 'tenant_id' not in store.columns(table):
+            store._run(f'ALTER TABLE {table} ADD COLUMN tenant_id TEXT')
+        change = next(c for c in CHANGE_COLUMNS if c in store.columns(table))
+        for ddl in index_ddl(table, change):
+            store._run(ddl)
+    return store
+
+
+def _naive_dump(store: TenantStore, out: str, page_size: int) -> None:
+    """Lo de antes: cada tabla entera a un archivo, con OFFSET."""
+    os.makedirs(out, exist_ok=True)
+    for table in BENCH_TABLES:
+        columns = store.columns(table)
+        cols = ', '.join(f'"{c}"' for c in columns)
+
+        def lines():
+            offset = 0
+            while True:
+                rows = store._read(f'SELECT {cols} FROM {table} ORDER BY id LIMIT ? OFFSET ?', (page_size, offset))
+                for row in rows:
+                    yield json.dumps(dict(zip(columns, row)), default=encode, separators=(',', ':'))
+                if len(rows) < page_size:
+                    return
+                offset += page_size
+        write_gz_lines(os.path.join(out, f'{table}.jsonl.gz'), lines())
+
+
+def _pct(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def bench(n: int, workers: int) -> int:
+    rng = random.Random(7)
+    workdir = tempfile.mkdtemp(prefix='tenant-export-')
+    try:
+        db_path = os.path.join(workdir, 'crm.db')
+        store = _bench_db(db_path)
+        # Un tenant grande (50 %), tres medianos (10 % c/u) y 40 chicos
+        tenants = ['t-grande'] + [f't-mediano-{i}' for i in range(3)] + [f't-chico-{i:02d}' for i in range(40)]
+        weights = [50] + [10] * 3 + [20 / 40] * 40
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        t0 = time.perf_counter()
+        with store.transaction():
+            for table, share in BENCH_TABLES.items():
+                columns = store.columns(table)
+                change = next(c for c in CHANGE_COLUMNS if c in columns)
+                extra = [c for c in ('name', 'status', 'notes') if c in columns]
+                cols = ['id', 'tenant_id', change] + extra
+                total = int(n * share)
+
+                def rows():
+                    for i in range(total):
+                        stamp = (now - timedelta(seconds=rng.randint(3600, 365 * 86400))).isoformat()
+                        yield ((f'{table[:3]}{i:08d}', rng.choices(tenants, weights)[0], stamp)
+                               + tuple(f'{c} {rng.randint(0, 9999)}' for c in extra))
+                sql = (f'INSERT INTO {table} ({", ".join(cols)}) VALUES ({", ".join("?" * len(cols))})')
+                for chunk in batched(rows(), 10_000):
+                    store._run(sql, chunk, many=True)
+        print(f"📊 {n:,} filas en {len(BENCH_TABLES)} tablas, {len(tenants)} tenants, "
+              f"{time.perf_counter() - t0:.1f} s para cargarlas")
+
+        t0 = time.perf_counter()
+        _naive_dump(store, os.path.join(workdir, 'naive'), PAGE_SIZE)
+        naive = time.perf_counter() - t0
+        print(f"   antes: una tabla entera por archivo con OFFSET: {naive:.1f} s; "
+              f"ningún tenant está listo antes de {naive:.1f} s")
+
+        conn = {'sqlite': db_path, 'dsn': None}
+        out = os.path.join(workdir, OUT_DIR)
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            stats = export(conn, out, list(BENCH_TABLES), workers=workers, quiet=True)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        small = [s for t, s in stats['finished'].items() if 'chico' in t]
+        print(f"✅ por tenant ({workers} procesos, tope {max(1, workers // 2)} por tenant): {stats['seconds']:.1f} s, "
+              f"{stats['rows']:,} filas, {stats['bytes'] / 1e6:.1f} MB")
+        print(f"   tenants chicos listos en p50 {_pct(small, 0.5):.1f} s / p95 {_pct(small, 0.95):.1f} s; "
+              f"el grande en {stats['finished']['t-grande']:.1f} s")
+
+        # Cambios: 1 % de filas actualizadas, 0.2 % borradas
+        later = (now + timedelta(minutes=5)).isoformat()
+        touched = deleted = 0
+        with store.transaction():
+            for table, share in BENCH_TABLES.items():
+                total = int(n * share)
+                change = next(c for c in CHANGE_COLUMNS if c in store.columns(table))
+                ids = [f'{table[:3]}{i:08d}' for i in rng.sample(range(total), max(1, total // 100))]
+                store._run(f'UPDATE {table} SET "{change}" = ? WHERE id = ?', [(later, i) for i in ids], many=True)
+                gone = [f'{table[:3]}{i:08d}' for i in rng.sample(range(total), max(1, total // 500))]
+                store._run(f'DELETE FROM {table} WHERE id = ?', [(i,) for i in gone], many=True)
+                touched += len(ids)
+                deleted += len(gone)
+        time.sleep(1)           # corrida nueva: otro directorio
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            incr = export(conn, out, list(BENCH_TABLES), workers=workers, quiet=True)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        print(f"🔁 incremental tras {touched:,} cambios y {deleted:,} borrados: {incr['rows']:,} filas "
+              f"({incr['bytes'] / 1e6:.2f} MB), {incr['deleted']:,} borrados detectados, {incr['seconds']:.1f} s")
+
+        for tenant in ('t-chico-00', 't-grande'):
+            target = _bench_db(os.path.join(workdir, f'restore-{tenant}.db'))
+            t0 = time.perf_counter()
+            restored = restore(target, out, tenant)
+            elapsed = time.perf_counter() - t0
+            ok = all(target._read(f'SELECT count(*) FROM {t} WHERE tenant_id = ?', (tenant,))[0][0]
+                     == store._read(f'SELECT count(*) FROM {t} WHERE tenant_id = ?', (tenant,))[0][0]
+                     for t in BENCH_TABLES)
+            print(f"{'✅' if ok else '❌'} restaurar {tenant}: {restored['rows']:,} filas de {restored['chain']} "
+                  f"corridas en {elapsed:.2f} s ({restored['rows'] / max(elapsed, 1e-9):,.0f} filas/s); "
+                  f"conteos {'iguales' if ok else 'distintos'} a la base")
+        return 0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Respaldo de las tablas del CRM partido por tenant')
+    parser.add_argument('--dsn', help='cadena de conexión de Postgres (o DATABASE_URL)')
+    parser.add_argument('--sqlite', help='base SQLite local')
+    parser.add_argument('--out', default=OUT_DIR, help=f'directorio de respaldos (por defecto {OUT_DIR})')
+    parser.add_argument('--tables', help='tablas separadas por coma (por defecto las que consulta src/)')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='procesos en paralelo')
+    parser.add_argument('--per-tenant', type=int, default=0, help='procesos máximos por tenant (workers/2)')
+    parser.add_argument('--full', action='store_true', help='corrida completa para todos los tenants')
+    parser.add_argument('--max-chain', type=int, default=MAX_CHAIN, help='incrementales antes de otra completa')
+    parser.add_argument('--keep-fulls', type=int, default=KEEP_FULLS, help='completas que se conservan por tenant')
+    parser.add_argument('--overlap', type=int, default=OVERLAP, help='segundos que se repasan antes del watermark')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    parser.add_argument('--restore', metavar='TENANT', help='restaurar la cadena vigente de un tenant')
+    parser.add_argument('--print-indexes', action='store_true', help='DDL de los índices por tenant')
+    parser.add_argument('--bench', type=int, metavar='N', help='benchmark con N filas en SQLite')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        return bench(args.bench, args.workers)
+
+    conn = {'sqlite': args.sqlite, 'dsn': args.dsn}
+    store = TenantStore(connect(SimpleNamespace(**conn)))
+    tables = [t.strip() for t in args.tables.split(',') if t.strip()] if args.tables else None
+
+    if args.print_indexes:
+        for table in tables or sorted(crm_tables() & set(store.tables())):
+            columns = store.columns(table)
+            if 'tenant_id' in columns:
+                change = next((c for c in CHANGE_COLUMNS if c in columns), '')
+                print('\n'.join(index_ddl(table, change)))
+        return 0
+
+    if args.restore:
+        tenant = folder(args.restore)
+        t0 = time.perf_counter()
+        stats = restore(store, args.out, tenant)
+        print(f"✅ {tenant}: {stats['rows']:,} filas y {stats['deleted']:,} borrados de {stats['chain']} corridas "
+              f"({stats['files']} archivos) en {time.perf_counter() - t0:.1f} s")
+        return 0
+
+    stats = export(conn, args.out, tables, args.workers, args.per_tenant, args.full, args.max_chain,
+                   args.keep_fulls, args.overlap, args.page_size)
+    print(f"📊 {stats['tenants']} tenants, {stats['rows']:,} filas, {stats['bytes'] / 1e6:.1f} MB, "
+          f"{stats['deleted']:,} borrados en {stats['seconds']:.1f} s → {args.out}")
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import csv
+import json
+
+from lead_dedup import dedup, write_sql
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        out = csv.writer(f)
+        out.writerow(header)
+        out.writerows(rows)
+
+
+def test_phone_match_never_remaps_a_lead_in_the_export(tmp_path):
+    leads, appointments = tmp_path / 'leads.csv', tmp_path / 'appointments.csv'
+    write_csv(leads, ['id', 'name', 'phone', 'created_at'], [
+        ['001', 'Ana Lopez', '5512345678', '2025-01-01T00:00:00'],
+        ['002', 'Ana López', '+52 1 5512345678', '2025-02-01T00:00:00'],
+        ['003', 'Pedro Ruiz', '5599999999', '2025-03-01T00:00:00'],
+    ])
+    write_csv(appointments, ['id', 'lead_id', 'lead_phone'], [
+        ['a1', '003', '5512345678'],
+        ['a2', '004', '5512345678'],
+        ['a3', '002', '5512345678'],
+    ])
+    plan_path = tmp_path / 'plan.jsonl'
+    _, plan = dedup(str(leads), plan_path=str(plan_path), related={'appointments': str(appointments)})
+    assert (plan.remap, plan.orphan_remap) == ({'002': '001'}, {'004': '001'})
+    assert plan.related['appointments'] == (1, 1)
+
+    groups = [json.loads(line) for line in plan_path.read_text(encoding='utf-8').splitlines()]
+    assert groups == [{'survivor': '001', 'merged': ['002'], 'match': 'phone', 'review': False, 'apply': True,
+                       'orphans': [{'table': 'appointments', 'lead_id': '004'}]}]
+
+    sql = tmp_path / 'merge.sql'
+    write_sql(str(sql), plan, {'appointments': 'lead_phone'})
+    text = sql.read_text(encoding='utf-8')
+    assert "'003'" not in text
+    assert "INSERT INTO lead_merge VALUES\n  ('002', '001');" in text
+    assert "INSERT INTO lead_orphan_merge VALUES\n  ('004', '001');" in text
+    assert 'FROM lead_orphan_merge m JOIN leads l' in text
+    assert text.count('DELETE FROM leads') == 1 and 'DELETE FROM leads l USING lead_merge m' in text
+
+
+def test_review_groups_stay_out_of_the_sql_unless_included(tmp_path):
+    leads = tmp_path / 'leads.csv'
+    write_csv(leads, ['id', 'name', 'phone', 'created_at'], [
+        ['001', 'Ana Lopez', '5512345678', '2025-01-01T00:00:00'],
+        ['002', 'Jorge Lopez', '5512345678', '2025-02-01T00:00:00'],
+    ])
+    _, plan = dedup(str(leads))
+    assert (plan.review, plan.held, plan.remap) == (1, 1, {})
+    assert plan.groups[0]['apply'] is False
+
+    _, plan = dedup(str(leads), include_review=True)
+    assert (plan.held, plan.remap) == (0, {'002': '001'})
@@ -0,0 +1,75 @@
+import csv
+import io
+import urllib.error
+
+import pytest
+
+from lead_import import Mapping, SQLiteBackend, import_csv, parse_int
+
+MAPPING = Mapping({'nombre': 'name', 'telefono': 'phone', 'puntaje': 'score'},
+                  {'new': 'Nuevo'}, {'nuevo': 'new'})
+
+
+def write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        out = csv.writer(f)
+        out.writerow(['Nombre', 'Telefono', 'Puntaje'])
+        out.writerows(rows)
+
+
+def phones(db):
+    return sorted(p for (p,) in SQLiteBackend(db)._conn().execute('SELECT phone FROM leads'))
+
+
+class RejectingBackend(SQLiteBackend):
+    """Responde 400 a cualquier lote que contenga ``bad``, como PostgREST."""
+
+    def __init__(self, path, bad):
+        super().__init__(path)
+        self.bad = bad
+        self.calls = 0
+
+    def insert(self, rows):
+        self.calls += 1
+        if any(r['phone'] == self.bad for r in rows):
+            raise urllib.error.HTTPError('http://x/leads', 400, 'Bad Request', {}, io.BytesIO(b'{"message": "bad"}'))
+        super().insert(rows)
+
+
+class TimeoutAfterCommitBackend(SQLiteBackend):
+    """El primer INSERT se confirma pero la respuesta no llega."""
+
+    timed_out = False
+
+    def insert(self, rows):
+        super().insert(rows)
+        if not self.timed_out:
+            self.timed_out = True
+            raise TimeoutError('read timed out')
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('42', 42), ('3.7', 3), ('12abc', 12), ('  -5', -5), ('+7', 7), ('0x1A', 26), ('abc', None), ('0x', None),
+])
+def test_parse_int_matches_js(value, expected):
+    assert parse_int(value) == expected
+
+
+def test_bad_row_goes_to_rejects_and_the_rest_of_the_batch_is_inserted(tmp_path):
+    source, db, rejects = tmp_path / 'leads.csv', str(tmp_path / 'leads.db'), tmp_path / 'rejects.csv'
+    write_csv(source, [[f'Lead {i}', f'55123400{i:02d}', '5'] for i in range(8)])
+    backend = RejectingBackend(db, bad='5512340003')
+    stats = import_csv(str(source), backend, batch_size=8, jobs=1, mapping=MAPPING,
+                       rejects_path=str(rejects), progress=False)
+    assert (stats.inserted, stats.rejected, stats.failed) == (7, 1, 0)
+    assert '5512340003' not in phones(db) and len(phones(db)) == 7
+    assert list(csv.reader(io.StringIO(rejects.read_text(encoding='utf-8')))) == [['4', 'Rechazado por la BD: 400 bad']]
+
+
+def test_retry_after_timeout_does_not_insert_twice(tmp_path):
+    source, db = tmp_path / 'leads.csv', str(tmp_path / 'leads.db')
+    write_csv(source, [[f'Lead {i}', f'55123400{i:02d}', '5'] for i in range(4)])
+    stats = import_csv(str(source), TimeoutAfterCommitBackend(db), batch_size=4, jobs=1, retries=2,
+                       mapping=MAPPING, progress=False)
+    assert stats.failed == 0
+    assert len(phones(db)) == 4
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from anchor_index import build_index
+from patch_engine import Patch
+from patch_ledger import Ledger, apply_incremental, is_present
+from patch_stream import present_checker
+
+SOURCE = '''function App() {
+  const [leads, setLeads] = useState([])
+  const [calendarEvents, setCalendarEvents] = useState([])
+  return null
+}
+'''
+
+
+def test_common_text_elsewhere_does_not_count_as_applied(tmp_path):
+    target = tmp_path / 'App.tsx'
+    target.write_text(SOURCE, encoding='utf-8')
+    patch = Patch('close', anchor='  const [leads, setLeads] = useState([])\n', text='}\n', action='after')
+    assert '}\n' in SOURCE and not is_present(patch, SOURCE)
+
+    ledger = Ledger(str(tmp_path / 'ledger.json'))
+    report = apply_incremental(str(target), [patch], ledger)
+    assert report.written and not report.results[0].skipped
+    content = target.read_text(encoding='utf-8')
+    assert 'useState([])\n}\n  const [calendarEvents' in content and is_present(patch, content)
+
+
+@pytest.mark.parametrize('action, text, applied', [
+    ('before', '  // estado\n', '  // estado\n  const [leads'),
+    ('after', ' // lista', 'useState([]) // lista\n  const [calendarEvents'),
+    ('after_line', '  const [x, setX] = useState(0)\n', 'useState([])\n  const [x, setX] = useState(0)\n'),
+])
+def test_insert_is_present_only_next_to_its_anchor(action, text, applied):
+    anchor = '= useState([])' if action != 'before' else '  const [leads'
+    patch = Patch('p', anchor=anchor, text=text, action=action, expect=None)
+    assert not is_present(patch, SOURCE)
+    # El mismo texto en otro lugar no cuenta
+    assert not is_present(patch, SOURCE + text)
+    content = SOURCE.replace(applied.replace(text, '', 1), applied, 1)
+    assert content != SOURCE and is_present(patch, content)
+
+
+def test_at_deletion_is_present_once_the_key_is_gone(tmp_path):
+    patch = Patch('sin-calendar', at='state:calendarEvents', text='')
+    assert not is_present(patch, SOURCE, build_index('App.tsx', SOURCE))
+    assert not is_present(patch, SOURCE)
+
+    target = tmp_path / 'App.tsx'
+    target.write_text(SOURCE, encoding='utf-8')
+    ledger = Ledger(str(tmp_path / 'ledger.json'))
+    assert apply_incremental(str(target), [patch], ledger, write=False).results[0].matches == 1
+
+    content = SOURCE.replace('const [calendarEvents, setCalendarEvents] = useState([])', '')
+    assert is_present(patch, content, build_index('App.tsx', content))
+
+
+def test_replace_is_present_when_the_anchor_only_remains_inside_the_text():
+    patch = Patch('r', anchor='useState([])', text='useState<Lead[]>([])', expect=None)
+    assert not is_present(patch, SOURCE)
+    assert not is_present(patch, SOURCE.replace('useState([])', 'useState<Lead[]>([])', 1))
+    assert is_present(patch, SOURCE.replace('useState([])', 'useState<Lead[]>([])'))
+
+
+def test_streaming_checker_agrees_with_is_present():
+    rng = random.Random(7)
+    compared = 0
+    for _ in range(2000):
+        content = ''.join(rng.choice('ab\n') for _ in range(rng.randint(1, 30)))
+        patches = [Patch(f'p{i}', anchor=''.join(rng.choice('ab\n') for _ in range(rng.randint(1, 3))),
+                         text=rng.choice(['', 'a', 'b\n', 'ab']), action=rng.choice(('before', 'after', 'after_line')),
+                         expect=None) for i in range(3)]
+        chunks = [content[i:i + 4] for i in range(0, len(content), 4)]
+        present = present_checker(iter(chunks), patches, chunk_size=4)
+        for p in patches:
+            assert present(p) == is_present(p, content), (content, p)
+            compared += 1
+    assert compared == 6000
@@ -0,0 +1,26 @@
+import json
+
+from patch_engine import Patch
+from patch_runner import run_all
+
+SOURCE = '''function App() {
+  const [{name}, set{name}] = useState([])
+  return null
+}
+'''
+
+
+def test_every_worker_index_lands_in_the_cache(tmp_path):
+    file_map = {}
+    for name in ('leads', 'team', 'events', 'alerts'):
+        path = tmp_path / f'{name}.tsx'
+        path.write_text(SOURCE.replace('{name}', name), encoding='utf-8')
+        file_map[str(path)] = [('script.py', [Patch(f'{name}-tipo', at=f'state:{name}', text=' // estado',
+                                                     action='after')])]
+    index_path = tmp_path / 'index.json'
+    outcomes = run_all(file_map, jobs=4, ledger_path=str(tmp_path / 'ledger.json'), index_path=str(index_path))
+    assert all(o.ok and o.written for o in outcomes)
+    cache = json.loads(index_path.read_text(encoding='utf-8'))
+    assert sorted(cache) == sorted(file_map)
+    assert all(f'state:{name}' in cache[str(tmp_path / f"{name}.tsx")]['entries']
+               for name in ('leads', 'team', 'events', 'alerts'))
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from patch_engine import FileReport, Patch, plan, read_text, render
+from patch_stream import stream_patches
+
+ACTIONS = ('before', 'after', 'after_line', 'replace')
+
+
+def in_memory(content: str, patches: list):
+    report = FileReport('mem')
+    edits = plan(content, patches, report)
+    return report.ok, render(content, edits) if edits is not None else None
+
+
+def streamed(tmp_path, content: str, patches: list, chunk_size: int):
+    src, dst = tmp_path / 'src.txt', tmp_path / 'dst.txt'
+    src.write_bytes(content.encode('utf-8'))
+    report = stream_patches(str(src), patches, chunk_size=chunk_size, dst=str(dst))
+    if not report.ok:
+        return False, None
+    return True, read_text(str(dst)) if report.written else content
+
+
+def random_case(rng: random.Random):
+    content = ''.join(rng.choice('ab\n') for _ in range(rng.randint(1, 40)))
+    patches = []
+    for i in range(rng.randint(1, 4)):
+        start = rng.randrange(len(content))
+        anchor = content[start:start + rng.randint(1, 4)]
+        patches.append(Patch(f'p{i}', anchor=anchor, text=rng.choice(['', 'X', 'Y\n', 'ZZ']),
+                             action=rng.choice(ACTIONS), expect=None))
+    return content, patches
+
+
+def test_stream_matches_render_on_random_cases(tmp_path):
+    rng = random.Random(5)
+    compared = 0
+    for _ in range(3000):
+        content, patches = random_case(rng)
+        expected = in_memory(content, patches)
+        assert streamed(tmp_path, content, patches, rng.randint(1, 8)) == expected, (content, patches)
+        compared += expected[0]
+    assert compared > 500
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 64])
+def test_after_line_inserts_follow_patch_order(tmp_path, chunk_size):
+    content = 'uno\ndos\n'
+    patches = [Patch('b', anchor='no', text='B\n', action='after_line'),
+               Patch('a', anchor='uno', text='A\n', action='after_line')]
+    assert streamed(tmp_path, content, patches, chunk_size) == in_memory(content, patches) == (True, 'uno\nB\nA\ndos\n')
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 64])
+def test_after_line_when_replace_removes_newline(tmp_path, chunk_size):
+    content = 'uno\ndos\n'
+    patches = [Patch('line', anchor='uno', text='X\n', action='after_line'),
+               Patch('join', anchor='o\n', text='o ')]
+    assert streamed(tmp_path, content, patches, chunk_size) == in_memory(content, patches) == (True, 'uno X\ndos\n')
@@ -0,0 +1,68 @@
+import io
+import json
+import threading
+
+from reminder_engine import ReminderEngine, Rule, follow
+
+
+def test_follow_skips_bad_lines_and_keeps_reading(monkeypatch, capsys):
+    lead = {'id': 'L1', 'name': 'Ana', 'phone': '5512345678', 'status': 'new', 'score': '9',
+            'temperature': 'HOT', 'created_at': '2026-01-01T00:00:00+00:00'}
+    stdin = '\n'.join([
+        '{"table": "leads", "eventType": "INSERT", "new": ',
+        '[1, 2]',
+        json.dumps({'table': 'leads', 'eventType': 'INSERT', 'new': lead}),
+    ]) + '\n'
+    monkeypatch.setattr('sys.stdin', io.StringIO(stdin))
+    engine = ReminderEngine([Rule('HOT', 4)])
+    out = io.StringIO()
+
+    worker = threading.Thread(target=follow, args=(engine, {}, 0.05, out), daemon=True)
+    worker.start()
+    worker.join(timeout=5)
+    assert not worker.is_alive()
+    assert len(engine) == 1
+    err = capsys.readouterr().err
+    assert 'línea 1: JSON inválido' in err and 'línea 2: se esperaba un objeto' in err
+
+
+def engine_with(*leads):
+    engine = ReminderEngine([Rule('HOT', 4), Rule('WARM', 24)], utc_offset=0)
+    engine.bulk_load(leads)
+    return engine
+
+
+def test_tick_sends_once_per_period_and_reschedules():
+    engine = engine_with(('L1', 'HOT', 0), ('L2', 'HOT', 3600), ('L3', 'WARM', 0))
+    assert [(r.lead_id, r.due) for r in engine.tick(4 * 3600)] == [('L1', 4 * 3600)]
+    assert engine.tick(4 * 3600) == []
+    # Tres periodos acumulados salen como uno solo
+    assert sorted(r.lead_id for r in engine.tick(13 * 3600)) == ['L1', 'L2']
+    assert engine.next_due('HOT') == 4 * 3600 + 12 * 3600
+
+
+def test_upsert_moves_the_lead_to_its_new_contact():
+    engine = engine_with(('L1', 'HOT', 0))
+    engine.upsert('L1', 'HOT', 3 * 3600)
+    assert engine.tick(4 * 3600) == []
+    assert [r.lead_id for r in engine.tick(7 * 3600)] == ['L1']
+
+    engine.upsert('L1', 'WARM', 7 * 3600)
+    assert engine.tick(12 * 3600) == []
+    assert len(engine) == 1 and engine.tick(31 * 3600)[0].category == 'WARM'
+
+
+def test_remove_then_upsert_does_not_revive_the_old_entry():
+    now = 10 * 3600
+    engine = engine_with(('L1', 'HOT', 0))
+    engine.remove('L1')
+    assert len(engine) == 0
+    engine.upsert('L1', 'HOT', now)
+    assert engine.tick(now + 60) == []
+    assert [r.due for r in engine.tick(now + 4 * 3600)] == [now + 4 * 3600]
+
+    # Lo mismo al pasar por una categoría sin regla (p. ej. CLIENTE) y volver
+    engine = engine_with(('L1', 'HOT', 0))
+    engine.upsert('L1', 'CLIENTE', 3600)
+    engine.upsert('L1', 'HOT', now)
+    assert engine.tick(now + 60) == []
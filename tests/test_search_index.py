@@ -0,0 +1,72 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from search_index import TABLES, SearchIndex, TableIndex, make_server
+
+APP = 'https://crm.ejemplo.com'
+
+
+def leads_index(count=50):
+    index = SearchIndex()
+    index.tables['leads'] = TableIndex(TABLES['leads'])
+    index.tables['leads'].bulk_load({'id': str(n), 'name': f'Lead {n}', 'phone': f'222{n:02d}12345',
+                                     'created_at': f'2026-01-01T00:{n // 60:02d}:{n % 60:02d}'}
+                                    for n in range(count))
+    return index
+
+
+def test_phone_suffix_returns_newest_first():
+    index = leads_index()
+    newest = [str(n) for n in range(49, 39, -1)]
+    for query in ('12345', '222'):      # sufijo y prefijo
+        assert [hit['id'] for hit in index.search(query, k=10)['leads']] == newest
+    index.apply([{'table': 'leads', 'row': {'id': '3', 'name': 'Lead 3', 'phone': '2220312345'}}])
+    assert index.search('12345', k=2)['leads'][0]['id'] == '3'
+
+
+@pytest.fixture
+def server():
+    server = make_server(leads_index(), 0, 'secreto', APP)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def call(url, token=None, origin=APP, data=None, method=None):
+    headers = {'Origin': origin}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    request = urllib.request.Request(url, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, error.read()
+
+
+def test_search_and_update_require_the_token(server):
+    assert call(server + '/search?q=lead')[0] == 401
+    assert call(server + '/search?q=lead', 'otro')[0] == 401
+    status, _, body = call(server + '/search?q=lead&k=1', 'secreto')
+    assert status == 200 and json.loads(body)['leads'][0]['id'] == '49'
+
+    change = json.dumps({'table': 'leads', 'row': {'id': '1'}, 'deleted': True}).encode('utf-8')
+    assert call(server + '/update', data=change)[0] == 401
+    status, _, body = call(server + '/update', 'secreto', data=change)
+    assert status == 200 and json.loads(body) == {'applied': 1}
+
+
+def test_cors_is_only_open_to_the_app_origin(server):
+    _, headers, _ = call(server + '/search?q=lead', 'secreto')
+    assert headers['Access-Control-Allow-Origin'] == APP
+    _, headers, _ = call(server + '/search?q=lead', 'secreto', origin='https://otra.pagina')
+    assert headers['Access-Control-Allow-Origin'] is None
+
+    status, headers, _ = call(server + '/update', method='OPTIONS')
+    assert status == 204 and headers['Access-Control-Allow-Origin'] == APP
+    assert 'Authorization' in headers['Access-Control-Allow-Headers']
@@ -0,0 +1,73 @@
+import os
+import sqlite3
+import uuid
+
+import tenant_export
+from migrate import SQLiteBackend
+from tenant_export import TenantStore, export_unit, plan, restore, save_json, tenant_manifest
+
+SCHEMA = 'CREATE TABLE leads (id {id_type} PRIMARY KEY, tenant_id TEXT, name TEXT, updated_at TEXT)'
+
+
+def uuid_store(path):
+    """SQLite que devuelve uuid.UUID en la columna id, como psycopg 3 con Postgres."""
+    sqlite3.register_converter('UUID', lambda raw: uuid.UUID(raw.decode('ascii')))
+    backend = SQLiteBackend(path)
+    backend.conn = sqlite3.connect(path, isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES)
+    backend.conn.execute(SCHEMA.format(id_type='UUID'))
+    return TenantStore(backend)
+
+
+def run_export(store, out, run_id, full=False):
+    """Una corrida en el proceso del test; el manifest se registra igual que en ``export``."""
+    units, kinds = plan(store, out, ['leads'], run_id, full=full)
+    tenant_export._STORE = store
+    for tenant, kind in kinds.items():
+        tables = {u.table: export_unit(u, out) for u in units if u.tenant == tenant}
+        manifest = tenant_manifest(out, tenant)
+        manifest['value'] = next(u.value for u in units if u.tenant == tenant)
+        manifest['runs'].append({'dir': f'{run_id}-{kind}', 'kind': kind, 'tables': tables})
+        save_json(os.path.join(out, tenant, 'manifest.json'), manifest)
+    return kinds
+
+
+def test_uuid_ids_round_trip_through_an_incremental(tmp_path, monkeypatch):
+    monkeypatch.setattr(tenant_export, '_STORE', None)
+    out = str(tmp_path / 'backups')
+    store = uuid_store(str(tmp_path / 'crm.db'))
+    ids = [str(uuid.UUID(int=i)) for i in range(1, 4)]
+    store._run('INSERT INTO leads VALUES (?, ?, ?, ?)',
+               [(i, 't1', f'Lead {n}', '2026-01-01T00:00:00+00:00') for n, i in enumerate(ids)], many=True)
+    assert run_export(store, out, '20260101T000000Z', full=True) == {'t1': 'full'}
+
+    store._run('UPDATE leads SET name = ?, updated_at = ? WHERE id = ?',
+               ('Lead editado', '2026-01-02T00:00:00+00:00', ids[0]))
+    store._run('DELETE FROM leads WHERE id = ?', (ids[2],))
+    assert run_export(store, out, '20260102T000000Z') == {'t1': 'incr'}
+    entry = tenant_manifest(out, 't1')['runs'][-1]['tables']['leads']
+    assert (entry.get('deleted'), entry['live']) == (1, 2)
+
+    target = SQLiteBackend(str(tmp_path / 'restaurado.db'))
+    target.conn.execute(SCHEMA.format(id_type='TEXT'))
+    stats = restore(TenantStore(target), out, 't1')
+    assert (stats['chain'], stats['deleted']) == (2, 1)
+    assert target.conn.execute('SELECT id, name FROM leads ORDER BY id').fetchall() == \
+        [(ids[0], 'Lead editado'), (ids[1], 'Lead 1')]
+
+
+def test_empty_incrementals_keep_the_watermark(tmp_path, monkeypatch):
+    monkeypatch.setattr(tenant_export, '_STORE', None)
+    out = str(tmp_path / 'backups')
+    store = uuid_store(str(tmp_path / 'crm.db'))
+    ids = [str(uuid.UUID(int=i)) for i in (1, 2)]
+    store._run('INSERT INTO leads VALUES (?, ?, ?, ?)', [(ids[0], 't1', 'Viejo', '2025-06-01T00:00:00+00:00'),
+                                                        (ids[1], 't1', 'Nuevo', '2026-01-01T00:00:00+00:00')],
+               many=True)
+    run_export(store, out, '20260101T000000Z', full=True)
+    first = tenant_manifest(out, 't1')['runs'][-1]['tables']['leads']['watermark']
+    # Sin la fila del watermark el repaso de --overlap ya no trae nada
+    store._run('DELETE FROM leads WHERE id = ?', (ids[1],))
+
+    for day in ('02', '03', '04'):
+        assert run_export(store, out, f'202601{day}T000000Z') == {'t1': 'incr'}
+        assert tenant_manifest(out, 't1')['runs'][-1]['tables']['leads']['watermark'] == first
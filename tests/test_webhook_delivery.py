@@ -0,0 +1,96 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from webhook_delivery import ConnectionPool, DeliveryLog, MockEndpoints, main
+
+
+@pytest.fixture
+def server():
+    server = MockEndpoints({'/erp': (1.0, 0.0)})
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def setup(tmp_path, server):
+    webhooks = tmp_path / 'webhooks.json'
+    webhooks.write_text(json.dumps([{'id': 'erp', 'url': server.url + '/erp', 'events': ['lead.created']}]),
+                        encoding='utf-8')
+    return str(webhooks), str(tmp_path / 'log.db')
+
+
+def statuses(log):
+    return DeliveryLog(log).conn.execute('SELECT event_id, status, retried FROM webhook_deliveries '
+                                         'ORDER BY id').fetchall()
+
+
+def test_bad_lines_are_skipped_and_the_run_finishes(tmp_path, server, capsys):
+    webhooks, log = setup(tmp_path, server)
+    events = tmp_path / 'events.jsonl'
+    events.write_text('{"event": "lead.created", "id": "e1", "data": {"id": 1}}\n'
+                      '{"event": \n'
+                      '"texto"\n'
+                      '{"event": "lead.created", "id": "e2", "data": {"id": 2}}\n', encoding='utf-8')
+    assert main([webhooks, '--events', str(events), '--log', log]) == 0
+    assert server.events['/erp'] == {'e1': 1, 'e2': 1}
+    err = capsys.readouterr().err
+    assert 'línea 2: JSON inválido' in err and 'línea 3: se esperaba un objeto' in err
+
+
+def test_retry_failed_marks_rows_once_redelivered(tmp_path, server):
+    webhooks, log = setup(tmp_path, server)
+    events = tmp_path / 'events.jsonl'
+    events.write_text('{"event": "lead.created", "id": "e1", "data": {"id": 1}}\n', encoding='utf-8')
+    server.profiles['/erp'] = (1.0, 1.0)
+    assert main([webhooks, '--events', str(events), '--log', log, '--max-attempts', '1']) == 1
+    assert statuses(log) == [('e1', 'failed', 0)]
+
+    server.profiles['/erp'] = (1.0, 0.0)
+    assert main([webhooks, '--log', log, '--retry-failed']) == 0
+    assert statuses(log) == [('e1', 'failed', 1), ('e1', 'delivered', 0)]
+    assert main([webhooks, '--log', log, '--retry-failed']) == 0
+    assert server.events['/erp'] == {'e1': 1}
+
+
+def test_204_without_content_length_keeps_the_connection(server):
+    server.profiles['/erp'] = (1.0, 0.0, 204)
+    pool = ConnectionPool('127.0.0.1', server.server_address[1], False)
+
+    async def post_twice():
+        body = b'{"event": "lead.created", "id": "e1"}'
+        return [await asyncio.wait_for(pool.post('/erp', body, {}), 2) for _ in range(2)]
+
+    t0 = time.perf_counter()
+    assert asyncio.run(post_twice()) == [204, 204]
+    assert time.perf_counter() - t0 < 1 and pool.opened == 1
+
+
+def test_interim_and_bodyless_responses_are_read_to_the_end():
+    replies = [b'HTTP/1.1 100 Continue\r\n\r\nHTTP/1.1 103 Early Hints\r\nLink: </a>\r\n\r\n'
+               b'HTTP/1.1 202 Accepted\r\nContent-Length: 2\r\n\r\nok',
+               b'HTTP/1.1 304 Not Modified\r\nETag: "x"\r\n\r\n',
+               b'HTTP/1.1 204 No Content\r\n\r\n']
+
+    async def handle(reader, writer):
+        for reply in replies:
+            await reader.readuntil(b'\r\n\r\n')
+            await reader.readexactly(2)
+            writer.write(reply)
+        await writer.drain()
+        await reader.read()
+        writer.close()
+
+    async def run():
+        listener = await asyncio.start_server(handle, '127.0.0.1', 0)
+        pool = ConnectionPool('127.0.0.1', listener.sockets[0].getsockname()[1], False)
+        statuses = [await asyncio.wait_for(pool.post('/erp', b'{}', {}), 2) for _ in replies]
+        for conn in pool.idle:
+            conn.writer.close()
+        listener.close()
+        return statuses, pool.opened
+
+    assert asyncio.run(run()) == ([202, 304, 204], 1)
@@ -0,0 +1,45 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from whatsapp_dispatch import MockWhatsApp, Outbox, SendError, WhatsAppClient, dispatch
+
+
+@pytest.fixture
+def mock():
+    server = MockWhatsApp(latency_ms=300, error_rate=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def test_timeout_after_send_is_unknown_and_not_resent(tmp_path, mock):
+    outbox = Outbox(str(tmp_path / 'outbox.db'))
+    outbox.enqueue([{'to': '+52 1 5512345678', 'body': 'Hola'}], '100000')
+    report = dispatch(outbox, WhatsAppClient('token', mock.url, timeout=0.05), progress=False)
+    assert (report.sent, report.retried, report.unknown) == (0, 0, 1)
+    assert outbox.counts() == {'unknown': 1}
+    assert outbox.recover() == 0 and outbox.counts() == {'unknown': 1}
+
+
+def test_same_text_is_deduplicated_per_day_or_campaign(tmp_path):
+    outbox = Outbox(str(tmp_path / 'outbox.db'))
+    message = {'to': '+52 1 5512345678', 'body': '¿Sigues interesado?'}
+    monday = time.mktime((2026, 10, 12, 10, 0, 0, 0, 0, -1))
+    assert outbox.enqueue([message], '100000', now=monday) == 1
+    assert outbox.enqueue([message], '100000', now=monday + 3600) == 0
+    assert outbox.enqueue([message], '100000', now=monday + 7 * 86400) == 1
+    assert outbox.enqueue([message], '100000', campaign='seguimiento', now=monday) == 1
+    assert outbox.enqueue([dict(message, campaign='seguimiento')], '100000', now=monday + 7 * 86400) == 0
+    assert outbox.enqueue([dict(message, id='manual-1'), dict(message, id='manual-1')], '100000') == 1
+
+
+def test_refused_connection_is_retryable():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    with pytest.raises(SendError) as info:
+        WhatsAppClient('token', f'http://127.0.0.1:{port}', timeout=1).send('100000', '5512345678', {'type': 'text'})
+    assert info.value.retryable and not info.value.unknown
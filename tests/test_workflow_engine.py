@@ -0,0 +1,23 @@
+import pytest
+
+from workflow_engine import Workflow, WorkflowEngine
+
+
+def status_workflow(id_, from_status='', to_status=''):
+    return Workflow({'id': id_, 'trigger': {'type': 'mortgage_status_changed',
+                                             'config': {'from_status': from_status, 'to_status': to_status}}})
+
+
+@pytest.mark.parametrize('old, new', [(None, 'approved'), ('submitted', None), (None, None), ('', '')])
+def test_any_to_any_fires_once_when_a_status_is_empty(old, new):
+    engine = WorkflowEngine([status_workflow('any')])
+    assert [w.id for w in engine.candidates('mortgage_status_changed', {'old_status': old, 'new_status': new})] == ['any']
+
+
+def test_dispatch_from_none_to_approved_runs_each_workflow_once():
+    engine = WorkflowEngine([status_workflow('any'), status_workflow('to-approved', to_status='approved'),
+                             status_workflow('from-submitted', from_status='submitted')])
+    change = {'table': 'mortgage_applications', 'eventType': 'UPDATE', 'commit_timestamp': '2026-05-01T10:00:00Z',
+              'new': {'id': 'm1', 'status': 'approved'}, 'old': {'id': 'm1', 'status': None}}
+    assert engine.dispatch(change) == 2
+    assert dict(engine.executions) == {'to-approved': 1, 'any': 1}
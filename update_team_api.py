@@ -1,5 +1,7 @@
-with open('src/App.tsx', 'r') as f:
-    content = f.read()
+from patch_engine import Patch
+from patch_ledger import run
+
+TARGET = 'src/App.tsx'
 
 # Reemplazar saveMember para usar API
 old_save = '''  async function saveMember(member: Partial<TeamMember>) {
@@ -56,8 +58,6 @@ new_save = '''  async function saveMember(member: Partial<TeamMember>) {
     }
   }'''
 
-content = content.replace(old_save, new_save)
-
 # Agregar campo email en modal (ya existe, solo verificar)
 # Agregar botón de eliminar en la vista de team
 
@@ -75,8 +75,6 @@ new_edit_button = '''                        <div className="flex gap-2 opacity-
                           </button>
                         </div>'''
 
-content = content.replace(old_edit_button, new_edit_button)
-
 # Agregar campo email en MemberModal
 old_modal = '''          <div>
             <label className="block text-sm text-gray-400 mb-1">WhatsApp</label>
@@ -92,9 +90,12 @@ new_modal = '''          <div>
             <input value={form.phone || ''} onChange={e => setForm({...form, phone: e.target.value})} className="w-full bg-gray-700 rounded-lg p-3" placeholder="+5215512345678" />
           </div>'''
 
-content = content.replace(old_modal, new_modal)
-
-with open('src/App.tsx', 'w') as f:
-    f.write(content)
+PATCHES = [
+    Patch('save-member-via-api', anchor=old_save, text=new_save),
+    Patch('team-delete-button', anchor=old_edit_button, text=new_edit_button),
+    Patch('member-modal-email', anchor=old_modal, text=new_modal),
+]
 
-print("✅ App.tsx actualizado con API y botón de eliminar")
+if __name__ == '__main__':
+    run(TARGET, PATCHES)
+    print("✅ App.tsx actualizado con API y botón de eliminar")
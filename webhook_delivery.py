@@ -0,0 +1,762 @@
+"""Entrega de webhooks con conexiones persistentes, lotes y circuit breaker por endpoint.
+
+ApiWebhooksView muestra ``webhook_configs`` y un log con ``response_time_ms``,
+pero nada entrega los eventos. Este servicio (asyncio, solo stdlib):
+
+- Lee eventos JSONL ``{"event": "lead.created", "data": {...}, "id"?}`` o
+  cambios de Supabase Realtime (INSERT en leads / appointments /
+  mortgage_applications → ``lead.created`` / ``appointment.created`` /
+  ``mortgage.created``) y los reparte a los webhooks activos suscritos.
+- Cada endpoint tiene su cola, sus workers y su pool de conexiones HTTP/1.1
+  keep-alive: no se abre un TCP (ni TLS) por entrega.
+- Con ``--batch-size`` > 1 junta eventos hasta ese tamaño o ``--batch-ms``
+  y manda ``{"events": [...]}`` en un solo POST.
+- Un circuit breaker por endpoint: tras ``--breaker-failures`` errores
+  seguidos (5xx, 429, timeout, red) deja de llamarlo ``--breaker-cooldown``
+  segundos y luego prueba con un solo request. Un ERP lento solo llena su
+  propia cola; si se llena, lo que no cabe se registra como ``dropped``.
+- 5xx/429/timeouts se reintentan con backoff (el de whatsapp_dispatch.py);
+  4xx no. Cada POST lleva ``X-Webhook-Event``, ``X-Webhook-Delivery`` y, si
+  el webhook tiene secreto, ``X-Webhook-Signature`` (``sha256=`` HMAC del
+  cuerpo). El secreto nunca viaja: el receptor recalcula el HMAC.
+- El log de entregas (mismas columnas que el de la vista) se escribe en
+  SQLite por lotes, fuera del event loop. Lo no entregado guarda su payload
+  y se reencola con ``--retry-failed``.
+- Latencias en un histograma logarítmico por endpoint (memoria fija):
+  p50/p95/p99 al final y en ``GET /stats`` de ``--metrics-port``.
+
+Uso::
+
+    python webhook_delivery.py webhook_configs.json --events eventos.jsonl
+    python webhook_delivery.py webhook_configs.csv --batch-size 50 --metrics-port 9108 < eventos.jsonl
+    python webhook_delivery.py webhook_configs.json --retry-failed
+    python webhook_delivery.py --bench 20000                # contra un mock local
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import hmac
+import json
+import math
+import os
+import random
+import sqlite3
+import ssl
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from whatsapp_dispatch import backoff
+
+LOG_PATH = 'webhook-deliveries.db'
+TIMEOUT = 5.0
+WORKERS = 4
+QUEUE_SIZE = 10_000
+MAX_ATTEMPTS = 4
+BREAKER_FAILURES = 5
+BREAKER_COOLDOWN = 30.0
+FLUSH_ROWS = 500
+FLUSH_SECONDS = 1.0
+REALTIME_EVENTS = {'leads': 'lead.created', 'appointments': 'appointment.created',
+                   'mortgage_applications': 'mortgage.created'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS webhook_deliveries (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  webhook_id TEXT NOT NULL,
+  event TEXT NOT NULL,
+  event_id TEXT,
+  status TEXT NOT NULL,
+  status_code INTEGER,
+  response_time_ms INTEGER,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  batch_size INTEGER NOT NULL DEFAULT 1,
+  error TEXT,
+  payload TEXT,
+  retried INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_webhook_deliveries_webhook ON webhook_deliveries(webhook_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_webhook_deliveries_pending ON webhook_deliveries(status, retried);
+"""
+
+
+class Histogram:
+    """Buckets logarítmicos de ~2% de ancho: percentiles sin guardar cada muestra."""
+
+    GROWTH = math.log(1.02)
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.max = 0.0
+
+    def add(self, ms: float) -> None:
+        bucket = int(math.log(max(ms, 0.01) / 0.01) / self.GROWTH)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        self.max = max(self.max, ms)
+
+    def percentile(self, p: float) -> float:
+        if not self.total:
+            return 0.0
+        rank = math.ceil(self.total * p / 100)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self.max, 0.01 * math.exp((bucket + 1) * self.GROWTH))
+        return self.max
+
+
+class CircuitBreaker:
+    """closed → open tras ``failures`` errores seguidos → half_open (un request) → closed/open."""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self.streak = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.trips = 0
+
+    def wait(self, now: float) -> float:
+        """0 si se puede llamar ya; si no, cuántos segundos esperar."""
+        if self.state == 'closed':
+            return 0.0
+        if self.state == 'open':
+            remaining = self.opened_at + self.cooldown - now
+            if remaining > 0:
+                return remaining
+            self.state = 'half_open'
+        if self.probing:
+            return 0.05
+        self.probing = True
+        return 0.0
+
+    def success(self) -> None:
+        self.state = 'closed'
+        self.streak = 0
+        self.probing = False
+
+    def failure(self, now: float) -> None:
+        self.streak += 1
+        if self.state == 'half_open' or self.streak >= self.failures:
+            if self.state != 'open':
+                self.trips += 1
+            self.state = 'open'
+            self.opened_at = now
+            self.probing = False
+
+
+class Connection:
+    __slots__ = ('reader', 'writer', 'uses')
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.uses = 0
+
+
+class ConnectionPool:
+    """Conexiones HTTP/1.1 keep-alive a un host; una por worker como máximo."""
+
+    def __init__(self, host: str, port: int, tls: bool):
+        self.host = host
+        self.port = port
+        self.ssl = ssl.create_default_context() if tls else None
+        self.idle = []
+        self.opened = 0
+
+    async def _acquire(self) -> Connection:
+        while self.idle:
+            conn = self.idle.pop()
+            if not conn.writer.is_closing() and not conn.reader.at_eof():
+                return conn
+            conn.writer.close()
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        self.opened += 1
+        return Connection(reader, writer)
+
+    async def post(self, path: str, body: bytes, headers: dict) -> int:
+        """POST y status; reintenta una vez si una conexión reutilizada ya estaba cerrada."""
+        head = [f'POST {path} HTTP/1.1', f'Host: {self.host}', 'Content-Type: application/json',
+                f'Content-Length: {len(body)}', 'Connection: keep-alive']
+        head += [f'{k}: {v}' for k, v in headers.items()]
+        request = ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+        for _ in range(2):
+            conn = await self._acquire()
+            reused = conn.uses > 0
+            keep = False
+            try:
+                conn.writer.write(request)
+                await conn.writer.drain()
+                status, keep = await self._response(conn.reader)
+                conn.uses += 1
+                return status
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+            finally:
+                if keep:
+                    self.idle.append(conn)
+                else:
+                    conn.writer.close()
+        raise ConnectionError('conexión cerrada por el servidor')
+
+    @staticmethod
+    async def _response(reader) -> tuple:
+        while True:
+            status_line = await reader.readuntil(b'\r\n')
+            version, status = status_line.split(b' ', 2)[:2]
+            status = int(status)
+            headers = {}
+            while True:
+                line = await reader.readuntil(b'\r\n')
+                if line == b'\r\n':
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip().lower()
+            if not 100 <= status < 200:
+                break
+            # 1xx (100 Continue, 103 Early Hints) es provisional: la respuesta sigue
+        keep = headers.get('connection') != 'close' if version == b'HTTP/1.1' \
+            else headers.get('connection') == 'keep-alive'
+        if status in (204, 304):
+            pass        # sin cuerpo aunque no haya Content-Length (RFC 9112 §6.3)
+        elif headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        else:
+            await reader.read()
+            keep = False
+        return status, keep
+
+
+class Endpoint:
+    def __init__(self, row: dict, workers: int, batch_size: int, batch_ms: float, queue_size: int,
+                 breaker: CircuitBreaker = None):
+        self.id = str(row.get('id') or '')
+        self.name = row.get('name') or self.id
+        self.url = row['url']
+        events = row.get('events') or []
+        self.events = set(json.loads(events) if isinstance(events, str) else events)
+        self.secret = row.get('secret') or ''
+        self.batch_size = int(row.get('batch_size') or batch_size)
+        self.batch_ms = float(row.get('batch_ms') or batch_ms)
+        self.workers = workers
+        parts = urllib.parse.urlsplit(self.url)
+        tls = parts.scheme == 'https'
+        self.path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        self.pool = ConnectionPool(parts.hostname, parts.port or (443 if tls else 80), tls)
+        self.queue = asyncio.Queue(queue_size)
+        self.breaker = breaker or CircuitBreaker()
+        self.histogram = Histogram()
+        self.delivered = self.failed = self.dropped = self.retries = self.posts = 0
+        self.last_status = None
+
+    def stats(self) -> dict:
+        h = self.histogram
+        return {'name': self.name, 'delivered': self.delivered, 'failed': self.failed, 'dropped': self.dropped,
+                'retries': self.retries, 'posts': self.posts, 'queued': self.queue.qsize(),
+                'connections_opened': self.pool.opened, 'breaker': self.breaker.state,
+                'breaker_trips': self.breaker.trips, 'last_status_code': self.last_status,
+                'p50_ms': round(h.percentile(50), 1), 'p95_ms': round(h.percentile(95), 1),
+                'p99_ms': round(h.percentile(99), 1), 'max_ms': round(h.max, 1)}
+
+
+def load_webhooks(path: str) -> list:
+    """Export de ``webhook_configs`` (CSV, JSONL o arreglo JSON), solo los activos."""
+    if path.endswith('.csv'):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+    elif path.endswith(('.jsonl', '.ndjson')):
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+    return [r for r in rows if str(r.get('active', True)).lower() not in ('false', 'f', '0', '')]
+
+
+def to_event(line: dict):
+    """``(nombre, id, data)`` de un evento propio o de un INSERT de Realtime; None si no aplica."""
+    if line.get('event'):
+        data = line.get('data') or {}
+        return line['event'], str(line.get('id') or f"{line['event']}:{data.get('id', uuid.uuid4().hex)}"), data
+    name = REALTIME_EVENTS.get(line.get('table'))
+    if name and line.get('eventType') == 'INSERT':
+        data = line.get('new') or {}
+        return name, f"{name}:{data.get('id')}", data
+    return None
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+
+
+class DeliveryLog:
+    """Filas del log en memoria y ``executemany`` cada ``FLUSH_ROWS`` o ``FLUSH_SECONDS``."""
+
+    COLUMNS = ('webhook_id', 'event', 'event_id', 'status', 'status_code', 'response_time_ms', 'attempts',
+               'batch_size', 'error', 'payload', 'created_at')
+
+    def __init__(self, path: str = LOG_PATH):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.rows = []
+        self.written = 0
+        self.lock = asyncio.Lock()
+
+    def add(self, row: tuple) -> None:
+        self.rows.append(row)
+
+    def _write(self, rows: list) -> None:
+        with self.conn:
+            self.conn.executemany(f'INSERT INTO webhook_deliveries ({", ".join(self.COLUMNS)}) '
+                                  f'VALUES ({", ".join("?" * len(self.COLUMNS))})', rows)
+
+    async def flush(self) -> None:
+        async with self.lock:
+            rows, self.rows = self.rows, []
+            if rows:
+                await asyncio.to_thread(self._write, rows)
+                self.written += len(rows)
+
+    async def run(self) -> None:
+        while True:
+            deadline = time.monotonic() + FLUSH_SECONDS
+            while len(self.rows) < FLUSH_ROWS and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            await self.flush()
+
+    def pending(self) -> list:
+        """Entregas no hechas y aún no reencoladas: ``(rowid, webhook_id, event, event_id, data)``."""
+        rows = self.conn.execute("SELECT id, webhook_id, event, event_id, payload FROM webhook_deliveries "
+                                 "WHERE status != 'delivered' AND retried = 0 AND payload IS NOT NULL").fetchall()
+        return [(r[0], r[1], r[2], r[3], json.loads(r[4])) for r in rows]
+
+    def mark_retried(self, ids: list) -> None:
+        with self.conn:
+            self.conn.executemany('UPDATE webhook_deliveries SET retried = 1 WHERE id = ?', [(i,) for i in ids])
+
+
+class Deliverer:
+    def __init__(self, endpoints: list, log: DeliveryLog, timeout: float = TIMEOUT,
+                 max_attempts: int = MAX_ATTEMPTS):
+        self.endpoints = endpoints
+        self.log = log
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.by_event = {}
+        for endpoint in endpoints:
+            for name in endpoint.events:
+                self.by_event.setdefault(name, []).append(endpoint)
+        self.tasks = []
+        self.started = time.perf_counter()
+
+    def publish(self, name: str, event_id: str, data: dict, only: str = '') -> int:
+        """Encola el evento en cada endpoint suscrito; devuelve en cuántos entró."""
+        item = (name, event_id, data, now_iso())
+        queued = 0
+        for endpoint in self.by_event.get(name, ()):
+            if only and endpoint.id != only:
+                continue
+            try:
+                endpoint.queue.put_nowait(item)
+                queued += 1
+            except asyncio.QueueFull:
+                endpoint.dropped += 1
+                self.log.add((endpoint.id, name, event_id, 'dropped', None, None, 0, 1, 'cola llena',
+                              json.dumps(data, ensure_ascii=False), item[3]))
+        return queued
+
+    async def _batch(self, endpoint: Endpoint) -> list:
+        items = [await endpoint.queue.get()]
+        deadline = time.monotonic() + endpoint.batch_ms / 1000
+        while len(items) < endpoint.batch_size:
+            try:
+                items.append(endpoint.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(endpoint.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _worker(self, endpoint: Endpoint) -> None:
+        while True:
+            items = await self._batch(endpoint)
+            try:
+                await self._deliver(endpoint, items)
+            except Exception as exc:
+                print(f"⚠️ {endpoint.name}: {type(exc).__name__}: {exc}", file=sys.stderr)
+            finally:
+                for _ in items:
+                    endpoint.queue.task_done()
+
+    async def _deliver(self, endpoint: Endpoint, items: list) -> None:
+        if len(items) == 1:
+            name, event_id, data, created = items[0]
+            payload = {'event': name, 'id': event_id, 'created_at': created, 'data': data}
+            delivery = event_id
+        else:
+            payload = {'events': [{'event': n, 'id': i, 'created_at': c, 'data': d} for n, i, d, c in items]}
+            delivery = hashlib.sha1('|'.join(i for _, i, _, _ in items).encode('utf-8')).hexdigest()
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        headers = {'X-Webhook-Event': items[0][0] if len(items) == 1 else 'batch', 'X-Webhook-Delivery': delivery}
+        if endpoint.secret:
+            headers['X-Webhook-Signature'] = 'sha256=' + hmac.new(endpoint.secret.encode('utf-8'), body,
+                                                                  hashlib.sha256).hexdigest()
+        loop = asyncio.get_running_loop()
+        attempts = 0
+        while True:
+            wait = endpoint.breaker.wait(loop.time())
+            while wait:
+                await asyncio.sleep(wait)
+                wait = endpoint.breaker.wait(loop.time())
+            attempts += 1
+            t0 = loop.time()
+            status, error = None, ''
+            try:
+                status = await asyncio.wait_for(endpoint.pool.post(endpoint.path, body, headers), self.timeout)
+            except asyncio.TimeoutError:
+                error = f'timeout {self.timeout:g} s'
+            except (OSError, asyncio.IncompleteReadError, ValueError) as exc:
+                error = f'{type(exc).__name__}: {exc}'
+            ms = (loop.time() - t0) * 1000
+            endpoint.posts += 1
+            endpoint.histogram.add(ms)
+            endpoint.last_status = status
+            retryable = status is None or status == 429 or status >= 500
+            if retryable:
+                endpoint.breaker.failure(loop.time())
+            else:
+                endpoint.breaker.success()
+            if retryable and attempts < self.max_attempts:
+                endpoint.retries += 1
+                await asyncio.sleep(backoff(attempts))
+                continue
+            ok = status is not None and 200 <= status < 300
+            error = error or ('' if ok else f'HTTP {status}')
+            for name, event_id, data, created in items:
+                self.log.add((endpoint.id, name, event_id, 'delivered' if ok else 'failed', status, round(ms),
+                              attempts, len(items), error or None,
+                              None if ok else json.dumps(data, ensure_ascii=False), created))
+            if ok:
+                endpoint.delivered += len(items)
+            else:
+                endpoint.failed += len(items)
+            return
+
+    def start(self) -> None:
+        for endpoint in self.endpoints:
+            for _ in range(endpoint.workers):
+                self.tasks.append(asyncio.create_task(self._worker(endpoint)))
+        self.tasks.append(asyncio.create_task(self.log.run()))
+
+    async def drain(self) -> None:
+        """Espera a que todas las colas se vacíen, para los workers y escribe el log."""
+        await asyncio.gather(*(endpoint.queue.join() for endpoint in self.endpoints))
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        await self.log.flush()
+
+    def stats(self) -> dict:
+        return {'uptime_s': round(time.perf_counter() - self.started, 1), 'log_rows': self.log.written,
+                'endpoints': {endpoint.id: endpoint.stats() for endpoint in self.endpoints}}
+
+
+async def serve_metrics(deliverer: Deliverer, port: int):
+    """``GET /stats`` en localhost con los contadores y percentiles de cada endpoint."""
+    async def handle(reader, writer):
+        try:
+            await reader.readuntil(b'\r\n\r\n')
+            body = json.dumps(deliverer.stats(), ensure_ascii=False).encode('utf-8')
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: close\r\n'
+                         + f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle, '127.0.0.1', port)
+
+
+def print_stats(deliverer: Deliverer, seconds: float) -> None:
+    total = sum(e.delivered for e in deliverer.endpoints)
+    print(f"📊 {total:,} entregas en {seconds:.2f} s ({total / max(seconds, 1e-9):,.0f}/s), "
+          f"{deliverer.log.written:,} filas de log")
+    for endpoint in deliverer.endpoints:
+        s = endpoint.stats()
+        print(f"   {s['name']}: ✅ {s['delivered']:,} ❌ {s['failed']:,} ⏭️ {s['dropped']:,} 🔁 {s['retries']:,} · "
+              f"{s['posts']:,} POST en {s['connections_opened']} conexiones · breaker {s['breaker']} "
+              f"({s['breaker_trips']} aperturas) · p50 {s['p50_ms']:,.0f} ms p95 {s['p95_ms']:,.0f} ms "
+              f"p99 {s['p99_ms']:,.0f} ms")
+
+
+async def run(args, webhooks: list) -> int:
+    endpoints = [Endpoint(row, args.workers, args.batch_size, args.batch_ms, args.queue_size,
+                          CircuitBreaker(args.breaker_failures, args.breaker_cooldown)) for row in webhooks]
+    log = DeliveryLog(args.log)
+    deliverer = Deliverer(endpoints, log, args.timeout, args.max_attempts)
+    deliverer.start()
+    metrics = await serve_metrics(deliverer, args.metrics_port) if args.metrics_port else None
+    t0 = time.perf_counter()
+    requeued = []
+    if args.retry_failed:
+        pending = log.pending()
+        requeued = [row[0] for row in pending if deliverer.publish(row[2], row[3], row[4], only=row[1])]
+        print(f"🔁 {len(requeued):,} entregas pendientes reencoladas")
+        if len(requeued) < len(pending):
+            print(f"⚠️ {len(pending) - len(requeued):,} sin webhook activo suscrito; siguen pendientes",
+                  file=sys.stderr)
+    else:
+        lines = asyncio.Queue(1000)
+        loop = asyncio.get_running_loop()
+
+        def put(item) -> None:
+            asyncio.run_coroutine_threadsafe(lines.put(item), loop).result()
+
+        def read(handle) -> None:
+            for number, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError as exc:
+                    print(f"⚠️ línea {number}: JSON inválido ({exc})", file=sys.stderr)
+                    continue
+                if not isinstance(item, dict):
+                    print(f"⚠️ línea {number}: se esperaba un objeto", file=sys.stderr)
+                    continue
+                put(item)
+
+        def reader():
+            # Una línea mala se registra y se salta; el None final siempre llega
+            try:
+                if args.events in ('', '-'):
+                    read(sys.stdin)
+                else:
+                    with open(args.events, 'r', encoding='utf-8') as handle:
+                        read(handle)
+            except OSError as exc:
+                print(f"❌ {args.events}: {exc}", file=sys.stderr)
+            finally:
+                put(None)
+
+        threading.Thread(target=reader, daemon=True).start()
+        while True:
+            line = await lines.get()
+            if line is None:
+                break
+            event = to_event(line)
+            if event:
+                deliverer.publish(*event)
+    await deliverer.drain()
+    # Solo con la nueva entrega ya escrita en el log: si se cae antes, se reencolan otra vez
+    log.mark_retried(requeued)
+    if metrics:
+        metrics.close()
+    print_stats(deliverer, time.perf_counter() - t0)
+    return 1 if any(e.failed or e.dropped for e in endpoints) else 0
+
+
+class MockEndpoints(ThreadingHTTPServer):
+    """Endpoints locales con latencia y errores por ruta; cuenta conexiones y eventos recibidos."""
+
+    daemon_threads = True
+    request_queue_size = 128    # con el backlog de 5 los connect simultáneos esperan el reintento de SYN (1 s)
+
+    def __init__(self, profiles: dict, port: int = 0):
+        super().__init__(('127.0.0.1', port), _MockHandler)
+        self.profiles = profiles            # ruta -> (latencia ms, tasa de 503[, status de éxito])
+        self.connections = 0
+        self.events = {}
+        self.lock = threading.Lock()
+
+    def get_request(self):
+        request = super().get_request()
+        with self.lock:
+            self.connections += 1
+        return request
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True      # encabezados y cuerpo salen en dos write()
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        latency, error_rate, *status = server.profiles.get(self.path, (20.0, 0.0))
+        time.sleep(latency / 1000 * random.uniform(0.5, 1.5))
+        if random.random() < error_rate:
+            return self._reply(503, {'error': 'unavailable'})
+        with server.lock:
+            counts = server.events.setdefault(self.path, {})
+            for event in body.get('events') or [body]:
+                counts[event.get('id')] = counts.get(event.get('id'), 0) + 1
+        if status and status[0] == 204:
+            self.send_response(204)         # sin Content-Length, como muchos receptores
+            self.end_headers()
+            return
+        self._reply(200, {'ok': True})
+
+    def _reply(self, code: int, data: dict):
+        raw = json.dumps(data).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *args):
+        pass
+
+
+def bench_events(count: int) -> list:
+    names = ('lead.created',) * 6 + ('appointment.created',) * 3 + ('mortgage.created',)
+    return [{'event': random.choice(names), 'id': f'evt-{i}',
+             'data': {'id': f'r{i}', 'name': f'Cliente {i}', 'phone': f'52222{i:07d}', 'status': 'new'}}
+            for i in range(count)]
+
+
+def naive(server: MockEndpoints, webhooks: list, events: list) -> float:
+    """Un POST con conexión nueva por entrega, uno tras otro (lo que haría un fetch en serie)."""
+    t0 = time.perf_counter()
+    for line in events:
+        for row in webhooks:
+            if line['event'] not in row['events']:
+                continue
+            req = urllib.request.Request(row['url'], method='POST', data=json.dumps(line).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'})
+            try:
+                with urllib.request.urlopen(req, timeout=TIMEOUT) as resp:
+                    resp.read()
+            except (urllib.error.URLError, TimeoutError):
+                pass
+    return time.perf_counter() - t0
+
+
+def bench(count: int, workers: int) -> int:
+    random.seed(5)
+    server = MockEndpoints({'/erp/leads': (150.0, 0.2), '/slack/citas': (15.0, 0.0), '/analytics': (30.0, 0.01)})
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    webhooks = [
+        {'id': 'erp', 'name': 'ERP - Nuevos Leads', 'url': server.url + '/erp/leads',
+         'events': ['lead.created', 'mortgage.created'], 'secret': 'whsec_local'},
+        {'id': 'slack', 'name': 'Slack - Citas', 'url': server.url + '/slack/citas', 'events': ['appointment.created']},
+        {'id': 'analytics', 'name': 'Analytics - Todo', 'url': server.url + '/analytics', 'batch_size': 100,
+         'events': ['lead.created', 'appointment.created', 'mortgage.created']},
+    ]
+    events = bench_events(count)
+    expected = {path: sum(1 for e in events if e['event'] in row['events'])
+                for path, row in zip(('/erp/leads', '/slack/citas', '/analytics'), webhooks)}
+
+    sample = events[:30]
+    serial = naive(server, webhooks, sample)
+    print(f"📄 Serie, conexión nueva por entrega: {serial:.1f} s para {len(sample)} eventos "
+          f"→ ~{serial / len(sample) * count / 60:,.0f} min para {count:,}")
+    server.events.clear()
+    server.connections = 0
+    # El ERP se cae del segundo 5 al 10: su breaker abre y los demás ni se enteran
+    outage = [threading.Timer(5, server.profiles.__setitem__, ('/erp/leads', (150.0, 1.0))),
+              threading.Timer(10, server.profiles.__setitem__, ('/erp/leads', (150.0, 0.2)))]
+
+    async def main():
+        with tempfile.TemporaryDirectory() as tmp:
+            endpoints = [Endpoint(row, workers, 1, 50.0, count) for row in webhooks]
+            deliverer = Deliverer(endpoints, DeliveryLog(os.path.join(tmp, 'log.db')), TIMEOUT, MAX_ATTEMPTS)
+            # con un ERP tan malo el breaker abre seguido; enfriamiento corto para el bench
+            for endpoint in endpoints:
+                endpoint.breaker = CircuitBreaker(BREAKER_FAILURES, 1.0)
+            deliverer.start()
+            for timer in outage:
+                timer.start()
+            t0 = time.perf_counter()
+            for line in events:
+                deliverer.publish(*to_event(line))
+            done = {}
+
+            async def watch(endpoint):
+                await endpoint.queue.join()
+                done[endpoint.name] = time.perf_counter() - t0
+            await asyncio.gather(*(watch(e) for e in endpoints))
+            await deliverer.drain()
+            print_stats(deliverer, time.perf_counter() - t0)
+            print("   terminó cada endpoint en: " + ', '.join(f'{name} {s:.1f} s' for name, s in done.items()))
+            rows = deliverer.log.conn.execute('SELECT COUNT(*) FROM webhook_deliveries').fetchone()[0]
+            return endpoints, rows
+
+    endpoints, rows = asyncio.run(main())
+    lost = {path: expected[path] - len(server.events.get(path, {})) for path in expected}
+    duplicated = sum(n - 1 for counts in server.events.values() for n in counts.values() if n > 1)
+    failed = sum(e.failed for e in endpoints)
+    print(f"   {server.connections} conexiones TCP en total; eventos sin llegar por endpoint: {lost} "
+          f"({failed} agotaron reintentos); repetidos por reintento: {duplicated}; {rows:,} filas de log")
+    server.shutdown()
+    return 0 if sum(lost.values()) == failed else 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Entrega los webhooks de webhook_configs con pool, lotes y breakers')
+    parser.add_argument('webhooks', nargs='?', help='export de webhook_configs (csv, jsonl o json)')
+    parser.add_argument('--events', default='-', help='JSONL de eventos o cambios de Realtime (por defecto stdin)')
+    parser.add_argument('--log', default=LOG_PATH, help=f'SQLite del log de entregas (por defecto {LOG_PATH})')
+    parser.add_argument('--workers', type=int,
+                        help=f'requests en vuelo (y conexiones) por endpoint ({WORKERS}; 16 en --bench)')
+    parser.add_argument('--batch-size', type=int, default=1, help='eventos por POST (1 = sin lotes)')
+    parser.add_argument('--batch-ms', type=float, default=200.0, help='espera máxima para llenar un lote')
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE, help='eventos en espera por endpoint')
+    parser.add_argument('--timeout', type=float, default=TIMEOUT)
+    parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS)
+    parser.add_argument('--breaker-failures', type=int, default=BREAKER_FAILURES,
+                        help='errores seguidos que abren el circuito de un endpoint')
+    parser.add_argument('--breaker-cooldown', type=float, default=BREAKER_COOLDOWN,
+                        help='segundos sin llamar a un endpoint con el circuito abierto')
+    parser.add_argument('--metrics-port', type=int, default=0, help='servir GET /stats en este puerto')
+    parser.add_argument('--retry-failed', action='store_true', help='reencolar lo fallido o descartado del log')
+    parser.add_argument('--bench', type=int, metavar='N', help='N eventos contra endpoints mock locales')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        return bench(args.bench, args.workers or 16)
+    args.workers = args.workers or WORKERS
+    if not args.webhooks:
+        parser.error('falta el export de webhook_configs')
+    webhooks = load_webhooks(args.webhooks)
+    if not webhooks:
+        print("⚠️ No hay webhooks activos")
+        return 0
+    return asyncio.run(run(args, webhooks))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,461 @@
+"""Cola de envío de notificaciones de WhatsApp con outbox persistente.
+
+El envío de promociones hoy es un solo request que recorre todo el segmento
+y devuelve ``sent/errors/total`` al final; si se corta a la mitad no hay forma
+de saber a quién ya le llegó. Aquí cada mensaje entra a un outbox en SQLite
+con una llave idempotente y pasa por estos estados::
+
+    pending -> sending -> sent
+                       -> pending (reintento con backoff) -> ... -> failed
+                       -> unknown (timeout o corte sin respuesta)
+
+- Un token bucket por número emisor (``phone_number_id``) limita los
+  mensajes por segundo de cada número; ``--concurrency`` limita los requests
+  en vuelo en total.
+- 429 y 5xx se reintentan con backoff exponencial (respeta
+  ``Retry-After``); otros 4xx fallan de inmediato. De los errores de red
+  solo se reintentan los que prueban que el request no salió (conexión
+  rechazada, DNS).
+- Sin ``id`` la llave sale de emisor, destinatario y mensaje dentro de su
+  ``campaign`` (o ``--campaign``); sin campaña, dentro del día. Encolar otra
+  vez el mismo archivo no duplica, pero el mismo texto a la misma persona
+  otra semana sí se envía.
+- Lo que está en ``sent`` nunca se reenvía. Si no se sabe si un mensaje
+  llegó (timeout o conexión cortada después de enviar, o el proceso murió con
+  mensajes en ``sending``) queda como ``unknown`` y solo se reenvía con
+  ``--resend-unknown``.
+- Al final reporta throughput y percentiles de latencia por request.
+
+Uso::
+
+    python whatsapp_dispatch.py --enqueue mensajes.jsonl      # {"to", "body", "sender"?, "id"?, "campaign"?}
+    python whatsapp_dispatch.py --enqueue seguimiento.jsonl --campaign seguimiento-2026-w42
+    python whatsapp_dispatch.py --run --rate 20 --concurrency 8
+    python whatsapp_dispatch.py --status
+    python whatsapp_dispatch.py --bench 2000 --senders 3     # contra un mock local
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import random
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lead_import import normalize_phone
+
+OUTBOX_PATH = 'whatsapp-outbox.db'
+GRAPH_URL = 'https://graph.facebook.com/v21.0'
+RATE = 20.0
+CONCURRENCY = 8
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 300.0
+FETCH_SIZE = 500
+# Fallas de conexión que ocurren antes de enviar un byte del request
+NOT_SENT = (ConnectionRefusedError, socket.gaierror)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+  id TEXT PRIMARY KEY,
+  sender TEXT NOT NULL,
+  recipient TEXT NOT NULL,
+  payload TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  next_attempt_at REAL NOT NULL DEFAULT 0,
+  last_error TEXT,
+  message_id TEXT,
+  created_at REAL NOT NULL,
+  sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at);
+"""
+
+
+class TokenBucket:
+    """``rate`` tokens por segundo, hasta ``burst`` acumulados."""
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.stamp = time.monotonic()
+
+    def take(self, now: float = None) -> float:
+        """Toma un token si hay; si no, devuelve cuántos segundos faltan."""
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Outbox:
+    def __init__(self, path: str = OUTBOX_PATH):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def enqueue(self, messages, default_sender: str, campaign: str = '', now: float = None) -> int:
+        """Agrega mensajes; los que ya tienen su ``id`` en el outbox se ignoran.
+
+        Sin ``id`` la llave se arma con la campaña del mensaje (o ``campaign``)
+        o, si no hay, con el día local de ``now``.
+        """
+        now = time.time() if now is None else now
+        day = time.strftime('%Y-%m-%d', time.localtime(now))
+        rows = []
+        for msg in messages:
+            sender = str(msg.get('sender') or default_sender)
+            recipient = normalize_phone(str(msg['to'])).lstrip('+')
+            payload = msg.get('payload') or {'type': 'text', 'text': {'body': msg['body']}}
+            scope = msg.get('campaign') or campaign or day
+            key = msg.get('id') or hashlib.sha1(
+                f"{scope}|{sender}|{recipient}|{json.dumps(payload, sort_keys=True)}".encode('utf-8')).hexdigest()
+            rows.append((str(key), sender, recipient, json.dumps(payload), now))
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany('INSERT OR IGNORE INTO outbox (id, sender, recipient, payload, created_at) '
+                                  'VALUES (?, ?, ?, ?, ?)', rows)
+        return self.conn.total_changes - before
+
+    def recover(self, resend_unknown: bool = False) -> int:
+        """Mensajes que quedaron en ``sending`` por un corte."""
+        status = 'pending' if resend_unknown else 'unknown'
+        with self.conn:
+            cur = self.conn.execute("UPDATE outbox SET status = ? WHERE status = 'sending'", (status,))
+            if resend_unknown:
+                self.conn.execute("UPDATE outbox SET status = 'pending' WHERE status = 'unknown'")
+        return cur.rowcount
+
+    def due(self, limit: int, exclude: set) -> list:
+        rows = self.conn.execute(
+            "SELECT id, sender, recipient, payload, attempts FROM outbox "
+            "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at, created_at LIMIT ?",
+            (time.time(), limit + len(exclude))).fetchall()
+        return [r for r in rows if r[0] not in exclude][:limit]
+
+    def next_due(self):
+        row = self.conn.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'").fetchone()
+        return row[0]
+
+    def mark_sending(self, ids: list) -> None:
+        with self.conn:
+            self.conn.executemany("UPDATE outbox SET status = 'sending', attempts = attempts + 1 WHERE id = ?",
+                                  [(i,) for i in ids])
+
+    def mark_sent(self, key: str, message_id: str) -> None:
+        with self.conn:
+            self.conn.execute("UPDATE outbox SET status = 'sent', message_id = ?, sent_at = ?, last_error = NULL "
+                              "WHERE id = ?", (message_id, time.time(), key))
+
+    def mark_retry(self, key: str, error: str, at: float) -> None:
+        with self.conn:
+            self.conn.execute("UPDATE outbox SET status = 'pending', last_error = ?, next_attempt_at = ? WHERE id = ?",
+                              (error, at, key))
+
+    def mark_unknown(self, key: str, error: str) -> None:
+        with self.conn:
+            self.conn.execute("UPDATE outbox SET status = 'unknown', last_error = ? WHERE id = ?", (error, key))
+
+    def mark_failed(self, key: str, error: str) -> None:
+        with self.conn:
+            self.conn.execute("UPDATE outbox SET status = 'failed', last_error = ? WHERE id = ?", (error, key))
+
+    def counts(self) -> dict:
+        return dict(self.conn.execute('SELECT status, COUNT(*) FROM outbox GROUP BY status'))
+
+
+class SendError(Exception):
+    """``unknown``: el request pudo haber llegado a Meta; no se reintenta solo."""
+
+    def __init__(self, message: str, retryable: bool, retry_after: float = None, unknown: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.unknown = unknown
+
+
+class WhatsAppClient:
+    """POST ``{base}/{phone_number_id}/messages`` de la Cloud API."""
+
+    def __init__(self, token: str, base_url: str = GRAPH_URL, timeout: float = 30.0):
+        self.token = token
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def send(self, sender: str, recipient: str, payload: dict) -> str:
+        body = dict(payload, messaging_product='whatsapp', to=recipient)
+        req = urllib.request.Request(f'{self.base_url}/{sender}/messages', method='POST',
+                                     data=json.dumps(body).encode('utf-8'),
+                                     headers={'Authorization': f'Bearer {self.token}',
+                                              'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                data = json.loads(resp.read() or b'{}')
+        except urllib.error.HTTPError as exc:
+            detail = exc.read()[:300].decode('utf-8', 'replace')
+            retry_after = exc.headers.get('Retry-After')
+            raise SendError(f'HTTP {exc.code}: {detail}', exc.code == 429 or exc.code >= 500,
+                            float(retry_after) if retry_after and retry_after.isdigit() else None)
+        except urllib.error.URLError as exc:
+            if isinstance(exc.reason, NOT_SENT):
+                raise SendError(f'{type(exc.reason).__name__}: {exc.reason}', True)
+            raise SendError(f'{type(exc.reason).__name__}: {exc.reason}', False, unknown=True)
+        except (OSError, http.client.HTTPException) as exc:
+            # Timeout o corte esperando la respuesta: Meta pudo haberlo aceptado
+            raise SendError(f'{type(exc).__name__}: {exc}', False, unknown=True)
+        return ((data.get('messages') or [{}])[0]).get('id', '')
+
+
+@dataclass
+class Report:
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    unknown: int = 0
+    latencies: list = field(default_factory=list)
+    seconds: float = 0.0
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def backoff(attempts: int, retry_after: float = None) -> float:
+    if retry_after:
+        return retry_after
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1)) * (0.5 + random.random() / 2)
+
+
+def dispatch(outbox: Outbox, client: WhatsAppClient, rate: float = RATE, concurrency: int = CONCURRENCY,
+             max_attempts: int = MAX_ATTEMPTS, until_empty: bool = True, progress: bool = True) -> Report:
+    """Envía lo pendiente respetando el bucket de cada emisor.
+
+    Solo este hilo toca el outbox; los hilos del pool hacen el request HTTP.
+    """
+    report = Report()
+    buckets = {}
+    queues = {}                 # emisor -> deque de filas listas
+    queued = set()
+    t0 = shown = time.perf_counter()
+
+    def call(row):
+        start = time.perf_counter()
+        try:
+            return row, client.send(row[1], row[2], json.loads(row[3])), None, time.perf_counter() - start
+        except SendError as exc:
+            return row, None, exc, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        inflight = set()
+        while True:
+            if sum(len(q) for q in queues.values()) < concurrency * 4:
+                for row in outbox.due(FETCH_SIZE, queued):
+                    queues.setdefault(row[1], deque()).append(row)
+                    queued.add(row[0])
+
+            wait_for = None
+            for sender, queue in queues.items():
+                bucket = buckets.setdefault(sender, TokenBucket(rate))
+                while queue and len(inflight) < concurrency:
+                    delay = bucket.take()
+                    if delay:
+                        wait_for = delay if wait_for is None else min(wait_for, delay)
+                        break
+                    row = queue.popleft()
+                    outbox.mark_sending([row[0]])
+                    inflight.add(pool.submit(call, row))
+
+            if not inflight and not any(queues.values()):
+                upcoming = outbox.next_due()
+                if upcoming is None or not until_empty:
+                    break
+                time.sleep(max(0.0, min(upcoming - time.time(), 1.0)))
+                continue
+
+            if not inflight:
+                time.sleep(wait_for or 0.01)
+                continue
+            done, _ = wait(inflight, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                inflight.discard(future)
+                row, message_id, error, latency = future.result()
+                queued.discard(row[0])
+                report.latencies.append(latency)
+                attempts = row[4] + 1
+                if error is None:
+                    outbox.mark_sent(row[0], message_id)
+                    report.sent += 1
+                elif error.unknown:
+                    outbox.mark_unknown(row[0], str(error))
+                    report.unknown += 1
+                elif error.retryable and attempts < max_attempts:
+                    outbox.mark_retry(row[0], str(error), time.time() + backoff(attempts, error.retry_after))
+                    report.retried += 1
+                else:
+                    outbox.mark_failed(row[0], str(error))
+                    report.failed += 1
+            if progress and done and time.perf_counter() - shown > 0.5:
+                shown = time.perf_counter()
+                rate_now = report.sent / max(time.perf_counter() - t0, 1e-9)
+                print(f"\r   {report.sent:,} enviados, {report.failed:,} fallidos, {report.retried:,} reintentos "
+                      f"· {rate_now:,.0f} msg/s", end='', flush=True)
+    if progress:
+        print()
+    report.seconds = time.perf_counter() - t0
+    return report
+
+
+def print_report(report: Report, outbox: Outbox) -> None:
+    print(f"📊 {report.sent:,} enviados en {report.seconds:.2f} s "
+          f"({report.sent / max(report.seconds, 1e-9):,.1f} msg/s)")
+    print(f"   ⚠️ {report.retried:,} reintentos, ❌ {report.failed:,} fallidos")
+    if report.unknown:
+        print(f"   ⚠️ {report.unknown:,} sin respuesta: quedan como 'unknown' (usa --resend-unknown)")
+    if report.latencies:
+        print(f"   latencia p50 {report.percentile(50) * 1000:,.0f} ms · p90 {report.percentile(90) * 1000:,.0f} ms"
+              f" · p99 {report.percentile(99) * 1000:,.0f} ms · máx {max(report.latencies) * 1000:,.0f} ms")
+    print(f"   outbox: {json.dumps(outbox.counts())}")
+
+
+class MockWhatsApp(ThreadingHTTPServer):
+    """Imitación local de la Cloud API: latencia, 429/500 al azar y conteo de duplicados."""
+
+    daemon_threads = True
+
+    def __init__(self, latency_ms: float = 50.0, error_rate: float = 0.02, port: int = 0):
+        super().__init__(('127.0.0.1', port), _MockHandler)
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.received = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    @property
+    def duplicates(self) -> int:
+        return sum(n - 1 for n in self.received.values() if n > 1)
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        time.sleep(server.latency * random.uniform(0.5, 1.5))
+        roll = random.random()
+        if roll < server.error_rate / 2:
+            return self._reply(429, {'error': {'code': 130429, 'message': 'Rate limit hit'}}, {'Retry-After': '1'})
+        if roll < server.error_rate:
+            return self._reply(500, {'error': {'code': 1, 'message': 'Unknown error'}})
+        key = (self.path, body.get('to'), json.dumps(body.get('text'), sort_keys=True))
+        with server.lock:
+            server.received[key] = server.received.get(key, 0) + 1
+        self._reply(200, {'messaging_product': 'whatsapp', 'messages': [{'id': f'wamid.{random.getrandbits(48):x}'}]})
+
+    def _reply(self, code: int, data: dict, headers: dict = None):
+        raw = json.dumps(data).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *args):
+        pass
+
+
+def bench(messages: int, senders: int, rate: float, concurrency: int, latency_ms: float, error_rate: float) -> int:
+    """Encola ``messages`` mensajes contra el mock, los envía y corre otra vez para mostrar que no reenvía."""
+    server = MockWhatsApp(latency_ms, error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = WhatsAppClient('token-local', server.url)
+    with tempfile.TemporaryDirectory() as tmp:
+        outbox = Outbox(os.path.join(tmp, 'outbox.db'))
+        ids = [f'{100000 + i}' for i in range(senders)]
+        added = outbox.enqueue(({'to': f'+52 1 55{i:08d}', 'body': f'Promo de prueba #{i}', 'sender': ids[i % senders]}
+                                for i in range(messages)), ids[0], campaign='bench')
+        print(f"📄 {added:,} mensajes, {senders} emisores a {rate:g} msg/s c/u, {concurrency} en vuelo, "
+              f"mock {latency_ms:g} ms / {error_rate:.0%} errores")
+        print_report(dispatch(outbox, client, rate, concurrency), outbox)
+        outbox.enqueue(({'to': f'+52 1 55{i:08d}', 'body': f'Promo de prueba #{i}', 'sender': ids[i % senders]}
+                        for i in range(messages)), ids[0], campaign='bench')
+        again = dispatch(outbox, client, rate, concurrency, progress=False)
+        print(f"🔁 Segunda corrida con los mismos mensajes: {again.sent} enviados; duplicados en el mock: {server.duplicates}")
+    server.shutdown()
+    return 1 if server.duplicates else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Cola de envío de WhatsApp con outbox persistente')
+    parser.add_argument('--outbox', default=OUTBOX_PATH)
+    parser.add_argument('--enqueue', metavar='JSONL', help='mensajes a encolar, uno por línea')
+    parser.add_argument('--campaign', default='',
+                        help='campaña de los mensajes sin id ni campaign (por defecto, el día)')
+    parser.add_argument('--run', action='store_true', help='enviar lo pendiente')
+    parser.add_argument('--status', action='store_true')
+    parser.add_argument('--sender', default=os.environ.get('META_PHONE_NUMBER_ID', ''),
+                        help='phone_number_id por defecto (META_PHONE_NUMBER_ID)')
+    parser.add_argument('--token', default=os.environ.get('META_ACCESS_TOKEN', ''))
+    parser.add_argument('--base-url', default=GRAPH_URL, help='p. ej. un mock local')
+    parser.add_argument('--rate', type=float, default=RATE, help='mensajes por segundo por emisor')
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+    parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS)
+    parser.add_argument('--resend-unknown', action='store_true',
+                        help='reenviar los que quedaron a medias en un corte (pueden duplicarse)')
+    parser.add_argument('--bench', type=int, metavar='N', help='N mensajes contra un mock local')
+    parser.add_argument('--senders', type=int, default=2)
+    parser.add_argument('--mock-latency-ms', type=float, default=50.0)
+    parser.add_argument('--mock-error-rate', type=float, default=0.02)
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        return bench(args.bench, args.senders, args.rate, args.concurrency,
+                     args.mock_latency_ms, args.mock_error_rate)
+
+    outbox = Outbox(args.outbox)
+    recovered = outbox.recover(args.resend_unknown)
+    if recovered:
+        state = 'se reenviarán' if args.resend_unknown else "quedan como 'unknown' (usa --resend-unknown)"
+        print(f"⚠️ {recovered} mensajes estaban en envío al cortarse; {state}")
+    if args.enqueue:
+        if not args.sender:
+            parser.error('falta --sender (o META_PHONE_NUMBER_ID) para mensajes sin emisor')
+        with open(args.enqueue, 'r', encoding='utf-8') as f:
+            added = outbox.enqueue((json.loads(line) for line in f if line.strip()), args.sender, args.campaign)
+        print(f"✅ {added:,} mensajes encolados en {args.outbox}")
+    if args.run:
+        if not args.token:
+            parser.error('falta --token (o META_ACCESS_TOKEN)')
+        report = dispatch(outbox, WhatsAppClient(args.token, args.base_url), args.rate, args.concurrency,
+                          args.max_attempts)
+        print_report(report, outbox)
+        return 1 if report.failed or report.unknown else 0
+    if args.status or not args.enqueue:
+        print(f"📊 {args.outbox}: {json.dumps(outbox.counts())}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,622 @@
+"""Motor de workflows: compila cada automatización una vez y la indexa por trigger.
+
+WorkflowBuilderView guarda cada workflow en ``workflows`` como JSON
+(``trigger``, ``conditions``, ``actions``) y solo lo simula; nada los evalúa.
+Este motor:
+
+1. Compila al cargar: cada condición es un closure con el valor ya en
+   minúsculas o ya convertido a número (mismas reglas que ``applyFilter`` de
+   ReportBuilderView), las condiciones de un workflow se encadenan en un solo
+   predicado (las de igualdad primero) y los mensajes ``{{name}}`` /
+   ``{{property}}`` quedan partidos en piezas.
+2. Indexa por tipo de trigger, y los de cambio de estatus además por
+   ``(de, a)``: un evento solo revisa los workflows de su trigger y de su
+   transición (más los comodines ``Cualquiera``), no los 1,000.
+3. Recibe cambios de Supabase Realtime (``table``, ``eventType``, ``new``,
+   ``old``, ``commit_timestamp``) y los convierte en triggers: INSERT de
+   leads → ``lead_created``, cambio de ``status``/``score`` → ``lead_status_changed``
+   / ``lead_score_changed``, citas creadas o completadas, cambio de estatus
+   de hipoteca. Si ``old`` no trae las columnas (sin ``REPLICA IDENTITY
+   FULL``) se compara contra el último valor visto. ``task_overdue`` y
+   ``lead_inactive_days`` no salen de un cambio: llegan como
+   ``{"trigger": ..., "record": {...}, "days": n}`` desde el job que los
+   detecta.
+4. Cada workflow que aplica va a un pool de workers que ejecuta sus acciones
+   en orden. ``wait_hours`` no duerme: las acciones siguientes salen con
+   ``not_before``. Los WhatsApp inmediatos van a ``--whatsapp-out`` en el
+   formato de ``whatsapp_dispatch.py --enqueue``; todo lo demás a ``--out``.
+   El ``id`` de cada acción es ``<workflow>:<tabla>:<registro>:<commit>:<n>``,
+   así que reprocesar los mismos eventos no duplica.
+
+Uso::
+
+    python workflow_engine.py workflows.json --events cambios.jsonl --out acciones.jsonl \\
+        --whatsapp-out mensajes.jsonl
+    python workflow_engine.py workflows.csv --out acciones.jsonl < cambios.jsonl
+    python workflow_engine.py --bench 1000 --bench-events 100000
+"""
+import argparse
+import csv
+import json
+import math
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+TRIGGERS = ('lead_created', 'lead_status_changed', 'appointment_created', 'appointment_completed',
+            'mortgage_status_changed', 'lead_score_changed', 'task_overdue', 'lead_inactive_days')
+STATUS_TRIGGERS = ('lead_status_changed', 'mortgage_status_changed')
+ACTIONS = ('send_whatsapp', 'assign_to', 'change_status', 'create_task', 'add_note',
+           'send_notification', 'wait_hours', 'send_email')
+# Condiciones baratas y selectivas primero: cortan el AND antes de convertir números o buscar subcadenas
+OPERATOR_COST = {'equals': 0, 'not_equals': 1, 'is_empty': 1, 'greater_than': 2, 'less_than': 2, 'contains': 3}
+TEMPLATE_RE = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+TEMPLATE_FIELDS = {'name': ('name', 'lead_name'), 'nombre': ('name', 'lead_name'),
+                   'property': ('property_interest', 'property_name'), 'phone': ('phone', 'lead_phone')}
+
+
+def _text(value) -> str:
+    """``String(value).toLowerCase()`` de JS (80.0 → '80', null → '')."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    elif isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value).lower()
+
+
+def _number(value) -> float:
+    """``Number(value || 0)`` de JS: vacío es 0 y lo que no es número es NaN."""
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def compile_condition(condition: dict):
+    field = condition.get('field') or ''
+    operator = condition.get('operator')
+    raw = condition.get('value')
+    wanted = _text(raw)
+    if operator == 'equals':
+        return lambda record: _text(record.get(field)) == wanted
+    if operator == 'not_equals':
+        return lambda record: _text(record.get(field)) != wanted
+    if operator == 'contains':
+        return lambda record: wanted in _text(record.get(field))
+    if operator == 'greater_than':
+        limit = _number(raw)
+        return lambda record: _number(record.get(field)) > limit
+    if operator == 'less_than':
+        limit = _number(raw)
+        return lambda record: _number(record.get(field)) < limit
+    if operator == 'is_empty':
+        return lambda record: _text(record.get(field)) == '' or not record.get(field)
+    return None     # operador desconocido: como en applyFilter, no filtra
+
+
+def compile_conditions(conditions: list):
+    """Un solo predicado para el AND de todas las condiciones (None si no hay)."""
+    ordered = sorted(conditions or [], key=lambda c: OPERATOR_COST.get(c.get('operator'), 9))
+    checks = tuple(p for p in map(compile_condition, ordered) if p is not None)
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    if len(checks) == 2:
+        first, second = checks
+        return lambda record: first(record) and second(record)
+
+    def matches(record):
+        for check in checks:
+            if not check(record):
+                return False
+        return True
+    return matches
+
+
+def compile_template(template: str):
+    """``"Hola {{name}}"`` → función que arma el texto sin volver a buscar marcas."""
+    pieces = TEMPLATE_RE.split(template or '')
+    if len(pieces) == 1:
+        return lambda record: pieces[0]
+    literals, fields = pieces[0::2], pieces[1::2]
+
+    def lookup(record, name):
+        for key in TEMPLATE_FIELDS.get(name, (name,)):
+            value = record.get(key)
+            if value:
+                value = str(value)
+                return value.split(' ')[0] if name in ('name', 'nombre') else value
+        return ''
+
+    def render(record):
+        out = [literals[0]]
+        for name, literal in zip(fields, literals[1:]):
+            out.append(lookup(record, name))
+            out.append(literal)
+        return ''.join(out)
+    return render
+
+
+def compile_action(action: dict):
+    """(tipo, horas de espera, función record → campos de la acción)."""
+    kind = action.get('type')
+    config = action.get('config') or {}
+    if kind == 'wait_hours':
+        return kind, _number(config.get('hours')) or 0.0, None
+    if kind == 'send_whatsapp':
+        message = compile_template(config.get('message', ''))
+        return kind, 0.0, lambda record: {'to': record.get('phone') or record.get('lead_phone') or '',
+                                          'body': message(record)}
+    if kind == 'send_email':
+        subject, body = compile_template(config.get('subject', '')), compile_template(config.get('body', ''))
+        return kind, 0.0, lambda record: {'to': record.get('email') or '', 'subject': subject(record),
+                                          'body': body(record)}
+    if kind == 'send_notification':
+        message = compile_template(config.get('message', ''))
+        role = config.get('target_role') or 'admin'
+        return kind, 0.0, lambda record: {'target_role': role, 'message': message(record)}
+    if kind == 'add_note':
+        note = compile_template(config.get('note', ''))
+        return kind, 0.0, lambda record: {'note': note(record)}
+    if kind == 'create_task':
+        title = compile_template(config.get('title', ''))
+        fixed = {'category': config.get('category') or 'seguimiento', 'priority': config.get('priority') or 'medium',
+                 'due_days': int(_number(config.get('due_days')) or 1)}
+        return kind, 0.0, lambda record: dict(fixed, title=title(record))
+    fixed = {k: v for k, v in config.items()}   # assign_to, change_status y lo que venga después
+    return kind, 0.0, lambda record: dict(fixed)
+
+
+def _json_field(value, default):
+    if isinstance(value, str):
+        value = value.strip()
+        return json.loads(value) if value else default
+    return default if value is None else value
+
+
+class Workflow:
+    __slots__ = ('id', 'name', 'trigger', 'transition', 'check', 'matches', 'actions')
+
+    def __init__(self, row: dict):
+        trigger = _json_field(row.get('trigger'), {})
+        config = trigger.get('config') or {}
+        self.id = str(row.get('id') or '')
+        self.name = row.get('name') or ''
+        self.trigger = trigger.get('type') or ''
+        self.transition = None
+        self.check = None
+        if self.trigger in STATUS_TRIGGERS:
+            self.transition = (config.get('from_status') or '', config.get('to_status') or '')
+        elif self.trigger == 'lead_score_changed':
+            self.check = _score_check(config.get('direction') or 'increased', config.get('threshold'))
+        elif self.trigger == 'lead_inactive_days':
+            days = int(_number(config.get('inactive_days')) or 3)
+            self.check = lambda ctx: int(_number(ctx.get('days'))) == days
+        self.matches = compile_conditions(_json_field(row.get('conditions'), []))
+        self.actions = [compile_action(a) for a in _json_field(row.get('actions'), [])]
+
+
+def _score_check(direction: str, threshold):
+    """Sube/baja de score; con umbral, solo cuando lo cruza en esa dirección."""
+    limit = None if threshold in (None, '') else _number(threshold)
+    up = direction in ('increased', 'any')
+    down = direction in ('decreased', 'any')
+
+    def check(ctx):
+        old, new = _number(ctx.get('old_score')), _number(ctx.get('new_score'))
+        if up and new > old and (limit is None or old < limit <= new):
+            return True
+        return down and new < old and (limit is None or new < limit <= old)
+    return check
+
+
+def load_workflows(path: str, include_inactive: bool = False) -> list:
+    """Export de ``workflows`` (CSV con columnas JSON, JSONL o arreglo JSON)."""
+    if path.endswith('.csv'):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+    elif path.endswith(('.jsonl', '.ndjson')):
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+    active = [r for r in rows if include_inactive or _text(r.get('active')) in ('true', 't', '1')]
+    return [Workflow(r) for r in active]
+
+
+class ActionPool:
+    """Workers que ejecutan las acciones de cada workflow disparado, en orden."""
+
+    def __init__(self, emit, workers: int = 4, backlog: int = 10000):
+        self.emit = emit
+        self.jobs = queue.Queue(backlog)
+        self.done = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+        self.threads = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, record: dict, runs: list) -> None:
+        """Una entrada por evento: ``runs`` son los ``(workflow, run_id)`` que aplicaron."""
+        self.jobs.put((record, runs))
+
+    def _work(self) -> None:
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            record, runs = job
+            now = datetime.now(timezone.utc)
+            done = failed = 0
+            for workflow, run_id in runs:
+                try:
+                    self.execute(workflow, record, run_id, now)
+                    done += 1
+                except Exception as exc:
+                    failed += 1
+                    print(f"⚠️ {workflow.name or workflow.id}: {exc}", file=sys.stderr)
+            with self.lock:
+                self.done += done
+                self.failed += failed
+
+    def execute(self, workflow: Workflow, record: dict, run_id: str, now: datetime) -> None:
+        delay = 0.0
+        lead_id = record.get('lead_id') or record.get('id')
+        for index, (kind, hours, build) in enumerate(workflow.actions):
+            if kind == 'wait_hours':
+                delay += hours
+                continue
+            item = {'id': f'{run_id}:{index}', 'workflow_id': workflow.id, 'type': kind, 'lead_id': lead_id}
+            item.update(build(record))
+            if delay:
+                item['not_before'] = (now + timedelta(hours=delay)).isoformat(timespec='seconds')
+            self.emit(item)
+
+    def close(self) -> None:
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+
+
+class WorkflowEngine:
+    def __init__(self, workflows=(), pool: ActionPool = None):
+        self.pool = pool
+        self.by_trigger = {}
+        self.by_transition = {}
+        self.last = {}          # (tabla, id) -> (status, score) para eventos sin ``old`` completo
+        self.executions = Counter()
+        for workflow in workflows:
+            self.add(workflow)
+
+    def add(self, workflow: Workflow) -> None:
+        if workflow.transition is not None:
+            self.by_transition.setdefault(workflow.trigger, {}).setdefault(workflow.transition, []).append(workflow)
+        else:
+            self.by_trigger.setdefault(workflow.trigger, []).append(workflow)
+
+    def candidates(self, trigger: str, ctx: dict) -> list:
+        if trigger not in STATUS_TRIGGERS:
+            return self.by_trigger.get(trigger, ())
+        keys = self.by_transition.get(trigger)
+        if not keys:
+            return ()
+        old, new = ctx.get('old_status') or '', ctx.get('new_status') or ''
+        found = []
+        # Con old o new vacíos las claves se repiten: cada una se mira una vez
+        for key in dict.fromkeys(((old, new), (old, ''), ('', new), ('', ''))):
+            found.extend(keys.get(key, ()))
+        return found
+
+    def classify(self, change: dict) -> list:
+        """Triggers que produce un cambio: ``[(trigger, record, ctx)]``."""
+        if change.get('trigger'):
+            record = change.get('record') or change.get('new') or {}
+            return [(change['trigger'], record, change)]
+        table, kind = change.get('table'), change.get('eventType')
+        record, old = change.get('new') or {}, change.get('old') or {}
+        key = (table, record.get('id') or old.get('id'))
+        if kind == 'DELETE':
+            self.last.pop(key, None)
+            return []
+        seen = self.last.get(key)
+        status, score = record.get('status'), record.get('score')
+        self.last[key] = (status, score)
+        if kind == 'INSERT':
+            if table == 'leads':
+                return [('lead_created', record, {})]
+            if table == 'appointments':
+                return [('appointment_created', record, {})]
+            return []
+        if kind != 'UPDATE':
+            return []
+        old_status = old['status'] if 'status' in old else (seen[0] if seen else status)
+        fired = []
+        if table == 'leads':
+            if old_status != status:
+                fired.append(('lead_status_changed', record, {'old_status': old_status, 'new_status': status}))
+            old_score = old['score'] if 'score' in old else (seen[1] if seen else score)
+            if _number(old_score) != _number(score):
+                fired.append(('lead_score_changed', record, {'old_score': old_score, 'new_score': score}))
+        elif table == 'appointments':
+            if status == 'completed' and old_status != 'completed':
+                fired.append(('appointment_completed', record, {}))
+        elif table == 'mortgage_applications':
+            if old_status != status:
+                fired.append(('mortgage_status_changed', record, {'old_status': old_status, 'new_status': status}))
+        return fired
+
+    def dispatch(self, change: dict) -> int:
+        """Manda al pool cada workflow que aplica al cambio; devuelve cuántos."""
+        fired = 0
+        for trigger, record, ctx in self.classify(change):
+            stamp = change.get('commit_timestamp') or record.get('updated_at') or record.get('created_at') or ''
+            run_key = f"{change.get('table') or trigger}:{record.get('id') or ''}:{stamp}"
+            runs = []
+            for workflow in self.candidates(trigger, ctx):
+                if workflow.check is not None and not workflow.check(ctx):
+                    continue
+                if workflow.matches is not None and not workflow.matches(record):
+                    continue
+                self.executions[workflow.id] += 1
+                runs.append((workflow, f'{workflow.id}:{run_key}'))
+            fired += len(runs)
+            if runs and self.pool is not None:
+                self.pool.submit(record, runs)
+        return fired
+
+
+class JsonlSink:
+    """WhatsApp inmediatos a ``whatsapp_path`` (outbox), el resto a ``actions_path``."""
+
+    def __init__(self, actions_path: str, whatsapp_path: str = ''):
+        self.lock = threading.Lock()
+        self.actions = open(actions_path, 'a', encoding='utf-8') if actions_path else sys.stdout
+        self.whatsapp = open(whatsapp_path, 'a', encoding='utf-8') if whatsapp_path else None
+
+    def __call__(self, item: dict) -> None:
+        outbox = self.whatsapp is not None and item['type'] == 'send_whatsapp' and 'not_before' not in item
+        line = json.dumps(item, ensure_ascii=False) + '\n'
+        with self.lock:
+            (self.whatsapp if outbox else self.actions).write(line)
+
+    def close(self) -> None:
+        for fh in (self.actions, self.whatsapp):
+            if fh is not None and fh is not sys.stdout:
+                fh.close()
+
+
+def interpret(workflows: list, change: dict) -> int:
+    """Lo que haría un evaluador sin compilar: todos los workflows, JSON parseado y operadores por evento."""
+    record, old = change.get('new') or {}, change.get('old') or {}
+    fired = 0
+    for row in workflows:
+        trigger = json.loads(row['trigger'])
+        table, kind = change.get('table'), change.get('eventType')
+        t = trigger['type']
+        config = trigger.get('config') or {}
+        if t == 'lead_created':
+            hit = table == 'leads' and kind == 'INSERT'
+        elif t == 'appointment_created':
+            hit = table == 'appointments' and kind == 'INSERT'
+        elif t == 'appointment_completed':
+            hit = table == 'appointments' and kind == 'UPDATE' and record.get('status') == 'completed' \
+                and old.get('status') != 'completed'
+        elif t in STATUS_TRIGGERS:
+            hit = (table == ('leads' if t == 'lead_status_changed' else 'mortgage_applications') and kind == 'UPDATE'
+                   and old.get('status') != record.get('status')
+                   and config.get('from_status', '') in ('', old.get('status'))
+                   and config.get('to_status', '') in ('', record.get('status')))
+        elif t == 'lead_score_changed':
+            hit = table == 'leads' and kind == 'UPDATE' and _score_check(
+                config.get('direction') or 'increased', config.get('threshold'))(
+                {'old_score': old.get('score'), 'new_score': record.get('score')})
+        else:
+            hit = False
+        if not hit:
+            continue
+        ok = True
+        for c in json.loads(row['conditions']):
+            value, op, want = record.get(c['field']), c['operator'], c.get('value') or ''
+            text = '' if value is None else str(value).lower()
+            if op == 'equals':
+                ok = text == want.lower()
+            elif op == 'not_equals':
+                ok = text != want.lower()
+            elif op == 'contains':
+                ok = want.lower() in text
+            elif op == 'greater_than':
+                ok = _number(value) > _number(want)
+            elif op == 'less_than':
+                ok = _number(value) < _number(want)
+            elif op == 'is_empty':
+                ok = not value or text == ''
+            if not ok:
+                break
+        fired += ok
+    return fired
+
+
+LEAD_STATUSES = ('new', 'contacted', 'qualified', 'appointment', 'visit_done', 'negotiation', 'won', 'lost')
+SOURCES = ('facebook', 'instagram', 'whatsapp', 'referido', 'sitio_web', 'llamada')
+DEVELOPMENTS = ('Monte Verde', 'Los Encinos', 'Andes', 'Distrito Falco', 'Miravalle', 'Alpes')
+
+
+def synthetic_workflows(count: int, rnd: random.Random) -> list:
+    triggers = ('lead_status_changed',) * 4 + ('lead_created',) * 2 + ('lead_score_changed', 'appointment_created',
+                                                                       'appointment_completed', 'mortgage_status_changed')
+    rows = []
+    for i in range(count):
+        trigger = rnd.choice(triggers)
+        config = {}
+        if trigger in STATUS_TRIGGERS:
+            config = {'from_status': rnd.choice(('',) + LEAD_STATUSES), 'to_status': rnd.choice(LEAD_STATUSES)}
+        elif trigger == 'lead_score_changed':
+            config = {'direction': rnd.choice(('increased', 'decreased', 'any')), 'threshold': rnd.choice((None, 50, 80))}
+        conditions = []
+        for _ in range(rnd.randint(1, 3)):
+            field, op, value = rnd.choice((
+                ('temperature', 'equals', rnd.choice(('HOT', 'WARM', 'COLD'))),
+                ('source', 'equals', rnd.choice(SOURCES)),
+                ('property_interest', 'contains', rnd.choice(DEVELOPMENTS).split(' ')[-1].lower()),
+                ('score', 'greater_than', str(rnd.randint(20, 90))),
+                ('budget', 'less_than', str(rnd.randint(1, 6) * 1_000_000)),
+                ('assigned_to', 'is_empty', ''),
+            ))
+            conditions.append({'field': field, 'operator': op, 'value': value})
+        actions = [{'type': 'send_whatsapp', 'config': {'message': 'Hola {{name}}, ¿te interesa {{property}}?'}}]
+        if rnd.random() < .5:
+            actions += [{'type': 'wait_hours', 'config': {'hours': 24}},
+                        {'type': 'create_task', 'config': {'title': 'Seguimiento {{name}}', 'due_days': 1}}]
+        rows.append({'id': f'wf{i}', 'name': f'Workflow {i}', 'active': True, 'trigger': json.dumps({'type': trigger,
+                     'config': config}), 'conditions': json.dumps(conditions), 'actions': json.dumps(actions)})
+    return rows
+
+
+def synthetic_events(count: int, rnd: random.Random) -> list:
+    events = []
+    for i in range(count):
+        lead = {'id': f'l{rnd.randrange(200_000)}', 'name': f'Cliente {i} Pérez', 'phone': f'52222{rnd.randrange(10**7):07d}',
+                'status': rnd.choice(LEAD_STATUSES), 'score': rnd.randint(0, 100), 'temperature': rnd.choice(('HOT', 'WARM', 'COLD')),
+                'source': rnd.choice(SOURCES), 'property_interest': rnd.choice(DEVELOPMENTS),
+                'budget': rnd.randint(8, 60) * 100_000, 'assigned_to': rnd.choice(('', 'v1', 'v2', 'v3'))}
+        stamp = f'2026-10-01T00:00:{i:08d}Z'
+        roll = rnd.random()
+        if roll < .15:
+            events.append({'table': 'leads', 'eventType': 'INSERT', 'new': lead, 'old': {}, 'commit_timestamp': stamp})
+        elif roll < .75:
+            old = dict(lead, status=rnd.choice(LEAD_STATUSES), score=lead['score'] + rnd.choice((-10, 0, 0, 15)))
+            events.append({'table': 'leads', 'eventType': 'UPDATE', 'new': lead, 'old': old, 'commit_timestamp': stamp})
+        elif roll < .9:
+            appointment = {'id': f'a{i}', 'lead_id': lead['id'], 'lead_phone': lead['phone'], 'lead_name': lead['name'],
+                           'property_name': lead['property_interest'], 'status': rnd.choice(('scheduled', 'completed'))}
+            kind = rnd.choice(('INSERT', 'UPDATE'))
+            events.append({'table': 'appointments', 'eventType': kind, 'new': appointment,
+                           'old': {'id': appointment['id'], 'status': 'scheduled'}, 'commit_timestamp': stamp})
+        else:
+            events.append({'table': 'mortgage_applications', 'eventType': 'UPDATE',
+                           'new': dict(lead, id=f'm{i}', lead_id=lead['id']),
+                           'old': {'id': f'm{i}', 'status': rnd.choice(LEAD_STATUSES)}, 'commit_timestamp': stamp})
+    return events
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else 0.0
+
+
+def bench(workflow_count: int, event_count: int, workers: int) -> int:
+    rnd = random.Random(21)
+    rows = synthetic_workflows(workflow_count, rnd)
+    events = synthetic_events(event_count, rnd)
+
+    t0 = time.perf_counter()
+    workflows = [Workflow(row) for row in rows]
+    print(f"📄 {len(workflows):,} workflows compilados en {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    engine = WorkflowEngine(workflows)
+    latencies, fired = [], 0
+    t0 = time.perf_counter()
+    for change in events:
+        started = time.perf_counter()
+        fired += engine.dispatch(change)
+        latencies.append(time.perf_counter() - started)
+    matched = time.perf_counter() - t0
+    print(f"✅ {event_count:,} eventos contra {workflow_count:,} workflows: {matched:.2f} s evaluando "
+          f"({event_count / matched * 60 / 1e6:.1f} M eventos/min); p50 {percentile(latencies, .5) * 1e6:.0f} µs, "
+          f"p99 {percentile(latencies, .99) * 1e6:.0f} µs por evento, {fired:,} ejecuciones")
+
+    emitted = Counter()
+    lock = threading.Lock()
+
+    def emit(item):
+        with lock:
+            emitted[item['type']] += 1
+
+    pool = ActionPool(emit, workers)
+    engine = WorkflowEngine(workflows, pool)
+    t0 = time.perf_counter()
+    for change in events:
+        engine.dispatch(change)
+    pool.close()
+    total = time.perf_counter() - t0
+    print(f"   con las acciones ({workers} workers): {total:.2f} s, {sum(emitted.values()):,} acciones "
+          f"({pool.failed} fallidas), {event_count / total * 60:,.0f} eventos/min")
+
+    sample = events[:max(1, min(event_count, 2000))]
+    t0 = time.perf_counter()
+    naive = sum(interpret(rows, change) for change in sample)
+    per_event = (time.perf_counter() - t0) / len(sample)
+    compiled = sum(WorkflowEngine(workflows).dispatch(change) for change in sample)
+    print(f"   sin compilar ni indexar: {per_event * 1e6:,.0f} µs por evento → {per_event * event_count:,.0f} s "
+          f"para {event_count:,} ({naive:,} = {compiled:,} ejecuciones en la muestra)")
+    return 0 if naive == compiled else 1
+
+
+def read_events(path: str):
+    handle = sys.stdin if path in ('', '-') else open(path, 'r', encoding='utf-8')
+    try:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Evalúa los workflows de WorkflowBuilderView contra cambios de Realtime')
+    parser.add_argument('workflows', nargs='?', help='export de la tabla workflows (csv, jsonl o json)')
+    parser.add_argument('--events', default='-', help='JSONL de cambios (por defecto stdin)')
+    parser.add_argument('--out', default='', help='JSONL de acciones (por defecto stdout)')
+    parser.add_argument('--whatsapp-out', default='', help='JSONL para whatsapp_dispatch.py --enqueue')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--include-inactive', action='store_true', help='evaluar también los workflows apagados')
+    parser.add_argument('--bench', type=int, metavar='WORKFLOWS', help='benchmark con N workflows sintéticos')
+    parser.add_argument('--bench-events', type=int, default=100_000, metavar='N')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        return bench(args.bench, args.bench_events, args.workers)
+    if not args.workflows:
+        parser.error('falta el export de workflows')
+
+    workflows = load_workflows(args.workflows, args.include_inactive)
+    for workflow in workflows:
+        if workflow.trigger not in TRIGGERS:
+            print(f"⚠️ {workflow.name or workflow.id}: trigger desconocido {workflow.trigger!r}", file=sys.stderr)
+        for kind in {kind for kind, _, _ in workflow.actions} - set(ACTIONS):
+            print(f"⚠️ {workflow.name or workflow.id}: acción desconocida {kind!r}", file=sys.stderr)
+    sink = JsonlSink(args.out, args.whatsapp_out)
+    pool = ActionPool(sink, args.workers)
+    engine = WorkflowEngine(workflows, pool)
+    events = fired = 0
+    t0 = time.perf_counter()
+    try:
+        for change in read_events(args.events):
+            fired += engine.dispatch(change)
+            events += 1
+    finally:
+        pool.close()
+        sink.close()
+    print(f"✅ {events:,} eventos, {fired:,} ejecuciones de {len(workflows):,} workflows "
+          f"en {time.perf_counter() - t0:.2f} s ({pool.failed} fallidas)", file=sys.stderr)
+    for workflow_id, count in engine.executions.most_common(5):
+        print(f"   📊 {workflow_id}: {count:,}", file=sys.stderr)
+    return 1 if pool.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())